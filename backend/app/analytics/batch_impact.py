@@ -0,0 +1,313 @@
+"""
+Batch Impact Analyzer - Computes and stores the impact of many events at once
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.core.database import chunked, upsert_records
+from app.models import Event, EventImpact
+from app.analytics.impact_analyzer import ImpactAnalyzer, WINDOW_COLUMNS
+from app.analytics.impact_cube import cube_keys, refresh_impact_cube
+
+
+# Maximum number of bound parameters per IN (...) query
+QUERY_CHUNK_SIZE = 500
+
+
+def _increase_pct(event: np.ndarray, baseline: np.ndarray) -> np.ndarray:
+    """Percentage change from baseline (0 where the baseline is not positive)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(baseline > 0, (event - baseline) / baseline * 100, 0.0)
+
+
+class BatchImpactAnalyzer:
+    """
+    Set-at-a-time version of ImpactAnalyzer.calculate_event_impact.
+
+    Instead of a few queries, a commit and a refresh per event, a batch:
+      1. fetches the requested events in chunked IN queries
+      2. loads the metrics of their cities once (one query per metric table,
+         see ImpactAnalyzer.load_window_indexes)
+      3. computes the baseline/event window aggregates and the impact
+         formulas for all events as arrays (MetricWindowIndex.window_stats)
+      4. writes EventImpact rows with one bulk update and one bulk insert,
+         refreshes the affected impact cube cells and commits once
+
+    Results match calculate_event_impact() event by event.
+
+    Usage:
+        results = BatchImpactAnalyzer(db).analyze(event_ids)
+    """
+
+    def __init__(self, db: Session):
+        """
+        Args:
+            db: Database session
+        """
+        self.db = db
+        self.analyzer = ImpactAnalyzer(db)
+
+    def analyze(self, event_ids: List[int]) -> List[Dict]:
+        """
+        Calculate, store and commit the impacts of events.
+
+        Args:
+            event_ids: IDs of the events to analyze (duplicates are analyzed once)
+
+        Returns:
+            One entry per distinct event ID, in request order:
+            {"event_id", "status": created|updated|not_found|error, "error"}
+        """
+        event_ids = list(dict.fromkeys(event_ids))
+        impacts, errors = self.compute(event_ids)
+
+        statuses: Dict[int, str] = {}
+        try:
+            statuses = self._upsert(impacts)
+            refresh_impact_cube(self.db, cube_keys(self.db, impacts))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            for event_id in impacts:
+                errors[event_id] = f"Could not save impact: {e}"
+            statuses = {}
+
+        results = []
+        for event_id in event_ids:
+            if event_id in statuses:
+                results.append({"event_id": event_id, "status": statuses[event_id], "error": None})
+            elif event_id in errors:
+                status = "not_found" if errors[event_id] == "Event not found" else "error"
+                results.append({"event_id": event_id, "status": status, "error": errors[event_id]})
+        return results
+
+    def compute(self, event_ids: List[int]) -> Tuple[Dict[int, Dict], Dict[int, str]]:
+        """
+        Calculate impacts without writing them.
+
+        Returns:
+            (EventImpact column values by event ID, error message by event ID)
+        """
+        events = self._load_events(event_ids)
+        errors = {
+            event_id: "Event not found"
+            for event_id in event_ids
+            if events.empty or event_id not in events.index
+        }
+        if events.empty:
+            return {}, errors
+
+        self.analyzer.load_window_indexes(city_ids=events["city_id"].unique().tolist())
+
+        window_before = self.analyzer.window_before
+        baseline_starts = events["start_date"] - timedelta(days=window_before + 30)
+        baseline_ends = events["start_date"] - timedelta(days=window_before)
+        windows = {
+            "baseline": (baseline_starts, baseline_ends),
+            "event": (events["start_date"], events["end_date"]),
+        }
+
+        stats = {}
+        for metric_type, index in self.analyzer.window_indexes.items():
+            columns = WINDOW_COLUMNS[metric_type]
+            for window, (starts, ends) in windows.items():
+                stats[metric_type, window] = index.window_stats(
+                    events["city_id"], starts, ends,
+                    mean_columns=columns, sum_columns=columns,
+                )
+
+        sections = [
+            self._tourism_impact(stats),
+            self._hotel_impact(stats),
+            self._economic_impact(stats),
+            self._mobility_impact(stats),
+        ]
+        event_costs = events["economic_impact_usd"].to_numpy()
+
+        impacts = {}
+        for row, event_id in enumerate(events.index):
+            values = {
+                "event_id": int(event_id),
+                "days_before_analyzed": self.analyzer.window_before,
+                "days_after_analyzed": self.analyzer.window_after,
+            }
+            try:
+                for section in sections:
+                    values.update(section(row))
+            except ValueError as e:
+                errors[int(event_id)] = str(e)
+                continue
+
+            # ROI if the cost is available
+            event_cost = event_costs[row]
+            if event_cost and not pd.isna(event_cost) and values.get("total_economic_impact_usd"):
+                values["event_cost_usd"] = float(event_cost)
+                values["roi_ratio"] = values["total_economic_impact_usd"] / float(event_cost)
+                values["benefit_cost_ratio"] = values["roi_ratio"]
+
+            impacts[int(event_id)] = values
+
+        return impacts, errors
+
+    def _load_events(self, event_ids: List[int]) -> pd.DataFrame:
+        """Requested events indexed by ID (chunked IN queries)"""
+        rows = []
+        for chunk in chunked(event_ids, QUERY_CHUNK_SIZE):
+            rows.extend(
+                self.db.query(
+                    Event.id, Event.city_id, Event.start_date, Event.end_date,
+                    Event.economic_impact_usd,
+                )
+                .filter(Event.id.in_(chunk))
+                .all()
+            )
+        events = pd.DataFrame(
+            rows, columns=["id", "city_id", "start_date", "end_date", "economic_impact_usd"]
+        )
+        events["start_date"] = pd.to_datetime(events["start_date"])
+        events["end_date"] = pd.to_datetime(events["end_date"])
+        return events.set_index("id")
+
+    # ------------------------------------------------------------------
+    # Impact formulas (same as the ImpactAnalyzer._calculate_*_impact methods)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _has_rows(*windows: Dict) -> np.ndarray:
+        return np.logical_and.reduce([window["rows"] > 0 for window in windows])
+
+    def _tourism_impact(self, stats: Dict):
+        baseline, event = stats["tourism", "baseline"], stats["tourism", "event"]
+        valid = self._has_rows(baseline, event)
+        baseline_avg = baseline["mean"]["total_visitors"]
+        event_avg = event["mean"]["total_visitors"]
+        increase_pct = _increase_pct(event_avg, baseline_avg)
+        additional = (event_avg - baseline_avg) * event["rows"]
+
+        def section(row: int) -> Dict:
+            if not valid[row]:
+                return {}
+            if np.isnan(baseline_avg[row]) or np.isnan(event_avg[row]):
+                raise ValueError("No visitor counts in the baseline or event window")
+            return {
+                "baseline_daily_visitors": int(baseline_avg[row]),
+                "event_period_daily_visitors": int(event_avg[row]),
+                "visitor_increase_pct": round(float(increase_pct[row]), 2),
+                "additional_visitors": max(0, int(additional[row])),
+            }
+
+        return section
+
+    def _hotel_impact(self, stats: Dict):
+        baseline, event = stats["hotel", "baseline"], stats["hotel", "event"]
+        valid = self._has_rows(baseline, event)
+        baseline_occupancy = baseline["mean"]["occupancy_rate_pct"]
+        event_occupancy = event["mean"]["occupancy_rate_pct"]
+        occupancy_pct = _increase_pct(event_occupancy, baseline_occupancy)
+        baseline_price = baseline["mean"]["avg_price_usd"]
+        event_price = event["mean"]["avg_price_usd"]
+        price_pct = _increase_pct(event_price, baseline_price)
+
+        def section(row: int) -> Dict:
+            if not valid[row]:
+                return {}
+            return {
+                "baseline_occupancy_pct": round(float(baseline_occupancy[row]), 2),
+                "event_occupancy_pct": round(float(event_occupancy[row]), 2),
+                "occupancy_increase_pct": round(float(occupancy_pct[row]), 2),
+                "baseline_avg_price_usd": round(float(baseline_price[row]), 2),
+                "event_avg_price_usd": round(float(event_price[row]), 2),
+                "price_increase_pct": round(float(price_pct[row]), 2),
+            }
+
+        return section
+
+    def _economic_impact(self, stats: Dict):
+        event = stats["economic", "event"]
+        valid = self._has_rows(event)
+        direct = event["sum"]["total_spending_usd"]
+        indirect = direct * 0.4
+        induced = direct * 0.3
+        total = direct + indirect + induced
+        jobs = event["sum"]["temporary_jobs_created"]
+        tax = event["sum"]["estimated_tax_revenue_usd"]
+
+        def section(row: int) -> Dict:
+            if not valid[row]:
+                return {}
+            return {
+                "total_economic_impact_usd": round(float(total[row]), 2),
+                "direct_spending_usd": round(float(direct[row]), 2),
+                "indirect_spending_usd": round(float(indirect[row]), 2),
+                "induced_spending_usd": round(float(induced[row]), 2),
+                "jobs_created": int(round(jobs[row])),
+                "tax_revenue_usd": round(float(tax[row]), 2),
+            }
+
+        return section
+
+    def _mobility_impact(self, stats: Dict):
+        baseline, event = stats["mobility", "baseline"], stats["mobility", "event"]
+        valid = self._has_rows(baseline, event)
+        increases = {
+            "airport_arrivals_increase_pct": "airport_arrivals",
+            "public_transport_increase_pct": "public_transport_usage",
+            "traffic_congestion_increase_pct": "traffic_congestion_index",
+        }
+        pcts = {
+            field: _increase_pct(event["mean"][col], baseline["mean"][col])
+            for field, col in increases.items()
+        }
+
+        def section(row: int) -> Dict:
+            if not valid[row]:
+                return {}
+            return {field: round(float(pct[row]), 2) for field, pct in pcts.items()}
+
+        return section
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _upsert(self, impacts: Dict[int, Dict]) -> Dict[int, str]:
+        """
+        Write the impacts with INSERT ... ON CONFLICT (event_id) (no commit).
+
+        Concurrent runs cannot duplicate an event's row: the unique event_id
+        index makes the database merge them. Impacts without some sections
+        (e.g. no mobility data) leave those stored columns as they are, so
+        there is one statement per distinct set of columns.
+
+        Returns:
+            "created" or "updated" by event ID (as seen before the write)
+        """
+        existing = set()
+        for chunk in chunked(impacts, QUERY_CHUNK_SIZE):
+            existing.update(
+                event_id for (event_id,) in
+                self.db.query(EventImpact.event_id).filter(EventImpact.event_id.in_(chunk))
+            )
+
+        now = datetime.now(timezone.utc)
+        shapes: Dict[Tuple[str, ...], List[Dict]] = {}
+        for values in impacts.values():
+            shapes.setdefault(tuple(sorted(values)), []).append({**values, "updated_at": now})
+        for records in shapes.values():
+            upsert_records(self.db, EventImpact, records, keys=("event_id",))
+
+        return {
+            event_id: "updated" if event_id in existing else "created"
+            for event_id in impacts
+        }
+
+    def load_impacts(self, event_ids: List[int]) -> Dict[int, EventImpact]:
+        """Stored EventImpact of each event"""
+        impacts: Dict[int, EventImpact] = {}
+        for chunk in chunked(event_ids, QUERY_CHUNK_SIZE):
+            for impact in self.db.query(EventImpact).filter(EventImpact.event_id.in_(chunk)):
+                impacts[impact.event_id] = impact
+        return impacts
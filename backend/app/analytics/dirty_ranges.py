@@ -0,0 +1,178 @@
+"""
+Dirty Ranges - Finds the events whose impacts are affected by changed metrics
+
+Uploads and ingestion jobs record the (city_id, date) slices they wrote in a
+DirtyRanges. An EventIntervalIndex over the events' analysis windows
+(baseline start through end_date + EVENT_IMPACT_WINDOW_AFTER_DAYS) then
+returns only the events overlapping those slices, which are queued for
+recomputation on the background impact worker. Re-analysis cost is
+proportional to the change instead of to the dataset.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.analytics.impact_worker import impact_worker
+from app.models import Event
+
+
+class DirtyRanges:
+    """
+    Changed (city_id, date range) slices, merged per city.
+
+    Usage:
+        dirty = DirtyRanges()
+        dirty.add(city.id, metric_date)
+        dirty.ranges()  # [(city_id, start, end), ...]
+    """
+
+    def __init__(self):
+        self._days: Dict[int, Set[date]] = defaultdict(set)
+        self._spans: Dict[int, List[Tuple[date, date]]] = defaultdict(list)
+
+    def add(self, city_id: int, day: date):
+        """Record one changed day"""
+        self._days[city_id].add(day)
+
+    def add_days(self, city_id: int, days: Iterable[date]):
+        """Record many changed days at once (stored as runs of consecutive days)"""
+        days = np.unique(np.asarray(list(days), dtype="datetime64[D]"))
+        if len(days) == 0:
+            return
+        breaks = np.flatnonzero(np.diff(days) > np.timedelta64(1, "D")) + 1
+        for run in np.split(days, breaks):
+            self.add_range(city_id, run[0].astype(object), run[-1].astype(object))
+
+    def add_range(self, city_id: int, start: date, end: date):
+        """Record a changed date range (inclusive)"""
+        self._spans[city_id].append((min(start, end), max(start, end)))
+
+    def __bool__(self) -> bool:
+        return any(self._days.values()) or any(self._spans.values())
+
+    def city_ids(self) -> List[int]:
+        return sorted(set(self._days) | set(self._spans))
+
+    def ranges(self) -> List[Tuple[int, date, date]]:
+        """Disjoint ranges per city; consecutive or overlapping days are merged"""
+        merged = []
+        for city_id in self.city_ids():
+            spans = sorted(
+                [(day, day) for day in self._days.get(city_id, ())]
+                + self._spans.get(city_id, [])
+            )
+            current_start, current_end = None, None
+            for start, end in spans:
+                if current_end is not None and start <= current_end + timedelta(days=1):
+                    current_end = max(current_end, end)
+                    continue
+                if current_start is not None:
+                    merged.append((city_id, current_start, current_end))
+                current_start, current_end = start, end
+            if current_start is not None:
+                merged.append((city_id, current_start, current_end))
+        return merged
+
+    def to_list(self) -> List[Dict]:
+        """JSON-friendly ranges for API responses"""
+        return [
+            {"city_id": city_id, "start_date": start.isoformat(), "end_date": end.isoformat()}
+            for city_id, start, end in self.ranges()
+        ]
+
+
+class EventIntervalIndex:
+    """
+    Interval index over the analysis windows of events, per city.
+
+    Windows are sorted by start. Since no window is longer than the
+    longest one (max_length), the windows overlapping [start, end] all
+    start in [start - max_length, end]: two binary searches bound the
+    candidates, and only those are compared with the query.
+    """
+
+    def __init__(self, events: pd.DataFrame, window_before: int, window_after: int):
+        """
+        Args:
+            events: Columns id, city_id, start_date, end_date
+            window_before: Days between the baseline end and the event start
+            window_after: Days analyzed after the event end
+        """
+        self._cities: Dict[int, Dict] = {}
+        if events.empty:
+            return
+
+        starts = pd.to_datetime(events["start_date"]) - pd.Timedelta(days=window_before + 30)
+        ends = pd.to_datetime(events["end_date"]) + pd.Timedelta(days=window_after)
+        windows = pd.DataFrame({
+            "id": events["id"].to_numpy(),
+            "city_id": events["city_id"].to_numpy(),
+            "start": starts.to_numpy(dtype="datetime64[D]"),
+            "end": ends.to_numpy(dtype="datetime64[D]"),
+        })
+
+        for city_id, group in windows.groupby("city_id", sort=False):
+            group = group.sort_values("start", kind="mergesort")
+            starts = group["start"].to_numpy(dtype="datetime64[D]")
+            ends = group["end"].to_numpy(dtype="datetime64[D]")
+            self._cities[city_id] = {
+                "ids": group["id"].to_numpy(),
+                "starts": starts,
+                "ends": ends,
+                "max_length": (ends - starts).max(),
+            }
+
+    @classmethod
+    def from_db(cls, db: Session, city_ids: Optional[Iterable[int]] = None) -> "EventIntervalIndex":
+        """Index the events of some cities (all cities if None)"""
+        query = db.query(Event.id, Event.city_id, Event.start_date, Event.end_date)
+        if city_ids is not None:
+            query = query.filter(Event.city_id.in_(list(city_ids)))
+        events = pd.DataFrame(query.all(), columns=["id", "city_id", "start_date", "end_date"])
+        return cls(
+            events,
+            window_before=settings.EVENT_IMPACT_WINDOW_BEFORE_DAYS,
+            window_after=settings.EVENT_IMPACT_WINDOW_AFTER_DAYS,
+        )
+
+    def overlapping(self, city_id: int, start: date, end: date) -> np.ndarray:
+        """IDs of the city's events whose window overlaps [start, end]"""
+        city = self._cities.get(city_id)
+        if city is None:
+            return np.array([], dtype=np.int64)
+
+        query_start = np.datetime64(start, "D")
+        query_end = np.datetime64(end, "D")
+        lo = np.searchsorted(city["starts"], query_start - city["max_length"], side="left")
+        hi = np.searchsorted(city["starts"], query_end, side="right")
+        candidates = slice(lo, hi)
+        return city["ids"][candidates][city["ends"][candidates] >= query_start]
+
+    def affected_events(self, dirty: DirtyRanges) -> List[int]:
+        """IDs of all events overlapping any dirty range"""
+        event_ids = set()
+        for city_id, start, end in dirty.ranges():
+            event_ids.update(int(event_id) for event_id in self.overlapping(city_id, start, end))
+        return sorted(event_ids)
+
+
+def enqueue_affected_impacts(db: Session, dirty: DirtyRanges, source: str) -> Dict:
+    """
+    Queue recomputation of the impacts overlapping the dirty ranges.
+
+    Returns:
+        {"dirty_ranges": [...], "affected_events": count, "impact_job_id": id or None}
+    """
+    summary = {"dirty_ranges": dirty.to_list(), "affected_events": 0, "impact_job_id": None}
+    if not dirty:
+        return summary
+
+    event_ids = EventIntervalIndex.from_db(db, dirty.city_ids()).affected_events(dirty)
+    summary["affected_events"] = len(event_ids)
+    if event_ids:
+        summary["impact_job_id"] = impact_worker.enqueue(db, event_ids, source=source).id
+    return summary
@@ -6,11 +6,10 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func, select, true
 
 from app.models import (
     Event,
-    City,
     TourismMetric,
     HotelMetric,
     EconomicMetric,
@@ -18,6 +17,33 @@ from app.models import (
     EventImpact
 )
 from app.core.config import settings
+from app.analytics.metric_window_index import MetricWindowIndex
+from app.analytics.impact_cube import city_rows, load_impact_cube, summarize_by_city
+
+
+# Metric tables by metric type
+METRIC_MODELS = {
+    "tourism": TourismMetric,
+    "hotel": HotelMetric,
+    "economic": EconomicMetric,
+    "mobility": MobilityMetric,
+}
+
+# Columns aggregated over baseline and event windows, by metric type
+WINDOW_COLUMNS = {
+    "tourism": ["total_visitors"],
+    "hotel": ["occupancy_rate_pct", "avg_price_usd"],
+    "economic": [
+        "total_spending_usd",
+        "temporary_jobs_created",
+        "estimated_tax_revenue_usd",
+    ],
+    "mobility": [
+        "airport_arrivals",
+        "public_transport_usage",
+        "traffic_congestion_index",
+    ],
+}
 
 
 class ImpactAnalyzer:
@@ -25,10 +51,28 @@ class ImpactAnalyzer:
     Analyzes the impact of events on tourism, hotels, and economy
     """
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        window_indexes: Optional[Dict[str, MetricWindowIndex]] = None,
+        set_based: bool = True,
+    ):
+        """
+        Args:
+            db: Database session
+            window_indexes: Optional MetricWindowIndex by metric type (keyed on
+                city_id), e.g. from load_window_indexes(), shared across analyzers
+            set_based: Without window indexes, compute all baseline and event
+                window aggregates of an event in one SQL statement instead of
+                loading the rows of each window as ORM objects
+        """
         self.db = db
         self.window_before = settings.EVENT_IMPACT_WINDOW_BEFORE_DAYS
         self.window_after = settings.EVENT_IMPACT_WINDOW_AFTER_DAYS
+        self.window_indexes = dict(window_indexes or {})
+        self.set_based = set_based
+        # Window aggregates fetched up front for the event being analyzed
+        self._prefetched: Dict[Tuple, Dict] = {}
 
     def calculate_event_impact(self, event_id: int) -> Optional[EventImpact]:
         """
@@ -51,6 +95,28 @@ class ImpactAnalyzer:
         event_end = event.end_date
         post_event_end = event.end_date + timedelta(days=self.window_after)
 
+        if self.set_based and len(self.window_indexes) < len(METRIC_MODELS):
+            self._prefetched = self._sql_window_aggregates(
+                event.city_id, baseline_start, baseline_end, event_start, event_end
+            )
+        try:
+            impact = self._build_impact(
+                event, baseline_start, baseline_end, event_start, event_end
+            )
+        finally:
+            self._prefetched = {}
+
+        return impact
+
+    def _build_impact(
+        self,
+        event: Event,
+        baseline_start: date,
+        baseline_end: date,
+        event_start: date,
+        event_end: date,
+    ) -> EventImpact:
+        """Assemble the EventImpact of an event from its window aggregates"""
         # Calculate tourism impact
         tourism_impact = self._calculate_tourism_impact(
             event.city_id, baseline_start, baseline_end, event_start, event_end
@@ -73,7 +139,7 @@ class ImpactAnalyzer:
 
         # Create or update EventImpact record
         impact = EventImpact(
-            event_id=event_id,
+            event_id=event.id,
             **tourism_impact,
             **hotel_impact,
             **economic_impact,
@@ -92,52 +158,188 @@ class ImpactAnalyzer:
 
         return impact
 
-    def _calculate_tourism_impact(
+    def load_window_indexes(self, city_ids: Optional[List[int]] = None) -> Dict[str, MetricWindowIndex]:
+        """
+        Load the metrics tables once and index them for window lookups
+
+        After this call the _calculate_*_impact methods answer every baseline
+        and event window from memory instead of querying the database, which
+        pays off when many events are analyzed with the same analyzer.
+
+        Args:
+            city_ids: Only index these cities (all cities if None)
+
+        Returns:
+            Dictionary of MetricWindowIndex by metric type
+        """
+        for metric_type, model in METRIC_MODELS.items():
+            columns = WINDOW_COLUMNS[metric_type]
+            query = self.db.query(
+                model.city_id, model.date, *[getattr(model, col) for col in columns]
+            )
+            if city_ids is not None:
+                query = query.filter(model.city_id.in_(city_ids))
+
+            df = pd.DataFrame(query.all(), columns=["city_id", "date", *columns])
+            # Falsy values (None or 0) are skipped, like the per-query averages
+            df[columns] = df[columns].astype(float).replace(0, np.nan)
+
+            self.window_indexes[metric_type] = MetricWindowIndex(
+                df, columns, key_column="city_id", date_column="date"
+            )
+
+        return self.window_indexes
+
+    def _window_aggregates(
         self,
+        metric_type: str,
         city_id: int,
-        baseline_start: date,
-        baseline_end: date,
-        event_start: date,
-        event_end: date,
+        start_date: date,
+        end_date: date,
     ) -> Dict:
-        """Calculate tourism-related impact metrics"""
+        """
+        Aggregate a metric table over [start_date, end_date] for a city
 
-        # Get baseline metrics
-        baseline_metrics = (
-            self.db.query(TourismMetric)
+        Uses the window index when loaded, otherwise queries the rows.
+        Falsy values (None or 0) are left out of sums and means.
+
+        Returns:
+            {"rows": number of rows, "mean": {column: value}, "sum": {column: value}}
+        """
+        columns = WINDOW_COLUMNS[metric_type]
+
+        prefetched = self._prefetched.get((metric_type, city_id, start_date, end_date))
+        if prefetched is not None:
+            return prefetched
+
+        index = self.window_indexes.get(metric_type)
+        if index is not None:
+            return {
+                "rows": index.window_rows(city_id, start_date, end_date),
+                "mean": {
+                    col: index.window_mean(city_id, col, start_date, end_date)
+                    for col in columns
+                },
+                "sum": {
+                    col: index.window_sum(city_id, col, start_date, end_date)
+                    for col in columns
+                },
+            }
+
+        model = METRIC_MODELS[metric_type]
+        metrics = (
+            self.db.query(model)
             .filter(
                 and_(
-                    TourismMetric.city_id == city_id,
-                    TourismMetric.date >= baseline_start,
-                    TourismMetric.date <= baseline_end,
+                    model.city_id == city_id,
+                    model.date >= start_date,
+                    model.date <= end_date,
                 )
             )
             .all()
         )
 
-        # Get event period metrics
-        event_metrics = (
-            self.db.query(TourismMetric)
-            .filter(
-                and_(
-                    TourismMetric.city_id == city_id,
-                    TourismMetric.date >= event_start,
-                    TourismMetric.date <= event_end,
+        values = {
+            col: [getattr(m, col) for m in metrics if getattr(m, col)]
+            for col in columns
+        }
+        return {
+            "rows": len(metrics),
+            "mean": {col: np.mean(v) if v else np.nan for col, v in values.items()},
+            "sum": {col: sum(v) for col, v in values.items()},
+        }
+
+    def _sql_window_aggregates(
+        self,
+        city_id: int,
+        baseline_start: date,
+        baseline_end: date,
+        event_start: date,
+        event_end: date,
+    ) -> Dict[Tuple, Dict]:
+        """
+        Aggregate every metric table over the baseline and event windows in one statement
+
+        Each table contributes one single-row subquery of conditional
+        aggregates (COUNT/SUM/AVG over CASE WHEN date in window), restricted
+        to the city and the span covering both windows so the (city_id, date)
+        indexes are used. The subqueries are cross joined, so the database
+        returns a single plain row instead of one ORM object per day.
+        Falsy values (None or 0) are left out of sums and means, like the
+        row-by-row path.
+
+        Returns:
+            Aggregates like _window_aggregates(), keyed by
+            (metric_type, city_id, start_date, end_date)
+        """
+        windows = [(baseline_start, baseline_end), (event_start, event_end)]
+        span_start = min(baseline_start, event_start)
+        span_end = max(baseline_end, event_end)
+
+        subqueries = []
+        labels = []
+        for metric_type, model in METRIC_MODELS.items():
+            aggregates = []
+            for w, (start, end) in enumerate(windows):
+                in_window = and_(model.date >= start, model.date <= end)
+                aggregates.append(func.count(case((in_window, 1))).label(f"rows_{w}"))
+                labels.append((metric_type, w, "rows", None))
+                for col in WINDOW_COLUMNS[metric_type]:
+                    column = getattr(model, col)
+                    value = case((and_(in_window, column != 0), column))
+                    aggregates.append(func.avg(value).label(f"mean_{w}_{col}"))
+                    aggregates.append(func.sum(value).label(f"sum_{w}_{col}"))
+                    labels.append((metric_type, w, "mean", col))
+                    labels.append((metric_type, w, "sum", col))
+            subqueries.append(
+                select(*aggregates)
+                .where(
+                    model.city_id == city_id,
+                    model.date >= span_start,
+                    model.date <= span_end,
                 )
+                .subquery(f"{metric_type}_windows")
             )
-            .all()
-        )
 
-        if not baseline_metrics or not event_metrics:
+        joined = subqueries[0]
+        for subquery in subqueries[1:]:
+            joined = joined.join(subquery, true())
+        statement = select(*[c for subquery in subqueries for c in subquery.c]).select_from(joined)
+        row = tuple(self.db.execute(statement).one())
+
+        results: Dict[Tuple, Dict] = {}
+        for (metric_type, w, kind, col), value in zip(labels, row):
+            start, end = windows[w]
+            aggregates = results.setdefault(
+                (metric_type, city_id, start, end), {"rows": 0, "mean": {}, "sum": {}}
+            )
+            if kind == "rows":
+                aggregates["rows"] = int(value)
+            elif kind == "mean":
+                aggregates["mean"][col] = float(value) if value is not None else np.nan
+            else:
+                aggregates["sum"][col] = value if value is not None else 0
+        return results
+
+    def _calculate_tourism_impact(
+        self,
+        city_id: int,
+        baseline_start: date,
+        baseline_end: date,
+        event_start: date,
+        event_end: date,
+    ) -> Dict:
+        """Calculate tourism-related impact metrics"""
+
+        baseline = self._window_aggregates("tourism", city_id, baseline_start, baseline_end)
+        event = self._window_aggregates("tourism", city_id, event_start, event_end)
+
+        if not baseline["rows"] or not event["rows"]:
             return {}
 
         # Calculate averages
-        baseline_avg_visitors = np.mean(
-            [m.total_visitors for m in baseline_metrics if m.total_visitors]
-        )
-        event_avg_visitors = np.mean(
-            [m.total_visitors for m in event_metrics if m.total_visitors]
-        )
+        baseline_avg_visitors = baseline["mean"]["total_visitors"]
+        event_avg_visitors = event["mean"]["total_visitors"]
 
         # Calculate increases
         visitor_increase_pct = (
@@ -147,7 +349,7 @@ class ImpactAnalyzer:
         )
 
         additional_visitors = int(
-            (event_avg_visitors - baseline_avg_visitors) * len(event_metrics)
+            (event_avg_visitors - baseline_avg_visitors) * event["rows"]
         )
 
         return {
@@ -167,42 +369,15 @@ class ImpactAnalyzer:
     ) -> Dict:
         """Calculate hotel-related impact metrics"""
 
-        # Get baseline metrics
-        baseline_metrics = (
-            self.db.query(HotelMetric)
-            .filter(
-                and_(
-                    HotelMetric.city_id == city_id,
-                    HotelMetric.date >= baseline_start,
-                    HotelMetric.date <= baseline_end,
-                )
-            )
-            .all()
-        )
-
-        # Get event period metrics
-        event_metrics = (
-            self.db.query(HotelMetric)
-            .filter(
-                and_(
-                    HotelMetric.city_id == city_id,
-                    HotelMetric.date >= event_start,
-                    HotelMetric.date <= event_end,
-                )
-            )
-            .all()
-        )
+        baseline = self._window_aggregates("hotel", city_id, baseline_start, baseline_end)
+        event = self._window_aggregates("hotel", city_id, event_start, event_end)
 
-        if not baseline_metrics or not event_metrics:
+        if not baseline["rows"] or not event["rows"]:
             return {}
 
         # Calculate occupancy metrics
-        baseline_occupancy = np.mean(
-            [m.occupancy_rate_pct for m in baseline_metrics if m.occupancy_rate_pct]
-        )
-        event_occupancy = np.mean(
-            [m.occupancy_rate_pct for m in event_metrics if m.occupancy_rate_pct]
-        )
+        baseline_occupancy = baseline["mean"]["occupancy_rate_pct"]
+        event_occupancy = event["mean"]["occupancy_rate_pct"]
 
         occupancy_increase_pct = (
             ((event_occupancy - baseline_occupancy) / baseline_occupancy) * 100
@@ -211,12 +386,8 @@ class ImpactAnalyzer:
         )
 
         # Calculate price metrics
-        baseline_price = np.mean(
-            [m.avg_price_usd for m in baseline_metrics if m.avg_price_usd]
-        )
-        event_price = np.mean(
-            [m.avg_price_usd for m in event_metrics if m.avg_price_usd]
-        )
+        baseline_price = baseline["mean"]["avg_price_usd"]
+        event_price = event["mean"]["avg_price_usd"]
 
         price_increase_pct = (
             ((event_price - baseline_price) / baseline_price) * 100
@@ -243,26 +414,13 @@ class ImpactAnalyzer:
     ) -> Dict:
         """Calculate economic impact metrics"""
 
-        # Get event period metrics
-        event_metrics = (
-            self.db.query(EconomicMetric)
-            .filter(
-                and_(
-                    EconomicMetric.city_id == city_id,
-                    EconomicMetric.date >= event_start,
-                    EconomicMetric.date <= event_end,
-                )
-            )
-            .all()
-        )
+        event = self._window_aggregates("economic", city_id, event_start, event_end)
 
-        if not event_metrics:
+        if not event["rows"]:
             return {}
 
         # Calculate total spending
-        total_spending = sum(
-            m.total_spending_usd for m in event_metrics if m.total_spending_usd
-        )
+        total_spending = event["sum"]["total_spending_usd"]
 
         # Estimate multiplier effects (simplified)
         # Direct: actual spending
@@ -275,14 +433,8 @@ class ImpactAnalyzer:
         total_economic_impact = direct_spending + indirect_spending + induced_spending
 
         # Jobs and tax revenue estimates
-        jobs_created = sum(
-            m.temporary_jobs_created for m in event_metrics if m.temporary_jobs_created
-        )
-        tax_revenue = sum(
-            m.estimated_tax_revenue_usd
-            for m in event_metrics
-            if m.estimated_tax_revenue_usd
-        )
+        jobs_created = event["sum"]["temporary_jobs_created"]
+        tax_revenue = event["sum"]["estimated_tax_revenue_usd"]
 
         return {
             "total_economic_impact_usd": round(total_economic_impact, 2),
@@ -303,42 +455,15 @@ class ImpactAnalyzer:
     ) -> Dict:
         """Calculate mobility and transportation impact metrics"""
 
-        # Get baseline metrics
-        baseline_metrics = (
-            self.db.query(MobilityMetric)
-            .filter(
-                and_(
-                    MobilityMetric.city_id == city_id,
-                    MobilityMetric.date >= baseline_start,
-                    MobilityMetric.date <= baseline_end,
-                )
-            )
-            .all()
-        )
+        baseline = self._window_aggregates("mobility", city_id, baseline_start, baseline_end)
+        event = self._window_aggregates("mobility", city_id, event_start, event_end)
 
-        # Get event period metrics
-        event_metrics = (
-            self.db.query(MobilityMetric)
-            .filter(
-                and_(
-                    MobilityMetric.city_id == city_id,
-                    MobilityMetric.date >= event_start,
-                    MobilityMetric.date <= event_end,
-                )
-            )
-            .all()
-        )
-
-        if not baseline_metrics or not event_metrics:
+        if not baseline["rows"] or not event["rows"]:
             return {}
 
         # Calculate airport arrivals increase
-        baseline_arrivals = np.mean(
-            [m.airport_arrivals for m in baseline_metrics if m.airport_arrivals]
-        )
-        event_arrivals = np.mean(
-            [m.airport_arrivals for m in event_metrics if m.airport_arrivals]
-        )
+        baseline_arrivals = baseline["mean"]["airport_arrivals"]
+        event_arrivals = event["mean"]["airport_arrivals"]
 
         arrivals_increase_pct = (
             ((event_arrivals - baseline_arrivals) / baseline_arrivals) * 100
@@ -347,16 +472,8 @@ class ImpactAnalyzer:
         )
 
         # Calculate public transport usage increase
-        baseline_transport = np.mean(
-            [
-                m.public_transport_usage
-                for m in baseline_metrics
-                if m.public_transport_usage
-            ]
-        )
-        event_transport = np.mean(
-            [m.public_transport_usage for m in event_metrics if m.public_transport_usage]
-        )
+        baseline_transport = baseline["mean"]["public_transport_usage"]
+        event_transport = event["mean"]["public_transport_usage"]
 
         transport_increase_pct = (
             ((event_transport - baseline_transport) / baseline_transport) * 100
@@ -365,20 +482,8 @@ class ImpactAnalyzer:
         )
 
         # Calculate traffic congestion increase
-        baseline_congestion = np.mean(
-            [
-                m.traffic_congestion_index
-                for m in baseline_metrics
-                if m.traffic_congestion_index
-            ]
-        )
-        event_congestion = np.mean(
-            [
-                m.traffic_congestion_index
-                for m in event_metrics
-                if m.traffic_congestion_index
-            ]
-        )
+        baseline_congestion = baseline["mean"]["traffic_congestion_index"]
+        event_congestion = event["mean"]["traffic_congestion_index"]
 
         congestion_increase_pct = (
             ((event_congestion - baseline_congestion) / baseline_congestion) * 100
@@ -411,14 +516,7 @@ class ImpactAnalyzer:
         Returns:
             DataFrame with time series data
         """
-        metric_model_map = {
-            "tourism": TourismMetric,
-            "hotel": HotelMetric,
-            "economic": EconomicMetric,
-            "mobility": MobilityMetric,
-        }
-
-        model = metric_model_map.get(metric_type)
+        model = METRIC_MODELS.get(metric_type)
         if not model:
             return pd.DataFrame()
 
@@ -485,42 +583,30 @@ class ImpactAnalyzer:
         Returns:
             DataFrame with city comparison metrics
         """
-        city_data = []
+        # One read of the pre-aggregated cube instead of two queries per city
+        cube = load_impact_cube(self.db, city_ids)
+        if cube.empty:
+            return pd.DataFrame()
+        by_city = summarize_by_city(cube)
+        cities = city_rows(self.db, by_city.index)
 
+        city_data = []
         for city_id in city_ids:
-            city = self.db.query(City).filter(City.id == city_id).first()
-            if not city:
+            if city_id not in cities or city_id not in by_city.index:
                 continue
-
-            # Get all event impacts for this city
-            impacts = (
-                self.db.query(EventImpact)
-                .join(Event, EventImpact.event_id == Event.id)
-                .filter(Event.city_id == city_id)
-                .all()
-            )
-
-            if not impacts:
+            row = by_city.loc[city_id]
+            if not row["num_events"]:
                 continue
 
-            # Calculate averages
             city_data.append({
                 "city_id": city_id,
-                "city_name": city.name,
-                "num_events": len(impacts),
-                "avg_visitor_increase_pct": np.mean(
-                    [i.visitor_increase_pct for i in impacts if i.visitor_increase_pct]
-                ),
-                "avg_price_increase_pct": np.mean(
-                    [i.price_increase_pct for i in impacts if i.price_increase_pct]
-                ),
-                "avg_occupancy_increase_pct": np.mean(
-                    [i.occupancy_increase_pct for i in impacts if i.occupancy_increase_pct]
-                ),
-                "total_economic_impact_usd": sum(
-                    i.total_economic_impact_usd for i in impacts if i.total_economic_impact_usd
-                ),
-                "total_jobs_created": sum(i.jobs_created for i in impacts if i.jobs_created),
+                "city_name": cities[city_id].name,
+                "num_events": int(row["num_events"]),
+                "avg_visitor_increase_pct": row["avg_visitor_increase_pct"],
+                "avg_price_increase_pct": row["avg_price_increase_pct"],
+                "avg_occupancy_increase_pct": row["avg_occupancy_increase_pct"],
+                "total_economic_impact_usd": float(row["economic_impact_sum_usd"]),
+                "total_jobs_created": int(row["jobs_created_sum"]),
             })
 
         return pd.DataFrame(city_data)
@@ -0,0 +1,205 @@
+"""
+Impact Cube - Materialized event impact aggregates per city, event type and year
+
+The dashboard, the city comparison and the globe view only need totals and
+means per city, so instead of loading every EventImpact row on each request
+they read the few hundred rows of the ImpactCube table. Writers of
+EventImpact rows call refresh_impact_cube() with the cells they touched
+(see cube_keys()), which recomputes just those cells in the same
+transaction.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, desc, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.database import chunked, ensure_tables
+from app.models import City, Event, EventImpact, ImpactCube
+
+
+# A cube cell: (city_id, event_type, year)
+CubeKey = Tuple[int, object, int]
+
+# Cube measures: cube column prefix -> EventImpact column
+PCT_MEASURES = {
+    "visitor_increase_pct": EventImpact.visitor_increase_pct,
+    "price_increase_pct": EventImpact.price_increase_pct,
+    "occupancy_increase_pct": EventImpact.occupancy_increase_pct,
+}
+
+# Maximum number of cells per (city_id, event_type, year) IN (...) query
+KEY_CHUNK_SIZE = 300
+
+
+def cube_keys(db: Session, event_ids: Iterable[int]) -> Set[CubeKey]:
+    """Cube cells the given events belong to"""
+    keys: Set[CubeKey] = set()
+    for chunk in chunked(set(event_ids), KEY_CHUNK_SIZE):
+        keys.update(
+            tuple(row) for row in
+            db.query(Event.city_id, Event.event_type, Event.year)
+            .filter(Event.id.in_(chunk))
+            .distinct()
+        )
+    return keys
+
+
+def refresh_impact_cube(db: Session, keys: Optional[Iterable[CubeKey]] = None) -> int:
+    """
+    Recompute cube cells from the EventImpact rows (does not commit).
+
+    Args:
+        db: Database session (pending changes are flushed first)
+        keys: Cells to refresh (all cells if None)
+
+    Returns:
+        Number of cells written
+    """
+    ensure_tables(db, ImpactCube.__table__)
+    db.flush()
+
+    if keys is None:
+        db.query(ImpactCube).delete(synchronize_session=False)
+        rows = _aggregate_cells(db, None)
+    else:
+        keys = list(set(keys))
+        rows = []
+        for chunk in chunked(keys, KEY_CHUNK_SIZE):
+            db.query(ImpactCube).filter(
+                tuple_(ImpactCube.city_id, ImpactCube.event_type, ImpactCube.year).in_(chunk)
+            ).delete(synchronize_session=False)
+            rows.extend(_aggregate_cells(db, chunk))
+
+    if rows:
+        db.bulk_insert_mappings(ImpactCube, rows)
+    return len(rows)
+
+
+def _aggregate_cells(db: Session, keys: Optional[List[CubeKey]]) -> List[Dict]:
+    """Aggregate EventImpact rows per cell with one grouped query (plus the top events)"""
+    cell = (Event.city_id, Event.event_type, Event.year)
+    economic = EventImpact.total_economic_impact_usd
+
+    def nonzero(column):
+        return case((column != 0, column))
+
+    aggregates = [
+        func.count(EventImpact.id),
+        func.coalesce(func.sum(nonzero(economic)), 0),
+        func.count(nonzero(economic)),
+        func.max(economic),
+        func.coalesce(func.sum(nonzero(EventImpact.jobs_created)), 0),
+    ]
+    for column in PCT_MEASURES.values():
+        aggregates.append(func.coalesce(func.sum(nonzero(column)), 0))
+        aggregates.append(func.count(nonzero(column)))
+
+    query = select(*cell, *aggregates).join(Event, EventImpact.event_id == Event.id)
+    if keys is not None:
+        query = query.where(tuple_(*cell).in_(keys))
+    query = query.group_by(*cell)
+
+    # Event with the largest economic impact in each cell
+    ranked = select(
+        *cell,
+        EventImpact.event_id,
+        func.row_number().over(
+            partition_by=cell, order_by=(desc(func.coalesce(economic, 0)), EventImpact.id)
+        ).label("rank"),
+    ).join(Event, EventImpact.event_id == Event.id)
+    if keys is not None:
+        ranked = ranked.where(tuple_(*cell).in_(keys))
+    ranked = ranked.subquery()
+    top_events = {
+        (city_id, event_type, year): event_id
+        for city_id, event_type, year, event_id, _ in db.execute(
+            select(ranked).where(ranked.c.rank == 1)
+        )
+    }
+
+    rows = []
+    for city_id, event_type, year, count, econ_sum, econ_count, econ_max, jobs, *pcts in db.execute(query):
+        row = {
+            "city_id": city_id,
+            "event_type": event_type,
+            "year": year,
+            "impact_count": count,
+            "economic_impact_sum_usd": float(econ_sum),
+            "economic_impact_count": econ_count,
+            "economic_impact_max_usd": econ_max,
+            "top_event_id": top_events.get((city_id, event_type, year)),
+            "jobs_created_sum": int(jobs),
+        }
+        for i, prefix in enumerate(PCT_MEASURES):
+            row[f"{prefix}_sum"] = float(pcts[2 * i])
+            row[f"{prefix}_count"] = pcts[2 * i + 1]
+        rows.append(row)
+    return rows
+
+
+def ensure_impact_cube(db: Session):
+    """Build the cube once if impacts exist but the cube is empty (commits)"""
+    ensure_tables(db, ImpactCube.__table__)
+    if db.query(ImpactCube.id).first() is None and db.query(EventImpact.id).first() is not None:
+        refresh_impact_cube(db)
+        db.commit()
+
+
+def load_impact_cube(db: Session, city_ids: Optional[List[int]] = None) -> pd.DataFrame:
+    """Cube rows (all columns) as a DataFrame, optionally for some cities"""
+    ensure_impact_cube(db)
+    columns = [column.name for column in ImpactCube.__table__.columns]
+    query = select(*[getattr(ImpactCube, name) for name in columns])
+    if city_ids is not None:
+        query = query.where(ImpactCube.city_id.in_(city_ids))
+    return pd.DataFrame(db.execute(query).all(), columns=columns)
+
+
+def summarize_by_city(cube: pd.DataFrame) -> pd.DataFrame:
+    """
+    Roll cube cells up to one row per city.
+
+    Returns:
+        DataFrame indexed by city_id with num_events, the measure sums and
+        counts, and top_event_id / top_event_impact_usd
+    """
+    sums = [
+        "impact_count", "economic_impact_sum_usd", "economic_impact_count", "jobs_created_sum",
+        *[f"{prefix}_{stat}" for prefix in PCT_MEASURES for stat in ("sum", "count")],
+    ]
+    by_city = cube.groupby("city_id")[sums].sum()
+    by_city = by_city.rename(columns={"impact_count": "num_events"})
+
+    top = (
+        cube.assign(_max=cube["economic_impact_max_usd"].fillna(0))
+        .sort_values("_max", ascending=False, kind="mergesort")
+        .drop_duplicates("city_id")
+        .set_index("city_id")
+    )
+    by_city["top_event_id"] = top["top_event_id"]
+    by_city["top_event_impact_usd"] = top["economic_impact_max_usd"]
+
+    for prefix in PCT_MEASURES:
+        counts = by_city[f"{prefix}_count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            by_city[f"avg_{prefix}"] = np.where(
+                counts > 0, by_city[f"{prefix}_sum"] / counts, np.nan
+            )
+    return by_city
+
+
+def event_names(db: Session, event_ids: Iterable) -> Dict[int, str]:
+    """Names of events by ID"""
+    ids = [int(i) for i in set(event_ids) if i is not None and not pd.isna(i)]
+    if not ids:
+        return {}
+    return dict(db.query(Event.id, Event.name).filter(Event.id.in_(ids)).all())
+
+
+def city_rows(db: Session, city_ids: Iterable) -> Dict[int, City]:
+    """Cities by ID"""
+    ids = [int(i) for i in set(city_ids)]
+    if not ids:
+        return {}
+    return {city.id: city for city in db.query(City).filter(City.id.in_(ids)).all()}
@@ -0,0 +1,150 @@
+"""
+Impact Worker - Recomputes event impacts in a background thread
+
+Request handlers call enqueue(), which stores an ImpactJob row and puts its
+ID on an in-process queue, and return immediately. A single worker thread
+takes job IDs off the queue and runs BatchImpactAnalyzer over the job's
+events in chunks, committing progress after each chunk so the job status
+endpoints can report it.
+
+Thread lifecycle and recovery of unfinished jobs live in JobWorker.
+"""
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, ensure_tables
+from app.core.job_worker import JobWorker
+from app.analytics.batch_impact import BatchImpactAnalyzer
+from app.models import Event, ImpactJob, JobStatus
+
+
+class ImpactJobWorker(JobWorker):
+    """
+    Single background thread processing ImpactJob rows.
+
+    Usage:
+        job = impact_worker.enqueue(db, [event_id], source="event_impact")
+        ...
+        db.get(ImpactJob, job.id).progress_pct
+    """
+
+    job_model = ImpactJob
+    name = "impact-worker"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = 500,
+    ):
+        """
+        Args:
+            session_factory: Creates the worker's own database sessions
+            batch_size: Events analyzed (and committed) per chunk
+        """
+        super().__init__(session_factory)
+        self.batch_size = batch_size
+
+    def enqueue(
+        self,
+        db: Session,
+        event_ids: Optional[List[int]] = None,
+        source: str = "api",
+    ) -> ImpactJob:
+        """
+        Create (or reuse) a job and queue it; commits the job row.
+
+        An unfinished job for the same events is returned instead of
+        creating a duplicate, so repeated requests do not pile up work.
+
+        Args:
+            db: Request database session
+            event_ids: Events to recompute (None = all events)
+            source: What requested the job
+
+        Returns:
+            The queued (or already pending) job
+        """
+        ensure_tables(db, ImpactJob.__table__)
+        event_ids = sorted(set(event_ids)) if event_ids is not None else None
+
+        pending = (
+            db.query(ImpactJob)
+            .filter(ImpactJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            .order_by(ImpactJob.id)
+            .all()
+        )
+        for job in pending:
+            if job.event_ids == event_ids:
+                return job
+
+        job = ImpactJob(
+            status=JobStatus.QUEUED,
+            source=source,
+            event_ids=event_ids,
+            total=len(event_ids) if event_ids is not None else 0,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.submit(job.id)
+        return job
+
+    def process(self, job_id: int):
+        """Run one job in the calling thread with a fresh session"""
+        db = self.session_factory()
+        try:
+            job = db.get(ImpactJob, job_id)
+            if job is None or job.is_finished:
+                return
+
+            if job.event_ids is not None:
+                event_ids = list(job.event_ids)
+            else:
+                # Group events of a city together so each chunk loads few cities
+                event_ids = [
+                    event_id for (event_id,) in
+                    db.query(Event.id).order_by(Event.city_id, Event.id)
+                ]
+
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            job.total = len(event_ids)
+            job.processed = job.succeeded = job.failed = 0
+            job.error = None
+            db.commit()
+
+            for i in range(0, len(event_ids), self.batch_size):
+                if self._stop.is_set():
+                    # Left as running: requeued when the worker starts again
+                    return
+                chunk = event_ids[i:i + self.batch_size]
+                results = BatchImpactAnalyzer(db).analyze(chunk)
+                ok = sum(1 for r in results if r["status"] in ("created", "updated"))
+                job.processed += len(chunk)
+                job.succeeded += ok
+                job.failed += len(chunk) - ok
+                db.commit()
+
+            job.status = JobStatus.DONE
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            print(f"   ✓ Impact job {job.id}: {job.succeeded}/{job.total} events analyzed")
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Impact job {job_id} failed: {e}")
+            job = db.get(ImpactJob, job_id)
+            if job is not None:
+                job.status = JobStatus.FAILED
+                job.error = str(e)[:1000]
+                job.finished_at = datetime.now(timezone.utc)
+                db.commit()
+        finally:
+            db.close()
+
+
+# Application-wide worker, started from app.main on startup
+impact_worker = ImpactJobWorker(batch_size=settings.IMPACT_JOB_BATCH_SIZE)
@@ -0,0 +1,226 @@
+"""
+Prefix-sum window index over daily metrics
+Answers [start, end] window sums, means and maxima per city in constant time
+"""
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def _to_datetime64(value) -> np.datetime64:
+    """Convert a date, datetime, Timestamp or string to datetime64[ns]"""
+    return np.datetime64(pd.Timestamp(value), 'ns')
+
+
+class MetricWindowIndex:
+    """
+    Index of daily metrics for fast window aggregates.
+
+    Rows are grouped by key (city name or city_id) and sorted by date once.
+    For every column the index keeps the prefix sums and prefix counts of the
+    non-missing values, so the sum or mean of any window is two array lookups
+    once its bounds are found on the sorted dates. Columns listed in
+    max_columns also get a sparse table, which gives range maxima with two
+    lookups as well.
+
+    Missing values (NaN/None) are skipped, like pandas mean()/max().
+
+    Usage:
+        index = MetricWindowIndex(df_hotel_metrics, ['avg_price_usd'],
+                                  max_columns=['avg_price_usd'])
+        index.window_mean('London', 'avg_price_usd', start, end)
+        index.window_stats(cities, starts, ends, mean_columns=['avg_price_usd'])
+    """
+
+    def __init__(
+        self,
+        df: Optional[pd.DataFrame],
+        columns: Iterable[str],
+        key_column: str = 'city',
+        date_column: str = 'date',
+        max_columns: Iterable[str] = (),
+    ):
+        """
+        Build the index.
+
+        Args:
+            df: Daily metrics with a key column, a date column and value columns
+            columns: Columns to build prefix sums for (sum/mean queries)
+            key_column: Column identifying the city
+            date_column: Date column
+            max_columns: Columns to build sparse tables for (max queries)
+        """
+        self.columns = list(columns)
+        self.max_columns = list(max_columns)
+        self._series: Dict[Hashable, Dict] = {}
+
+        if df is None or df.empty:
+            return
+
+        for key, group in df.groupby(key_column, sort=False):
+            group = group.sort_values(date_column, kind='mergesort')
+            series = {
+                'dates': pd.to_datetime(group[date_column]).to_numpy(dtype='datetime64[ns]'),
+                'sums': {},
+                'counts': {},
+                'max': {},
+            }
+            for col in self.columns:
+                values = pd.to_numeric(group[col], errors='coerce').to_numpy(dtype=float)
+                present = ~np.isnan(values)
+                series['sums'][col] = np.concatenate(
+                    ([0.0], np.cumsum(np.where(present, values, 0.0)))
+                )
+                series['counts'][col] = np.concatenate(([0], np.cumsum(present)))
+            for col in self.max_columns:
+                values = pd.to_numeric(group[col], errors='coerce').to_numpy(dtype=float)
+                series['max'][col] = self._sparse_table(values)
+            self._series[key] = series
+
+    @staticmethod
+    def _sparse_table(values: np.ndarray) -> list:
+        """Level k holds the maximum of values[i:i + 2**k] (NaN skipped)"""
+        table = [values]
+        width = 1
+        while 2 * width <= len(values):
+            previous = table[-1]
+            table.append(np.fmax(previous[:-width], previous[width:]))
+            width *= 2
+        return table
+
+    def __contains__(self, key) -> bool:
+        return key in self._series
+
+    def keys(self):
+        """Keys (cities) present in the index"""
+        return self._series.keys()
+
+    # ------------------------------------------------------------------
+    # Single-window queries
+    # ------------------------------------------------------------------
+
+    def bounds(self, key, start, end) -> Tuple[int, int]:
+        """Row range [lo, hi) of the key's sorted rows inside [start, end]"""
+        series = self._series.get(key)
+        if series is None:
+            return 0, 0
+        lo = int(np.searchsorted(series['dates'], _to_datetime64(start), side='left'))
+        hi = int(np.searchsorted(series['dates'], _to_datetime64(end), side='right'))
+        return lo, max(lo, hi)
+
+    def window_rows(self, key, start, end) -> int:
+        """Number of metric rows inside the window"""
+        lo, hi = self.bounds(key, start, end)
+        return hi - lo
+
+    def window_count(self, key, column: str, start, end) -> int:
+        """Number of non-missing values of a column inside the window"""
+        lo, hi = self.bounds(key, start, end)
+        if hi == lo:
+            return 0
+        counts = self._series[key]['counts'][column]
+        return int(counts[hi] - counts[lo])
+
+    def window_sum(self, key, column: str, start, end) -> float:
+        """Sum of a column inside the window (0 if empty)"""
+        lo, hi = self.bounds(key, start, end)
+        if hi == lo:
+            return 0.0
+        sums = self._series[key]['sums'][column]
+        return float(sums[hi] - sums[lo])
+
+    def window_mean(self, key, column: str, start, end) -> float:
+        """Mean of a column inside the window (NaN if no values)"""
+        count = self.window_count(key, column, start, end)
+        if count == 0:
+            return np.nan
+        return self.window_sum(key, column, start, end) / count
+
+    def window_max(self, key, column: str, start, end) -> float:
+        """Maximum of a column inside the window (NaN if no values)"""
+        lo, hi = self.bounds(key, start, end)
+        if hi == lo:
+            return np.nan
+        table = self._series[key]['max'][column]
+        level = (hi - lo).bit_length() - 1
+        return float(np.fmax(table[level][lo], table[level][hi - (1 << level)]))
+
+    # ------------------------------------------------------------------
+    # Vectorized queries
+    # ------------------------------------------------------------------
+
+    def window_stats(
+        self,
+        keys,
+        starts,
+        ends,
+        mean_columns: Iterable[str] = (),
+        sum_columns: Iterable[str] = (),
+        max_columns: Iterable[str] = (),
+    ) -> Dict:
+        """
+        Aggregate one [start, end] window per query.
+
+        Args:
+            keys: Key (city) of each query
+            starts: Window start of each query (NaT skips the query)
+            ends: Window end of each query (NaT skips the query)
+            mean_columns: Columns to average
+            sum_columns: Columns to sum
+            max_columns: Columns to take the maximum of
+
+        Returns:
+            {'rows': metric rows in each window,
+             'mean': {column: array}, 'sum': {column: array}, 'max': {column: array}}
+        """
+        keys = pd.Series(np.asarray(keys, dtype=object))
+        starts = pd.to_datetime(pd.Series(starts)).to_numpy(dtype='datetime64[ns]')
+        ends = pd.to_datetime(pd.Series(ends)).to_numpy(dtype='datetime64[ns]')
+        n_queries = len(keys)
+
+        stats = {
+            'rows': np.zeros(n_queries, dtype=np.int64),
+            'mean': {col: np.full(n_queries, np.nan) for col in mean_columns},
+            'sum': {col: np.zeros(n_queries) for col in sum_columns},
+            'max': {col: np.full(n_queries, np.nan) for col in max_columns},
+        }
+        has_dates = ~(np.isnat(starts) | np.isnat(ends))
+
+        for key, rows in keys.groupby(keys, sort=False).indices.items():
+            series = self._series.get(key)
+            rows = rows[has_dates[rows]]
+            if series is None or len(rows) == 0:
+                continue
+
+            lo = np.searchsorted(series['dates'], starts[rows], side='left')
+            hi = np.maximum(np.searchsorted(series['dates'], ends[rows], side='right'), lo)
+            stats['rows'][rows] = hi - lo
+
+            for col in stats['sum']:
+                sums = series['sums'][col]
+                stats['sum'][col][rows] = sums[hi] - sums[lo]
+            for col in stats['mean']:
+                sums, counts = series['sums'][col], series['counts'][col]
+                n_values = counts[hi] - counts[lo]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    stats['mean'][col][rows] = np.where(
+                        n_values > 0, (sums[hi] - sums[lo]) / n_values, np.nan
+                    )
+            for col in stats['max']:
+                stats['max'][col][rows] = self._range_max(series['max'][col], lo, hi)
+
+        return stats
+
+    @staticmethod
+    def _range_max(table: list, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Range maxima of [lo, hi) using two overlapping power-of-two blocks"""
+        result = np.full(len(lo), np.nan)
+        lengths = hi - lo
+        non_empty = lengths > 0
+        levels = np.zeros(len(lo), dtype=np.int64)
+        levels[non_empty] = np.floor(np.log2(lengths[non_empty])).astype(np.int64)
+        for level in np.unique(levels[non_empty]):
+            rows = non_empty & (levels == level)
+            block = table[level]
+            result[rows] = np.fmax(block[lo[rows]], block[hi[rows] - (1 << int(level))])
+        return result
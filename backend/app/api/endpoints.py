@@ -3,51 +3,40 @@ API endpoints for Evently
 """
 from datetime import date, datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+import pandas as pd
 
-from app.core.database import get_db
-from app.models import City, Event, EventImpact
+from app.core.config import settings
+from app.core.database import ensure_tables, get_db
+from app.models import City, Event, EventImpact, ImpactJob, JobStatus
 from app.analytics.impact_analyzer import ImpactAnalyzer
+from app.analytics.batch_impact import BatchImpactAnalyzer
+from app.analytics.impact_cube import city_rows, event_names, load_impact_cube, summarize_by_city
+from app.analytics.impact_worker import impact_worker
 from app.api import schemas
 from app.analytics.impact_analyzer import ImpactAnalyzer
 from app.analytics.scenario_simulator import ScenarioSimulator
 from app.ml.economic_impact_model import EconomicImpactModel
+from app.ml.model_warmup import ModelNotReadyError, model_warmup
+from app.ml.prediction_cache import prediction_cache
 
 router = APIRouter()
 
-# Initialize ML model (singleton)
-_ml_model = None
-
 
 def get_ml_model() -> EconomicImpactModel:
-    """Get or create ML model instance"""
-    global _ml_model
-    if _ml_model is None:
-        _ml_model = EconomicImpactModel()
-        try:
-            _ml_model.load()
-            # Verify model is actually loaded
-            if _ml_model.best_model is None:
-                raise FileNotFoundError("Model file exists but is invalid")
-        except (FileNotFoundError, Exception) as e:
-            # Model not trained yet or invalid, train it
-            print(f"⚠️  Model not found or invalid: {e}")
-            print("🔄 Training model from CSV data...")
-            try:
-                _ml_model.load_data()
-                _ml_model.train()
-                _ml_model.save()
-                print("✅ Model trained and saved successfully")
-            except Exception as train_error:
-                print(f"❌ Error training model: {train_error}")
-                raise ValueError(f"Could not train model: {train_error}")
-    
-    # Double check model is ready
-    if _ml_model.best_model is None:
-        raise ValueError("Model is not trained. Please ensure CSV data exists and run training.")
-    
-    return _ml_model
+    """
+    Get the ML model loaded at startup.
+
+    Raises 503 while the background warmup (app.ml.model_warmup) is still
+    running or if it failed; requests never load or train the model.
+    """
+    try:
+        return model_warmup.get()
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
 
 # ============================================================================
@@ -148,15 +137,25 @@ def create_event(event: schemas.EventCreate, db: Session = Depends(get_db)):
 # Impact Analysis Endpoints
 # ============================================================================
 
-@router.get("/events/{event_id}/impact", response_model=schemas.EventImpactResponse)
+@router.get(
+    "/events/{event_id}/impact",
+    response_model=schemas.EventImpactResponse,
+    responses={202: {"model": schemas.ImpactJobResponse}},
+)
 def get_event_impact(
     event_id: int,
+    response: Response,
     recalculate: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Get impact analysis for an event
 
+    Impacts are computed by the background impact worker. If the event has
+    no stored impact yet, a job is queued and 202 is returned with the job
+    (poll /jobs/impact/{job_id}). With recalculate, a job is queued and the
+    stored impact is returned meanwhile.
+
     Args:
         event_id: Event ID
         recalculate: Force recalculation of impact metrics
@@ -166,70 +165,49 @@ def get_event_impact(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    # Get existing impact or calculate new one
     impact = db.query(EventImpact).filter(EventImpact.event_id == event_id).first()
 
     if not impact or recalculate:
-        analyzer = ImpactAnalyzer(db)
-        impact = analyzer.calculate_event_impact(event_id)
-
+        job = impact_worker.enqueue(db, [event_id], source="event_impact")
         if not impact:
-            raise HTTPException(
-                status_code=400,
-                detail="Insufficient data to calculate impact"
-            )
-
-        # Save to database
-        if recalculate and db.query(EventImpact).filter(EventImpact.event_id == event_id).first():
-            # Update existing
-            db.query(EventImpact).filter(EventImpact.event_id == event_id).update(
-                {k: v for k, v in impact.__dict__.items() if not k.startswith('_')}
+            return JSONResponse(
+                status_code=202,
+                content=jsonable_encoder(_job_response(job)),
+                headers={"Location": f"{settings.API_V1_STR}/jobs/impact/{job.id}"},
             )
-        else:
-            # Create new
-            db.add(impact)
-
-        db.commit()
-        db.refresh(impact)
+        response.headers["X-Impact-Job-Id"] = str(job.id)
 
     return impact
 
 
-@router.post("/events/batch-analyze", response_model=List[schemas.EventImpactResponse])
+@router.post("/events/batch-analyze", response_model=schemas.BatchAnalyzeResponse)
 def batch_analyze_events(
     event_ids: List[int],
     db: Session = Depends(get_db)
 ):
-    """Batch analyze multiple events"""
-    analyzer = ImpactAnalyzer(db)
-    results = []
-
-    for event_id in event_ids:
-        try:
-            impact = analyzer.calculate_event_impact(event_id)
-            if impact:
-                # Check if exists
-                existing = db.query(EventImpact).filter(EventImpact.event_id == event_id).first()
-                if existing:
-                    # Update
-                    for key, value in impact.__dict__.items():
-                        if not key.startswith('_'):
-                            setattr(existing, key, value)
-                    db.commit()
-                    db.refresh(existing)
-                    results.append(existing)
-                else:
-                    # Create new
-                    db.add(impact)
-                    db.commit()
-                    db.refresh(impact)
-                    results.append(impact)
-        except Exception as e:
-            # Log error but continue with other events
-            print(f"Error analyzing event {event_id}: {str(e)}")
-            continue
-
-    return results
+    """
+    Batch analyze multiple events
+
+    Metrics are fetched per city in a few queries, impacts are computed for
+    all events at once and stored with one bulk upsert and a single commit.
+    Each event gets its own status, so one bad event does not fail the batch.
+    """
+    analyzer = BatchImpactAnalyzer(db)
+    results = analyzer.analyze(event_ids)
+
+    saved = [r["event_id"] for r in results if r["status"] in ("created", "updated")]
+    impacts = analyzer.load_impacts(saved)
+    for result in results:
+        result["impact"] = impacts.get(result["event_id"])
+        if result["error"]:
+            print(f"Error analyzing event {result['event_id']}: {result['error']}")
+
+    return {
+        "count": len(results),
+        "succeeded": len(saved),
+        "failed": len(results) - len(saved),
+        "results": results,
+    }
 
 
 # ============================================================================
@@ -398,38 +376,18 @@ def simulate_event_growth(
 
 @router.get("/analytics/dashboard/kpis", response_model=schemas.DashboardKPIs)
 def get_dashboard_kpis(db: Session = Depends(get_db)):
-    """Get key performance indicators for dashboard"""
+    """Get key performance indicators for dashboard (read from the impact cube)"""
     # Total events analyzed
     total_events = db.query(Event).count()
 
     # Total cities
     total_cities = db.query(City).count()
 
-    # Get all impacts
-    impacts = db.query(EventImpact).all()
-
-    # If no impacts exist, calculate them for all events
-    if not impacts:
-        analyzer = ImpactAnalyzer(db)
-        events = db.query(Event).all()
-        for event in events:
-            try:
-                impact = analyzer.calculate_event_impact(event.id)
-                if impact:
-                    # Check if impact already exists
-                    existing = db.query(EventImpact).filter(
-                        EventImpact.event_id == event.id
-                    ).first()
-                    if not existing:
-                        db.add(impact)
-            except Exception:
-                pass  # Skip events that can't be analyzed
-        
-        db.commit()
-        impacts = db.query(EventImpact).all()
-    
-    # If still no impacts, return default values
-    if not impacts:
+    cube = load_impact_cube(db)
+
+    # If no impacts exist, have the worker calculate them for all events
+    if cube.empty or not cube["impact_count"].sum():
+        job = impact_worker.enqueue(db, None, source="dashboard") if total_events else None
         return schemas.DashboardKPIs(
             total_events_analyzed=total_events,
             total_cities=total_cities,
@@ -437,63 +395,121 @@ def get_dashboard_kpis(db: Session = Depends(get_db)):
             avg_visitor_increase_pct=0,
             avg_hotel_price_increase_pct=0,
             total_jobs_created=0,
-            highest_impact_event_name="No events analyzed yet",
-            highest_impact_city="N/A"
+            highest_impact_event_name="Impact analysis in progress" if job else "No events analyzed yet",
+            highest_impact_city="N/A",
+            impact_job_id=job.id if job else None,
         )
 
     # Calculate averages
-    avg_economic_impact = sum(
-        i.total_economic_impact_usd for i in impacts if i.total_economic_impact_usd
-    ) / len(impacts)
-
-    avg_visitor_increase = sum(
-        i.visitor_increase_pct for i in impacts if i.visitor_increase_pct
-    ) / len(impacts)
+    num_impacts = cube["impact_count"].sum()
+    avg_economic_impact = cube["economic_impact_sum_usd"].sum() / num_impacts
+    avg_visitor_increase = cube["visitor_increase_pct_sum"].sum() / num_impacts
+    avg_price_increase = cube["price_increase_pct_sum"].sum() / num_impacts
+    total_jobs = cube["jobs_created_sum"].sum()
 
-    avg_price_increase = sum(
-        i.price_increase_pct for i in impacts if i.price_increase_pct
-    ) / len(impacts)
+    # Find highest impact event and the city with most impact
+    by_city = summarize_by_city(cube)
+    top_city_id = by_city["economic_impact_sum_usd"].idxmax()
+    top_event_id = by_city["top_event_id"].loc[by_city["top_event_impact_usd"].fillna(0).idxmax()]
 
-    total_jobs = sum(i.jobs_created for i in impacts if i.jobs_created)
-
-    # Find highest impact event
-    highest_impact = max(
-        impacts,
-        key=lambda i: i.total_economic_impact_usd or 0
-    )
-    highest_impact_event = db.query(Event).filter(
-        Event.id == highest_impact.event_id
-    ).first()
-
-    # Find city with most impact
-    from sqlalchemy import func
-    city_impacts = db.query(
-        Event.city_id,
-        func.sum(EventImpact.total_economic_impact_usd).label('total_impact')
-    ).join(EventImpact, Event.id == EventImpact.event_id).group_by(
-        Event.city_id
-    ).order_by(func.sum(EventImpact.total_economic_impact_usd).desc()).first()
-
-    highest_impact_city_name = "N/A"
-    if city_impacts:
-        highest_impact_city = db.query(City).filter(
-            City.id == city_impacts[0]
-        ).first()
-        if highest_impact_city:
-            highest_impact_city_name = highest_impact_city.name
+    names = event_names(db, [top_event_id])
+    cities = city_rows(db, [top_city_id])
+    highest_impact_city = cities.get(int(top_city_id))
 
     return schemas.DashboardKPIs(
         total_events_analyzed=total_events,
         total_cities=total_cities,
-        avg_economic_impact_per_event_usd=round(avg_economic_impact, 2),
-        avg_visitor_increase_pct=round(avg_visitor_increase, 2),
-        avg_hotel_price_increase_pct=round(avg_price_increase, 2),
+        avg_economic_impact_per_event_usd=round(float(avg_economic_impact), 2),
+        avg_visitor_increase_pct=round(float(avg_visitor_increase), 2),
+        avg_hotel_price_increase_pct=round(float(avg_price_increase), 2),
         total_jobs_created=int(total_jobs),
-        highest_impact_event_name=highest_impact_event.name if highest_impact_event else "N/A",
-        highest_impact_city=highest_impact_city_name
+        highest_impact_event_name=names.get(int(top_event_id), "N/A") if not pd.isna(top_event_id) else "N/A",
+        highest_impact_city=highest_impact_city.name if highest_impact_city else "N/A"
     )
 
 
+@router.get("/analytics/globe", response_model=List[schemas.GlobeCityImpact])
+def get_globe_impacts(db: Session = Depends(get_db)):
+    """Per-city impact totals for the globe view (read from the impact cube)"""
+    cities = db.query(City).all()
+    cube = load_impact_cube(db)
+    by_city = summarize_by_city(cube) if not cube.empty else None
+    names = event_names(db, by_city["top_event_id"]) if by_city is not None else {}
+
+    items = []
+    for city in cities:
+        row = by_city.loc[city.id] if by_city is not None and city.id in by_city.index else None
+        top_event_id = row["top_event_id"] if row is not None else None
+        items.append({
+            "city_id": city.id,
+            "city_name": city.name,
+            "country": city.country,
+            "latitude": city.latitude,
+            "longitude": city.longitude,
+            "num_events": int(row["num_events"]) if row is not None else 0,
+            "total_economic_impact_usd": float(row["economic_impact_sum_usd"]) if row is not None else 0.0,
+            "total_jobs_created": int(row["jobs_created_sum"]) if row is not None else 0,
+            "top_event_name": (
+                names.get(int(top_event_id))
+                if top_event_id is not None and not pd.isna(top_event_id) else None
+            ),
+        })
+    return items
+
+
+# ============================================================================
+# Background Job Endpoints
+# ============================================================================
+
+def _job_response(job: ImpactJob) -> dict:
+    """ImpactJobResponse fields of a job"""
+    return {
+        "job_id": job.id,
+        "status": JobStatus(job.status).value,
+        "source": job.source,
+        "total": job.total,
+        "processed": job.processed,
+        "succeeded": job.succeeded,
+        "failed": job.failed,
+        "progress_pct": job.progress_pct,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@router.get("/jobs/impact", response_model=List[schemas.ImpactJobResponse])
+def list_impact_jobs(
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """Most recent impact recomputation jobs"""
+    ensure_tables(db, ImpactJob.__table__)
+    jobs = db.query(ImpactJob).order_by(ImpactJob.id.desc()).limit(limit).all()
+    return [_job_response(job) for job in jobs]
+
+
+@router.get("/jobs/impact/{job_id}", response_model=schemas.ImpactJobResponse)
+def get_impact_job(job_id: int, db: Session = Depends(get_db)):
+    """Status and progress of an impact recomputation job"""
+    ensure_tables(db, ImpactJob.__table__)
+    job = db.get(ImpactJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@router.post("/jobs/impact", response_model=schemas.ImpactJobResponse, status_code=202)
+def create_impact_job(
+    event_ids: Optional[List[int]] = None,
+    db: Session = Depends(get_db)
+):
+    """Queue recomputation of some events' impacts (all events if no IDs are given)"""
+    job = impact_worker.enqueue(db, event_ids, source="api")
+    return _job_response(job)
+
+
 # ============================================================================
 # ML Prediction Endpoints
 # ============================================================================
@@ -531,23 +547,20 @@ def predict_event_impact(input_data: schemas.PredictionInput):
 
     Returns predicted economic impact with confidence interval.
     """
+    model = get_ml_model()
+
+    key = prediction_cache.key(
+        model, 'simple', input_data.event_type, input_data.city,
+        input_data.duration_days, input_data.attendance
+    )
+
     try:
-        model = get_ml_model()
-        
-        # Double check model is ready
-        if model.best_model is None:
-            # Try to train it now
-            print("⚠️  Model not ready, attempting to train...")
-            model.load_data()
-            model.train()
-            model.save()
-        
-        result = model.predict_simple(
+        result = prediction_cache.get_or_compute(key, lambda: model.predict_simple(
             event_type=input_data.event_type,
             city=input_data.city,
             duration_days=input_data.duration_days,
             attendance=input_data.attendance
-        )
+        ))
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -555,6 +568,42 @@ def predict_event_impact(input_data: schemas.PredictionInput):
         raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
 
 
+@router.post("/predict/batch", response_model=schemas.BatchPredictionResponse)
+def predict_event_impact_batch(input_data: schemas.BatchPredictionInput):
+    """
+    Predict economic impact for many events in one request.
+
+    Each event takes the same inputs as /predict. The whole batch is scored
+    with a single model call, so this is much faster than calling /predict
+    once per event. Results are returned in input order.
+    """
+    if len(input_data.events) > settings.MAX_BATCH_PREDICTION_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large (max {settings.MAX_BATCH_PREDICTION_ROWS} events)"
+        )
+
+    model = get_ml_model()
+
+    try:
+        events = pd.DataFrame([event.model_dump() for event in input_data.events])
+        predictions = model.predict_many(events)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
+
+    return {
+        "count": len(predictions),
+        "model_info": {
+            "model_used": model.best_model_name,
+            "model_r2": round(model.metrics[model.best_model_name]['r2'], 4),
+            "model_mape": round(model.metrics[model.best_model_name]['mape'], 2),
+        },
+        "results": predictions.to_dict(orient='records'),
+    }
+
+
 @router.post("/predict/detailed")
 def predict_event_impact_detailed(
     event_type: str = Query(..., description="Event type"),
@@ -592,14 +641,24 @@ def predict_event_impact_detailed(
     try:
         # Use predict_simple if no overrides, otherwise use predict directly
         if any([visitor_increase_pct, price_increase_pct, occupancy_boost]):
-            result = model.predict(params)
+            key = prediction_cache.key(model, 'detailed', *sorted(params.items()))
+            result = prediction_cache.get_or_compute(key, lambda: model.predict(params))
         else:
-            result = model.predict_simple(
+            key = prediction_cache.key(model, 'simple', event_type, city, duration_days, attendance)
+            result = prediction_cache.get_or_compute(key, lambda: model.predict_simple(
                 event_type=event_type,
                 city=city,
                 duration_days=duration_days,
                 attendance=attendance
-            )
+            ))
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/predict/cache/stats")
+def get_prediction_cache_stats():
+    """
+    Prediction cache counters (hits, misses, evictions, size) of this worker.
+    """
+    return prediction_cache.stats()
@@ -197,6 +197,22 @@ class EventImpactResponse(BaseModel):
         from_attributes = True
 
 
+class BatchAnalyzeItem(BaseModel):
+    """Outcome of one event of a batch analysis"""
+    event_id: int
+    status: str  # "created", "updated", "not_found" or "error"
+    error: Optional[str] = None
+    impact: Optional[EventImpactResponse] = None
+
+
+class BatchAnalyzeResponse(BaseModel):
+    """Batch analysis response (results in request order)"""
+    count: int
+    succeeded: int
+    failed: int
+    results: List[BatchAnalyzeItem]
+
+
 # ============================================================================
 # Analytics Schemas
 # ============================================================================
@@ -267,6 +283,54 @@ class DashboardKPIs(BaseModel):
     total_jobs_created: int
     highest_impact_event_name: Optional[str] = "N/A"
     highest_impact_city: Optional[str] = "N/A"
+    impact_job_id: Optional[int] = None  # Set while impacts are being calculated
+
+
+class ImpactJobResponse(BaseModel):
+    """Status and progress of a background impact recomputation job"""
+    job_id: int
+    status: str  # "queued", "running", "done" or "failed"
+    source: Optional[str] = None
+    total: int
+    processed: int
+    succeeded: int
+    failed: int
+    progress_pct: float
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ImportJobResponse(BaseModel):
+    """Status and progress of a background upload import job"""
+    job_id: int
+    kind: str  # "cities", "events", "hotel-metrics" or "tourism-metrics"
+    filename: str
+    status: str  # "queued", "running", "done" or "failed"
+    rows_processed: int
+    chunks: int
+    rows_per_second: float
+    error_count: int
+    errors: List[str] = []  # First row errors (capped)
+    result: Optional[Dict[str, Any]] = None  # Upload response once done
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class GlobeCityImpact(BaseModel):
+    """Impact totals of a city for the globe view"""
+    city_id: int
+    city_name: str
+    country: str
+    latitude: float
+    longitude: float
+    num_events: int
+    total_economic_impact_usd: float
+    total_jobs_created: int
+    top_event_name: Optional[str] = None
 
 
 # ============================================================================
@@ -368,6 +432,39 @@ class PredictionResponse(BaseModel):
     input_summary: Dict[str, Any]
 
 
+class BatchPredictionInput(BaseModel):
+    """Input for batch economic impact prediction"""
+    events: List[PredictionInput] = Field(..., min_length=1, description="Events to predict")
+
+
+class BatchPredictionItem(BaseModel):
+    """Prediction for one event of a batch"""
+    event_type: str
+    city: str
+    duration_days: int
+    attendance: int
+    total_economic_impact_usd: float
+    lower_bound_usd: float
+    upper_bound_usd: float
+    direct_spending_usd: float
+    indirect_spending_usd: float
+    induced_spending_usd: float
+    jobs_created: int
+    jobs_ratio_usd: float
+    roi_ratio: float
+    estimated_event_cost_usd: float
+    baseline_impact_usd: float
+    additional_impact_usd: float
+    impact_multiplier: float
+
+
+class BatchPredictionResponse(BaseModel):
+    """Batch prediction response (results in input order)"""
+    count: int
+    model_info: Dict[str, Any]
+    results: List[BatchPredictionItem]
+
+
 class AvailableCity(BaseModel):
     """Available city for prediction"""
     name: str
@@ -1,23 +1,86 @@
 """
 File upload endpoints for importing data from CSV/XLSX
 """
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
-import io
-from datetime import datetime
-from typing import List
 
-from app.core.database import get_db
-from app.models import City, Event, HotelMetric, TourismMetric, EconomicMetric
-from app.models.event import EventType
+from app.core.config import settings
+from app.core.database import ensure_tables, get_db
+from app.api import schemas
+from app.etl.import_jobs import import_upload, import_worker, missing_columns
+from app.etl.upload_stream import UploadReader
+from app.models import ImportJob, JobStatus
 
 router = APIRouter()
 
+# Server-Sent Events stream of an import job
+SSE_POLL_SECONDS = 0.5
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _import_job_response(job: ImportJob) -> dict:
+    """ImportJobResponse fields of a job"""
+    report = job.report or {}
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "filename": job.filename,
+        "status": JobStatus(job.status).value,
+        "rows_processed": job.rows_processed or 0,
+        "chunks": job.chunks or 0,
+        "rows_per_second": job.rows_per_second,
+        "error_count": job.error_count or 0,
+        "errors": report.get("errors", []),
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _handle_upload(kind: str, file: UploadFile, db: Session, wait: bool):
+    """
+    Check the header of an upload, then import it in the background
+    (202 with the import job) or, with wait=True, in the request.
+    """
+    if not (file.filename.endswith('.csv') or file.filename.endswith('.xlsx')):
+        raise HTTPException(status_code=400, detail="File must be CSV or XLSX format")
+
+    try:
+        # Only the header is read here: the rows are streamed in chunks
+        reader = UploadReader(file.file, file.filename)
+        missing = missing_columns(kind, reader.columns)
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Missing required columns: {', '.join(missing)}"
+            )
+
+        if wait:
+            return import_upload(db, kind, reader)
+
+        job = import_worker.enqueue(db, kind, file.file, file.filename)
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(_import_job_response(job)),
+            headers={"Location": f"{settings.API_V1_STR}/jobs/{job.id}"},
+        )
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+
 
 @router.post("/upload/cities")
-async def upload_cities_csv(
+def upload_cities_csv(
     file: UploadFile = File(...),
+    wait: bool = Query(False, description="Import in the request instead of a background job"),
     db: Session = Depends(get_db)
 ):
     """
@@ -35,84 +98,17 @@ async def upload_cities_csv(
     - annual_tourists (optional)
     - hotel_rooms (optional)
     - avg_hotel_price_usd (optional)
-    """
-
-    # Validate file type
-    if not (file.filename.endswith('.csv') or file.filename.endswith('.xlsx')):
-        raise HTTPException(
-            status_code=400,
-            detail="File must be CSV or XLSX format"
-        )
-
-    try:
-        # Read file
-        contents = await file.read()
-
-        # Parse based on file type
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        else:  # xlsx
-            df = pd.read_excel(io.BytesIO(contents))
-
-        # Validate required columns
-        required_columns = [
-            'name', 'country', 'country_code', 'continent',
-            'latitude', 'longitude', 'timezone'
-        ]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Missing required columns: {', '.join(missing_columns)}"
-            )
-
-        # Insert cities
-        cities_created = 0
-        cities_skipped = 0
-
-        for _, row in df.iterrows():
-            # Check if city already exists
-            existing = db.query(City).filter(City.name == row['name']).first()
-            if existing:
-                cities_skipped += 1
-                continue
-
-            # Create city
-            city = City(
-                name=row['name'],
-                country=row['country'],
-                country_code=row['country_code'],
-                continent=row['continent'],
-                latitude=float(row['latitude']),
-                longitude=float(row['longitude']),
-                timezone=row['timezone'],
-                population=int(row['population']) if pd.notna(row.get('population')) else None,
-                area_km2=float(row['area_km2']) if pd.notna(row.get('area_km2')) else None,
-                gdp_usd=float(row['gdp_usd']) if pd.notna(row.get('gdp_usd')) else None,
-                annual_tourists=int(row['annual_tourists']) if pd.notna(row.get('annual_tourists')) else None,
-                hotel_rooms=int(row['hotel_rooms']) if pd.notna(row.get('hotel_rooms')) else None,
-                avg_hotel_price_usd=float(row['avg_hotel_price_usd']) if pd.notna(row.get('avg_hotel_price_usd')) else None,
-            )
-            db.add(city)
-            cities_created += 1
-
-        db.commit()
 
-        return {
-            "message": "Cities imported successfully",
-            "cities_created": cities_created,
-            "cities_skipped": cities_skipped,
-            "total_rows": len(df)
-        }
-
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    Returns 202 with an import job (see /jobs/{job_id}/events for progress)
+    unless wait=true.
+    """
+    return _handle_upload("cities", file, db, wait)
 
 
 @router.post("/upload/events")
-async def upload_events_csv(
+def upload_events_csv(
     file: UploadFile = File(...),
+    wait: bool = Query(False, description="Import in the request instead of a background job"),
     db: Session = Depends(get_db)
 ):
     """
@@ -128,89 +124,17 @@ async def upload_events_csv(
     - actual_attendance (optional)
     - venue_name (optional)
     - description (optional)
-    """
-
-    if not (file.filename.endswith('.csv') or file.filename.endswith('.xlsx')):
-        raise HTTPException(status_code=400, detail="File must be CSV or XLSX")
-
-    try:
-        contents = await file.read()
-
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-
-        # Validate required columns
-        required = ['name', 'city_name', 'event_type', 'start_date', 'end_date']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Missing columns: {', '.join(missing)}"
-            )
-
-        events_created = 0
-        events_skipped = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                # Get city
-                city = db.query(City).filter(City.name == row['city_name']).first()
-                if not city:
-                    errors.append(f"Row {idx+1}: City '{row['city_name']}' not found")
-                    continue
-
-                # Parse dates
-                start_date = pd.to_datetime(row['start_date']).date()
-                end_date = pd.to_datetime(row['end_date']).date()
-
-                # Validate event type
-                try:
-                    event_type = EventType(row['event_type'].lower())
-                except ValueError:
-                    errors.append(f"Row {idx+1}: Invalid event_type '{row['event_type']}'")
-                    continue
-
-                # Create event
-                event = Event(
-                    city_id=city.id,
-                    name=row['name'],
-                    event_type=event_type,
-                    description=row.get('description', ''),
-                    start_date=start_date,
-                    end_date=end_date,
-                    year=start_date.year,
-                    expected_attendance=int(row['expected_attendance']) if pd.notna(row.get('expected_attendance')) else None,
-                    actual_attendance=int(row['actual_attendance']) if pd.notna(row.get('actual_attendance')) else None,
-                    venue_name=row.get('venue_name'),
-                    is_recurring=bool(row.get('is_recurring', False)),
-                )
-                db.add(event)
-                events_created += 1
-
-            except Exception as e:
-                errors.append(f"Row {idx+1}: {str(e)}")
-                continue
-
-        db.commit()
-
-        return {
-            "message": "Events imported",
-            "events_created": events_created,
-            "total_rows": len(df),
-            "errors": errors if errors else None
-        }
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
+    Returns 202 with an import job (see /jobs/{job_id}/events for progress)
+    unless wait=true.
+    """
+    return _handle_upload("events", file, db, wait)
 
 
 @router.post("/upload/hotel-metrics")
-async def upload_hotel_metrics_csv(
+def upload_hotel_metrics_csv(
     file: UploadFile = File(...),
+    wait: bool = Query(False, description="Import in the request instead of a background job"),
     db: Session = Depends(get_db)
 ):
     """
@@ -223,91 +147,17 @@ async def upload_hotel_metrics_csv(
     - avg_price_usd (optional)
     - available_rooms (optional)
     - occupied_rooms (optional)
-    """
-
-    if not (file.filename.endswith('.csv') or file.filename.endswith('.xlsx')):
-        raise HTTPException(status_code=400, detail="File must be CSV or XLSX")
-
-    try:
-        contents = await file.read()
 
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-
-        # Validate
-        required = ['city_name', 'date']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(status_code=400, detail=f"Missing: {', '.join(missing)}")
-
-        metrics_created = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                # Get city
-                city = db.query(City).filter(City.name == row['city_name']).first()
-                if not city:
-                    errors.append(f"Row {idx+1}: City not found")
-                    continue
-
-                # Parse date
-                metric_date = pd.to_datetime(row['date']).date()
-
-                # Check if metric already exists
-                existing = db.query(HotelMetric).filter(
-                    HotelMetric.city_id == city.id,
-                    HotelMetric.date == metric_date
-                ).first()
-
-                if existing:
-                    # Update existing
-                    if pd.notna(row.get('occupancy_rate_pct')):
-                        existing.occupancy_rate_pct = float(row['occupancy_rate_pct'])
-                    if pd.notna(row.get('avg_price_usd')):
-                        existing.avg_price_usd = float(row['avg_price_usd'])
-                    if pd.notna(row.get('available_rooms')):
-                        existing.available_rooms = int(row['available_rooms'])
-                    if pd.notna(row.get('occupied_rooms')):
-                        existing.occupied_rooms = int(row['occupied_rooms'])
-                else:
-                    # Create new
-                    metric = HotelMetric(
-                        city_id=city.id,
-                        date=metric_date,
-                        occupancy_rate_pct=float(row['occupancy_rate_pct']) if pd.notna(row.get('occupancy_rate_pct')) else None,
-                        avg_price_usd=float(row['avg_price_usd']) if pd.notna(row.get('avg_price_usd')) else None,
-                        available_rooms=int(row['available_rooms']) if pd.notna(row.get('available_rooms')) else None,
-                        occupied_rooms=int(row['occupied_rooms']) if pd.notna(row.get('occupied_rooms')) else None,
-                        median_price_usd=float(row['median_price_usd']) if pd.notna(row.get('median_price_usd')) else None,
-                    )
-                    db.add(metric)
-
-                metrics_created += 1
-
-            except Exception as e:
-                errors.append(f"Row {idx+1}: {str(e)}")
-                continue
-
-        db.commit()
-
-        return {
-            "message": "Hotel metrics imported",
-            "metrics_created": metrics_created,
-            "total_rows": len(df),
-            "errors": errors if errors else None
-        }
-
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+    Returns 202 with an import job (see /jobs/{job_id}/events for progress)
+    unless wait=true.
+    """
+    return _handle_upload("hotel-metrics", file, db, wait)
 
 
 @router.post("/upload/tourism-metrics")
-async def upload_tourism_metrics_csv(
+def upload_tourism_metrics_csv(
     file: UploadFile = File(...),
+    wait: bool = Query(False, description="Import in the request instead of a background job"),
     db: Session = Depends(get_db)
 ):
     """
@@ -320,55 +170,86 @@ async def upload_tourism_metrics_csv(
     - international_visitors (optional)
     - domestic_visitors (optional)
     - avg_spending_per_visitor_usd (optional)
-    """
-
-    if not (file.filename.endswith('.csv') or file.filename.endswith('.xlsx')):
-        raise HTTPException(status_code=400, detail="File must be CSV or XLSX")
-
-    try:
-        contents = await file.read()
-
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
 
-        required = ['city_name', 'date']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(status_code=400, detail=f"Missing: {', '.join(missing)}")
-
-        metrics_created = 0
+    Returns 202 with an import job (see /jobs/{job_id}/events for progress)
+    unless wait=true.
+    """
+    return _handle_upload("tourism-metrics", file, db, wait)
 
-        for idx, row in df.iterrows():
-            city = db.query(City).filter(City.name == row['city_name']).first()
-            if not city:
-                continue
 
-            metric_date = pd.to_datetime(row['date']).date()
+@router.get("/jobs/{job_id}", response_model=schemas.ImportJobResponse)
+def get_import_job(job_id: int, db: Session = Depends(get_db)):
+    """Status, progress and (once done) result of an import job"""
+    ensure_tables(db, ImportJob.__table__)
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _import_job_response(job)
 
-            metric = TourismMetric(
-                city_id=city.id,
-                date=metric_date,
-                total_visitors=int(row['total_visitors']) if pd.notna(row.get('total_visitors')) else None,
-                international_visitors=int(row['international_visitors']) if pd.notna(row.get('international_visitors')) else None,
-                domestic_visitors=int(row['domestic_visitors']) if pd.notna(row.get('domestic_visitors')) else None,
-                avg_spending_per_visitor_usd=float(row['avg_spending_per_visitor_usd']) if pd.notna(row.get('avg_spending_per_visitor_usd')) else None,
-            )
-            db.add(metric)
-            metrics_created += 1
 
-        db.commit()
+@router.get("/jobs/{job_id}/events")
+async def stream_import_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Server-Sent Events stream of an import job.
 
-        return {
-            "message": "Tourism metrics imported",
-            "metrics_created": metrics_created,
-            "total_rows": len(df)
-        }
+    Sends a "progress" event whenever the status, rows processed, chunks or
+    errors change (with the current rows per second and the errors reported
+    since the previous event), then a final "done" or "failed" event with
+    the result, and closes.
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+    The request session is closed before the body streams, so every poll
+    reads the job with a short-lived session of its own, off the event loop.
+    """
+    ensure_tables(db, ImportJob.__table__)
+    if not db.get(ImportJob, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    def poll() -> tuple:
+        """(response fields, finished) of the job, read with a fresh session"""
+        session = import_worker.session_factory()
+        try:
+            job = session.get(ImportJob, job_id)
+            return _import_job_response(job), job.is_finished
+        finally:
+            session.close()
+
+    async def events():
+        last = None
+        errors_sent = 0
+        idle = 0.0
+        while True:
+            state, finished = await run_in_threadpool(poll)
+            errors = state.pop("errors")
+            # The rate changes on every poll: it is sent, but not compared
+            changed = {key: value for key, value in state.items() if key != "rows_per_second"}
+            if finished:
+                event = state["status"]
+            elif changed != last:
+                event = "progress"
+            else:
+                event = None
+
+            if event is not None:
+                state["new_errors"] = errors[errors_sent:]
+                errors_sent = len(errors)
+                yield f"event: {event}\ndata: {json.dumps(jsonable_encoder(state))}\n\n"
+                last = changed
+                idle = 0.0
+            elif idle >= SSE_HEARTBEAT_SECONDS:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                idle = 0.0
+
+            if finished:
+                return
+            await asyncio.sleep(SSE_POLL_SECONDS)
+            idle += SSE_POLL_SECONDS
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/templates/cities")
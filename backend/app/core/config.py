@@ -1,6 +1,8 @@
 """
 Application configuration using Pydantic Settings
 """
+import os
+import tempfile
 from typing import List
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -35,16 +37,44 @@ class Settings(BaseSettings):
     # External APIs
     AIRROI_API_KEY: str = Field(default="", env="AIRROI_API_KEY")
     AIRROI_BASE_URL: str = "https://www.airroi.com/data-portal"
+    AIRROI_MAX_CONCURRENCY: int = 8  # Work units (city, source, month) fetched at once
+    AIRROI_RATE_LIMIT_PER_SECOND: float = 10.0  # Sustained request rate allowed by the API quota
+    AIRROI_RATE_LIMIT_BURST: int = 10  # Requests that may be sent back to back
+    AIRROI_MAX_RETRIES: int = 5  # Retries of a request answered with 429/5xx or a network error
+    AIRROI_BACKOFF_BASE_SECONDS: float = 0.5  # First retry delay, doubled on each attempt
+    AIRROI_BACKOFF_MAX_SECONDS: float = 30.0
+    AIRROI_CACHE_DIR: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "evently-airroi-cache"),
+        env="AIRROI_CACHE_DIR"
+    )  # Cached AIRROI responses, revalidated with their ETag once stale
+    AIRROI_CACHE_TTL_SECONDS: int = 6 * 3600  # Responses reused without a request (0 disables the cache)
 
     # Analytics
     DEFAULT_ANALYSIS_WINDOW_DAYS: int = 30
     EVENT_IMPACT_WINDOW_BEFORE_DAYS: int = 14
     EVENT_IMPACT_WINDOW_AFTER_DAYS: int = 14
+    IMPACT_JOB_BATCH_SIZE: int = 500  # Events recomputed per commit by the background worker
+
+    # Uploads
+    UPLOAD_CHUNK_ROWS: int = 50000  # Rows parsed, validated and committed at a time
+    UPLOAD_SPOOL_DIR: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "evently-uploads"),
+        env="UPLOAD_SPOOL_DIR"
+    )  # Uploaded files waiting for (or being processed by) an import job
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = 50
     MAX_PAGE_SIZE: int = 1000
 
+    # ML Predictions
+    MAX_BATCH_PREDICTION_ROWS: int = 100000
+    ML_TRAINING_CPU_BUDGET: int = 0  # Worker processes for model training (0 = all CPUs)
+    TOURISM_FORECAST_BACKEND: str = "auto"  # "prophet", "holt_winters", "random_forest" or "auto" (Prophet if installed)
+    FORECAST_HORIZON_DAYS: int = 365  # Days of every city's metric forecasts kept precomputed
+    MODEL_REGISTRY_POLL_SECONDS: int = 30  # How often API processes check for a new model version
+    PREDICTION_CACHE_MAX_ENTRIES: int = 10000  # Cached prediction responses per process (0 = off)
+    PREDICTION_CACHE_TTL_SECONDS: int = 3600
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,7 +1,8 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+import weakref
+from sqlalchemy import create_engine, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -33,3 +34,110 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Engines on which ensure_tables() already ran, per table name
+_ensured_tables = weakref.WeakKeyDictionary()
+
+
+def ensure_tables(db, *tables):
+    """
+    Create tables that were added after the database was set up (once per engine)
+
+    Args:
+        db: Session (or engine) whose database should have the tables
+        tables: Table objects, e.g. ImpactCube.__table__
+    """
+    engine = db.get_bind() if hasattr(db, "get_bind") else db
+    ensured = _ensured_tables.setdefault(engine, set())
+    missing = [table for table in tables if table.name not in ensured]
+    if missing:
+        Base.metadata.create_all(bind=engine, tables=missing, checkfirst=True)
+        ensured.update(table.name for table in missing)
+
+
+def chunked(values, size):
+    """
+    Split values into consecutive lists of at most size items
+
+    Keeps IN (...) queries under the database's bound parameter limits.
+
+    Args:
+        values: Iterable to split (consumed once)
+        size: Maximum number of items per list
+    """
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def upsert_statement(db, table, keys, update_columns, coalesce=False):
+    """
+    INSERT ... ON CONFLICT (keys) DO UPDATE for PostgreSQL and SQLite
+
+    Args:
+        db: Session (or engine) the statement will run on
+        table: Target Table
+        keys: Columns of a unique index, e.g. ('city_id', 'date')
+        update_columns: Columns overwritten on conflict
+        coalesce: Keep the stored value where the new one is NULL
+
+    Raises:
+        NotImplementedError: For other database backends
+    """
+    engine = db.get_bind() if hasattr(db, "get_bind") else db
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported on {engine.dialect.name}")
+
+    statement = insert(table)
+    values = {
+        column: (
+            func.coalesce(statement.excluded[column], table.c[column])
+            if coalesce else statement.excluded[column]
+        )
+        for column in update_columns
+    }
+    if not values:
+        return statement.on_conflict_do_nothing(index_elements=list(keys))
+    return statement.on_conflict_do_update(index_elements=list(keys), set_=values)
+
+
+def upsert_records(db, model, records, keys=("city_id", "date"), update_columns=None, coalesce=False):
+    """
+    Insert rows, updating the existing row when the key already exists
+
+    Records repeating a key are merged first (later non-NULL values win
+    when coalescing, later records otherwise), since one statement may
+    not update the same row twice.
+
+    Args:
+        db: Database session (the caller commits)
+        model: Mapped class, e.g. HotelMetric
+        records: Dicts of column values, all with the same columns
+        keys: Columns of a unique index of the table
+        update_columns: Columns overwritten on conflict (default: all non-key columns given)
+        coalesce: Keep stored values where the new value is None
+
+    Returns:
+        Number of distinct keys written
+    """
+    merged = {}
+    for record in records:
+        key = tuple(record[column] for column in keys)
+        if coalesce and key in merged:
+            previous = merged[key]
+            record = {column: (value if value is not None else previous.get(column)) for column, value in record.items()}
+        merged[key] = record
+    if not merged:
+        return 0
+
+    rows = list(merged.values())
+    if update_columns is None:
+        update_columns = [column for column in rows[0] if column not in keys]
+    statement = upsert_statement(db, model.__table__, keys, update_columns, coalesce=coalesce)
+    db.execute(statement, rows)
+    return len(rows)
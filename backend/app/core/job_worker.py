@@ -0,0 +1,155 @@
+"""
+Job Worker - Base class for background workers backed by a job table
+
+A worker owns one daemon thread and an in-process queue of job IDs. Request
+handlers store a job row, put its ID on the queue and return immediately;
+the thread calls process() for each ID. The job table is the source of
+truth: when the thread starts it requeues jobs that were still queued or
+running when the process stopped.
+"""
+import queue
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, ensure_tables
+from app.models import JobStatus
+
+
+class JobWorker(ABC):
+    """
+    Single background thread processing the rows of a job table.
+
+    Subclasses set job_model (a model with id, status, error and
+    finished_at columns) and implement process(job_id). An exception
+    escaping process() marks that job as failed; the thread carries on
+    with the next one.
+    """
+
+    job_model = None
+    name = "job-worker"
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        """
+        Args:
+            session_factory: Creates the worker's own database sessions
+        """
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._recovered = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Thread lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        """
+        Start the worker thread (no-op if it is running).
+
+        Returns:
+            True if this call started the thread
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._recovered.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop after the current job"""
+        self._stop.set()
+        self._queue.put(None)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        """Worker thread body: recover unfinished jobs, then process the queue"""
+        self._recover()
+        self._recovered.set()
+        while not self._stop.is_set():
+            job_id = self._queue.get()
+            try:
+                if job_id is not None:
+                    self.process(job_id)
+            except Exception as e:
+                print(f"❌ {self.name}: job {job_id} crashed: {e}")
+                self._mark_failed(job_id, e)
+            finally:
+                self._queue.task_done()
+
+    def _mark_failed(self, job_id: int, error: Exception):
+        """Record a job whose process() raised as failed"""
+        try:
+            db = self.session_factory()
+            try:
+                job = db.get(self.job_model, job_id)
+                if job is not None and not job.is_finished:
+                    job.status = JobStatus.FAILED
+                    job.error = str(error)[:1000]
+                    job.finished_at = datetime.now(timezone.utc)
+                    db.commit()
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"⚠️  Warning: Could not mark {self.job_model.__tablename__} {job_id} as failed: {e}")
+
+    def _recover(self):
+        """Requeue jobs left queued or running by a previous process"""
+        model = self.job_model
+        try:
+            db = self.session_factory()
+            try:
+                ensure_tables(db, model.__table__)
+                job_ids = [
+                    job_id for (job_id,) in
+                    db.query(model.id)
+                    .filter(model.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+                    .order_by(model.id)
+                ]
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"⚠️  Warning: Could not recover {model.__tablename__}: {e}")
+            return
+
+        for job_id in job_ids:
+            self._queue.put(job_id)
+        if job_ids:
+            print(f"   ✓ Requeued {len(job_ids)} unfinished {model.__tablename__}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until recovered and queued jobs are done; True if they were"""
+        done = threading.Event()
+
+        def join():
+            if self.is_running:
+                self._recovered.wait()
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=join, daemon=True).start()
+        return done.wait(timeout)
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, job_id: int):
+        """Queue a committed job and make sure the thread is running"""
+        self._queue.put(job_id)
+        self.start()
+
+    @abstractmethod
+    def process(self, job_id: int):
+        """Run one job in the calling thread"""
@@ -0,0 +1,167 @@
+"""
+One-off schema migrations for databases created before a model change
+
+The project creates its tables with Base.metadata.create_all(), which never
+alters existing tables. The functions here bring older databases in line
+with the models; each one checks the current schema first, so running it
+again is a no-op.
+
+Run by hand with:
+    python -m app.core.migrations
+
+Nothing here runs on startup: the API only checks the schema
+(missing_unique_keys()) and reports what still needs migrating.
+"""
+from typing import Dict, List
+from sqlalchemy import delete, func, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import EconomicMetric, EventImpact, HotelMetric, MobilityMetric, TourismMetric
+
+
+METRIC_MODELS = [TourismMetric, HotelMetric, EconomicMetric, MobilityMetric]
+METRIC_KEY = ["city_id", "date"]
+IMPACT_KEY = ["event_id"]
+
+# Tables with a unique key index: (model, key columns)
+UNIQUE_KEYS = [(model, METRIC_KEY) for model in METRIC_MODELS] + [(EventImpact, IMPACT_KEY)]
+
+
+def dedupe_rows(engine: Engine, model, key: List[str], keep=func.max) -> int:
+    """
+    Delete duplicate key rows of a table, keeping one row (by id) per key.
+
+    Args:
+        keep: func.max keeps the most recently inserted row, func.min the oldest
+
+    Returns:
+        Number of rows deleted
+    """
+    table = model.__table__
+    kept = select(keep(table.c.id)).group_by(*(table.c[column] for column in key))
+    with engine.begin() as connection:
+        result = connection.execute(delete(table).where(table.c.id.not_in(kept)))
+    return result.rowcount
+
+
+def dedupe_metrics(engine: Engine, model) -> int:
+    """
+    Delete duplicate (city_id, date) rows of a metrics table.
+
+    The most recently inserted row (highest id) of each key is kept, as it
+    holds the latest upload of that day.
+
+    Returns:
+        Number of rows deleted
+    """
+    return dedupe_rows(engine, model, METRIC_KEY, keep=func.max)
+
+
+def dedupe_impacts(engine: Engine) -> int:
+    """
+    Delete duplicate EventImpact rows of an event.
+
+    The oldest row (lowest id) is kept: it is the one the analyzers read
+    and updated.
+
+    Returns:
+        Number of rows deleted
+    """
+    return dedupe_rows(engine, EventImpact, IMPACT_KEY, keep=func.min)
+
+
+def _key_index(model, key: List[str]):
+    """The index over the key columns declared on the model"""
+    return next(
+        index for index in model.__table__.indexes
+        if [column.name for column in index.columns] == key
+    )
+
+
+def _has_unique_key(inspector, model, key: List[str]) -> bool:
+    """Whether the table's key index exists and is unique"""
+    index = _key_index(model, key)
+    current = {item["name"]: item for item in inspector.get_indexes(model.__table__.name)}
+    return index.name in current and bool(current[index.name]["unique"])
+
+
+def missing_unique_keys(engine: Engine) -> List[str]:
+    """
+    Existing tables whose key index is not unique yet.
+
+    Read-only: run the migrations (python -m app.core.migrations) to fix them.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    return [
+        model.__table__.name for model, key in UNIQUE_KEYS
+        if model.__table__.name in existing_tables and not _has_unique_key(inspector, model, key)
+    ]
+
+
+def _make_unique(engine: Engine, model, key: List[str], dedupe) -> int:
+    """Deduplicate a table, then replace its key index by the unique one"""
+    table = model.__table__
+    index = _key_index(model, key)
+    current = {item["name"] for item in inspect(engine).get_indexes(table.name)}
+
+    deleted = dedupe()
+    with engine.begin() as connection:
+        if index.name in current:
+            connection.exec_driver_sql(f"DROP INDEX {index.name}")
+        index.create(bind=connection)
+    print(f"   ✓ {table.name}: {deleted} duplicate rows removed, ({', '.join(key)}) is unique")
+    return deleted
+
+
+def ensure_unique_metric_keys(engine: Engine) -> Dict[str, int]:
+    """
+    Make (city_id, date) unique on every metrics table.
+
+    Tables whose index is not unique yet are deduplicated, then the old
+    index is replaced by the unique one from the models.
+
+    Returns:
+        Duplicate rows deleted per migrated table
+    """
+    pending = set(missing_unique_keys(engine))
+    return {
+        model.__table__.name: _make_unique(engine, model, METRIC_KEY, lambda: dedupe_metrics(engine, model))
+        for model in METRIC_MODELS
+        if model.__table__.name in pending
+    }
+
+
+def ensure_unique_impact_keys(engine: Engine) -> int:
+    """
+    Make event_id unique on event_impacts (one impact row per event).
+
+    Duplicates are deleted and the whole impact cube is rebuilt from the
+    remaining rows.
+
+    Returns:
+        Duplicate rows deleted (0 if the index was already unique)
+    """
+    if EventImpact.__tablename__ not in missing_unique_keys(engine):
+        return 0
+    deleted = _make_unique(engine, EventImpact, IMPACT_KEY, lambda: dedupe_impacts(engine))
+    if deleted:
+        from app.analytics.impact_cube import refresh_impact_cube
+
+        with Session(bind=engine) as db:
+            refresh_impact_cube(db)
+            db.commit()
+    return deleted
+
+
+if __name__ == "__main__":
+    from app.core.database import engine
+
+    print("🔧 Migrating metrics tables to unique (city_id, date) keys...")
+    result = ensure_unique_metric_keys(engine)
+    print(f"✅ Done ({len(result)} tables migrated)")
+
+    print("🔧 Migrating event_impacts to one row per event...")
+    deleted = ensure_unique_impact_keys(engine)
+    print(f"✅ Done ({deleted} duplicate impacts removed)")
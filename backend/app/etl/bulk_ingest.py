@@ -0,0 +1,384 @@
+"""
+Bulk ingestion of uploaded CSV/XLSX data
+
+The upload endpoints used to walk DataFrames with iterrows(), look up the
+city of every row with its own query and add ORM objects one by one. The
+BulkIngestor instead:
+  1. resolves the city name -> id map once per upload
+  2. validates and types whole columns at a time (pd.to_numeric /
+     pd.to_datetime with errors='coerce'), turning bad cells into per-row
+     errors
+  3. writes rows with PostgreSQL COPY, or a single executemany on other
+     databases (SQLite); metrics are upserted on their (city_id, date) key
+     so uploading a file twice does not duplicate rows
+
+Reports keep the shape the endpoints returned before (created / skipped
+counts and "Row N: ..." errors).
+"""
+import io
+import uuid
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.database import upsert_records
+from app.analytics.dirty_ranges import DirtyRanges
+from app.models import City, Event, HotelMetric, TourismMetric
+from app.models.event import EventType
+
+
+# Optional numeric columns of each upload, by target type
+CITY_FLOAT_COLUMNS = ['area_km2', 'gdp_usd', 'avg_hotel_price_usd']
+CITY_INT_COLUMNS = ['population', 'annual_tourists', 'hotel_rooms']
+EVENT_INT_COLUMNS = ['expected_attendance', 'actual_attendance']
+HOTEL_FLOAT_COLUMNS = ['occupancy_rate_pct', 'avg_price_usd', 'median_price_usd']
+HOTEL_INT_COLUMNS = ['available_rooms', 'occupied_rooms']
+TOURISM_FLOAT_COLUMNS = ['avg_spending_per_visitor_usd']
+TOURISM_INT_COLUMNS = ['total_visitors', 'international_visitors', 'domestic_visitors']
+# Unique key of the metrics tables
+METRIC_KEY = ['city_id', 'date']
+
+
+class BulkIngestor:
+    """
+    Vectorized, set-based writer for the /upload endpoints.
+
+    One ingestor can be fed several chunks of the same upload: the city
+    map is resolved once and the dirty ranges and new event IDs accumulate.
+
+    Usage:
+        ingestor = BulkIngestor(db)
+        report = ingestor.ingest_hotel_metrics(df)
+        db.commit()
+        enqueue_affected_impacts(db, ingestor.dirty, source="upload:hotel-metrics")
+    """
+
+    def __init__(self, db: Session):
+        """
+        Args:
+            db: Database session (the caller commits)
+        """
+        self.db = db
+        self.dirty = DirtyRanges()
+        self.created_event_ids: List[int] = []
+        self._cities: Optional[Dict[str, int]] = None
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @property
+    def cities(self) -> Dict[str, int]:
+        """City name -> id, loaded once"""
+        if self._cities is None:
+            self._cities = dict(self.db.query(City.name, City.id).all())
+        return self._cities
+
+    def _city_ids(self, names: pd.Series) -> pd.Series:
+        """City id of each row (NaN where the city does not exist)"""
+        return names.map(self.cities)
+
+    @staticmethod
+    def _row_numbers(df: pd.DataFrame, row_offset: int) -> pd.Series:
+        """1-based row numbers as reported to the user"""
+        return pd.Series(df.index, index=df.index) + 1 + row_offset
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, column: str, integer: bool = False):
+        """
+        Typed column and mask of cells that are present but not numeric.
+
+        Integers are truncated like int(); missing columns are all missing.
+        """
+        if column not in df.columns:
+            return pd.Series(np.nan, index=df.index), pd.Series(False, index=df.index)
+        raw = df[column]
+        values = pd.to_numeric(raw, errors='coerce')
+        invalid = values.isna() & raw.notna()
+        if integer:
+            values = np.trunc(values).astype('Int64')
+        return values, invalid
+
+    @staticmethod
+    def _dates(series: pd.Series):
+        """Dates (datetime.date) and mask of unparseable cells"""
+        parsed = pd.to_datetime(series, errors='coerce')
+        invalid = parsed.isna()
+        return parsed.dt.date.where(~invalid, None), invalid
+
+    @staticmethod
+    def _text(df: pd.DataFrame, column: str, default=None) -> pd.Series:
+        if column not in df.columns:
+            return pd.Series(default, index=df.index, dtype=object)
+        return df[column].astype(object).where(df[column].notna(), None)
+
+    @staticmethod
+    def _records(frame: pd.DataFrame) -> List[Dict]:
+        """Rows as dicts of plain Python values (None for missing)"""
+        columns = []
+        for column in frame.columns:
+            values = frame[column].to_numpy(dtype=object, na_value=None)
+            values[pd.isna(values)] = None
+            columns.append(values)
+        return [dict(zip(frame.columns, row)) for row in zip(*columns)]
+
+    def _copy(self, table_name: str, frame: pd.DataFrame) -> bool:
+        """COPY rows into a table on PostgreSQL; False on other databases"""
+        connection = self.db.connection()
+        if connection.dialect.name != 'postgresql':
+            return False
+        cursor = connection.connection.cursor()
+        if not hasattr(cursor, 'copy_expert'):
+            return False
+
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False, na_rep='\\N')
+        buffer.seek(0)
+        columns = ', '.join(frame.columns)
+        cursor.copy_expert(
+            f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+        return True
+
+    def _with_metadata(self, model, frame: pd.DataFrame) -> pd.DataFrame:
+        """Add the JSON default the ORM would set ('{}')"""
+        frame = frame.copy()
+        if 'metadata_json' in model.__table__.columns and 'metadata_json' not in frame.columns:
+            frame['metadata_json'] = '{}'
+        return frame
+
+    def _insert(self, model, frame: pd.DataFrame) -> int:
+        """Insert rows with COPY on PostgreSQL, executemany elsewhere"""
+        if frame.empty:
+            return 0
+        if self._copy(model.__tablename__, self._with_metadata(model, frame)):
+            return len(frame)
+
+        records = self._records(frame)
+        if 'metadata_json' in model.__table__.columns:
+            for record in records:
+                record.setdefault('metadata_json', {})
+        self.db.execute(insert(model.__table__), records)
+        return len(frame)
+
+    def _upsert(self, model, frame: pd.DataFrame, update_columns: List[str]) -> int:
+        """
+        Upsert metric rows keyed on (city_id, date), keeping stored values
+        where the upload has none.
+
+        PostgreSQL: COPY into a temporary staging table, then one
+        INSERT ... SELECT ... ON CONFLICT DO UPDATE. Elsewhere: executemany
+        of the dialect's ON CONFLICT statement.
+        """
+        if frame.empty:
+            return 0
+        # One statement may not update a row twice: combine repeated keys
+        # (GroupBy.last() keeps the last non-missing value of each column)
+        frame = frame.groupby(METRIC_KEY, sort=False).last().reset_index()
+
+        table = model.__tablename__
+        stage = f"stage_{table}_{uuid.uuid4().hex[:8]}"
+        staged = self._with_metadata(model, frame)
+        connection = self.db.connection()
+        if connection.dialect.name == 'postgresql':
+            columns = ', '.join(staged.columns)
+            connection.exec_driver_sql(
+                f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            if self._copy(stage, staged):
+                assignments = ', '.join(
+                    f"{column} = COALESCE(EXCLUDED.{column}, {table}.{column})" for column in update_columns
+                )
+                connection.exec_driver_sql(
+                    f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage} "
+                    f"ON CONFLICT ({', '.join(METRIC_KEY)}) DO UPDATE SET {assignments}"
+                )
+                connection.exec_driver_sql(f"DROP TABLE {stage}")
+                return len(frame)
+            connection.exec_driver_sql(f"DROP TABLE {stage}")
+
+        records = self._records(frame)
+        if 'metadata_json' in model.__table__.columns:
+            for record in records:
+                record['metadata_json'] = {}
+        return upsert_records(
+            self.db, model, records, keys=METRIC_KEY, update_columns=update_columns, coalesce=True,
+        )
+
+    def _record_dirty(self, city_ids: pd.Series, dates: pd.Series):
+        """Add the written (city_id, day) slices to the dirty ranges"""
+        pairs = pd.DataFrame({'city_id': city_ids, 'date': pd.to_datetime(dates)})
+        for city_id, group in pairs.drop_duplicates().groupby('city_id'):
+            self.dirty.add_days(int(city_id), group['date'].dt.date)
+
+    # ------------------------------------------------------------------
+    # Uploads
+    # ------------------------------------------------------------------
+
+    def ingest_cities(self, df: pd.DataFrame, row_offset: int = 0) -> Dict:
+        """
+        Insert cities whose name does not exist yet.
+
+        Raises:
+            ValueError: If a required numeric column has invalid values
+        """
+        rows = self._row_numbers(df, row_offset)
+        frame = pd.DataFrame({
+            column: self._text(df, column)
+            for column in ['name', 'country', 'country_code', 'continent', 'timezone']
+        })
+        for column in ['latitude', 'longitude']:
+            values, invalid = self._numeric(df, column)
+            invalid |= values.isna()
+            if invalid.any():
+                raise ValueError(f"Row {rows[invalid].iloc[0]}: invalid {column} '{df[column][invalid].iloc[0]}'")
+            frame[column] = values
+        for column in CITY_FLOAT_COLUMNS + CITY_INT_COLUMNS:
+            values, invalid = self._numeric(df, column, integer=column in CITY_INT_COLUMNS)
+            if invalid.any():
+                raise ValueError(f"Row {rows[invalid].iloc[0]}: invalid {column} '{df[column][invalid].iloc[0]}'")
+            frame[column] = values
+
+        # Skip existing cities and repeated names within the upload
+        skip = frame['name'].isin(self.cities.keys()) | frame['name'].duplicated()
+        new = frame[~skip]
+        created = self._insert(City, new)
+        if created:
+            # Later chunks must see the new cities
+            self._cities = None
+
+        return {"cities_created": created, "cities_skipped": int(skip.sum())}
+
+    def ingest_events(self, df: pd.DataFrame, row_offset: int = 0) -> Dict:
+        """Insert events; rows with unknown cities, bad dates or types are reported"""
+        rows = self._row_numbers(df, row_offset)
+        errors = pd.Series(None, index=df.index, dtype=object)
+
+        def flag(mask: pd.Series, messages: pd.Series):
+            new = mask & errors.isna()
+            errors[new] = messages[new]
+
+        city_ids = self._city_ids(df['city_name'])
+        flag(city_ids.isna(), "Row " + rows.astype(str) + ": City '" + df['city_name'].astype(str) + "' not found")
+
+        start_dates, bad_start = self._dates(df['start_date'])
+        end_dates, bad_end = self._dates(df['end_date'])
+        flag(bad_start, "Row " + rows.astype(str) + ": Invalid start_date '" + df['start_date'].astype(str) + "'")
+        flag(bad_end, "Row " + rows.astype(str) + ": Invalid end_date '" + df['end_date'].astype(str) + "'")
+
+        event_types = df['event_type'].astype(str).str.lower()
+        valid_types = {event_type.value for event_type in EventType}
+        flag(
+            ~event_types.isin(valid_types),
+            "Row " + rows.astype(str) + ": Invalid event_type '" + df['event_type'].astype(str) + "'",
+        )
+
+        columns = {}
+        for column in EVENT_INT_COLUMNS:
+            values, invalid = self._numeric(df, column, integer=True)
+            if column in df.columns:
+                flag(invalid, "Row " + rows.astype(str) + f": Invalid {column} '" + df[column].astype(str) + "'")
+            columns[column] = values
+
+        ok = errors.isna()
+        if 'is_recurring' in df.columns:
+            is_recurring = df['is_recurring'].fillna(False).astype(bool).astype(int)
+        else:
+            is_recurring = pd.Series(0, index=df.index)
+
+        frame = pd.DataFrame({
+            'city_id': city_ids,
+            'name': self._text(df, 'name'),
+            'event_type': event_types.map(lambda value: EventType(value) if value in valid_types else None),
+            'description': self._text(df, 'description', default=''),
+            'start_date': start_dates,
+            'end_date': end_dates,
+            'year': pd.to_datetime(df['start_date'], errors='coerce').dt.year.astype('Int64'),
+            **columns,
+            'venue_name': self._text(df, 'venue_name'),
+            'is_recurring': is_recurring,
+        })[ok]
+
+        if not frame.empty:
+            frame['city_id'] = frame['city_id'].astype(int)
+            records = self._records(frame)
+            for record in records:
+                record['metadata_json'] = {}
+            # RETURNING gives the IDs of the new events (batched by SQLAlchemy)
+            result = self.db.execute(insert(Event).returning(Event.id), records)
+            self.created_event_ids.extend(result.scalars().all())
+
+        return {
+            "events_created": len(frame),
+            "errors": errors[~ok].tolist(),
+        }
+
+    def ingest_hotel_metrics(self, df: pd.DataFrame, row_offset: int = 0) -> Dict:
+        """
+        Upsert hotel metrics by (city, date).
+
+        Existing rows get the non-missing uploaded values; new (city, date)
+        pairs are inserted (repeated pairs are combined, later values win).
+        """
+        rows = self._row_numbers(df, row_offset)
+        errors = pd.Series(None, index=df.index, dtype=object)
+
+        city_ids = self._city_ids(df['city_name'])
+        errors[city_ids.isna()] = "Row " + rows[city_ids.isna()].astype(str) + ": City not found"
+
+        dates, bad_dates = self._dates(df['date'])
+        new = bad_dates & errors.isna()
+        errors[new] = "Row " + rows[new].astype(str) + ": Invalid date '" + df['date'][new].astype(str) + "'"
+
+        frame = pd.DataFrame({'city_id': city_ids, 'date': dates})
+        for column in HOTEL_FLOAT_COLUMNS + HOTEL_INT_COLUMNS:
+            values, invalid = self._numeric(df, column, integer=column in HOTEL_INT_COLUMNS)
+            new = invalid & errors.isna()
+            if new.any():
+                errors[new] = "Row " + rows[new].astype(str) + f": Invalid {column} '" + df[column][new].astype(str) + "'"
+            frame[column] = values
+
+        ok = errors.isna()
+        frame = frame[ok].copy()
+        if frame.empty:
+            return {"metrics_created": 0, "errors": errors[~ok].tolist()}
+        frame['city_id'] = frame['city_id'].astype(int)
+
+        self._upsert(HotelMetric, frame, HOTEL_FLOAT_COLUMNS + HOTEL_INT_COLUMNS)
+        self._record_dirty(frame['city_id'], frame['date'])
+        return {"metrics_created": len(frame), "errors": errors[~ok].tolist()}
+
+    def ingest_tourism_metrics(self, df: pd.DataFrame, row_offset: int = 0) -> Dict:
+        """
+        Upsert tourism metrics by (city, date); rows with unknown cities are skipped.
+
+        Raises:
+            ValueError: If a date or number cannot be parsed
+        """
+        rows = self._row_numbers(df, row_offset)
+        city_ids = self._city_ids(df['city_name'])
+        known = city_ids.notna()
+
+        dates, bad_dates = self._dates(df['date'])
+        bad_dates &= known
+        if bad_dates.any():
+            raise ValueError(f"Row {rows[bad_dates].iloc[0]}: invalid date '{df['date'][bad_dates].iloc[0]}'")
+
+        frame = pd.DataFrame({'city_id': city_ids, 'date': dates})
+        for column in TOURISM_FLOAT_COLUMNS + TOURISM_INT_COLUMNS:
+            values, invalid = self._numeric(df, column, integer=column in TOURISM_INT_COLUMNS)
+            invalid &= known
+            if invalid.any():
+                raise ValueError(f"Row {rows[invalid].iloc[0]}: invalid {column} '{df[column][invalid].iloc[0]}'")
+            frame[column] = values
+
+        frame = frame[known].copy()
+        frame['city_id'] = frame['city_id'].astype(int)
+        self._upsert(TourismMetric, frame, TOURISM_FLOAT_COLUMNS + TOURISM_INT_COLUMNS)
+        if not frame.empty:
+            self._record_dirty(frame['city_id'], frame['date'])
+        return {"metrics_created": len(frame)}
+
@@ -0,0 +1,196 @@
+"""
+Columnar on-disk cache for the example CSVs
+Converts each CSV into a typed Feather (Arrow IPC) file the first time it is
+read, and memory-maps that file on later loads instead of re-parsing the CSV
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is in requirements.txt
+    pa = None
+    feather = None
+
+
+CACHE_FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path: Union[str, Path], with_hash: bool = True) -> Dict:
+    """
+    Fingerprint of a file: size, mtime and (optionally) SHA-256 of its content.
+
+    Args:
+        path: File to fingerprint
+        with_hash: Also hash the file content
+
+    Returns:
+        {'size': bytes, 'mtime_ns': int, 'sha256': hex digest or None}
+    """
+    stat = os.stat(path)
+    digest = None
+    if with_hash:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+
+
+class ColumnarCache:
+    """
+    Cache of CSV tables as memory-mappable Feather files.
+
+    Every table gets two files in the cache directory: <stem>.feather with the
+    parsed data and <stem>.json with the fingerprint of the CSV it was built
+    from. A cached table is reused when the CSV size and mtime are unchanged;
+    if only the mtime changed (file touched or copied) the content hash decides.
+    Any other change rebuilds that table only.
+
+    When the cache cannot be used (pyarrow missing, read-only directory,
+    columns Arrow cannot represent) the CSV is parsed directly.
+
+    Usage:
+        cache = ColumnarCache()
+        df = cache.read_csv(data_dir / "hotel_metrics.csv", parse_dates=['date'])
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the cached tables.
+                       Defaults to a .columnar_cache folder next to each CSV
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.enabled = feather is not None
+
+    def _paths(self, csv_path: Path):
+        """Feather and manifest paths of a CSV"""
+        cache_dir = self.cache_dir or csv_path.parent / ".columnar_cache"
+        return cache_dir / f"{csv_path.stem}.feather", cache_dir / f"{csv_path.stem}.json"
+
+    def read_csv(self, csv_path: Union[str, Path], parse_dates: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        Read a CSV through the cache.
+
+        Args:
+            csv_path: CSV file to read
+            parse_dates: Columns to convert with pd.to_datetime()
+
+        Returns:
+            DataFrame equal to pd.read_csv() followed by the date conversions
+        """
+        csv_path = Path(csv_path)
+        parse_dates = list(parse_dates)
+        if not self.enabled:
+            return self._parse_csv(csv_path, parse_dates)
+
+        table_path, manifest_path = self._paths(csv_path)
+        manifest = self._read_manifest(manifest_path)
+        fingerprint = self._fresh_fingerprint(csv_path, manifest, parse_dates)
+
+        if fingerprint is None and table_path.exists():
+            try:
+                table = feather.read_table(table_path, memory_map=True)
+                return self._to_pandas(table)
+            except (OSError, pa.ArrowException):
+                fingerprint = file_fingerprint(csv_path)
+
+        df = self._parse_csv(csv_path, parse_dates)
+        self._write(df, table_path, manifest_path, fingerprint or file_fingerprint(csv_path),
+                    parse_dates)
+        return df
+
+    @staticmethod
+    def _to_pandas(table) -> pd.DataFrame:
+        """Arrow table to DataFrame, with NaN (like read_csv) for missing strings"""
+        df = table.to_pandas()
+        for col in df.columns[df.dtypes == object]:
+            missing = df[col].isna()
+            if missing.any():
+                df[col] = df[col].where(~missing, np.nan)
+        return df
+
+    @staticmethod
+    def _parse_csv(csv_path: Path, parse_dates: list) -> pd.DataFrame:
+        """Parse the CSV with pandas"""
+        df = pd.read_csv(csv_path)
+        for col in parse_dates:
+            df[col] = pd.to_datetime(df[col])
+        return df
+
+    @staticmethod
+    def _read_manifest(manifest_path: Path) -> Optional[Dict]:
+        """Load a manifest, None if missing or unreadable"""
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _fresh_fingerprint(self, csv_path: Path, manifest: Optional[Dict],
+                           parse_dates: list) -> Optional[Dict]:
+        """
+        Check the cached table against the CSV.
+
+        Returns:
+            None if the cached table is up to date, otherwise the CSV
+            fingerprint to store with the rebuilt table
+        """
+        quick = file_fingerprint(csv_path, with_hash=False)
+        if (
+            not manifest
+            or manifest.get('version') != CACHE_FORMAT_VERSION
+            or manifest.get('parse_dates') != parse_dates
+            or manifest.get('size') != quick['size']
+        ):
+            return file_fingerprint(csv_path)
+        if manifest.get('mtime_ns') == quick['mtime_ns']:
+            return None
+
+        # Same size, new mtime: compare content before rebuilding
+        fingerprint = file_fingerprint(csv_path)
+        if fingerprint['sha256'] == manifest.get('sha256'):
+            try:
+                self._write_manifest(self._paths(csv_path)[1], {**manifest, **fingerprint})
+            except OSError:
+                pass
+            return None
+        return fingerprint
+
+    def _write(self, df: pd.DataFrame, table_path: Path, manifest_path: Path,
+               fingerprint: Dict, parse_dates: list):
+        """Write the table and then its manifest (both atomically)"""
+        try:
+            table_path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            tmp_path = table_path.with_name(f"{table_path.name}.{os.getpid()}.tmp")
+            # Uncompressed so later loads can memory-map the columns
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, table_path)
+            self._write_manifest(manifest_path, {
+                'version': CACHE_FORMAT_VERSION,
+                'parse_dates': parse_dates,
+                **fingerprint,
+            })
+        except (OSError, pa.ArrowException) as e:
+            print(f"   ⚠️  Warning: Could not cache {table_path.stem}: {e}")
+
+    @staticmethod
+    def _write_manifest(manifest_path: Path, manifest: Dict):
+        """Write a manifest atomically"""
+        tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
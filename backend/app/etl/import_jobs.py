@@ -0,0 +1,256 @@
+"""
+Import Jobs - Runs uploaded CSV/XLSX imports in a background thread
+
+The /upload endpoints only check the header of the file, copy it to the
+spool directory (settings.UPLOAD_SPOOL_DIR) and store an ImportJob row, so
+the request returns right away. The import worker then streams the spooled
+file through the BulkIngestor chunk by chunk; the running report is saved
+with each chunk and exposed by the /jobs/{id} endpoints (including a
+Server-Sent Events stream). Jobs interrupted by a restart resume after the
+last committed chunk.
+"""
+import copy
+import os
+import shutil
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ensure_tables
+from app.core.job_worker import JobWorker
+from app.analytics.dirty_ranges import enqueue_affected_impacts
+from app.analytics.impact_worker import impact_worker
+from app.etl.bulk_ingest import BulkIngestor
+from app.etl.upload_stream import UploadReader, stream_ingest
+from app.models import ImportJob, JobStatus
+
+
+# Required columns and BulkIngestor method of each upload kind
+REQUIRED_COLUMNS = {
+    "cities": ['name', 'country', 'country_code', 'continent', 'latitude', 'longitude', 'timezone'],
+    "events": ['name', 'city_name', 'event_type', 'start_date', 'end_date'],
+    "hotel-metrics": ['city_name', 'date'],
+    "tourism-metrics": ['city_name', 'date'],
+}
+INGEST_METHODS = {
+    "cities": "ingest_cities",
+    "events": "ingest_events",
+    "hotel-metrics": "ingest_hotel_metrics",
+    "tourism-metrics": "ingest_tourism_metrics",
+}
+SPOOL_COPY_BUFFER_BYTES = 1024 * 1024
+
+
+class ImportInterrupted(Exception):
+    """The worker is stopping; the job resumes when it starts again"""
+
+
+def missing_columns(kind: str, columns: List[str]) -> List[str]:
+    """Required columns of an upload kind that the file lacks"""
+    return [column for column in REQUIRED_COLUMNS[kind] if column not in columns]
+
+
+def import_upload(
+    db: Session,
+    kind: str,
+    reader: UploadReader,
+    report: Optional[Dict[str, Any]] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Import an upload chunk by chunk and queue the impact recomputation.
+
+    Args:
+        db: Database session (committed after each chunk)
+        kind: "cities", "events", "hotel-metrics" or "tourism-metrics"
+        reader: The uploaded file
+        report: Running report of an interrupted import of the same file
+        on_progress: Called with the running report before each chunk's commit
+
+    Returns:
+        The upload response (created counts, errors, recomputation summary)
+
+    Raises:
+        ValueError: If required columns are missing or a row cannot be imported
+    """
+    missing = missing_columns(kind, reader.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    ingestor = BulkIngestor(db)
+    if report:
+        # Changes of the chunks committed before the interruption
+        for item in report.get("dirty_ranges", []):
+            ingestor.dirty.add_range(
+                item["city_id"], date.fromisoformat(item["start_date"]), date.fromisoformat(item["end_date"]),
+            )
+        ingestor.created_event_ids.extend(report.get("created_event_ids", []))
+
+    def progress(running: Dict[str, Any]):
+        running["dirty_ranges"] = ingestor.dirty.to_list()
+        running["created_event_ids"] = list(ingestor.created_event_ids)
+        if on_progress is not None:
+            on_progress(running)
+
+    report = stream_ingest(reader, getattr(ingestor, INGEST_METHODS[kind]), db, on_progress=progress, report=report)
+    return _summary(db, kind, report, ingestor)
+
+
+def _summary(db: Session, kind: str, report: Dict[str, Any], ingestor: BulkIngestor) -> Dict[str, Any]:
+    """Response of a finished import"""
+    counts = {"total_rows": report["total_rows"], "chunks": report["chunks"]}
+
+    if kind == "cities":
+        return {
+            "message": "Cities imported successfully",
+            "cities_created": report.get("cities_created", 0),
+            "cities_skipped": report.get("cities_skipped", 0),
+            **counts,
+        }
+
+    if kind == "events":
+        # New events have no impacts yet: let the background worker compute them
+        impact_job = None
+        if ingestor.created_event_ids:
+            impact_job = impact_worker.enqueue(db, ingestor.created_event_ids, source="upload:events")
+        return {
+            "message": "Events imported",
+            "events_created": report.get("events_created", 0),
+            **counts,
+            "errors": report.get("errors") or None,
+            "error_count": report.get("error_count", 0),
+            "impact_job_id": impact_job.id if impact_job else None,
+        }
+
+    # Recompute only the impacts whose windows cover the changed days
+    recompute = enqueue_affected_impacts(db, ingestor.dirty, source=f"upload:{kind}")
+    if kind == "hotel-metrics":
+        return {
+            "message": "Hotel metrics imported",
+            "metrics_created": report.get("metrics_created", 0),
+            **counts,
+            "errors": report.get("errors") or None,
+            "error_count": report.get("error_count", 0),
+            **recompute,
+        }
+    return {
+        "message": "Tourism metrics imported",
+        "metrics_created": report.get("metrics_created", 0),
+        **counts,
+        **recompute,
+    }
+
+
+def spool_upload(fileobj: BinaryIO, filename: str) -> str:
+    """Copy an uploaded file to the spool directory; returns its path"""
+    os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+    extension = os.path.splitext(filename)[1].lower()
+    path = os.path.join(settings.UPLOAD_SPOOL_DIR, f"{uuid.uuid4().hex}{extension}")
+    fileobj.seek(0)
+    with open(path, "wb") as spooled:
+        shutil.copyfileobj(fileobj, spooled, SPOOL_COPY_BUFFER_BYTES)
+    return path
+
+
+class ImportJobWorker(JobWorker):
+    """
+    Single background thread processing ImportJob rows.
+
+    Usage:
+        job = import_worker.enqueue(db, "hotel-metrics", file.file, file.filename)
+        ...
+        db.get(ImportJob, job.id).rows_processed
+    """
+
+    job_model = ImportJob
+    name = "import-worker"
+
+    def enqueue(self, db: Session, kind: str, fileobj: BinaryIO, filename: str) -> ImportJob:
+        """
+        Spool an upload, store its job and queue it; commits the job row.
+
+        Args:
+            db: Request database session
+            kind: Upload kind (a key of REQUIRED_COLUMNS)
+            fileobj: Uploaded file (read from the start)
+            filename: Original name of the file
+
+        Returns:
+            The queued job
+        """
+        ensure_tables(db, ImportJob.__table__)
+        job = ImportJob(
+            status=JobStatus.QUEUED,
+            kind=kind,
+            filename=filename,
+            spool_path=spool_upload(fileobj, filename),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.submit(job.id)
+        return job
+
+    def process(self, job_id: int):
+        """Run one import in the calling thread with a fresh session"""
+        db = self.session_factory()
+        try:
+            job = db.get(ImportJob, job_id)
+            if job is None or job.is_finished:
+                return
+
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            job.rows_at_start = job.rows_processed or 0
+            job.error = None
+            db.commit()
+            report = copy.deepcopy(job.report) if job.report else None
+
+            def on_progress(running: Dict[str, Any]):
+                if self._stop.is_set():
+                    raise ImportInterrupted()
+                job.report = copy.deepcopy(running)
+                job.rows_processed = running["total_rows"]
+                job.chunks = running["chunks"]
+                job.error_count = running.get("error_count", 0)
+
+            with open(job.spool_path, "rb") as fileobj:
+                reader = UploadReader(fileobj, job.filename)
+                result = import_upload(db, job.kind, reader, report=report, on_progress=on_progress)
+
+            job.status = JobStatus.DONE
+            job.result = result
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            self._remove_spool(job.spool_path)
+            print(f"   ✓ Import job {job.id}: {job.rows_processed} rows of {job.filename} imported")
+        except ImportInterrupted:
+            # Left as running: resumes after the last committed chunk
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Import job {job_id} failed: {e}")
+            job = db.get(ImportJob, job_id)
+            if job is not None:
+                job.status = JobStatus.FAILED
+                job.error = str(e)[:1000]
+                job.finished_at = datetime.now(timezone.utc)
+                db.commit()
+                self._remove_spool(job.spool_path)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _remove_spool(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Application-wide worker, started from app.main on startup
+import_worker = ImportJobWorker()
@@ -0,0 +1,179 @@
+"""
+Streaming reader for uploaded CSV/XLSX files
+
+The upload endpoints used to await file.read() and parse the whole payload
+into one DataFrame. UploadReader reads the spooled upload in fixed-size
+chunks instead (pd.read_csv(chunksize=...) for CSV, an openpyxl read-only
+row iterator for XLSX), and stream_ingest() validates, inserts and commits
+each chunk before the next one is read, reporting progress as chunks
+complete (app.etl.import_jobs runs it in the background). Peak memory is
+bounded by the chunk size, not by the file size.
+"""
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+# Per-row error messages kept in a report (the total is always counted)
+MAX_REPORTED_ERRORS = 1000
+
+
+class UploadReader:
+    """
+    Reads an uploaded CSV or XLSX file in chunks of rows.
+
+    Chunks keep the row index of the whole file (0, 1, ... across chunks),
+    so "Row N" messages refer to rows of the file.
+
+    Usage:
+        reader = UploadReader(file.file, file.filename)
+        missing = [col for col in required if col not in reader.columns]
+        for chunk in reader.chunks():
+            ...
+    """
+
+    def __init__(self, fileobj: BinaryIO, filename: str, chunk_rows: Optional[int] = None):
+        """
+        Args:
+            fileobj: Seekable binary file (e.g. UploadFile.file)
+            filename: Original name; the extension selects the parser
+            chunk_rows: Rows per chunk (default: settings.UPLOAD_CHUNK_ROWS)
+        """
+        self.fileobj = fileobj
+        self.filename = filename
+        self.chunk_rows = chunk_rows or settings.UPLOAD_CHUNK_ROWS
+        self.is_excel = filename.endswith('.xlsx')
+        self._columns: Optional[List[str]] = None
+
+    @property
+    def columns(self) -> List[str]:
+        """Header of the file"""
+        if self._columns is None:
+            self.fileobj.seek(0)
+            if self.is_excel:
+                rows = self._excel_rows()
+                self._columns = self._excel_header(next(rows, ()))
+                rows.close()
+            else:
+                self._columns = list(pd.read_csv(self.fileobj, nrows=0).columns)
+            self.fileobj.seek(0)
+        return self._columns
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        """DataFrames of at most chunk_rows rows"""
+        self.fileobj.seek(0)
+        if self.is_excel:
+            yield from self._excel_chunks()
+        else:
+            yield from pd.read_csv(self.fileobj, chunksize=self.chunk_rows)
+
+    def _excel_rows(self) -> Iterator[tuple]:
+        """Row values of the first worksheet, read lazily"""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.fileobj, read_only=True, data_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _excel_header(row: tuple) -> List[str]:
+        """Column names like pd.read_excel (blank header cells become 'Unnamed: i')"""
+        return [str(value) if value is not None else f"Unnamed: {i}" for i, value in enumerate(row)]
+
+    def _excel_chunks(self) -> Iterator[pd.DataFrame]:
+        rows = self._excel_rows()
+        columns = self._excel_header(next(rows, ()))
+        start = 0
+        buffer = []
+        blank = []
+        for row in rows:
+            row = row[:len(columns)]
+            # Blank rows are kept like pd.read_excel does, except trailing ones
+            if all(value is None for value in row):
+                blank.append(row)
+                continue
+            for values in blank + [row]:
+                buffer.append(values)
+                if len(buffer) == self.chunk_rows:
+                    yield self._excel_frame(buffer, columns, start)
+                    start += len(buffer)
+                    buffer = []
+            blank = []
+        if buffer or start == 0:
+            yield self._excel_frame(buffer, columns, start)
+
+    @staticmethod
+    def _excel_frame(rows: List[tuple], columns: List[str], start: int) -> pd.DataFrame:
+        frame = pd.DataFrame.from_records(rows, columns=columns) if rows else pd.DataFrame(columns=columns)
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        # Let pandas infer numeric columns like read_excel does
+        return frame.infer_objects()
+
+
+def merge_reports(total: Dict[str, Any], report: Dict[str, Any]):
+    """Add a chunk report to the running total (counts summed, errors appended)"""
+    for key, value in report.items():
+        if key == "errors":
+            total["error_count"] = total.get("error_count", 0) + len(value)
+            kept = total.setdefault("errors", [])
+            kept.extend(value[:max(MAX_REPORTED_ERRORS - len(kept), 0)])
+        elif isinstance(value, (int, float)):
+            total[key] = total.get(key, 0) + value
+        else:
+            total[key] = value
+
+
+def stream_ingest(
+    reader: UploadReader,
+    ingest: Callable[[pd.DataFrame], Dict[str, Any]],
+    db: Session,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    report: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Ingest an upload chunk by chunk, committing after each chunk.
+
+    A failing chunk is rolled back and the error raised; earlier chunks
+    stay committed.
+
+    Args:
+        reader: Source file
+        ingest: Writes one chunk and returns its report (e.g. a BulkIngestor method)
+        db: Session to commit
+        on_progress: Called with the running report after each chunk, before
+            its commit, so progress saved with the same session is committed
+            together with the chunk
+        report: Running report of an interrupted import; rows it counts in
+            total_rows are skipped
+
+    Returns:
+        Merged chunk reports plus total_rows and chunks
+    """
+    report = report if report is not None else {}
+    report.setdefault("total_rows", 0)
+    report.setdefault("chunks", 0)
+    done_rows = report["total_rows"]
+
+    for chunk in reader.chunks():
+        if done_rows and len(chunk):
+            # Resume: drop rows committed by an earlier run
+            if chunk.index[-1] < done_rows:
+                continue
+            chunk = chunk.loc[done_rows:]
+        try:
+            chunk_report = ingest(chunk)
+            merge_reports(report, chunk_report)
+            report["total_rows"] += len(chunk)
+            report["chunks"] += 1
+            if on_progress is not None:
+                on_progress(report)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        print(f"   ✓ {reader.filename}: chunk {report['chunks']} done ({report['total_rows']} rows)")
+    return report
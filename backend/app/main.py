@@ -1,11 +1,40 @@
 """
 Main FastAPI application for Evently
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.database import engine
+from app.core.migrations import missing_unique_keys
 from app.api.endpoints import router as api_router
 from app.api.upload import router as upload_router
+from app.analytics.impact_worker import impact_worker
+from app.etl.import_jobs import import_worker
+from app.ml.model_warmup import model_warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the schema, then start the ML model load and the background workers"""
+    try:
+        pending = missing_unique_keys(engine)
+    except Exception as e:
+        print(f"⚠️  Warning: Could not check the database schema: {e}")
+    else:
+        if pending:
+            # Never migrated here: deduplication deletes rows and is run by hand
+            print(f"❌ {', '.join(pending)}: key is not unique, uploads and impact runs will fail. "
+                  f"Run `python -m app.core.migrations` to migrate.")
+    model_warmup.start()
+    impact_worker.start()
+    import_worker.start()
+    yield
+    model_warmup.stop()
+    impact_worker.stop()
+    import_worker.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -13,6 +42,7 @@ app = FastAPI(
     version=settings.VERSION,
     description=settings.DESCRIPTION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -46,6 +76,13 @@ def health_check():
     return {"status": "healthy", "service": "evently-api"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 200 once the ML model is loaded, 503 before"""
+    status = model_warmup.status()
+    return JSONResponse(status_code=200 if status['ready'] else 503, content=status)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -6,6 +6,8 @@ Reads directly from CSV files for easy data updates
 Author: Evently UNESCO MVP
 """
 import os
+import json
+import hashlib
 import pickle
 import numpy as np
 import pandas as pd
@@ -13,12 +15,110 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Tuple, Optional, List
 
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+from app.analytics.metric_window_index import MetricWindowIndex
+from app.core.config import settings
+from app.etl.columnar_cache import ColumnarCache
+from app.ml.model_artifact import MANIFEST_FILE, load_artifact, save_artifact
+from app.ml.training_scheduler import TrainingScheduler
+
+
+# Window features taken from each metrics CSV (df_<source>_metrics).
+# Maps feature name -> CSV column.
+METRIC_WINDOW_FEATURES = {
+    'tourism': {
+        'event': {
+            'event_avg_total_visitors': 'total_visitors',
+            'event_avg_spending_per_visitor': 'avg_spending_per_visitor_usd',
+            'event_avg_stay_duration': 'avg_stay_duration_days',
+        },
+        'baseline': {
+            'baseline_avg_total_visitors': 'total_visitors',
+            'baseline_avg_spending_per_visitor': 'avg_spending_per_visitor_usd',
+            'baseline_avg_stay_duration': 'avg_stay_duration_days',
+        },
+        'increase_pct': {
+            'visitor_increase_actual': ('event_avg_total_visitors', 'baseline_avg_total_visitors'),
+            'spending_increase_pct': ('event_avg_spending_per_visitor', 'baseline_avg_spending_per_visitor'),
+        },
+    },
+    'hotel': {
+        'event': {
+            'event_avg_occupancy_pct': 'occupancy_rate_pct',
+            'event_avg_hotel_price': 'avg_price_usd',
+        },
+        'event_max': {
+            'event_max_hotel_price': 'avg_price_usd',
+        },
+        'baseline': {
+            'baseline_avg_occupancy_pct': 'occupancy_rate_pct',
+            'baseline_avg_hotel_price': 'avg_price_usd',
+        },
+        'difference': {
+            'occupancy_boost_actual': ('event_avg_occupancy_pct', 'baseline_avg_occupancy_pct'),
+        },
+        'increase_pct': {
+            'hotel_price_increase_actual': ('event_avg_hotel_price', 'baseline_avg_hotel_price'),
+        },
+    },
+    'economic': {
+        'event': {
+            'event_avg_daily_spending': 'total_spending_usd',
+            'event_avg_accommodation_spending': 'accommodation_spending_usd',
+            'event_avg_food_spending': 'food_beverage_spending_usd',
+            'event_avg_retail_spending': 'retail_spending_usd',
+        },
+        'baseline': {
+            'baseline_avg_daily_spending': 'total_spending_usd',
+        },
+        'increase_pct': {
+            'daily_spending_increase_pct': ('event_avg_daily_spending', 'baseline_avg_daily_spending'),
+        },
+    },
+    'mobility': {
+        'event': {
+            'event_avg_airport_arrivals': 'airport_arrivals',
+            'event_avg_international_flights': 'international_flights',
+            'event_avg_public_transport': 'public_transport_usage',
+            'event_avg_traffic_congestion': 'traffic_congestion_index',
+        },
+        'baseline': {
+            'baseline_avg_airport_arrivals': 'airport_arrivals',
+            'baseline_avg_traffic_congestion': 'traffic_congestion_index',
+        },
+        'increase_pct': {
+            'airport_arrivals_increase_pct': ('event_avg_airport_arrivals', 'baseline_avg_airport_arrivals'),
+        },
+    },
+}
+
+
+def _increase_pct(event_values: np.ndarray, baseline_values: np.ndarray) -> np.ndarray:
+    """Percentage increase over baseline, 0 where the baseline is not positive."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        increase = (event_values / np.maximum(baseline_values, 1) - 1) * 100
+    return np.where(baseline_values > 0, increase, 0.0)
+
+
+# Window features averaged over the reference events in predict_simple()
+REFERENCE_METRIC_FEATURES = {
+    'tourism': [
+        'event_avg_total_visitors', 'baseline_avg_total_visitors',
+        'event_avg_spending_per_visitor', 'baseline_avg_spending_per_visitor',
+    ],
+    'hotel': [
+        'event_avg_occupancy_pct', 'baseline_avg_occupancy_pct',
+        'event_avg_hotel_price', 'baseline_avg_hotel_price', 'event_max_hotel_price',
+    ],
+    'economic': ['event_avg_daily_spending', 'baseline_avg_daily_spending'],
+    'mobility': ['event_avg_airport_arrivals', 'baseline_avg_airport_arrivals'],
+}
+
 
 class EconomicImpactModel:
     """
@@ -75,6 +175,13 @@ class EconomicImpactModel:
         self.df_economic_metrics = None
         self.df_mobility_metrics = None
 
+        # Parsed CSVs are cached as memory-mappable Feather files
+        self.csv_cache = ColumnarCache()
+
+        # Window indexes over the metrics CSVs, built on first use
+        # Format: {source: (metrics DataFrame, MetricWindowIndex)}
+        self._metric_indexes = {}
+
         # Models
         self.models = {}
         self.best_model = None
@@ -88,6 +195,14 @@ class EconomicImpactModel:
 
         # Metrics
         self.metrics = {}
+
+        # Precomputed predict_simple() references
+        # Format: {event_type: {city: profile}}, see build_reference_profiles()
+        self.reference_profiles = {}
+
+        # Identifies the trained model + data snapshot (see data_fingerprint())
+        self.trained_at = None
+        self.fingerprint = None
         
         # Jobs creation ratios by city (calculated from historical data analysis)
         # These ratios represent: total_economic_impact_usd / jobs_created
@@ -137,21 +252,15 @@ class EconomicImpactModel:
         print(f"   Directory: {self.data_dir}")
 
         # Load basic CSVs
-        self.df_events = pd.read_csv(self.data_dir / "events.csv")
-        self.df_cities = pd.read_csv(self.data_dir / "cities.csv")
-        self.df_impacts = pd.read_csv(self.data_dir / "event_impacts.csv")
-        
-        # Load time-series metrics CSVs
-        self.df_tourism_metrics = pd.read_csv(self.data_dir / "tourism_metrics.csv")
-        self.df_hotel_metrics = pd.read_csv(self.data_dir / "hotel_metrics.csv")
-        self.df_economic_metrics = pd.read_csv(self.data_dir / "economic_metrics.csv")
-        self.df_mobility_metrics = pd.read_csv(self.data_dir / "mobility_metrics.csv")
+        self.df_events = self._read_csv("events.csv")
+        self.df_cities = self._read_csv("cities.csv")
+        self.df_impacts = self._read_csv("event_impacts.csv")
         
-        # Convert date columns to datetime
-        self.df_tourism_metrics['date'] = pd.to_datetime(self.df_tourism_metrics['date'])
-        self.df_hotel_metrics['date'] = pd.to_datetime(self.df_hotel_metrics['date'])
-        self.df_economic_metrics['date'] = pd.to_datetime(self.df_economic_metrics['date'])
-        self.df_mobility_metrics['date'] = pd.to_datetime(self.df_mobility_metrics['date'])
+        # Load time-series metrics CSVs (date columns converted to datetime)
+        self.df_tourism_metrics = self._read_csv("tourism_metrics.csv", parse_dates=['date'])
+        self.df_hotel_metrics = self._read_csv("hotel_metrics.csv", parse_dates=['date'])
+        self.df_economic_metrics = self._read_csv("economic_metrics.csv", parse_dates=['date'])
+        self.df_mobility_metrics = self._read_csv("mobility_metrics.csv", parse_dates=['date'])
 
         print(f"   ✓ events.csv: {len(self.df_events)} events")
         print(f"   ✓ cities.csv: {len(self.df_cities)} cities")
@@ -169,176 +278,127 @@ class EconomicImpactModel:
 
         return self.df_training
 
+    def _read_csv(self, filename: str, parse_dates: List[str] = ()) -> pd.DataFrame:
+        """Read a CSV from data_dir through the columnar cache."""
+        return self.csv_cache.read_csv(self.data_dir / filename, parse_dates=parse_dates)
+
+    def metric_index(self, source: str) -> MetricWindowIndex:
+        """
+        Get the window index over one metrics CSV.
+
+        Args:
+            source: tourism, hotel, economic or mobility
+
+        The index is rebuilt only when the underlying DataFrame is replaced.
+        """
+        df = getattr(self, f"df_{source}_metrics")
+        cached = self._metric_indexes.get(source)
+        if cached is not None and cached[0] is df:
+            return cached[1]
+
+        spec = METRIC_WINDOW_FEATURES[source]
+        columns = list(dict.fromkeys(
+            list(spec['event'].values()) + list(spec['baseline'].values())
+        ))
+        index = MetricWindowIndex(
+            df, columns, key_column='city', date_column='date',
+            max_columns=list(spec.get('event_max', {}).values())
+        )
+        self._metric_indexes[source] = (df, index)
+        return index
+
+    def _window_features(self, source: str, cities, start_dates: np.ndarray,
+                         end_dates: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Calculate the window features of one metrics CSV for many events.
+
+        Args:
+            source: tourism, hotel, economic or mobility
+            cities: City of each event
+            start_dates, end_dates: Event dates (datetime64); the baseline
+                window is the 30 days before start_date
+
+        Returns:
+            Tuple of (features, valid) where valid marks events with data in
+            both the event and the baseline window
+        """
+        spec = METRIC_WINDOW_FEATURES[source]
+        index = self.metric_index(source)
+
+        event_stats = index.window_stats(
+            cities, start_dates, end_dates,
+            mean_columns=spec['event'].values(),
+            max_columns=spec.get('event_max', {}).values()
+        )
+        baseline_stats = index.window_stats(
+            cities,
+            start_dates - np.timedelta64(30, 'D'),
+            start_dates - np.timedelta64(1, 'D'),
+            mean_columns=spec['baseline'].values()
+        )
+        valid = (event_stats['rows'] > 0) & (baseline_stats['rows'] > 0)
+
+        features = {}
+        for feature, column in spec['event'].items():
+            features[feature] = event_stats['mean'][column]
+        for feature, column in spec.get('event_max', {}).items():
+            features[feature] = event_stats['max'][column]
+        for feature, column in spec['baseline'].items():
+            features[feature] = baseline_stats['mean'][column]
+        for feature, (event_col, baseline_col) in spec.get('increase_pct', {}).items():
+            features[feature] = _increase_pct(features[event_col], features[baseline_col])
+        for feature, (event_col, baseline_col) in spec.get('difference', {}).items():
+            features[feature] = features[event_col] - features[baseline_col]
+
+        return features, valid
+
     def _enrich_with_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Enrich event data with time-series metrics from tourism, hotel, economic, and mobility CSVs.
-        
-        For each event:
+
+        Set-based, for all events at once:
         1. Get event dates (start_date, end_date) from events.csv
-        2. Calculate baseline metrics (30 days before event)
-        3. Calculate event period metrics (during event)
-        4. Calculate differences and ratios
-        5. Add as new features
+        2. Look up event and baseline (30 days before event) window means
+           for all events at once in the MetricWindowIndex of each CSV
+        3. Calculate differences and ratios on whole columns
+        4. Add as new features
         """
         print("\n📊 Enriching events with time-series metrics...")
-        
+
         # Get event dates from events.csv
         events_with_dates = self.df_events[['event_name', 'start_date', 'end_date']].copy()
         events_with_dates['start_date'] = pd.to_datetime(events_with_dates['start_date'])
         events_with_dates['end_date'] = pd.to_datetime(events_with_dates['end_date'])
-        
+
         # Merge to get dates for each impact record
         df = df.merge(events_with_dates, on='event_name', how='left')
-        
-        # Initialize new feature columns
-        metric_features = []
-        
-        def calculate_event_metrics(row):
-            """Calculate metrics for a single event"""
-            city = row['city']
-            start_date = row['start_date']
-            end_date = row['end_date']
-            
-            if pd.isna(start_date) or pd.isna(end_date):
-                return pd.Series()
-            
-            # Baseline period: 30 days before event
-            baseline_start = start_date - pd.Timedelta(days=30)
-            baseline_end = start_date - pd.Timedelta(days=1)
-            
-            # Filter metrics for this city
-            city_tourism = self.df_tourism_metrics[self.df_tourism_metrics['city'] == city].copy()
-            city_hotel = self.df_hotel_metrics[self.df_hotel_metrics['city'] == city].copy()
-            city_economic = self.df_economic_metrics[self.df_economic_metrics['city'] == city].copy()
-            city_mobility = self.df_mobility_metrics[self.df_mobility_metrics['city'] == city].copy()
-            
-            metrics = {}
-            
-            # TOURISM METRICS
-            if not city_tourism.empty:
-                # Event period
-                event_tourism = city_tourism[
-                    (city_tourism['date'] >= start_date) & 
-                    (city_tourism['date'] <= end_date)
-                ]
-                # Baseline period
-                baseline_tourism = city_tourism[
-                    (city_tourism['date'] >= baseline_start) & 
-                    (city_tourism['date'] <= baseline_end)
-                ]
-                
-                if not event_tourism.empty and not baseline_tourism.empty:
-                    # Event period averages
-                    metrics['event_avg_total_visitors'] = event_tourism['total_visitors'].mean()
-                    metrics['event_avg_spending_per_visitor'] = event_tourism['avg_spending_per_visitor_usd'].mean()
-                    metrics['event_avg_stay_duration'] = event_tourism['avg_stay_duration_days'].mean()
-                    
-                    # Baseline averages
-                    metrics['baseline_avg_total_visitors'] = baseline_tourism['total_visitors'].mean()
-                    metrics['baseline_avg_spending_per_visitor'] = baseline_tourism['avg_spending_per_visitor_usd'].mean()
-                    metrics['baseline_avg_stay_duration'] = baseline_tourism['avg_stay_duration_days'].mean()
-                    
-                    # Differences
-                    metrics['visitor_increase_actual'] = (
-                        (metrics['event_avg_total_visitors'] / max(metrics['baseline_avg_total_visitors'], 1) - 1) * 100
-                        if metrics['baseline_avg_total_visitors'] > 0 else 0
-                    )
-                    metrics['spending_increase_pct'] = (
-                        (metrics['event_avg_spending_per_visitor'] / max(metrics['baseline_avg_spending_per_visitor'], 1) - 1) * 100
-                        if metrics['baseline_avg_spending_per_visitor'] > 0 else 0
-                    )
-            
-            # HOTEL METRICS
-            if not city_hotel.empty:
-                event_hotel = city_hotel[
-                    (city_hotel['date'] >= start_date) & 
-                    (city_hotel['date'] <= end_date)
-                ]
-                baseline_hotel = city_hotel[
-                    (city_hotel['date'] >= baseline_start) & 
-                    (city_hotel['date'] <= baseline_end)
-                ]
-                
-                if not event_hotel.empty and not baseline_hotel.empty:
-                    metrics['event_avg_occupancy_pct'] = event_hotel['occupancy_rate_pct'].mean()
-                    metrics['event_avg_hotel_price'] = event_hotel['avg_price_usd'].mean()
-                    metrics['event_max_hotel_price'] = event_hotel['avg_price_usd'].max()
-                    
-                    metrics['baseline_avg_occupancy_pct'] = baseline_hotel['occupancy_rate_pct'].mean()
-                    metrics['baseline_avg_hotel_price'] = baseline_hotel['avg_price_usd'].mean()
-                    
-                    metrics['occupancy_boost_actual'] = metrics['event_avg_occupancy_pct'] - metrics['baseline_avg_occupancy_pct']
-                    metrics['hotel_price_increase_actual'] = (
-                        (metrics['event_avg_hotel_price'] / max(metrics['baseline_avg_hotel_price'], 1) - 1) * 100
-                        if metrics['baseline_avg_hotel_price'] > 0 else 0
-                    )
-            
-            # ECONOMIC METRICS
-            if not city_economic.empty:
-                event_economic = city_economic[
-                    (city_economic['date'] >= start_date) & 
-                    (city_economic['date'] <= end_date)
-                ]
-                baseline_economic = city_economic[
-                    (city_economic['date'] >= baseline_start) & 
-                    (city_economic['date'] <= baseline_end)
-                ]
-                
-                if not event_economic.empty and not baseline_economic.empty:
-                    metrics['event_avg_daily_spending'] = event_economic['total_spending_usd'].mean()
-                    metrics['event_avg_accommodation_spending'] = event_economic['accommodation_spending_usd'].mean()
-                    metrics['event_avg_food_spending'] = event_economic['food_beverage_spending_usd'].mean()
-                    metrics['event_avg_retail_spending'] = event_economic['retail_spending_usd'].mean()
-                    
-                    metrics['baseline_avg_daily_spending'] = baseline_economic['total_spending_usd'].mean()
-                    
-                    metrics['daily_spending_increase_pct'] = (
-                        (metrics['event_avg_daily_spending'] / max(metrics['baseline_avg_daily_spending'], 1) - 1) * 100
-                        if metrics['baseline_avg_daily_spending'] > 0 else 0
-                    )
-            
-            # MOBILITY METRICS
-            if not city_mobility.empty:
-                event_mobility = city_mobility[
-                    (city_mobility['date'] >= start_date) & 
-                    (city_mobility['date'] <= end_date)
-                ]
-                baseline_mobility = city_mobility[
-                    (city_mobility['date'] >= baseline_start) & 
-                    (city_mobility['date'] <= baseline_end)
-                ]
-                
-                if not event_mobility.empty and not baseline_mobility.empty:
-                    metrics['event_avg_airport_arrivals'] = event_mobility['airport_arrivals'].mean()
-                    metrics['event_avg_international_flights'] = event_mobility['international_flights'].mean()
-                    metrics['event_avg_public_transport'] = event_mobility['public_transport_usage'].mean()
-                    metrics['event_avg_traffic_congestion'] = event_mobility['traffic_congestion_index'].mean()
-                    
-                    metrics['baseline_avg_airport_arrivals'] = baseline_mobility['airport_arrivals'].mean()
-                    metrics['baseline_avg_traffic_congestion'] = baseline_mobility['traffic_congestion_index'].mean()
-                    
-                    metrics['airport_arrivals_increase_pct'] = (
-                        (metrics['event_avg_airport_arrivals'] / max(metrics['baseline_avg_airport_arrivals'], 1) - 1) * 100
-                        if metrics['baseline_avg_airport_arrivals'] > 0 else 0
-                    )
-            
-            return pd.Series(metrics)
-        
-        # Apply to each row
-        print("   Calculating metrics for each event...")
-        metric_df = df.apply(calculate_event_metrics, axis=1)
-        
+
+        print("   Calculating metrics for all events...")
+        start_dates = df['start_date'].to_numpy(dtype='datetime64[ns]')
+        end_dates = df['end_date'].to_numpy(dtype='datetime64[ns]')
+
+        metric_columns = {}
+        for source in METRIC_WINDOW_FEATURES:
+            features, valid = self._window_features(source, df['city'], start_dates, end_dates)
+            # Same rule as the per-event loop: both windows must have rows
+            if not valid.any():
+                continue
+            for feature, values in features.items():
+                metric_columns[feature] = np.where(valid, values, np.nan)
+
+        metric_df = pd.DataFrame(metric_columns, index=df.index)
+
         # Merge metrics back to main dataframe
         df = pd.concat([df, metric_df], axis=1)
-        
+
         # Fill NaN values with 0 or median
         for col in metric_df.columns:
             if col in df.columns:
                 if df[col].dtype in ['int64', 'float64']:
                     df[col] = df[col].fillna(0)
-        
+
         print(f"   ✓ Added {len(metric_df.columns)} new metric features")
-        
+
         return df
 
     def _prepare_training_data(self) -> pd.DataFrame:
@@ -490,13 +550,16 @@ class EconomicImpactModel:
 
         return df
 
-    def train(self, test_size: float = 0.2, random_state: int = 42) -> Dict:
+    def train(self, test_size: float = 0.2, random_state: int = 42,
+              cpu_budget: Optional[int] = None) -> Dict:
         """
         Train multiple regression models and select the best one.
 
         Args:
             test_size: Fraction of data to use for testing
             random_state: Random seed for reproducibility
+            cpu_budget: Maximum worker processes for training
+                        (default: settings.ML_TRAINING_CPU_BUDGET, 0 = all CPUs)
 
         Returns:
             Dictionary with metrics for all models
@@ -547,19 +610,19 @@ class EconomicImpactModel:
             ),
         }
 
-        best_r2 = -float('inf')
-
-        for name, model in model_configs.items():
-            print(f"\n🎯 Training {name}...")
+        # Fit all models and their CV folds in parallel
+        scheduler = TrainingScheduler(cpu_budget=cpu_budget or settings.ML_TRAINING_CPU_BUDGET)
+        results = scheduler.run(model_configs, X_train_scaled, y_train, X_test_scaled)
 
-            # Train
-            model.fit(X_train_scaled, y_train)
+        best_r2 = -float('inf')
 
-            # Predict (in log space)
-            y_pred_log = model.predict(X_test_scaled)
+        for name in model_configs:
+            print(f"\n🎯 Trained {name}")
+            result = results[name]
+            model = result['model']
 
-            # Transform back to original scale
-            y_pred = np.expm1(y_pred_log)
+            # Predictions (in log space), transformed back to original scale
+            y_pred = np.expm1(result['y_pred'])
             y_test_original = np.expm1(y_test)
 
             # Calculate metrics
@@ -570,10 +633,10 @@ class EconomicImpactModel:
                 'mape': np.mean(np.abs((y_test_original - y_pred) / np.maximum(y_test_original, 1))) * 100,  # Evitar división por 0
             }
 
-            # Cross-validation score
-            cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5, scoring='r2')
-            metrics['cv_r2_mean'] = cv_scores.mean()
-            metrics['cv_r2_std'] = cv_scores.std()
+            # Cross-validation score (shared 5-fold split)
+            metrics['cv_r2_mean'] = result['cv_scores'].mean()
+            metrics['cv_r2_std'] = result['cv_scores'].std()
+            metrics['train_seconds'] = result['wall_seconds']
 
             self.models[name] = model
             self.metrics[name] = metrics
@@ -583,6 +646,7 @@ class EconomicImpactModel:
             print(f"   RMSE: ${metrics['rmse']:,.0f}")
             print(f"   MAPE: {metrics['mape']:.2f}%")
             print(f"   CV R² (5-fold): {metrics['cv_r2_mean']:.4f} ± {metrics['cv_r2_std']:.4f}")
+            print(f"   Wall time: {result['fit_seconds']:.2f}s fit + {result['cv_seconds']:.2f}s CV")
 
             # Track best model
             if metrics['r2'] > best_r2:
@@ -599,6 +663,12 @@ class EconomicImpactModel:
         if hasattr(self.best_model, 'feature_importances_'):
             self._print_feature_importance()
 
+        # Precompute historical references for predict_simple()
+        self.build_reference_profiles()
+
+        self.trained_at = datetime.now().isoformat()
+        self.fingerprint = self.data_fingerprint()
+
         return self.metrics
 
     def _print_feature_importance(self):
@@ -613,26 +683,16 @@ class EconomicImpactModel:
         for i, idx in enumerate(indices[:10]):
             print(f"   {i+1}. {self.feature_columns[idx]}: {importance[idx]:.4f}")
 
-    def predict(self, event_data: Dict) -> Dict:
+    def _feature_values(self, event_data: Dict) -> Dict:
         """
-        Predict economic impact for a new event.
-
-        Args:
-            event_data: Dictionary with event characteristics:
-                - attendance: Expected attendance
-                - duration_days: Event duration
-                - event_type: Type (sports, music, culture, festival, business)
-                - city: City name (must exist in cities.csv)
+        Build all candidate feature values for one event.
 
-                Optional (will be looked up from city):
-                - population, annual_tourists, hotel_rooms, avg_hotel_price_usd
+        City characteristics missing from event_data are looked up in
+        cities.csv (event_data is updated in place, like predict() always did).
 
         Returns:
-            Dictionary with prediction and confidence interval
+            Dictionary of feature name -> value (superset of feature_columns)
         """
-        if self.best_model is None:
-            raise ValueError("Model not trained. Call train() first.")
-
         # Get city data if not provided
         city_name = event_data.get('city')
         if city_name and self.df_cities is not None:
@@ -725,7 +785,33 @@ class EconomicImpactModel:
         # Merge provided values with defaults
         for key, default_value in metric_features_defaults.items():
             base_features[key] = event_data.get(key, default_value)
-        
+
+        return base_features
+
+    def predict(self, event_data: Dict) -> Dict:
+        """
+        Predict economic impact for a new event.
+
+        Args:
+            event_data: Dictionary with event characteristics:
+                - attendance: Expected attendance
+                - duration_days: Event duration
+                - event_type: Type (sports, music, culture, festival, business)
+                - city: City name (must exist in cities.csv)
+
+                Optional (will be looked up from city):
+                - population, annual_tourists, hotel_rooms, avg_hotel_price_usd
+
+        Returns:
+            Dictionary with prediction and confidence interval
+        """
+        if self.best_model is None:
+            raise ValueError("Model not trained. Call train() first.")
+
+        base_features = self._feature_values(event_data)
+        event_type = event_data.get('event_type', 'other')
+        attendance = base_features['attendance']
+
         # Build feature vector in the correct order
         features = [base_features.get(col, 0.0) for col in self.feature_columns]
 
@@ -801,48 +887,54 @@ class EconomicImpactModel:
             }
         }
 
-    def predict_simple(self, event_type: str, city: str, duration_days: int,
-                       attendance: int = None) -> Dict:
+    def data_fingerprint(self) -> str:
         """
-        Simplified prediction using historical averages for similar events.
-
-        Only requires minimal inputs - the system fills in the rest using
-        averages from similar events (same type, same continent).
-
-        Args:
-            event_type: Type of event (sports, music, festival, culture, business)
-            city: City name (must exist in cities.csv)
-            duration_days: Event duration in days
-            attendance: Optional attendance estimate. If not provided,
-                       uses average attendance_per_day * duration_days
+        Fingerprint of the model and the data it predicts from.
 
-        Returns:
-            Dictionary with prediction, breakdown, and historical context
+        Combines the training timestamp, best model, features and the size
+        and mtime of every CSV in data_dir, so it changes whenever a different
+        model is loaded or the data was replaced before loading. Used to key
+        cached predictions.
         """
-        if self.best_model is None:
-            raise ValueError("Model not trained. Call train() or load() first.")
-
-        # Load data if not already loaded
+        parts = [str(self.trained_at), str(self.best_model_name), ",".join(self.feature_columns)]
+        if self.data_dir.exists():
+            for csv_path in sorted(self.data_dir.glob("*.csv")):
+                stat = csv_path.stat()
+                parts.append(f"{csv_path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+    def _ensure_data_loaded(self):
+        """Load the CSVs needed for predictions if not already loaded."""
         if self.df_cities is None:
-            self.df_cities = pd.read_csv(self.data_dir / "cities.csv")
+            self.df_cities = self._read_csv("cities.csv")
         if self.df_events is None:
-            self.df_events = pd.read_csv(self.data_dir / "events.csv")
+            self.df_events = self._read_csv("events.csv")
         if self.df_impacts is None:
-            self.df_impacts = pd.read_csv(self.data_dir / "event_impacts.csv")
+            self.df_impacts = self._read_csv("event_impacts.csv")
         
         # Load time-series metrics CSVs if not already loaded
         if self.df_tourism_metrics is None:
-            self.df_tourism_metrics = pd.read_csv(self.data_dir / "tourism_metrics.csv")
-            self.df_tourism_metrics['date'] = pd.to_datetime(self.df_tourism_metrics['date'])
+            self.df_tourism_metrics = self._read_csv("tourism_metrics.csv", parse_dates=['date'])
         if self.df_hotel_metrics is None:
-            self.df_hotel_metrics = pd.read_csv(self.data_dir / "hotel_metrics.csv")
-            self.df_hotel_metrics['date'] = pd.to_datetime(self.df_hotel_metrics['date'])
+            self.df_hotel_metrics = self._read_csv("hotel_metrics.csv", parse_dates=['date'])
         if self.df_economic_metrics is None:
-            self.df_economic_metrics = pd.read_csv(self.data_dir / "economic_metrics.csv")
-            self.df_economic_metrics['date'] = pd.to_datetime(self.df_economic_metrics['date'])
+            self.df_economic_metrics = self._read_csv("economic_metrics.csv", parse_dates=['date'])
         if self.df_mobility_metrics is None:
-            self.df_mobility_metrics = pd.read_csv(self.data_dir / "mobility_metrics.csv")
-            self.df_mobility_metrics['date'] = pd.to_datetime(self.df_mobility_metrics['date'])
+            self.df_mobility_metrics = self._read_csv("mobility_metrics.csv", parse_dates=['date'])
+
+
+    def _build_reference_profile(self, event_type: str, city: str) -> Dict:
+        """
+        Calculate the historical reference used by predict_simple().
+
+        It depends only on the event type and the city (the city's continent
+        selects the reference events, the city's metrics give the windows),
+        never on duration or attendance, so it can be computed ahead of time.
+
+        Returns:
+            JSON-serializable dictionary with the reference averages
+        """
+        self._ensure_data_loaded()
 
         # Get city info
         city_row = self.df_cities[self.df_cities['name'] == city]
@@ -963,10 +1055,6 @@ class EconomicImpactModel:
         if pd.isna(avg_impact_per_day):
             avg_impact_per_day = 50000000
 
-        # Estimate attendance if not provided
-        if attendance is None:
-            attendance = int(avg_attendance_per_day * duration_days)
-
         # Calculate average metrics from historical events (from the 4 additional CSVs)
         # These metrics will enrich the prediction with real time-series data
         avg_metrics = {}
@@ -979,83 +1067,21 @@ class EconomicImpactModel:
             events_with_dates['start_date'] = pd.to_datetime(events_with_dates['start_date'])
             events_with_dates['end_date'] = pd.to_datetime(events_with_dates['end_date'])
             
-            # Calculate metrics for each reference event and average them
-            metric_values = {
-                'event_avg_total_visitors': [],
-                'baseline_avg_total_visitors': [],
-                'event_avg_spending_per_visitor': [],
-                'baseline_avg_spending_per_visitor': [],
-                'event_avg_occupancy_pct': [],
-                'baseline_avg_occupancy_pct': [],
-                'event_avg_hotel_price': [],
-                'baseline_avg_hotel_price': [],
-                'event_max_hotel_price': [],
-                'event_avg_daily_spending': [],
-                'baseline_avg_daily_spending': [],
-                'event_avg_airport_arrivals': [],
-                'baseline_avg_airport_arrivals': [],
-            }
-            
-            for _, ref_event in events_with_dates.iterrows():
-                # Get city for this reference event
-                ref_city_match = reference_data[reference_data['event_name'] == ref_event['event_name']]
-                if len(ref_city_match) > 0:
-                    ref_city = ref_city_match['city'].iloc[0] if 'city' in ref_city_match.columns else city
-                else:
-                    ref_city = city
-                
-                ref_start = ref_event['start_date']
-                ref_end = ref_event['end_date']
-                ref_baseline_start = ref_start - pd.Timedelta(days=30)
-                ref_baseline_end = ref_start - pd.Timedelta(days=1)
-                
-                # Tourism metrics
-                city_tourism = self.df_tourism_metrics[self.df_tourism_metrics['city'] == ref_city]
-                if not city_tourism.empty:
-                    event_tourism = city_tourism[(city_tourism['date'] >= ref_start) & (city_tourism['date'] <= ref_end)]
-                    baseline_tourism = city_tourism[(city_tourism['date'] >= ref_baseline_start) & (city_tourism['date'] <= ref_baseline_end)]
-                    if not event_tourism.empty and not baseline_tourism.empty:
-                        metric_values['event_avg_total_visitors'].append(event_tourism['total_visitors'].mean())
-                        metric_values['baseline_avg_total_visitors'].append(baseline_tourism['total_visitors'].mean())
-                        metric_values['event_avg_spending_per_visitor'].append(event_tourism['avg_spending_per_visitor_usd'].mean())
-                        metric_values['baseline_avg_spending_per_visitor'].append(baseline_tourism['avg_spending_per_visitor_usd'].mean())
-                
-                # Hotel metrics
-                city_hotel = self.df_hotel_metrics[self.df_hotel_metrics['city'] == ref_city]
-                if not city_hotel.empty:
-                    event_hotel = city_hotel[(city_hotel['date'] >= ref_start) & (city_hotel['date'] <= ref_end)]
-                    baseline_hotel = city_hotel[(city_hotel['date'] >= ref_baseline_start) & (city_hotel['date'] <= ref_baseline_end)]
-                    if not event_hotel.empty and not baseline_hotel.empty:
-                        metric_values['event_avg_occupancy_pct'].append(event_hotel['occupancy_rate_pct'].mean())
-                        metric_values['baseline_avg_occupancy_pct'].append(baseline_hotel['occupancy_rate_pct'].mean())
-                        metric_values['event_avg_hotel_price'].append(event_hotel['avg_price_usd'].mean())
-                        metric_values['baseline_avg_hotel_price'].append(baseline_hotel['avg_price_usd'].mean())
-                        metric_values['event_max_hotel_price'].append(event_hotel['avg_price_usd'].max())
-                
-                # Economic metrics
-                city_economic = self.df_economic_metrics[self.df_economic_metrics['city'] == ref_city]
-                if not city_economic.empty:
-                    event_economic = city_economic[(city_economic['date'] >= ref_start) & (city_economic['date'] <= ref_end)]
-                    baseline_economic = city_economic[(city_economic['date'] >= ref_baseline_start) & (city_economic['date'] <= ref_baseline_end)]
-                    if not event_economic.empty and not baseline_economic.empty:
-                        metric_values['event_avg_daily_spending'].append(event_economic['total_spending_usd'].mean())
-                        metric_values['baseline_avg_daily_spending'].append(baseline_economic['total_spending_usd'].mean())
-                
-                # Mobility metrics
-                city_mobility = self.df_mobility_metrics[self.df_mobility_metrics['city'] == ref_city]
-                if not city_mobility.empty:
-                    event_mobility = city_mobility[(city_mobility['date'] >= ref_start) & (city_mobility['date'] <= ref_end)]
-                    baseline_mobility = city_mobility[(city_mobility['date'] >= ref_baseline_start) & (city_mobility['date'] <= ref_baseline_end)]
-                    if not event_mobility.empty and not baseline_mobility.empty:
-                        metric_values['event_avg_airport_arrivals'].append(event_mobility['airport_arrivals'].mean())
-                        metric_values['baseline_avg_airport_arrivals'].append(baseline_mobility['airport_arrivals'].mean())
-            
-            # Calculate averages
-            for key, values in metric_values.items():
-                if values:
-                    avg_metrics[key] = np.mean(values)
-                else:
-                    avg_metrics[key] = 0.0
+            # Get city for each reference event
+            if 'city' in reference_data.columns:
+                first_city = reference_data.drop_duplicates('event_name').set_index('event_name')['city']
+                ref_cities = events_with_dates['event_name'].map(first_city)
+            else:
+                ref_cities = pd.Series(city, index=events_with_dates.index)
+
+            # Calculate metrics for all reference events and average them
+            ref_starts = events_with_dates['start_date'].to_numpy(dtype='datetime64[ns]')
+            ref_ends = events_with_dates['end_date'].to_numpy(dtype='datetime64[ns]')
+            for source, feature_names in REFERENCE_METRIC_FEATURES.items():
+                features, valid = self._window_features(source, ref_cities, ref_starts, ref_ends)
+                for key in feature_names:
+                    values = features[key][valid]
+                    avg_metrics[key] = float(np.mean(values)) if len(values) else 0.0
             
             # Calculate derived metrics
             if avg_metrics.get('baseline_avg_total_visitors', 0) > 0:
@@ -1098,6 +1124,67 @@ class EconomicImpactModel:
             else:
                 avg_metrics['airport_arrivals_increase_pct'] = 0
         
+        return {
+            'city': {
+                'continent': continent,
+                'annual_tourists': float(city_data['annual_tourists']),
+                'avg_hotel_price_usd': float(city_data['avg_hotel_price_usd']),
+            },
+            'reference_scope': reference_scope,
+            'events_analyzed': len(reference_data),
+            'similar_events': reference_data['event_name'].tolist()[:5],
+            'avg_attendance_per_day': float(avg_attendance_per_day),
+            'avg_impact_per_day': float(avg_impact_per_day),
+            'avg_visitor_increase': float(avg_visitor_increase),
+            'avg_price_increase': float(avg_price_increase),
+            'avg_occupancy_boost': float(avg_occupancy_boost),
+            'avg_metrics': {key: float(value) for key, value in avg_metrics.items()},
+        }
+
+    def build_reference_profiles(self) -> Dict:
+        """
+        Precompute the predict_simple() reference for every (event_type, city).
+
+        Called at train() and load() time so that a prediction is a
+        dictionary lookup plus one model call.
+
+        Returns:
+            Nested dictionary {event_type: {city: profile}}
+        """
+        self._ensure_data_loaded()
+
+        self.reference_profiles = {}
+        for event_type in self.df_events['event_type'].dropna().unique().tolist():
+            for city in self.df_cities['name'].tolist():
+                self.reference_profiles.setdefault(event_type, {})[city] = (
+                    self._build_reference_profile(event_type, city)
+                )
+
+        n_profiles = sum(len(cities) for cities in self.reference_profiles.values())
+        print(f"   ✓ Built {n_profiles} reference profiles")
+        return self.reference_profiles
+
+    def _reference_profile(self, event_type: str, city: str) -> Dict:
+        """Get the precomputed reference, building it on a cache miss."""
+        profile = self.reference_profiles.get(event_type, {}).get(city)
+        if profile is None:
+            profile = self._build_reference_profile(event_type, city)
+            self.reference_profiles.setdefault(event_type, {})[city] = profile
+        return profile
+
+    def _simple_prediction_params(self, profile: Dict, event_type: str, city: str,
+                                  duration_days: int, attendance: int) -> Dict:
+        """
+        Build the predict() input used by predict_simple() from a reference profile.
+
+        Metrics without historical data fall back to defaults derived from the city.
+        """
+        city_data = profile['city']
+        avg_visitor_increase = profile['avg_visitor_increase']
+        avg_price_increase = profile['avg_price_increase']
+        avg_occupancy_boost = profile['avg_occupancy_boost']
+        avg_metrics = dict(profile['avg_metrics'])
+
         # Set defaults for missing metrics
         defaults = {
             'event_avg_total_visitors': attendance / max(duration_days, 1),
@@ -1153,6 +1240,48 @@ class EconomicImpactModel:
             **avg_metrics,  # Add all calculated metrics from the 4 CSVs
         }
 
+        return prediction_params
+
+    def predict_simple(self, event_type: str, city: str, duration_days: int,
+                       attendance: int = None) -> Dict:
+        """
+        Simplified prediction using historical averages for similar events.
+
+        Only requires minimal inputs - the system fills in the rest using
+        averages from similar events (same type, same continent).
+
+        Args:
+            event_type: Type of event (sports, music, festival, culture, business)
+            city: City name (must exist in cities.csv)
+            duration_days: Event duration in days
+            attendance: Optional attendance estimate. If not provided,
+                       uses average attendance_per_day * duration_days
+
+        Returns:
+            Dictionary with prediction, breakdown, and historical context
+        """
+        if self.best_model is None:
+            raise ValueError("Model not trained. Call train() or load() first.")
+
+        profile = self._reference_profile(event_type, city)
+
+        city_data = profile['city']
+        continent = city_data['continent']
+        reference_scope = profile['reference_scope']
+        avg_attendance_per_day = profile['avg_attendance_per_day']
+        avg_impact_per_day = profile['avg_impact_per_day']
+        avg_visitor_increase = profile['avg_visitor_increase']
+        avg_price_increase = profile['avg_price_increase']
+        avg_occupancy_boost = profile['avg_occupancy_boost']
+
+        # Estimate attendance if not provided
+        if attendance is None:
+            attendance = int(avg_attendance_per_day * duration_days)
+
+        prediction_params = self._simple_prediction_params(
+            profile, event_type, city, duration_days, attendance
+        )
+
         # Get prediction from main model
         result = self.predict(prediction_params)
 
@@ -1189,13 +1318,13 @@ class EconomicImpactModel:
         # Add historical context
         result['historical_reference'] = {
             'reference_scope': reference_scope,
-            'events_analyzed': len(reference_data),
+            'events_analyzed': profile['events_analyzed'],
             'avg_visitor_increase_pct': round(avg_visitor_increase, 1),
             'avg_price_increase_pct': round(avg_price_increase, 1),
             'avg_occupancy_boost_pct': round(avg_occupancy_boost, 1),
             'avg_attendance_per_day': int(avg_attendance_per_day),
             'avg_impact_per_day_usd': int(avg_impact_per_day),
-            'similar_events': reference_data['event_name'].tolist()[:5],
+            'similar_events': profile['similar_events'],
         }
 
         # Update input summary
@@ -1204,24 +1333,148 @@ class EconomicImpactModel:
 
         return result
 
+    def predict_many(self, events: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorized predict_simple() for many events at once.
+
+        Reference profiles and static features are resolved once per
+        (event_type, city) pair; the attendance and duration dependent
+        features are filled in as arrays and the whole batch goes through a
+        single scaler.transform() and model.predict() call.
+
+        Args:
+            events: DataFrame with columns event_type, city, duration_days and
+                    optionally attendance (missing/NaN = estimated from history)
+
+        Returns:
+            DataFrame with one row per input event (same index) holding the
+            values predict_simple() returns in its prediction, breakdown,
+            estimates and baseline_comparison sections
+        """
+        if self.best_model is None:
+            raise ValueError("Model not trained. Call train() or load() first.")
+
+        missing = {'event_type', 'city', 'duration_days'} - set(events.columns)
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        n_events = len(events)
+        event_types = events['event_type'].astype(str).to_numpy()
+        cities = events['city'].astype(str).to_numpy()
+        duration_days = events['duration_days'].to_numpy(dtype=np.int64)
+        if 'attendance' in events.columns:
+            attendance = pd.to_numeric(events['attendance'], errors='coerce').to_numpy(dtype=float)
+        else:
+            attendance = np.full(n_events, np.nan)
+
+        X = np.zeros((n_events, len(self.feature_columns)))
+        column_index = {col: i for i, col in enumerate(self.feature_columns)}
+        hotel_rooms = np.zeros(n_events)
+        jobs_ratio_base = np.zeros(n_events)
+        baseline_daily_visitors = np.zeros(n_events)
+        visitors_default = np.zeros(n_events, dtype=bool)
+
+        pairs = pd.DataFrame({'event_type': event_types, 'city': cities})
+        for (event_type, city), rows in pairs.groupby(['event_type', 'city'], sort=False).indices.items():
+            profile = self._reference_profile(event_type, city)
+
+            # Estimate attendance if not provided
+            unknown = rows[np.isnan(attendance[rows])]
+            attendance[unknown] = np.trunc(
+                profile['avg_attendance_per_day'] * duration_days[unknown]
+            )
+
+            # Static features of the pair (attendance/duration are set below)
+            params = self._simple_prediction_params(profile, event_type, city, 1, 1)
+            features = self._feature_values(params)
+            X[rows] = [features.get(col, 0.0) for col in self.feature_columns]
+
+            hotel_rooms[rows] = features['hotel_rooms']
+            jobs_ratio_base[rows] = self.jobs_ratios_by_city.get(city, self.default_jobs_ratio)
+            baseline_daily_visitors[rows] = profile['city']['annual_tourists'] / 365
+            visitors_default[rows] = 'event_avg_total_visitors' not in profile['avg_metrics']
+
+        # Features depending on attendance and duration
+        days = np.maximum(duration_days, 1)
+        dynamic = {
+            'attendance': attendance,
+            'duration_days': duration_days,
+            'attendance_per_day': attendance / days,
+            'visitors_per_hotel_room': attendance / np.maximum(hotel_rooms, 1),
+        }
+        for col, values in dynamic.items():
+            if col in column_index:
+                X[:, column_index[col]] = values
+        if 'event_avg_total_visitors' in column_index:
+            col = column_index['event_avg_total_visitors']
+            X[visitors_default, col] = (attendance / days)[visitors_default]
+
+        # Scale and predict in log space
+        prediction = np.expm1(self.best_model.predict(self.scaler.transform(X)))
+
+        mape = self.metrics[self.best_model_name]['mape'] / 100
+        working_days_per_year = 250
+        jobs_ratio_adjusted = (jobs_ratio_base / working_days_per_year) * duration_days
+        estimated_cost = prediction / 4.0
+
+        # Baseline: normal tourism for the same duration, 1.7x multiplier
+        baseline_daily_spending = baseline_daily_visitors * 150
+        baseline_period_impact = baseline_daily_spending * duration_days * 1.7
+        event_impact = np.round(prediction, 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            impact_multiplier = np.where(
+                baseline_period_impact > 0, event_impact / baseline_period_impact, 0
+            )
+
+        return pd.DataFrame({
+            'event_type': event_types,
+            'city': cities,
+            'duration_days': duration_days,
+            'attendance': attendance.astype(np.int64),
+            'total_economic_impact_usd': event_impact,
+            'lower_bound_usd': np.round(prediction * (1 - mape * 1.5), 2),
+            'upper_bound_usd': np.round(prediction * (1 + mape * 1.5), 2),
+            'direct_spending_usd': np.round(prediction * 0.64, 2),
+            'indirect_spending_usd': np.round(prediction * 0.25, 2),
+            'induced_spending_usd': np.round(prediction * 0.11, 2),
+            'jobs_created': np.trunc(prediction / jobs_ratio_adjusted).astype(np.int64),
+            'jobs_ratio_usd': np.round(jobs_ratio_adjusted, 2),
+            'roi_ratio': np.round(prediction / estimated_cost, 2),
+            'estimated_event_cost_usd': np.round(estimated_cost, 2),
+            'baseline_impact_usd': np.round(baseline_period_impact, 2),
+            'additional_impact_usd': np.round(event_impact - baseline_period_impact, 2),
+            'impact_multiplier': np.round(impact_multiplier, 2),
+        }, index=events.index)
+
     def get_event_types(self) -> List[str]:
         """Get available event types from historical data."""
         if self.df_events is None:
-            self.df_events = pd.read_csv(self.data_dir / "events.csv")
+            self.df_events = self._read_csv("events.csv")
         return self.df_events['event_type'].unique().tolist()
 
     def get_cities(self) -> List[Dict]:
         """Get available cities with their info."""
         if self.df_cities is None:
-            self.df_cities = pd.read_csv(self.data_dir / "cities.csv")
+            self.df_cities = self._read_csv("cities.csv")
         return self.df_cities[['name', 'country', 'continent']].to_dict('records')
 
-    def save(self, filename: str = "economic_impact_model.pkl"):
-        """Save the trained model and preprocessors."""
+    def save(self, filename: str = "economic_impact_model.pkl", directory: Optional[Path] = None):
+        """
+        Save the trained model and preprocessors.
+
+        Writes the artifact directory saved_models/<filename stem>/ (see
+        app.ml.model_artifact): the best model as memory-mappable arrays, a
+        JSON sidecar and every fitted model as a separate file.
+
+        Args:
+            filename: Model name (its stem names the artifact directory)
+            directory: Directory to save into instead of models_dir
+                       (used by the model registry for numbered versions)
+        """
         if self.best_model is None:
             raise ValueError("No model to save. Train first.")
 
-        save_path = self.models_dir / filename
+        save_path = self._artifact_path(filename, directory)
 
         model_data = {
             'best_model': self.best_model,
@@ -1231,24 +1484,62 @@ class EconomicImpactModel:
             'label_encoders': self.label_encoders,
             'feature_columns': self.feature_columns,
             'metrics': self.metrics,
-            'trained_at': datetime.now().isoformat(),
+            'trained_at': self.trained_at or datetime.now().isoformat(),
         }
 
-        with open(save_path, 'wb') as f:
-            pickle.dump(model_data, f)
+        save_artifact(save_path, model_data)
 
         print(f"\n💾 Model saved to: {save_path}")
 
-    def load(self, filename: str = "economic_impact_model.pkl"):
-        """Load a previously trained model."""
-        load_path = self.models_dir / filename
+        if self.reference_profiles:
+            self._save_reference_profiles(filename, directory)
+
+    def _artifact_path(self, filename: str, directory: Optional[Path] = None) -> Path:
+        """Artifact directory for a model file name."""
+        return Path(directory or self.models_dir) / Path(filename).stem
+
+    def _profiles_path(self, filename: str, directory: Optional[Path] = None) -> Path:
+        """Reference profiles file stored next to the model file."""
+        return Path(directory or self.models_dir) / f"{Path(filename).stem}_profiles.json"
+
+    def _save_reference_profiles(self, filename: str, directory: Optional[Path] = None):
+        """Write the reference profiles atomically next to the model file."""
+        profiles_path = self._profiles_path(filename, directory)
+        tmp_path = profiles_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.reference_profiles, f, ensure_ascii=False)
+        os.replace(tmp_path, profiles_path)
+        print(f"   ✓ Reference profiles saved to: {profiles_path}")
 
-        if not load_path.exists():
-            raise FileNotFoundError(f"Model file not found: {load_path}")
+    def load(self, filename: str = "economic_impact_model.pkl", directory: Optional[Path] = None):
+        """
+        Load a previously trained model.
+
+        Reads the artifact directory written by save(); falls back to the
+        single pickle of older versions. Alternate models are loaded on first
+        access to self.models.
+
+        Args:
+            filename: Model name used when saving
+            directory: Directory to load from instead of models_dir
+        """
+        artifact_path = self._artifact_path(filename, directory)
+        legacy_path = Path(directory or self.models_dir) / filename
+
+        if (artifact_path / MANIFEST_FILE).exists():
+            load_path = artifact_path
+        elif legacy_path.is_file():
+            # Single pickle written by older versions
+            load_path = legacy_path
+        else:
+            raise FileNotFoundError(f"Model file not found: {artifact_path}")
 
         try:
-            with open(load_path, 'rb') as f:
-                model_data = pickle.load(f)
+            if load_path == artifact_path:
+                model_data = load_artifact(artifact_path)
+            else:
+                with open(load_path, 'rb') as f:
+                    model_data = pickle.load(f)
 
             self.best_model = model_data.get('best_model')
             self.best_model_name = model_data.get('best_model_name')
@@ -1264,28 +1555,40 @@ class EconomicImpactModel:
 
             # Load CSVs for city lookups and metrics
             if self.data_dir.exists():
-                self.df_cities = pd.read_csv(self.data_dir / "cities.csv")
+                self.df_cities = self._read_csv("cities.csv")
                 # Also load metrics CSVs for predictions
                 try:
-                    self.df_tourism_metrics = pd.read_csv(self.data_dir / "tourism_metrics.csv")
-                    self.df_tourism_metrics['date'] = pd.to_datetime(self.df_tourism_metrics['date'])
-                    self.df_hotel_metrics = pd.read_csv(self.data_dir / "hotel_metrics.csv")
-                    self.df_hotel_metrics['date'] = pd.to_datetime(self.df_hotel_metrics['date'])
-                    self.df_economic_metrics = pd.read_csv(self.data_dir / "economic_metrics.csv")
-                    self.df_economic_metrics['date'] = pd.to_datetime(self.df_economic_metrics['date'])
-                    self.df_mobility_metrics = pd.read_csv(self.data_dir / "mobility_metrics.csv")
-                    self.df_mobility_metrics['date'] = pd.to_datetime(self.df_mobility_metrics['date'])
+                    self.df_tourism_metrics = self._read_csv("tourism_metrics.csv", parse_dates=['date'])
+                    self.df_hotel_metrics = self._read_csv("hotel_metrics.csv", parse_dates=['date'])
+                    self.df_economic_metrics = self._read_csv("economic_metrics.csv", parse_dates=['date'])
+                    self.df_mobility_metrics = self._read_csv("mobility_metrics.csv", parse_dates=['date'])
                     print("   ✓ Loaded time-series metrics CSVs")
                 except Exception as e:
                     print(f"   ⚠️  Warning: Could not load metrics CSVs: {e}")
             else:
                 print(f"⚠️  Warning: Data directory {self.data_dir} does not exist")
 
+            # Load precomputed references for predict_simple(), or build them once
+            profiles_path = self._profiles_path(filename, directory)
+            if profiles_path.exists():
+                with open(profiles_path, encoding='utf-8') as f:
+                    self.reference_profiles = json.load(f)
+                print(f"   ✓ Loaded reference profiles from: {profiles_path}")
+            elif self.data_dir.exists():
+                try:
+                    self.build_reference_profiles()
+                    self._save_reference_profiles(filename, directory)
+                except Exception as e:
+                    print(f"   ⚠️  Warning: Could not build reference profiles: {e}")
+
             print(f"\n📂 Model loaded from: {load_path}")
             print(f"   Best model: {self.best_model_name}")
             if self.best_model_name and self.best_model_name in self.metrics:
                 print(f"   R² Score: {self.metrics[self.best_model_name]['r2']:.4f}")
             print(f"   Trained at: {model_data.get('trained_at', 'Unknown')}")
+
+            self.trained_at = model_data.get('trained_at')
+            self.fingerprint = self.data_fingerprint()
         except Exception as e:
             raise ValueError(f"Error loading model from {load_path}: {str(e)}")
 
@@ -0,0 +1,81 @@
+"""
+Event Features
+Event context of city days (is an event on, total attendance, distance to
+the nearest event day) as a vectorized interval join
+"""
+import numpy as np
+import pandas as pd
+
+
+NO_EVENT_DAYS = 999
+
+
+def event_context(days: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join city days to the events of the same city.
+
+    Covering events are summed per (city, day) after expanding each event
+    into its days; the distance to the nearest event day comes from two
+    sorted merge_asof lookups on the event start: backward against the
+    running latest end (so long events covering later days are kept) and
+    forward to the next start.
+
+    Args:
+        days: DataFrame with columns city_id, date
+        events: DataFrame with columns city_id, start_date, end_date, attendance
+
+    Returns:
+        DataFrame aligned with days, with columns is_event_period,
+        days_to_event (at most NO_EVENT_DAYS, also without events in the
+        city) and event_size
+    """
+    day = pd.DataFrame({
+        'city_id': days['city_id'].to_numpy(),
+        'date': pd.to_datetime(days['date']).to_numpy(),
+        'row': np.arange(len(days)),
+    })
+    result = pd.DataFrame({
+        'is_event_period': np.zeros(len(day), dtype=bool),
+        'days_to_event': np.full(len(day), NO_EVENT_DAYS, dtype=np.int64),
+        'event_size': np.zeros(len(day), dtype=np.int64),
+    }, index=days.index)
+    if day.empty or events.empty:
+        return result
+
+    ev = pd.DataFrame({
+        'city_id': events['city_id'].to_numpy(),
+        'start': pd.to_datetime(events['start_date']).to_numpy(),
+        'end': pd.to_datetime(events['end_date']).to_numpy(),
+        'attendance': events['attendance'].fillna(0).to_numpy(dtype=np.int64),
+    })
+    ev = ev[ev['end'] >= ev['start']]
+    if ev.empty:
+        return result
+
+    # Attendance of the events covering each day
+    lengths = ((ev['end'] - ev['start']) // pd.Timedelta(days=1)).to_numpy() + 1
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    covered = pd.DataFrame({
+        'city_id': np.repeat(ev['city_id'].to_numpy(), lengths),
+        'date': np.repeat(ev['start'].to_numpy(), lengths) + offsets.astype('timedelta64[D]'),
+        'attendance': np.repeat(ev['attendance'].to_numpy(), lengths),
+    }).groupby(['city_id', 'date'], as_index=False)['attendance'].sum()
+    sizes = day.merge(covered, on=['city_id', 'date'], how='inner')
+    result.iloc[sizes['row'].to_numpy(), result.columns.get_loc('is_event_period')] = True
+    result.iloc[sizes['row'].to_numpy(), result.columns.get_loc('event_size')] = sizes['attendance'].to_numpy()
+
+    # Nearest event day: latest end among events started by the day, next start after it
+    ev = ev.sort_values('start')
+    ev['latest_end'] = ev.groupby('city_id')['end'].cummax()
+    day = day.sort_values('date')
+    before = pd.merge_asof(day, ev[['start', 'city_id', 'latest_end']], left_on='date', right_on='start',
+                           by='city_id', direction='backward')
+    after = pd.merge_asof(day, ev[['start', 'city_id']], left_on='date', right_on='start',
+                          by='city_id', direction='forward')
+    since = ((before['date'] - before['latest_end']) // pd.Timedelta(days=1)).clip(lower=0)
+    until = (after['start'] - after['date']) // pd.Timedelta(days=1)
+    # Capped like the old day-by-day scan, which started from NO_EVENT_DAYS
+    distance = np.minimum(np.fmin(since.to_numpy(dtype=float), until.to_numpy(dtype=float)), NO_EVENT_DAYS)
+    found = ~np.isnan(distance)
+    result.iloc[before['row'].to_numpy()[found], result.columns.get_loc('days_to_event')] = distance[found].astype(np.int64)
+    return result
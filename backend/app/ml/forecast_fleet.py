@@ -0,0 +1,228 @@
+"""
+Forecast Fleet
+One daily forecasting model per city and metric, trained on a process pool:
+
+    saved_models/forecasts/
+        visitors/city_1.pkl     one TourismPredictor model per series
+        occupancy/city_1.pkl
+        ...
+
+After fitting, every model forecasts a rolling horizon (settings.
+FORECAST_HORIZON_DAYS from today) into the metric_forecasts table.
+Predictions read slices of that table (forecast_slice()) instead of
+running a model per request.
+"""
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ensure_tables
+from app.ml.predictors import TourismPredictor
+from app.ml.training_scheduler import default_cpu_budget
+from app.models import HotelMetric, MetricForecast, MobilityMetric, TourismMetric
+
+
+DEFAULT_MODEL_DIR = Path(__file__).parent / "saved_models" / "forecasts"
+
+# Forecast metric -> (model, column) of its history
+METRICS = {
+    "visitors": (TourismMetric, "total_visitors"),
+    "arrivals": (MobilityMetric, "airport_arrivals"),
+    "occupancy": (HotelMetric, "occupancy_rate_pct"),
+    "price": (HotelMetric, "avg_price_usd"),
+}
+MIN_HISTORY_DAYS = 30
+
+
+def _train_series(city_id: int, metric: str, dates: np.ndarray, values: np.ndarray,
+                  start: date, horizon_days: int, model_path: str, backend: Optional[str]) -> Tuple:
+    """
+    Fit, save and forecast one city metric (runs in a worker process).
+
+    Returns:
+        (city_id, metric, forecast frame or None, backend or error message, seconds)
+    """
+    started = time.perf_counter()
+    try:
+        predictor = TourismPredictor(backend=backend, model_dir=Path(model_path).parent)
+        predictor.train(pd.DataFrame({'ds': dates, 'y': values}), verbose=False)
+        # Same format as BasePredictor.save_model(), so load_model() reads it
+        with open(model_path, 'wb') as f:
+            pickle.dump(predictor.model, f)
+        future = pd.DataFrame({'ds': pd.date_range(start, periods=horizon_days, freq='D')})
+        forecast = predictor.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        return city_id, metric, forecast, predictor.backend, time.perf_counter() - started
+    except Exception as e:
+        return city_id, metric, None, str(e), time.perf_counter() - started
+
+
+def load_forecasts(db: Session, city_ids: List[int], metrics: List[str], start: date, end: date) -> pd.DataFrame:
+    """
+    Precomputed forecasts of several cities and metrics over start..end, in one query.
+
+    Returns:
+        DataFrame with columns city_id, metric, ds, yhat, yhat_lower, yhat_upper
+    """
+    ensure_tables(db, MetricForecast.__table__)
+    rows = db.query(
+        MetricForecast.city_id, MetricForecast.metric, MetricForecast.date,
+        MetricForecast.yhat, MetricForecast.yhat_lower, MetricForecast.yhat_upper,
+    ).filter(
+        MetricForecast.city_id.in_(city_ids),
+        MetricForecast.metric.in_(metrics),
+        MetricForecast.date >= start,
+        MetricForecast.date <= end,
+    ).order_by(MetricForecast.city_id, MetricForecast.metric, MetricForecast.date).all()
+
+    df = pd.DataFrame(rows, columns=['city_id', 'metric', 'ds', 'yhat', 'yhat_lower', 'yhat_upper'])
+    df['ds'] = pd.to_datetime(df['ds'])
+    return df
+
+
+def forecast_slice(db: Session, city_id: int, metric: str, start: date, end: date) -> Optional[pd.DataFrame]:
+    """
+    Precomputed forecast of a city metric over start..end (inclusive).
+
+    Returns:
+        DataFrame with columns ds, yhat, yhat_lower, yhat_upper, or None
+        unless every day of the range is covered
+    """
+    df = load_forecasts(db, [city_id], [metric], start, end)
+    if len(df) != (end - start).days + 1:
+        return None
+    return df[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True)
+
+
+class ForecastFleet:
+    """
+    Trains the per-city forecasting models and refreshes their forecasts.
+
+    Every (city, metric) series is an independent task on a process pool
+    with at most cpu_budget workers; with a budget of 1 (or if no pool can
+    be started) they run in-process. Forecasts are stored as each task
+    finishes, one commit per series.
+
+    Usage:
+        report = ForecastFleet().refresh(db)
+        forecast_slice(db, city_id, "visitors", date(2025, 5, 2), date(2025, 7, 1))
+    """
+
+    def __init__(self, model_dir: Optional[Path] = None, cpu_budget: Optional[int] = None,
+                 horizon_days: Optional[int] = None, backend: Optional[str] = None):
+        """
+        Args:
+            model_dir: Where the models are saved (default: saved_models/forecasts)
+            cpu_budget: Maximum number of worker processes
+                (default: settings.ML_TRAINING_CPU_BUDGET, 0 = all CPUs)
+            horizon_days: Days forecast (default: settings.FORECAST_HORIZON_DAYS)
+            backend: TourismPredictor backend (default: settings.TOURISM_FORECAST_BACKEND)
+        """
+        self.model_dir = Path(model_dir or DEFAULT_MODEL_DIR)
+        self.cpu_budget = max(1, cpu_budget or settings.ML_TRAINING_CPU_BUDGET or default_cpu_budget())
+        self.horizon_days = horizon_days or settings.FORECAST_HORIZON_DAYS
+        self.backend = backend
+
+    def model_path(self, city_id: int, metric: str) -> Path:
+        """Saved model of a city metric"""
+        return self.model_dir / metric / f"city_{city_id}.pkl"
+
+    def load_history(self, db: Session, metrics: List[str], city_ids: Optional[List[int]] = None) -> Dict[Tuple[int, str], pd.DataFrame]:
+        """{(city_id, metric): DataFrame(date, value)} of every series with values"""
+        series = {}
+        for metric in metrics:
+            model, column = METRICS[metric]
+            query = db.query(model.city_id, model.date, getattr(model, column)).filter(getattr(model, column).isnot(None))
+            if city_ids is not None:
+                query = query.filter(model.city_id.in_(city_ids))
+            df = pd.DataFrame(query.order_by(model.city_id, model.date).all(), columns=['city_id', 'date', 'value'])
+            for city_id, group in df.groupby('city_id'):
+                series[(int(city_id), metric)] = group[['date', 'value']]
+        return series
+
+    def refresh(self, db: Session, start: Optional[date] = None, metrics: Optional[List[str]] = None,
+                city_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Retrain the models and replace their stored forecasts.
+
+        Args:
+            db: Database session (committed after each series)
+            start: First forecast day (default: today)
+            metrics: Metrics to forecast (default: all of METRICS)
+            city_ids: Cities to forecast (default: all with history)
+
+        Returns:
+            {"models_trained", "forecast_rows", "skipped": [...], "failed": [...], "seconds"}
+        """
+        ensure_tables(db, MetricForecast.__table__)
+        start = start or date.today()
+        started = time.perf_counter()
+        report = {"models_trained": 0, "forecast_rows": 0, "skipped": [], "failed": []}
+
+        tasks = []
+        for (city_id, metric), history in self.load_history(db, metrics or list(METRICS), city_ids).items():
+            if len(history) < MIN_HISTORY_DAYS:
+                report["skipped"].append(f"{metric} of city {city_id}: {len(history)} days of history")
+                continue
+            path = self.model_path(city_id, metric)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tasks.append((
+                city_id, metric, pd.to_datetime(history['date']).to_numpy(), history['value'].to_numpy(dtype=float),
+                start, self.horizon_days, str(path), self.backend,
+            ))
+
+        pending = {task[:2]: task for task in tasks}
+        if self.cpu_budget > 1 and len(tasks) > 1:
+            try:
+                self._run_pool(db, list(pending.values()), pending, report)
+            except (BrokenProcessPool, OSError) as e:
+                print(f"   ⚠️  Warning: Process pool unavailable ({e}), training serially")
+        for task in list(pending.values()):
+            self._store(db, _train_series(*task), pending, report)
+
+        report["seconds"] = round(time.perf_counter() - started, 2)
+        print(f"   ✓ Forecast fleet: {report['models_trained']} models, "
+              f"{report['forecast_rows']} forecast days in {report['seconds']}s ({self.cpu_budget} CPUs)")
+        return report
+
+    def _run_pool(self, db: Session, tasks: List[Tuple], pending: Dict, report: Dict):
+        """Run the tasks on a process pool, storing each result as it arrives"""
+        with ProcessPoolExecutor(max_workers=min(self.cpu_budget, len(tasks))) as pool:
+            futures = [pool.submit(_train_series, *task) for task in tasks]
+            for future in as_completed(futures):
+                self._store(db, future.result(), pending, report)
+
+    def _store(self, db: Session, result: Tuple, pending: Dict, report: Dict):
+        """Replace a series' forecast with a task result"""
+        city_id, metric, forecast, backend, seconds = result
+        pending.pop((city_id, metric), None)
+        if forecast is None:
+            report["failed"].append(f"{metric} of city {city_id}: {backend}")
+            print(f"   ❌ Forecast {metric} of city {city_id}: {backend}")
+            return
+
+        records = [
+            {
+                "city_id": city_id, "metric": metric, "date": ds.date(), "model": backend,
+                "yhat": float(yhat),
+                "yhat_lower": None if np.isnan(lower) else float(lower),
+                "yhat_upper": None if np.isnan(upper) else float(upper),
+            }
+            for ds, yhat, lower, upper in forecast.itertuples(index=False)
+        ]
+        db.query(MetricForecast).filter(
+            MetricForecast.city_id == city_id, MetricForecast.metric == metric,
+        ).delete(synchronize_session=False)
+        db.execute(insert(MetricForecast), records)
+        db.commit()
+        report["models_trained"] += 1
+        report["forecast_rows"] += len(records)
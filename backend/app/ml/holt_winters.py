@@ -0,0 +1,226 @@
+"""
+Holt-Winters Forecaster - Fast numpy fallback for daily visitor forecasts
+
+Additive Holt-Winters (level, damped trend, weekly season) fitted by a
+grid search over the smoothing parameters on the last two years, with
+every grid point run in the same pass as one column of an array. With two
+or more years of history a smoothed day-of-year profile is removed first
+and added back to the forecast, so the yearly cycle is kept too.
+Histories shorter than two weeks fall back to a seasonal-naive forecast
+(same weekday last week).
+
+Fitting 10 years of daily data takes about 30 ms, and predictions come in
+the same ds/yhat/yhat_lower/yhat_upper frame as Prophet's.
+"""
+from itertools import product
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+WEEK = 7
+YEAR = 365
+# Prophet's default interval_width is 0.8: the same two-sided 80% band
+INTERVAL_Z = 1.2816
+
+ALPHAS = (0.05, 0.1, 0.2, 0.4, 0.6)
+BETAS = (0.0, 0.01, 0.05)
+GAMMAS = (0.05, 0.1, 0.3)
+DAMPING = 0.98
+GRID_SEARCH_DAYS = 2 * YEAR
+PROFILE_SMOOTHING_DAYS = 15
+
+
+class HoltWintersForecaster:
+    """
+    Daily forecaster with Prophet's fit/predict interface.
+
+    Usage:
+        model = HoltWintersForecaster().fit(df['ds'], df['y'])
+        forecast = model.predict(pd.date_range('2025-01-01', periods=30))
+        forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+    """
+
+    def __init__(self):
+        self.method: Optional[str] = None  # "holt_winters" or "seasonal_naive"
+        self.start: Optional[pd.Timestamp] = None
+        self.n = 0
+        self.params = {}
+        self.sigma = 0.0
+        self.profile: Optional[np.ndarray] = None  # Yearly profile by day of year (index 1-366)
+
+    def fit(self, dates, values) -> "HoltWintersForecaster":
+        """
+        Fit on a daily series (missing days are interpolated).
+
+        Args:
+            dates: Day of each value
+            values: Observed values (NaN allowed)
+        """
+        series = pd.Series(
+            np.asarray(values, dtype=float),
+            index=pd.DatetimeIndex(pd.to_datetime(dates)).normalize(),
+        )
+        series = series.groupby(level=0).mean()
+        series = series.reindex(pd.date_range(series.index.min(), series.index.max(), freq='D'))
+        series = series.interpolate(limit_direction='both')
+        if series.isna().all():
+            raise ValueError("No values to fit")
+
+        self.start = series.index[0]
+        self.n = len(series)
+        y = series.to_numpy()
+
+        self.profile = None
+        if self.n >= 2 * YEAR:
+            self.profile = self._yearly_profile(series)
+            y = y - self.profile[series.index.dayofyear.to_numpy()]
+
+        if self.n >= 2 * WEEK:
+            self.method = "holt_winters"
+            self._fit_holt_winters(y)
+        else:
+            self.method = "seasonal_naive"
+            self._fit_seasonal_naive(y)
+        return self
+
+    def predict(self, dates) -> pd.DataFrame:
+        """
+        Forecast (or in-sample fit) for the given days.
+
+        Returns:
+            DataFrame with columns ds, yhat, yhat_lower, yhat_upper
+        """
+        if self.method is None:
+            raise ValueError("Model not trained yet")
+
+        ds = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+        offsets = ((ds - self.start) // pd.Timedelta(days=1)).to_numpy()
+        yhat = np.empty(len(ds))
+        sd = np.empty(len(ds))
+
+        inside = offsets < self.n
+        yhat[inside] = self.fitted[np.clip(offsets[inside], 0, self.n - 1)]
+        sd[inside] = self.sigma
+        if (~inside).any():
+            yhat[~inside], sd[~inside] = self._forecast(offsets[~inside] - self.n + 1)
+
+        if self.profile is not None:
+            yhat += self.profile[ds.dayofyear.to_numpy()]
+
+        return pd.DataFrame({
+            'ds': ds,
+            'yhat': yhat,
+            'yhat_lower': yhat - INTERVAL_Z * sd,
+            'yhat_upper': yhat + INTERVAL_Z * sd,
+        })
+
+    # ------------------------------------------------------------------
+    # Fitting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _yearly_profile(series: pd.Series) -> np.ndarray:
+        """Mean deviation from the rolling annual mean for each day of year, smoothed"""
+        trend = series.rolling(YEAR, center=True, min_periods=YEAR // 2).mean()
+        deviation = (series - trend).groupby(series.index.dayofyear).mean()
+        profile = deviation.reindex(range(1, 367)).interpolate(limit_direction='both').to_numpy()
+
+        # Circular moving average: the profile wraps from December to January
+        half = PROFILE_SMOOTHING_DAYS // 2
+        padded = np.concatenate([profile[-half:], profile, profile[:half]])
+        smoothed = np.convolve(padded, np.ones(PROFILE_SMOOTHING_DAYS) / PROFILE_SMOOTHING_DAYS, mode='valid')
+        smoothed -= smoothed.mean()
+        return np.concatenate([[0.0], smoothed])  # Indexed by dayofyear (1-366)
+
+    def _fit_holt_winters(self, y: np.ndarray):
+        """
+        Pick the smoothing parameters with the lowest one-step error.
+
+        The grid search runs every grid point at once (one array column
+        each) over the recent history; the chosen parameters are then run
+        once over the whole series with plain floats.
+        """
+        grid = np.array(list(product(ALPHAS, BETAS, GAMMAS)))
+        recent = y[-GRID_SEARCH_DAYS:]
+        level, trend, season = self._initial_state(recent)
+        fitted = np.empty((len(recent), len(grid)))
+        self._smooth(
+            recent, grid[:, 0], grid[:, 1], grid[:, 2],
+            np.full(len(grid), level), np.full(len(grid), trend),
+            np.tile(np.asarray(season)[:, None], (1, len(grid))), fitted,
+        )
+        # The first two weeks only warm the state up
+        sse = ((recent[2 * WEEK:, None] - fitted[2 * WEEK:]) ** 2).sum(axis=0)
+        alpha, beta, gamma = (float(value) for value in grid[int(np.argmin(sse))])
+
+        level, trend, season = self._initial_state(y)
+        fitted = [0.0] * len(y)
+        self.level, self.trend = self._smooth(y.tolist(), alpha, beta, gamma, level, trend, season, fitted)
+        self.season = np.asarray(season)
+        self.fitted = np.asarray(fitted)
+        self.params = {"alpha": alpha, "beta": beta, "gamma": gamma, "phi": DAMPING}
+        errors = y[2 * WEEK:] - self.fitted[2 * WEEK:]
+        self.sigma = float(np.sqrt((errors ** 2).mean()))
+
+    @staticmethod
+    def _initial_state(y: np.ndarray):
+        """(level, trend, weekly season) from the first two weeks"""
+        first, second = y[:WEEK].mean(), y[WEEK:2 * WEEK].mean()
+        return float(first), float((second - first) / WEEK), (y[:WEEK] - first).tolist()
+
+    @staticmethod
+    def _smooth(y, alpha, beta, gamma, level, trend, season, fitted):
+        """
+        Additive damped Holt-Winters recursions; fills fitted with the
+        one-step predictions and updates season in place.
+
+        Works on floats (one parameter set) or arrays (a grid, one column each).
+
+        Returns:
+            (level, trend) after the last observation
+        """
+        phi = DAMPING
+        for t, value in enumerate(y):
+            s = season[t % WEEK]
+            fitted[t] = level + phi * trend + s
+            new_level = alpha * (value - s) + (1 - alpha) * (level + phi * trend)
+            trend = beta * (new_level - level) + (1 - beta) * phi * trend
+            season[t % WEEK] = gamma * (value - new_level) + (1 - gamma) * s
+            level = new_level
+        return level, trend
+
+    def _fit_seasonal_naive(self, y: np.ndarray):
+        """Last observed week repeated (or the last value if less than a week)"""
+        self.last_week = y[-WEEK:]
+        self.fitted = y.copy()
+        if len(y) > WEEK:
+            self.sigma = float(np.std(y[WEEK:] - y[:-WEEK]))
+        else:
+            self.sigma = float(np.std(y)) if len(y) > 1 else 0.0
+
+    # ------------------------------------------------------------------
+    # Forecasting
+    # ------------------------------------------------------------------
+
+    def _forecast(self, horizons: np.ndarray):
+        """(mean, standard deviation) h days after the last observation"""
+        h = horizons.astype(int)
+
+        if self.method == "seasonal_naive":
+            week = self.last_week
+            mean = week[(len(week) - WEEK + (h - 1)) % WEEK] if len(week) == WEEK else np.full(len(h), week[-1])
+            sd = self.sigma * np.sqrt((h - 1) // WEEK + 1)
+            return mean, sd
+
+        alpha, beta, gamma, phi = (self.params[k] for k in ("alpha", "beta", "gamma", "phi"))
+        damped = phi * (1 - phi ** h) / (1 - phi)
+        mean = self.level + damped * self.trend + self.season[(self.n + h - 1) % WEEK]
+
+        # Prediction variance of additive Holt-Winters: sigma^2 (1 + sum c_j^2)
+        j = np.arange(1, h.max())
+        c = alpha * (1 + j * beta) + gamma * (j % WEEK == 0)
+        cumulative = np.concatenate([[0.0], np.cumsum(c ** 2)])
+        sd = self.sigma * np.sqrt(1 + cumulative[h - 1])
+        return mean, sd
@@ -0,0 +1,370 @@
+"""
+Model Artifact
+Slim on-disk layout for the trained economic impact model:
+
+    <name>/
+        model.json              metrics, feature_columns, encoders, scaler
+        best/*.npy              best model as flat, memory-mappable arrays
+        alternates/<model>.joblib   the other fitted models, loaded on demand
+
+The best model is served from the .npy arrays through ArrayRegressor, so
+loading it is a few np.load(mmap_mode='r') calls and forked workers share
+the pages. It is stored only as arrays (a best model that cannot be
+exported is stored as joblib instead); the alternates are only unpickled
+when asked for.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import joblib
+import numpy as np
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge, Lasso
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_FILE = "model.json"
+LINEAR_MODELS = (LinearRegression, Ridge, Lasso)
+# Rows walked through the trees at once: the (rows x trees) node arrays of
+# a block stay small enough for the CPU caches
+CHUNK_ROWS = 512
+
+
+class ArrayRegressor:
+    """
+    Prediction-only regressor backed by plain numpy arrays.
+
+    Supports linear models (coef/intercept) and tree ensembles (random forest
+    and gradient boosting). Trees of an ensemble are stored concatenated, one
+    entry per node, with leaves pointing back at themselves; all trees are
+    walked together for max_depth steps. Results match the scikit-learn
+    estimators the arrays were exported from.
+
+    Every batch size is served by the array walk; large batches are walked
+    in blocks of chunk_rows rows.
+    """
+
+    def __init__(self, kind: str, arrays: Dict[str, np.ndarray], params: Dict,
+                 chunk_rows: int = CHUNK_ROWS):
+        """
+        Args:
+            kind: 'linear', 'random_forest' or 'gradient_boosting'
+            arrays: Model arrays (see export_arrays())
+            params: Scalar parameters (learning_rate, init, max_depth)
+            chunk_rows: Rows walked through the trees at once
+        """
+        self.kind = kind
+        self.arrays = arrays
+        self.params = params
+        self.chunk_rows = chunk_rows
+        if 'feature_importances' in arrays:
+            self.feature_importances_ = arrays['feature_importances']
+
+    @classmethod
+    def supports(cls, model) -> bool:
+        """Whether a fitted estimator can be exported to arrays"""
+        if isinstance(model, LINEAR_MODELS):
+            return np.ndim(model.coef_) == 1
+        if isinstance(model, RandomForestRegressor):
+            return model.n_outputs_ == 1
+        if isinstance(model, GradientBoostingRegressor):
+            return isinstance(model.init_, DummyRegressor)
+        return False
+
+    @staticmethod
+    def export_arrays(model):
+        """
+        Flatten a fitted estimator.
+
+        Returns:
+            (kind, arrays, params)
+        """
+        if isinstance(model, LINEAR_MODELS):
+            arrays = {
+                'coef': np.asarray(model.coef_, dtype=np.float64),
+                'intercept': np.atleast_1d(np.asarray(model.intercept_, dtype=np.float64)),
+            }
+            return 'linear', arrays, {}
+
+        if isinstance(model, RandomForestRegressor):
+            kind, trees, params = 'random_forest', list(model.estimators_), {}
+        else:
+            kind, trees = 'gradient_boosting', list(model.estimators_[:, 0])
+            params = {
+                'learning_rate': float(model.learning_rate),
+                'init': float(np.ravel(model.init_.constant_)[0]),
+            }
+
+        roots, children, features, thresholds, values = [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            t = tree.tree_
+            nodes = np.arange(t.node_count)
+            is_leaf = t.children_left == -1
+            roots.append(offset)
+            # children[2 * node] goes left, children[2 * node + 1] goes right
+            pairs = np.column_stack([
+                np.where(is_leaf, nodes, t.children_left),
+                np.where(is_leaf, nodes, t.children_right),
+            ])
+            children.append(pairs.ravel() + offset)
+            # Leaves point at feature 0 so lookups stay in bounds
+            features.append(np.where(is_leaf, 0, t.feature))
+            thresholds.append(t.threshold)
+            values.append(t.value[:, 0, 0])
+            offset += t.node_count
+
+        arrays = {
+            'roots': np.asarray(roots, dtype=np.int32),
+            'children': np.concatenate(children).astype(np.int32),
+            'feature': np.concatenate(features).astype(np.int32),
+            'threshold': np.concatenate(thresholds).astype(np.float64),
+            'value': np.concatenate(values).astype(np.float64),
+            'feature_importances': np.asarray(model.feature_importances_, dtype=np.float64),
+        }
+        params['max_depth'] = int(max(tree.tree_.max_depth for tree in trees))
+        return kind, arrays, params
+
+    def predict(self, X) -> np.ndarray:
+        """Predict targets for the rows of X"""
+        if self.kind == 'linear':
+            X = np.asarray(X, dtype=np.float64)
+            return X @ self.arrays['coef'] + self.arrays['intercept'][0]
+
+        # Trees compare float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) > self.chunk_rows:
+            return np.concatenate([
+                self._predict_trees(X[start:start + self.chunk_rows])
+                for start in range(0, len(X), self.chunk_rows)
+            ])
+        return self._predict_trees(X)
+
+    def _predict_trees(self, X: np.ndarray) -> np.ndarray:
+        """Walk all trees together for a block of float32 rows"""
+        n_rows, n_features = X.shape
+        children, feature = self.arrays['children'], self.arrays['feature']
+        threshold = self.arrays['threshold']
+
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        node = np.repeat(np.asarray(self.arrays['roots'])[None, :], n_rows, axis=0)
+        for _ in range(self.params['max_depth']):
+            go_right = flat_X[row_offsets + feature[node]] > threshold[node]
+            node = children[2 * node + go_right]
+        leaf_values = self.arrays['value'][node]
+
+        # Accumulate tree by tree, in the same order as scikit-learn
+        # (cumsum adds strictly left to right, unlike sum())
+        if self.kind == 'gradient_boosting':
+            terms = np.column_stack([
+                np.full(len(X), self.params['init']),
+                self.params['learning_rate'] * leaf_values,
+            ])
+            return np.cumsum(terms, axis=1)[:, -1]
+
+        return np.cumsum(leaf_values, axis=1)[:, -1] / leaf_values.shape[1]
+
+
+class LazyModels:
+    """
+    Read-only mapping of model name -> fitted estimator.
+
+    Estimators are unpickled from their joblib file on first access;
+    models passed in memory (the ArrayRegressor of the best model) are
+    returned as they are.
+    """
+
+    def __init__(self, paths: Dict[str, Path], models: Optional[Dict] = None):
+        self._paths = dict(paths)
+        self._models = dict(models or {})
+        self._loaded = {}
+
+    def __getitem__(self, name: str):
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaded:
+            self._loaded[name] = joblib.load(self._paths[name])
+        return self._loaded[name]
+
+    def get(self, name: str, default=None):
+        return self[name] if name in self else default
+
+    def __contains__(self, name) -> bool:
+        return name in self._paths or name in self._models
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def keys(self):
+        return list(self._paths) + [name for name in self._models if name not in self._paths]
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def loaded(self) -> list:
+        """Names of the estimators already in memory"""
+        return list(self._loaded)
+
+
+def _to_builtin(value):
+    """numpy scalars -> Python numbers for JSON"""
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def save_artifact(directory: Path, model_data: Dict):
+    """
+    Write a model artifact.
+
+    The artifact is written next to the target directory and swapped in with
+    renames, so readers never see a partially written artifact.
+
+    Args:
+        directory: Artifact directory (e.g. saved_models/economic_impact_model)
+        model_data: Same keys as the legacy pickle: best_model, best_model_name,
+                    all_models, scaler, label_encoders, feature_columns,
+                    metrics, trained_at
+    """
+    directory = Path(directory)
+    tmp_dir = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    (tmp_dir / "alternates").mkdir(parents=True)
+
+    best_name = model_data['best_model_name']
+    all_models = model_data.get('all_models') or {}
+    best_model = all_models[best_name] if best_name in all_models else model_data['best_model']
+
+    # The best model is stored once: as arrays if it can be exported
+    # (or already is an ArrayRegressor, for a loaded model), else as joblib
+    exported = None
+    if isinstance(best_model, ArrayRegressor):
+        exported = best_model.kind, best_model.arrays, best_model.params
+    elif ArrayRegressor.supports(best_model):
+        exported = ArrayRegressor.export_arrays(best_model)
+
+    alternates = {}
+    for name in all_models:
+        if name == best_name and exported is not None:
+            continue
+        joblib.dump(all_models[name], tmp_dir / "alternates" / f"{name}.joblib")
+        alternates[name] = f"alternates/{name}.joblib"
+
+    if exported is not None:
+        (tmp_dir / "best").mkdir()
+        kind, arrays, params = exported
+        for key, array in arrays.items():
+            np.save(tmp_dir / "best" / f"{key}.npy", array)
+        best = {'format': 'arrays', 'kind': kind, 'params': params, 'arrays': sorted(arrays)}
+    else:
+        if best_name not in alternates:
+            joblib.dump(best_model, tmp_dir / "alternates" / f"{best_name}.joblib")
+            alternates[best_name] = f"alternates/{best_name}.joblib"
+        best = {'format': 'joblib', 'path': alternates[best_name]}
+
+    scaler = model_data['scaler']
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'best_model_name': best_name,
+        'trained_at': model_data.get('trained_at'),
+        'feature_columns': list(model_data['feature_columns']),
+        'metrics': _to_builtin(model_data.get('metrics', {})),
+        'label_encoders': {
+            col: encoder.classes_.tolist()
+            for col, encoder in model_data.get('label_encoders', {}).items()
+        },
+        'scaler': {
+            'mean': scaler.mean_.tolist(),
+            'scale': scaler.scale_.tolist(),
+            'var': scaler.var_.tolist(),
+            'n_samples_seen': int(np.max(scaler.n_samples_seen_)),
+        },
+        'best_model': best,
+        'alternates': alternates,
+    }
+    with open(tmp_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    old_dir = directory.with_name(f"{directory.name}.{os.getpid()}.old")
+    if directory.exists():
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_manifest(directory: Path) -> Dict:
+    """Read the JSON sidecar of an artifact"""
+    with open(Path(directory) / MANIFEST_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_artifact(directory: Path, mmap_mode: Optional[str] = 'r') -> Dict:
+    """
+    Load a model artifact.
+
+    Args:
+        directory: Artifact directory
+        mmap_mode: np.load() mode for the best model arrays (None reads them)
+
+    Returns:
+        Dictionary with the same keys as the legacy pickle; all_models is a
+        LazyModels mapping
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version: {manifest.get('format_version')}")
+
+    paths = {name: directory / path for name, path in manifest['alternates'].items()}
+    best_name = manifest['best_model_name']
+
+    best = manifest['best_model']
+    if best['format'] == 'arrays':
+        arrays = {
+            key: np.load(directory / "best" / f"{key}.npy", mmap_mode=mmap_mode)
+            for key in best['arrays']
+        }
+        best_model = ArrayRegressor(best['kind'], arrays, best['params'])
+        # Artifacts written before the best model was stored only as arrays
+        # still have its joblib copy: the arrays are used either way
+        paths.pop(best_name, None)
+        all_models = LazyModels(paths, {best_name: best_model})
+    else:
+        all_models = LazyModels(paths)
+        best_model = all_models[best_name]
+
+    scaler_data = manifest['scaler']
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(scaler_data['mean'])
+    scaler.scale_ = np.asarray(scaler_data['scale'])
+    scaler.var_ = np.asarray(scaler_data['var'])
+    scaler.n_samples_seen_ = scaler_data['n_samples_seen']
+    scaler.n_features_in_ = len(scaler.mean_)
+
+    label_encoders = {}
+    for col, classes in manifest['label_encoders'].items():
+        encoder = LabelEncoder()
+        encoder.classes_ = np.asarray(classes, dtype=object)
+        label_encoders[col] = encoder
+
+    return {
+        'best_model': best_model,
+        'best_model_name': manifest['best_model_name'],
+        'all_models': all_models,
+        'scaler': scaler,
+        'label_encoders': label_encoders,
+        'feature_columns': manifest['feature_columns'],
+        'metrics': manifest['metrics'],
+        'trained_at': manifest.get('trained_at'),
+    }
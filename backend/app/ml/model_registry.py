@@ -0,0 +1,172 @@
+"""
+Model Registry
+Numbered versions of the economic impact model with an atomic "current"
+pointer, so retrained models can be published while the API is running:
+
+    saved_models/registry/
+        manifest.json       one entry per version (metrics, dates)
+        CURRENT             number of the version the API should serve
+        v0001/              model artifact + reference profiles
+        v0002/
+        ...
+
+Publishing writes the new version first and only then replaces CURRENT with
+os.replace(), so readers see either the old or the new pointer, never a
+partial one. API processes poll CURRENT (see app.ml.model_warmup) and swap
+the model in memory.
+"""
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.ml.economic_impact_model import EconomicImpactModel
+from app.ml.model_artifact import MANIFEST_FILE, read_manifest
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+DEFAULT_REGISTRY_DIR = Path(__file__).parent / "saved_models" / "registry"
+MODEL_FILENAME = "economic_impact_model.pkl"
+
+
+class ModelRegistry:
+    """
+    Versioned store of trained EconomicImpactModel artifacts.
+
+    Usage:
+        registry = ModelRegistry()
+        version = registry.publish(model)      # saves v000N and promotes it
+        model = registry.load()                # loads the current version
+        registry.promote(version - 1)          # roll back
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Args:
+            root: Registry directory (default: saved_models/registry)
+        """
+        self.root = Path(root or DEFAULT_REGISTRY_DIR)
+        self.manifest_path = self.root / "manifest.json"
+        self.current_path = self.root / "CURRENT"
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def version_path(self, version: int) -> Path:
+        """Directory of a version"""
+        return self.root / f"v{version:04d}"
+
+    def versions(self) -> List[Dict]:
+        """Manifest entries, oldest first"""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f).get('versions', [])
+        except (OSError, ValueError):
+            return []
+
+    def current_version(self) -> Optional[int]:
+        """Version the CURRENT pointer refers to (None if nothing published)"""
+        try:
+            return int(self.current_path.read_text(encoding='utf-8').strip())
+        except (OSError, ValueError):
+            return None
+
+    def load(self, version: Optional[int] = None, data_dir: Optional[str] = None) -> EconomicImpactModel:
+        """
+        Load a version (default: the current one).
+
+        Raises:
+            FileNotFoundError: If there is no such version
+        """
+        version = version if version is not None else self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No model version published in {self.root}")
+
+        model = EconomicImpactModel(data_dir=data_dir)
+        model.load(MODEL_FILENAME, directory=self.version_path(version))
+        return model
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _lock(self):
+        """Serialize writers (publish/promote) across processes"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_json(self, path: Path, data):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def publish(self, model: EconomicImpactModel, promote: bool = True) -> int:
+        """
+        Save a trained model as the next version.
+
+        Args:
+            model: Trained model
+            promote: Point CURRENT at the new version
+
+        Returns:
+            The new version number
+        """
+        with self._lock():
+            versions = self.versions()
+            # Also skip directories left behind by interrupted publishes
+            taken = [entry['version'] for entry in versions] + [
+                int(path.name[1:]) for path in self.root.glob("v[0-9]*") if path.name[1:].isdigit()
+            ]
+            version = max(taken, default=0) + 1
+            version_dir = self.version_path(version)
+            version_dir.mkdir(parents=True)
+
+            model.save(MODEL_FILENAME, directory=version_dir)
+            artifact = read_manifest(model._artifact_path(MODEL_FILENAME, version_dir))
+            best_metrics = artifact['metrics'].get(artifact['best_model_name'], {})
+
+            versions.append({
+                'version': version,
+                'path': version_dir.name,
+                'created_at': datetime.now().isoformat(),
+                'trained_at': artifact.get('trained_at'),
+                'best_model_name': artifact['best_model_name'],
+                'r2': best_metrics.get('r2'),
+                'mape': best_metrics.get('mape'),
+            })
+            self._write_json(self.manifest_path, {'versions': versions})
+            print(f"   ✓ Published model version {version} to {version_dir}")
+
+            if promote:
+                self._set_current(version)
+        return version
+
+    def promote(self, version: int):
+        """Atomically point CURRENT at an existing version (also used to roll back)"""
+        with self._lock():
+            self._set_current(version)
+
+    def _set_current(self, version: int):
+        artifact_dir = self.version_path(version) / Path(MODEL_FILENAME).stem
+        if not (artifact_dir / MANIFEST_FILE).exists():
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        tmp_path = self.current_path.with_name(f"CURRENT.{os.getpid()}.tmp")
+        tmp_path.write_text(f"{version}\n", encoding='utf-8')
+        os.replace(tmp_path, self.current_path)
+        print(f"   ✓ Current model version: {version}")
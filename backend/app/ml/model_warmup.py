@@ -0,0 +1,220 @@
+"""
+Model Warmup
+Loads (or, if no saved model exists, trains) the economic impact model in a
+background thread at application startup, then watches the model registry
+and swaps in newly promoted versions
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.ml.economic_impact_model import EconomicImpactModel
+from app.ml.model_registry import ModelRegistry
+
+
+class ModelNotReadyError(Exception):
+    """Raised when the model is requested before warmup has finished"""
+
+
+def load_or_train_model() -> EconomicImpactModel:
+    """Load the saved model; train and save it from the CSVs if that fails."""
+    model = EconomicImpactModel()
+    try:
+        model.load()
+        # Verify model is actually loaded
+        if model.best_model is None:
+            raise FileNotFoundError("Model file exists but is invalid")
+    except Exception as e:
+        # Model not trained yet or invalid, train it
+        print(f"⚠️  Model not found or invalid: {e}")
+        print("🔄 Training model from CSV data...")
+        model.load_data()
+        model.train()
+        model.save()
+        print("✅ Model trained and saved successfully")
+
+    if model.best_model is None:
+        raise ValueError("Model is not trained. Please ensure CSV data exists and run training.")
+    return model
+
+
+class ModelWarmup:
+    """
+    Single-flight background initialization of the ML model.
+
+    start() launches one worker thread; later calls (from any thread) are
+    no-ops while it runs or once it succeeded, so only one load/training ever
+    happens. Requests call get() and get ModelNotReadyError until the model
+    is ready. After a failure, start() may be called again to retry.
+
+    With a registry, the current registry version is loaded (falling back to
+    loader() when nothing is published) and the thread keeps polling the
+    registry's CURRENT pointer every poll_seconds. A newly promoted version
+    is loaded in that thread and swapped in with a single assignment:
+    requests already holding the old model finish with it, the next get()
+    returns the new one. Watching continues after a failed first load, so
+    a version promoted later still makes the process ready.
+
+    States: idle -> warming -> ready | failed
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], EconomicImpactModel] = load_or_train_model,
+        registry: Optional[ModelRegistry] = None,
+        poll_seconds: float = 0,
+    ):
+        """
+        Args:
+            loader: Returns a ready model (runs in the warmup thread)
+            registry: Model registry to load from and watch
+            poll_seconds: Registry polling interval (0 = do not watch)
+        """
+        self.loader = loader
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self.state = 'idle'
+        self.error: Optional[str] = None
+        self.version: Optional[int] = None
+        self.started_at: Optional[datetime] = None
+        self.ready_at: Optional[datetime] = None
+        self.duration_seconds: Optional[float] = None
+        self.swaps = 0
+        self._model: Optional[EconomicImpactModel] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failed_version: Optional[int] = None
+
+    def start(self) -> bool:
+        """
+        Start warming up in the background.
+
+        Returns:
+            True if this call started the warmup, False if it was already
+            running or done
+        """
+        thread = self._thread
+        if self.state == 'failed' and thread is not None and thread.is_alive():
+            # A failed warmup keeps watching the registry: stop it before retrying
+            self._stop.set()
+            thread.join()
+
+        with self._lock:
+            if self.state in ('warming', 'ready'):
+                return False
+            self.state = 'warming'
+            self.error = None
+            self.started_at = datetime.now()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop watching the registry"""
+        self._stop.set()
+
+    def _run(self):
+        """Warmup thread body: initial load, then registry watching"""
+        started = time.perf_counter()
+        version = None
+        try:
+            version = self.registry.current_version() if self.registry else None
+            if version is not None:
+                model = self.registry.load(version)
+            else:
+                model = self.loader()
+        except Exception as e:
+            print(f"❌ Model warmup failed: {e}")
+            with self._lock:
+                self.state = 'failed'
+                self.error = str(e)
+                self._failed_version = version
+        else:
+            with self._lock:
+                self._model = model
+                self.version = version
+                self.state = 'ready'
+                self.ready_at = datetime.now()
+                self.duration_seconds = round(time.perf_counter() - started, 3)
+            print(f"✅ ML model ready ({self.duration_seconds}s, version {version or 'unversioned'})")
+
+        # Also after a failed first load: a version promoted later makes the process ready
+        if self.registry is not None and self.poll_seconds > 0:
+            while not self._stop.wait(self.poll_seconds):
+                self.check_for_update()
+
+    def check_for_update(self) -> bool:
+        """
+        Swap in the registry's current version if it changed; after a
+        failed warmup this makes the process ready.
+
+        Returns:
+            True if a new model was swapped in
+        """
+        version = self.registry.current_version()
+        if version is None or version in (self.version, self._failed_version):
+            return False
+
+        try:
+            model = self.registry.load(version)
+        except Exception as e:
+            # Keep serving the previous model; retry when CURRENT changes again
+            print(f"⚠️  Warning: Could not load model version {version}: {e}")
+            self._failed_version = version
+            return False
+
+        with self._lock:
+            self._model = model
+            self.version = version
+            self.swaps += 1
+            self.state = 'ready'
+            self.error = None
+            self.ready_at = self.ready_at or datetime.now()
+        print(f"🔄 Swapped to model version {version}")
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initial load finishes; True if the model is ready"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.state == 'warming':
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.01)
+        return self.is_ready
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == 'ready'
+
+    def get(self) -> EconomicImpactModel:
+        """Return the model, or raise ModelNotReadyError while warming up"""
+        model = self._model
+        if model is None:
+            if self.state == 'failed':
+                raise ModelNotReadyError(f"Model warmup failed: {self.error}")
+            raise ModelNotReadyError("Model is warming up, retry shortly")
+        return model
+
+    def status(self) -> Dict:
+        """Warmup state for the readiness probe"""
+        return {
+            'state': self.state,
+            'ready': self.is_ready,
+            'error': self.error,
+            'model_version': self.version,
+            'swaps': self.swaps,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'ready_at': self.ready_at.isoformat() if self.ready_at else None,
+            'duration_seconds': self.duration_seconds,
+        }
+
+
+# Application-wide instance, started from app.main on startup
+model_warmup = ModelWarmup(
+    registry=ModelRegistry(),
+    poll_seconds=settings.MODEL_REGISTRY_POLL_SECONDS,
+)
@@ -0,0 +1,116 @@
+"""
+Prediction Cache
+Bounded LRU cache with TTL for prediction responses
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+class PredictionCache:
+    """
+    Thread-safe, size-bounded LRU cache with a time-to-live.
+
+    Prediction responses are pure functions of their inputs and of the model
+    that produced them, so callers key entries by both (see key()). Once
+    max_entries is reached the least recently used entry is evicted, which
+    keeps memory flat under high-cardinality traffic. Entries older than
+    ttl_seconds are treated as misses.
+
+    The cache is per process; every API worker keeps its own.
+
+    Usage:
+        key = prediction_cache.key(model, 'simple', event_type, city, duration_days, attendance)
+        result = prediction_cache.get_or_compute(key, lambda: model.predict_simple(...))
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        """
+        Args:
+            max_entries: Maximum number of cached responses (0 disables caching)
+            ttl_seconds: Lifetime of an entry (0 = no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(model, *inputs) -> tuple:
+        """Cache key: model/data fingerprint followed by the request inputs"""
+        return (getattr(model, 'fingerprint', None) or id(model),) + inputs
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value (a copy) or None; counts a hit or a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    # Callers may modify the response, the cached one must stay intact
+                    return copy.deepcopy(value)
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full"""
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached value, or compute() stored in the cache (exceptions are not cached)"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+# Application-wide instance used by the prediction endpoints
+prediction_cache = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+)
@@ -4,9 +4,11 @@ Uses Prophet and scikit-learn for time series forecasting
 """
 import numpy as np
 import pandas as pd
-from datetime import date, timedelta
+from datetime import date
 from typing import Dict, List, Optional, Tuple
 import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
@@ -20,6 +22,9 @@ from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+from app.core.config import settings
+from app.ml.holt_winters import HoltWintersForecaster
+
 
 class BasePredictor:
     """Base class for all predictors"""
@@ -68,73 +73,117 @@ class BasePredictor:
 class TourismPredictor(BasePredictor):
     """
     Predict visitor numbers using Prophet (time series with seasonality)
+
+    Without Prophet (or with backend="holt_winters") the numpy
+    HoltWintersForecaster is used instead: it fits in milliseconds and
+    returns the same yhat/yhat_lower/yhat_upper frame. backend="random_forest"
+    keeps the regression on calendar features.
     """
 
-    def __init__(self, **kwargs):
+    BACKENDS = ("prophet", "holt_winters", "random_forest")
+
+    def __init__(self, backend: Optional[str] = None, **kwargs):
         super().__init__(**kwargs)
-        if PROPHET_AVAILABLE:
+        backend = backend or settings.TOURISM_FORECAST_BACKEND
+        if backend == "auto":
+            backend = "prophet" if PROPHET_AVAILABLE else "holt_winters"
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown forecast backend: {backend}")
+        if backend == "prophet" and not PROPHET_AVAILABLE:
+            raise ValueError("Prophet is not installed")
+        self.backend = backend
+
+        if backend == "prophet":
             self.model = Prophet(
                 yearly_seasonality=True,
                 weekly_seasonality=True,
                 daily_seasonality=False,
                 changepoint_prior_scale=0.05,
             )
+        elif backend == "holt_winters":
+            self.model = HoltWintersForecaster()
         else:
             # Fallback to simple regression
             self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-            self.use_prophet = False
+        self.use_prophet = backend == "prophet"
 
-    def train(self, df: pd.DataFrame):
+    def load_model(self, filename: str):
+        """Load model from disk (the backend follows the saved model)"""
+        super().load_model(filename)
+        if isinstance(self.model, HoltWintersForecaster):
+            self.backend = "holt_winters"
+        elif isinstance(self.model, RandomForestRegressor):
+            self.backend = "random_forest"
+        else:
+            self.backend = "prophet"
+        self.use_prophet = self.backend == "prophet"
+
+    def train(self, df: pd.DataFrame, verbose: bool = True):
         """
         Train on historical visitor data
 
         Args:
             df: DataFrame with columns ['ds', 'y'] for Prophet
                 or ['date', 'visitors', 'day_of_week', 'month', ...] for regression
+                (the Holt-Winters backend accepts either)
+            verbose: Print a line when done
         """
-        if PROPHET_AVAILABLE and hasattr(self.model, 'fit'):
+        if self.backend == "prophet":
             # Prophet format: ds (date), y (value)
             self.model.fit(df)
+        elif self.backend == "holt_winters":
+            self.model.fit(self._dates(df), self._target(df))
         else:
             # Fallback: extract features
             X = self._extract_features(df)
-            y = df['visitors'].values
+            y = self._target(df)
             self.model.fit(X, y)
 
         self.is_trained = True
-        print("✅ Tourism model trained")
+        if verbose:
+            print(f"✅ Tourism model trained ({self.backend})")
 
     def predict(self, future_dates: pd.DataFrame) -> pd.DataFrame:
         """Predict visitor numbers for future dates"""
         if not self.is_trained:
             raise ValueError("Model not trained yet")
 
-        if PROPHET_AVAILABLE and hasattr(self.model, 'predict'):
+        if self.backend == "prophet":
             forecast = self.model.predict(future_dates)
             return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
-        else:
-            X = self._extract_features(future_dates)
-            predictions = self.model.predict(X)
-            return pd.DataFrame({
-                'ds': future_dates['date'],
-                'yhat': predictions,
-                'yhat_lower': predictions * 0.9,
-                'yhat_upper': predictions * 1.1,
-            })
+        if self.backend == "holt_winters":
+            return self.model.predict(self._dates(future_dates))
+
+        X = self._extract_features(future_dates)
+        predictions = self.model.predict(X)
+        return pd.DataFrame({
+            'ds': self._dates(future_dates).to_numpy(),
+            'yhat': predictions,
+            'yhat_lower': predictions * 0.9,
+            'yhat_upper': predictions * 1.1,
+        })
+
+    @staticmethod
+    def _dates(df: pd.DataFrame) -> pd.Series:
+        """Dates of a frame as datetimes ('date' column, else Prophet's 'ds')"""
+        return pd.to_datetime(df['date'] if 'date' in df.columns else df['ds'])
+
+    @staticmethod
+    def _target(df: pd.DataFrame) -> np.ndarray:
+        """Visitor counts ('visitors' column, else Prophet's 'y')"""
+        return (df['visitors'] if 'visitors' in df.columns else df['y']).to_numpy(dtype=float)
 
     def _extract_features(self, df: pd.DataFrame) -> np.ndarray:
         """Extract time-based features for non-Prophet models"""
-        features = []
-        for _, row in df.iterrows():
-            dt = pd.to_datetime(row['date'] if 'date' in row else row['ds'])
-            features.append([
-                dt.dayofweek,
-                dt.month,
-                dt.day,
-                dt.dayofyear,
-                int(dt.dayofweek >= 5),  # is_weekend
-            ])
-        return np.array(features)
+        dates = self._dates(df).dt
+        dayofweek = dates.dayofweek.to_numpy()
+        return np.column_stack([
+            dayofweek,
+            dates.month.to_numpy(),
+            dates.day.to_numpy(),
+            dates.dayofyear.to_numpy(),
+            (dayofweek >= 5).astype(int),  # is_weekend
+        ])
 
 
 class HotelPricePredictor(BasePredictor):
@@ -309,9 +358,31 @@ class ImpactPredictor(BasePredictor):
 class EnsemblePredictor:
     """
     Ensemble of multiple predictors for robust predictions
+
+    With a database session, visitor and occupancy forecasts of a city are
+    read from the precomputed forecasts of the forecasting fleet (see
+    app.ml.forecast_fleet) instead of running the tourism model per request.
+
+    Requests are scored in batches (predict_many): the inputs of all
+    requests are built as arrays, each predictor runs once per batch, and
+    in parallel mode the three predictors run concurrently on threads.
+    Results include the time spent in each stage.
+
+    The threads are started on the first parallel batch; close() (or a
+    with block) shuts them down.
     """
 
-    def __init__(self):
+    WINDOW_DAYS = 30  # Days forecast before and after the event
+
+    def __init__(self, db=None, parallel: bool = True):
+        """
+        Args:
+            db: Session to read precomputed forecasts from (optional)
+            parallel: Run the tourism, hotel and impact predictors concurrently
+        """
+        self.db = db
+        self.parallel = parallel
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.tourism_predictor = TourismPredictor()
         self.hotel_predictor = HotelPricePredictor()
         self.impact_predictor = ImpactPredictor()
@@ -322,6 +393,7 @@ class EnsemblePredictor:
         event_duration: int,
         expected_attendance: int,
         city_data: Dict,
+        city_id: Optional[int] = None,
     ) -> Dict:
         """
         Predict full impact of an event
@@ -331,59 +403,170 @@ class EnsemblePredictor:
         - Hotel price changes
         - Total economic impact
         - Confidence intervals
+        - Per-stage timings (timings_ms)
         """
-        # Prepare future dates
-        start_date = event_date - timedelta(days=30)
-        end_date = event_date + timedelta(days=30)
-        dates = pd.date_range(start_date, end_date, freq='D')
-
-        future_df = pd.DataFrame({'ds': dates})
+        batch = self.predict_many([{
+            "event_date": event_date,
+            "event_duration": event_duration,
+            "expected_attendance": expected_attendance,
+            "city_data": city_data,
+            "city_id": city_id,
+        }])
+        return {**batch["predictions"][0], "timings_ms": batch["timings_ms"]}
+
+    def predict_many(self, requests: List[Dict]) -> Dict:
+        """
+        Predict the impact of many events in one pass
 
-        # Predict visitors
-        if self.tourism_predictor.is_trained:
-            visitor_forecast = self.tourism_predictor.predict(future_df)
-        else:
-            visitor_forecast = None
+        Args:
+            requests: Dicts with event_date, event_duration, expected_attendance,
+                city_data and optionally city_id (as for predict_event_impact)
 
-        # Predict hotel prices
-        if self.hotel_predictor.is_trained:
+        Returns:
+            {"predictions": [one predict_event_impact result per request],
+             "timings_ms": {"inputs", "forecasts", "tourism", "hotel", "impact", "total"}}
+        """
+        started = time.perf_counter()
+        timings = {}
+
+        # Inputs: one row of 61 days per request
+        stage = time.perf_counter()
+        n = len(requests)
+        offsets = np.arange(-self.WINDOW_DAYS, self.WINDOW_DAYS + 1)
+        event_days = np.array([r["event_date"] for r in requests], dtype='datetime64[D]')
+        durations = np.array([r["event_duration"] for r in requests])
+        attendance = np.array([r["expected_attendance"] for r in requests], dtype=float)
+        city_data = [r.get("city_data") or {} for r in requests]
+        hotel_price = np.array([c.get('avg_hotel_price', 150) for c in city_data], dtype=float)
+        days = event_days[:, None] + offsets  # (requests, 61)
+        timings["inputs"] = time.perf_counter() - stage
+
+        # Precomputed forecasts, read before any thread starts (sessions are not thread-safe)
+        stage = time.perf_counter()
+        visitors, occupancy = self._precomputed(requests, days)
+        timings["forecasts"] = time.perf_counter() - stage
+
+        def tourism():
+            missing = [i for i in range(n) if visitors[i] is None]
+            if missing and self.tourism_predictor.is_trained:
+                unique_days = np.unique(days[missing])
+                forecast = self.tourism_predictor.predict(pd.DataFrame({'ds': pd.to_datetime(unique_days)}))
+                forecast = forecast.set_index(pd.DatetimeIndex(forecast['ds']))
+                for i in missing:
+                    visitors[i] = forecast.loc[pd.to_datetime(days[i])].reset_index(drop=True)
+                    visitors[i].attrs['source'] = "model"
+
+        def hotel():
+            if not self.hotel_predictor.is_trained:
+                return None
+            dayofweek = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+            occupancy_rate = np.array([
+                occupancy[i]['yhat'].to_numpy() if occupancy[i] is not None else np.full(len(offsets), 75.0)
+                for i in range(n)
+            ])
             hotel_df = pd.DataFrame({
-                'occupancy_rate': [75.0] * len(dates),
-                'baseline_price': [city_data.get('avg_hotel_price', 150)] * len(dates),
-                'is_weekend': [d.dayofweek >= 5 for d in dates],
-                'is_event_period': [(event_date <= d.date() < event_date + timedelta(days=event_duration)) for d in dates],
-                'days_to_event': [(event_date - d.date()).days for d in dates],
-                'event_size': [expected_attendance] * len(dates),
+                'occupancy_rate': occupancy_rate.ravel(),
+                'baseline_price': np.repeat(hotel_price, len(offsets)),
+                'is_weekend': (dayofweek >= 5).ravel(),
+                'is_event_period': ((offsets >= 0) & (offsets < durations[:, None])).ravel(),
+                'days_to_event': np.tile(-offsets, n),
+                'event_size': np.repeat(attendance, len(offsets)),
             })
-            hotel_prices = self.hotel_predictor.predict(hotel_df)
-        else:
-            hotel_prices = None
+            return self.hotel_predictor.predict(hotel_df).reshape(n, len(offsets))
 
-        # Predict total impact
-        if self.impact_predictor.is_trained:
+        def impact():
+            if not self.impact_predictor.is_trained:
+                return None
             impact_df = pd.DataFrame({
-                'attendance': [expected_attendance],
-                'duration_days': [event_duration],
-                'event_type_encoded': [1],  # Default
-                'city_population': [city_data.get('population', 1000000)],
-                'city_annual_tourists': [city_data.get('annual_tourists', 5000000)],
-                'baseline_hotel_price': [city_data.get('avg_hotel_price', 150)],
+                'attendance': attendance,
+                'duration_days': durations,
+                'event_type_encoded': np.ones(n),  # Default
+                'city_population': [c.get('population', 1000000) for c in city_data],
+                'city_annual_tourists': [c.get('annual_tourists', 5000000) for c in city_data],
+                'baseline_hotel_price': hotel_price,
+            })
+            return self.impact_predictor.predict_with_confidence(impact_df)
+
+        outputs = self._run_stages({"tourism": tourism, "hotel": hotel, "impact": impact}, timings)
+        hotel_prices, impacts = outputs["hotel"], outputs["impact"]
+
+        predictions = []
+        for i in range(n):
+            forecast = visitors[i]
+            predictions.append({
+                "visitor_forecast": forecast.to_dict() if forecast is not None else None,
+                "visitor_forecast_source": forecast.attrs.get('source') if forecast is not None else None,
+                "hotel_prices": hotel_prices[i].tolist() if hotel_prices is not None else None,
+                "total_economic_impact": {
+                    "prediction": float(impacts[0][i]) if impacts is not None else None,
+                    "lower_bound": float(impacts[1][i]) if impacts is not None else None,
+                    "upper_bound": float(impacts[2][i]) if impacts is not None else None,
+                },
+                "metrics": {
+                    "tourism": self.tourism_predictor.metrics,
+                    "hotel": self.hotel_predictor.metrics,
+                    "impact": self.impact_predictor.metrics,
+                }
             })
-            total_impact, impact_lower, impact_upper = self.impact_predictor.predict_with_confidence(impact_df)
-        else:
-            total_impact = impact_lower = impact_upper = None
 
+        timings["total"] = time.perf_counter() - started
         return {
-            "visitor_forecast": visitor_forecast.to_dict() if visitor_forecast is not None else None,
-            "hotel_prices": hotel_prices.tolist() if hotel_prices is not None else None,
-            "total_economic_impact": {
-                "prediction": float(total_impact[0]) if total_impact is not None else None,
-                "lower_bound": float(impact_lower[0]) if impact_lower is not None else None,
-                "upper_bound": float(impact_upper[0]) if impact_upper is not None else None,
-            },
-            "metrics": {
-                "tourism": self.tourism_predictor.metrics,
-                "hotel": self.hotel_predictor.metrics,
-                "impact": self.impact_predictor.metrics,
-            }
+            "predictions": predictions,
+            "timings_ms": {name: round(seconds * 1000, 3) for name, seconds in timings.items()},
+        }
+
+    def _precomputed(self, requests: List[Dict], days: np.ndarray) -> Tuple[List, List]:
+        """Visitor and occupancy forecast slices of each request (None where not covered)"""
+        visitors: List[Optional[pd.DataFrame]] = [None] * len(requests)
+        occupancy: List[Optional[pd.DataFrame]] = [None] * len(requests)
+        city_ids = sorted({r["city_id"] for r in requests if r.get("city_id") is not None})
+        if self.db is None or not city_ids:
+            return visitors, occupancy
+
+        from app.ml.forecast_fleet import load_forecasts
+        forecasts = load_forecasts(
+            self.db, city_ids, ["visitors", "occupancy"],
+            days.min().astype(date), days.max().astype(date),
+        )
+        series = {
+            key: group.set_index('ds')[['yhat', 'yhat_lower', 'yhat_upper']]
+            for key, group in forecasts.groupby(['city_id', 'metric'])
         }
+        for i, request in enumerate(requests):
+            window = pd.to_datetime(days[i])
+            for metric, slices in (("visitors", visitors), ("occupancy", occupancy)):
+                known = series.get((request.get("city_id"), metric))
+                if known is None or not window.isin(known.index).all():
+                    continue
+                slices[i] = known.loc[window].rename_axis('ds').reset_index()
+                slices[i].attrs['source'] = "precomputed"
+        return visitors, occupancy
+
+    def _run_stages(self, stages: Dict, timings: Dict) -> Dict:
+        """Run the stage functions (concurrently in parallel mode), recording their durations"""
+        def timed(name, function):
+            stage = time.perf_counter()
+            try:
+                return function()
+            finally:
+                timings[name] = time.perf_counter() - stage
+
+        if not self.parallel:
+            return {name: timed(name, function) for name, function in stages.items()}
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="ensemble")
+        futures = {name: self._executor.submit(timed, name, function) for name, function in stages.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def close(self):
+        """Shut down the stage threads (started again by the next parallel batch)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,165 @@
+"""
+Training Scheduler
+Fits candidate regression models and their cross-validation folds on a
+process pool, sharing one fold split across all models
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+
+# Training arrays of the current worker process, set once by _init_worker()
+# so they are not pickled again for every task
+_WORKER_DATA: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray):
+    """Store the training arrays in the worker process"""
+    _WORKER_DATA['X_train'] = X_train
+    _WORKER_DATA['y_train'] = y_train
+    _WORKER_DATA['X_test'] = X_test
+
+
+def _run_task(name: str, estimator, fold: Optional[int],
+              train_idx: Optional[np.ndarray], test_idx: Optional[np.ndarray],
+              single_thread: bool = False) -> Tuple:
+    """
+    Run one training task on a clone of the estimator.
+
+    fold=None fits on the whole training set and predicts the test set;
+    otherwise the clone is fitted on one CV fold and scored with R².
+    With single_thread, the clone's n_jobs is 1 while fitting; the fitted
+    full model gets the estimator's own n_jobs back for prediction.
+
+    Returns:
+        (name, fold, result, seconds) where result is (fitted model,
+        test predictions) for the full fit and the R² score for a fold
+    """
+    X_train, y_train = _WORKER_DATA['X_train'], _WORKER_DATA['y_train']
+    started = time.perf_counter()
+
+    model = clone(estimator)
+    if single_thread:
+        model.set_params(n_jobs=1)
+
+    if fold is None:
+        model.fit(X_train, y_train)
+        result = (model, model.predict(_WORKER_DATA['X_test']))
+        if single_thread:
+            model.set_params(n_jobs=estimator.get_params()['n_jobs'])
+    else:
+        model.fit(X_train[train_idx], y_train[train_idx])
+        result = r2_score(y_train[test_idx], model.predict(X_train[test_idx]))
+
+    return name, fold, result, time.perf_counter() - started
+
+
+def default_cpu_budget() -> int:
+    """CPUs available to this process"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class TrainingScheduler:
+    """
+    Runs model fits and CV folds in parallel.
+
+    Every (model, fold) pair and every full fit is an independent task. The
+    tasks run on a process pool with at most cpu_budget workers; estimators
+    with their own n_jobs fit with one thread so the pool stays within the
+    budget, and the fitted models keep the configured n_jobs. The estimators
+    in model_configs are never modified. With a budget of 1 (or if no pool can be started) the tasks
+    run in-process, one after another.
+
+    The K-fold split is computed once and reused for every model, and matches
+    cross_val_score(cv=n_folds) for regressors.
+
+    Usage:
+        scheduler = TrainingScheduler(cpu_budget=8)
+        results = scheduler.run(model_configs, X_train, y_train, X_test)
+    """
+
+    def __init__(self, cpu_budget: Optional[int] = None, n_folds: int = 5):
+        """
+        Args:
+            cpu_budget: Maximum number of worker processes (default: all CPUs)
+            n_folds: Number of cross-validation folds
+        """
+        self.cpu_budget = max(1, cpu_budget or default_cpu_budget())
+        self.n_folds = n_folds
+
+    def fold_split(self, n_samples: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Shared (train_idx, test_idx) pairs for cross-validation"""
+        return list(KFold(n_splits=self.n_folds).split(np.arange(n_samples)))
+
+    def run(self, model_configs: Dict, X_train: np.ndarray, y_train: np.ndarray,
+            X_test: np.ndarray) -> Dict[str, Dict]:
+        """
+        Fit every model and cross-validate it.
+
+        Args:
+            model_configs: {name: unfitted estimator}
+            X_train, y_train: Training data (already scaled)
+            X_test: Test features to predict with the fitted models
+
+        Returns:
+            {name: {'model': fitted clone of the estimator, 'y_pred': test predictions,
+                    'cv_scores': array of fold R², 'fit_seconds': float,
+                    'cv_seconds': float, 'wall_seconds': float}}
+        """
+        folds = self.fold_split(len(X_train))
+        tasks = []
+        for name, estimator in model_configs.items():
+            single_thread = self.cpu_budget > 1 and 'n_jobs' in estimator.get_params()
+            tasks.append((name, estimator, None, None, None, single_thread))
+            for fold, (train_idx, test_idx) in enumerate(folds):
+                tasks.append((name, estimator, fold, train_idx, test_idx, single_thread))
+
+        started = time.perf_counter()
+        outputs = None
+        if self.cpu_budget > 1:
+            try:
+                outputs = self._run_pool(tasks, X_train, y_train, X_test)
+            except (BrokenProcessPool, OSError) as e:
+                print(f"   ⚠️  Warning: Process pool unavailable ({e}), training serially")
+        if outputs is None:
+            _init_worker(X_train, y_train, X_test)
+            outputs = [_run_task(*task) for task in tasks]
+        print(f"   ✓ Trained {len(model_configs)} models x {self.n_folds} folds "
+              f"in {time.perf_counter() - started:.1f}s ({self.cpu_budget} CPUs)")
+
+        results = {
+            name: {'cv_scores': np.zeros(len(folds)), 'fit_seconds': 0.0, 'cv_seconds': 0.0}
+            for name in model_configs
+        }
+        for name, fold, result, seconds in outputs:
+            entry = results[name]
+            if fold is None:
+                entry['model'], entry['y_pred'] = result
+                entry['fit_seconds'] = seconds
+            else:
+                entry['cv_scores'][fold] = result
+                entry['cv_seconds'] += seconds
+        for entry in results.values():
+            entry['wall_seconds'] = entry['fit_seconds'] + entry['cv_seconds']
+        return results
+
+    def _run_pool(self, tasks: List[Tuple], X_train: np.ndarray, y_train: np.ndarray,
+                  X_test: np.ndarray) -> List[Tuple]:
+        """Run the tasks on a process pool"""
+        workers = min(self.cpu_budget, len(tasks))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(X_train, y_train, X_test),
+        ) as pool:
+            futures = [pool.submit(_run_task, *task) for task in tasks]
+            return [future.result() for future in as_completed(futures)]
@@ -9,7 +9,10 @@ from app.models.metrics import (
     EconomicMetric,
     MobilityMetric
 )
-from app.models.impact import EventImpact
+from app.models.impact import EventImpact, ImpactCube
+from app.models.job import ImpactJob, ImportJob, JobStatus
+from app.models.sync import SyncWatermark
+from app.models.forecast import MetricForecast
 
 __all__ = [
     "City",
@@ -20,4 +23,10 @@ __all__ = [
     "EconomicMetric",
     "MobilityMetric",
     "EventImpact",
+    "ImpactCube",
+    "ImpactJob",
+    "ImportJob",
+    "JobStatus",
+    "SyncWatermark",
+    "MetricForecast",
 ]
@@ -0,0 +1,34 @@
+"""
+Precomputed forecasts
+"""
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class MetricForecast(Base):
+    """
+    One forecast day of a city metric
+
+    Written by the forecasting fleet (app.ml.forecast_fleet), which refits
+    one model per city and metric and replaces that city and metric's rolling
+    forecast. Predictions read slices of this table instead of running models.
+    """
+
+    __tablename__ = "metric_forecasts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=False)
+    metric = Column(String(30), nullable=False)  # "visitors", "arrivals", "occupancy" or "price"
+    date = Column(Date, nullable=False)
+
+    yhat = Column(Float, nullable=False)
+    yhat_lower = Column(Float)
+    yhat_upper = Column(Float)
+
+    model = Column(String(30))  # Backend that produced it, e.g. "holt_winters"
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_forecast_city_metric_date', 'city_id', 'metric', 'date', unique=True),
+    )
@@ -1,10 +1,13 @@
 """
 Event impact analysis model
 """
-from sqlalchemy import Column, Integer, Float, ForeignKey, JSON, DateTime
+from sqlalchemy import (
+    Column, Integer, Float, ForeignKey, JSON, DateTime, UniqueConstraint, Enum as SQLEnum
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.event import EventType
 
 
 class EventImpact(Base):
@@ -16,7 +19,8 @@ class EventImpact(Base):
     __tablename__ = "event_impacts"
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+    # One impact per event: analyzers upsert on event_id
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True, unique=True)
 
     # Tourism Impact
     baseline_daily_visitors = Column(Integer)  # Average before event
@@ -83,3 +87,55 @@ class EventImpact(Base):
             "roi_ratio": self.roi_ratio,
             "jobs_created": self.jobs_created,
         }
+
+
+class ImpactCube(Base):
+    """
+    Pre-aggregated event impacts per city, event type and year
+
+    One row per (city_id, event_type, year) cell, maintained by
+    app.analytics.impact_cube whenever EventImpact rows change. Sums and
+    counts skip missing and zero values, so mean = sum / count.
+    """
+
+    __tablename__ = "impact_cube"
+
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=False, index=True)
+    event_type = Column(SQLEnum(EventType), nullable=False)
+    year = Column(Integer, nullable=False)
+
+    # Number of EventImpact rows in the cell
+    impact_count = Column(Integer, nullable=False, default=0)
+
+    # Economic impact
+    economic_impact_sum_usd = Column(Float, nullable=False, default=0)
+    economic_impact_count = Column(Integer, nullable=False, default=0)
+    economic_impact_max_usd = Column(Float)
+    top_event_id = Column(Integer, ForeignKey("events.id"))
+
+    # Percentage increases
+    visitor_increase_pct_sum = Column(Float, nullable=False, default=0)
+    visitor_increase_pct_count = Column(Integer, nullable=False, default=0)
+    price_increase_pct_sum = Column(Float, nullable=False, default=0)
+    price_increase_pct_count = Column(Integer, nullable=False, default=0)
+    occupancy_increase_pct_sum = Column(Float, nullable=False, default=0)
+    occupancy_increase_pct_count = Column(Integer, nullable=False, default=0)
+
+    jobs_created_sum = Column(Integer, nullable=False, default=0)
+
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('city_id', 'event_type', 'year', name='uq_impact_cube_cell'),
+    )
+
+    def __repr__(self):
+        return f"<ImpactCube(city_id={self.city_id}, type={self.event_type}, year={self.year})>"
+
+    @property
+    def economic_impact_mean_usd(self):
+        """Mean economic impact of the events with one"""
+        if not self.economic_impact_count:
+            return None
+        return self.economic_impact_sum_usd / self.economic_impact_count
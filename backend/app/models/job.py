@@ -0,0 +1,114 @@
+"""
+Background job models
+"""
+from datetime import datetime, timezone
+from enum import Enum
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum as SQLEnum
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a background job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ImpactJob(Base):
+    """
+    Background recomputation of EventImpact rows
+
+    Created by request handlers, processed by app.analytics.impact_worker.
+    Jobs survive restarts: queued or interrupted jobs are picked up again
+    when the worker starts.
+    """
+
+    __tablename__ = "impact_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+    source = Column(String(50))  # What requested the job, e.g. "dashboard"
+
+    # Events to analyze (None = all events)
+    event_ids = Column(JSON)
+
+    # Progress
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    succeeded = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(String(1000))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<ImpactJob(id={self.id}, status={self.status}, {self.processed}/{self.total})>"
+
+    @property
+    def progress_pct(self) -> float:
+        """Share of the events processed so far"""
+        if self.status == JobStatus.DONE:
+            return 100.0
+        if not self.total:
+            return 0.0
+        return round(self.processed / self.total * 100, 1)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+
+class ImportJob(Base):
+    """
+    Background import of an uploaded CSV/XLSX file
+
+    Created by the /upload endpoints, which spool the file to disk, and
+    processed by app.etl.import_jobs. The running report (counts, errors,
+    changed ranges) is saved in the same transaction as each chunk, so an
+    interrupted import resumes after the last committed chunk.
+    """
+
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+    kind = Column(String(30), nullable=False)  # "cities", "events", "hotel-metrics", "tourism-metrics"
+    filename = Column(String(255), nullable=False)
+    spool_path = Column(String(500), nullable=False)
+
+    # Progress
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_at_start = Column(Integer, nullable=False, default=0)  # Rows committed before the last (re)start
+    chunks = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    report = Column(JSON)  # Running report of the committed chunks
+    result = Column(JSON)  # Final response, as returned by synchronous uploads
+    error = Column(String(1000))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<ImportJob(id={self.id}, kind={self.kind}, status={self.status}, rows={self.rows_processed})>"
+
+    @property
+    def rows_per_second(self) -> float:
+        """Import throughput since the job (last) started, counting only rows imported since"""
+        if self.started_at is None:
+            return 0.0
+        started = self.started_at
+        end = self.finished_at or datetime.now(started.tzinfo or timezone.utc)
+        if started.tzinfo is None and end.tzinfo is not None:
+            end = end.replace(tzinfo=None)
+        elapsed = (end - started).total_seconds()
+        rows = (self.rows_processed or 0) - (self.rows_at_start or 0)
+        return round(rows / elapsed, 1) if elapsed > 0 else 0.0
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
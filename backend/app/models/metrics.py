@@ -38,7 +38,8 @@ class TourismMetric(Base):
     city = relationship("City", back_populates="tourism_metrics")
 
     __table_args__ = (
-        Index('idx_tourism_city_date', 'city_id', 'date'),
+        # One row per city and day: re-ingestion upserts instead of duplicating
+        Index('idx_tourism_city_date', 'city_id', 'date', unique=True),
     )
 
 
@@ -79,7 +80,7 @@ class HotelMetric(Base):
     city = relationship("City", back_populates="hotel_metrics")
 
     __table_args__ = (
-        Index('idx_hotel_city_date', 'city_id', 'date'),
+        Index('idx_hotel_city_date', 'city_id', 'date', unique=True),
     )
 
 
@@ -119,7 +120,7 @@ class EconomicMetric(Base):
     city = relationship("City", back_populates="economic_metrics")
 
     __table_args__ = (
-        Index('idx_economic_city_date', 'city_id', 'date'),
+        Index('idx_economic_city_date', 'city_id', 'date', unique=True),
     )
 
 
@@ -160,5 +161,5 @@ class MobilityMetric(Base):
     city = relationship("City", back_populates="mobility_metrics")
 
     __table_args__ = (
-        Index('idx_mobility_city_date', 'city_id', 'date'),
+        Index('idx_mobility_city_date', 'city_id', 'date', unique=True),
     )
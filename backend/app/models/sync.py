@@ -0,0 +1,27 @@
+"""
+Sync state of external data sources
+"""
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class SyncWatermark(Base):
+    """
+    Last day stored from an external source for a city
+
+    Incremental syncs only request the days after it, e.g. the nightly
+    AIRROI refresh asks for one new day per city instead of a full year.
+    """
+
+    __tablename__ = "sync_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=False)
+    source = Column(String(50), nullable=False)  # e.g. "airroi:hotel"
+    last_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('idx_sync_watermark_city_source', 'city_id', 'source', unique=True),
+    )
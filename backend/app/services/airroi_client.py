@@ -1,25 +1,182 @@
 """
 AIRROI API Client for fetching real hotel and tourism data
 """
+import asyncio
+import random
+import time
 import httpx
 from typing import Dict, List, Optional
 from datetime import date
 from app.core.config import settings
+from app.services.response_cache import ResponseCache
+
+
+# Responses worth retrying: rate limited or a temporary server error
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Async token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one, waiting for the refill when the bucket is empty.
+    Shared by every request of a sync so the API quota holds no matter how
+    many run concurrently.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Largest burst (defaults to one second's worth)
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
 
 
 class AirROIClient:
     """Client for AIRROI Data Portal API"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """
+        Args:
+            api_key: AIRROI API key (defaults to settings.AIRROI_API_KEY)
+            client: Shared HTTP client (left open by close()); a pooled
+                client is created and owned by this instance if omitted
+            rate_limiter: Token bucket taken before every request
+            max_retries: Retries on 429/5xx and network errors
+                (defaults to settings.AIRROI_MAX_RETRIES)
+            cache: Response cache consulted before every request
+        """
         self.api_key = api_key or settings.AIRROI_API_KEY
         self.base_url = settings.AIRROI_BASE_URL
-        self.client = httpx.AsyncClient(
+        self._owns_client = client is None
+        self.client = client or self.create_http_client(self.api_key)
+        self.rate_limiter = rate_limiter
+        self.max_retries = settings.AIRROI_MAX_RETRIES if max_retries is None else max_retries
+        self.cache = cache
+
+    @staticmethod
+    def create_http_client(api_key: Optional[str] = None, **kwargs) -> httpx.AsyncClient:
+        """
+        Pooled HTTP client for the AIRROI API.
+
+        One client is meant to be shared by all concurrent requests of a
+        sync, so connections are reused instead of opened per call.
+        """
+        connections = max(1, settings.AIRROI_MAX_CONCURRENCY)
+        return httpx.AsyncClient(
             headers={
-                "Authorization": f"Bearer {self.api_key}",
+                "Authorization": f"Bearer {api_key or settings.AIRROI_API_KEY}",
                 "Content-Type": "application/json"
             },
-            timeout=30.0
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            **kwargs
+        )
+
+    async def _get(self, path: str, params: Dict) -> Dict:
+        """
+        GET an API path through the response cache.
+
+        Fresh cached responses are returned without a request; stale ones
+        are revalidated with their ETag and reused on 304 Not Modified.
+        """
+        if self.cache is None:
+            return (await self._request(path, params)).json()
+
+        key = self.cache.key(path, params)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            return entry["body"]
+
+        response = await self._request(path, params, headers=self.cache.validators(entry))
+        if response.status_code == 304 and entry is not None:
+            body = entry["body"]
+        else:
+            body = response.json()
+        self.cache.put(
+            key, body,
+            etag=response.headers.get("ETag", entry and entry.get("etag")),
+            last_modified=response.headers.get("Last-Modified", entry and entry.get("last_modified")),
+        )
+        return body
+
+    async def _request(self, path: str, params: Dict, headers: Optional[Dict] = None) -> httpx.Response:
+        """
+        GET an API path, retrying with exponential backoff.
+
+        Rate-limited (429) and 5xx responses and network errors are retried
+        up to max_retries times, waiting base * 2^attempt seconds (with
+        jitter, capped, and at least the server's Retry-After). Other errors
+        are raised right away.
+
+        Returns:
+            The successful (or 304 Not Modified) response
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                response = await self.client.get(f"{self.base_url}{path}", params=params, headers=headers)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                    return response
+                retry_after = self._retry_after(response)
+
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """Seconds asked for by a Retry-After header, if any"""
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number attempt + 1"""
+        delay = min(
+            settings.AIRROI_BACKOFF_MAX_SECONDS,
+            settings.AIRROI_BACKOFF_BASE_SECONDS * 2 ** attempt,
         )
+        # Jitter keeps concurrent retries from hitting the API in lockstep
+        delay *= random.uniform(0.5, 1.0)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, settings.AIRROI_BACKOFF_MAX_SECONDS))
+        return delay
 
     async def get_hotel_data(
         self,
@@ -51,13 +208,7 @@ class AirROIClient:
         }
 
         # Example endpoint - adjust based on actual AIRROI API documentation
-        response = await self.client.get(
-            f"{self.base_url}/api/hotel-metrics",
-            params=params
-        )
-
-        response.raise_for_status()
-        return response.json()
+        return await self._get("/api/hotel-metrics", params)
 
     async def get_tourism_data(
         self,
@@ -82,13 +233,7 @@ class AirROIClient:
             "end_date": end_date.isoformat()
         }
 
-        response = await self.client.get(
-            f"{self.base_url}/api/tourism-data",
-            params=params
-        )
-
-        response.raise_for_status()
-        return response.json()
+        return await self._get("/api/tourism-data", params)
 
     async def get_event_impact(
         self,
@@ -113,17 +258,12 @@ class AirROIClient:
             "date": event_date.isoformat()
         }
 
-        response = await self.client.get(
-            f"{self.base_url}/api/event-impact",
-            params=params
-        )
-
-        response.raise_for_status()
-        return response.json()
+        return await self._get("/api/event-impact", params)
 
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Close the HTTP client (unless it is shared)"""
+        if self._owns_client:
+            await self.client.aclose()
 
     async def __aenter__(self):
         return self
@@ -137,11 +277,15 @@ async def fetch_and_store_airroi_data(
     city_name: str,
     start_date: date,
     end_date: date,
-    db
-):
+    db,
+    incremental: bool = False
+) -> Dict:
     """
     Fetch data from AIRROI and store in database
 
+    With incremental=True only the days after the last day already
+    stored from AIRROI are requested.
+
     Example:
         await fetch_and_store_airroi_data(
             "London",
@@ -150,78 +294,40 @@ async def fetch_and_store_airroi_data(
             db_session
         )
     """
-    from app.models import City, HotelMetric, TourismMetric
-
-    async with AirROIClient() as client:
-        # Get city from database
-        city = db.query(City).filter(City.name == city_name).first()
-        if not city:
-            raise ValueError(f"City {city_name} not found in database")
-
-        # Fetch hotel data
-        hotel_data = await client.get_hotel_data(
-            city_name,
-            start_date,
-            end_date
-        )
-
-        # Store hotel metrics
-        for daily_data in hotel_data.get("daily_metrics", []):
-            metric = HotelMetric(
-                city_id=city.id,
-                date=date.fromisoformat(daily_data["date"]),
-                occupancy_rate_pct=daily_data.get("occupancy"),
-                avg_price_usd=daily_data.get("adr"),  # Average Daily Rate
-                revenue_per_available_room_usd=daily_data.get("revpar"),
-                available_rooms=daily_data.get("available_rooms"),
-                occupied_rooms=daily_data.get("occupied_rooms"),
-            )
-            db.add(metric)
-
-        # Fetch tourism data
-        tourism_data = await client.get_tourism_data(
-            city_name,
-            start_date,
-            end_date
-        )
+    from app.models import City
+    from app.services.airroi_harvester import AirROIHarvester
 
-        # Store tourism metrics
-        for daily_data in tourism_data.get("daily_metrics", []):
-            metric = TourismMetric(
-                city_id=city.id,
-                date=date.fromisoformat(daily_data["date"]),
-                total_visitors=daily_data.get("total_visitors"),
-                international_visitors=daily_data.get("international_visitors"),
-                domestic_visitors=daily_data.get("domestic_visitors"),
-                avg_spending_per_visitor_usd=daily_data.get("avg_spending"),
-            )
-            db.add(metric)
+    # Get city from database
+    city = db.query(City).filter(City.name == city_name).first()
+    if not city:
+        raise ValueError(f"City {city_name} not found in database")
 
-        db.commit()
-        print(f"✓ Imported AIRROI data for {city_name}")
+    report = await AirROIHarvester(db).sync([city], start_date, end_date, incremental=incremental)
+    if report["failed_units"]:
+        raise RuntimeError(f"{len(report['failed_units'])} AIRROI requests failed for {city_name}")
+    print(f"✓ Imported AIRROI data for {city_name}")
+    return report
 
 
 # Script to import data for all cities
-async def import_all_cities_from_airroi(db):
+async def import_all_cities_from_airroi(
+    db,
+    start_date: date = date(2024, 1, 1),
+    end_date: date = date(2024, 12, 31),
+    incremental: bool = False
+) -> Dict:
     """
     Import data from AIRROI for all cities in database
+
+    Cities and months are fetched concurrently; see AirROIHarvester. A
+    nightly refresh passes incremental=True and end_date=date.today(), so
+    each city only asks for the days since its last sync.
     """
     from app.models import City
+    from app.services.airroi_harvester import AirROIHarvester
 
     cities = db.query(City).all()
-
-    for city in cities:
-        try:
-            print(f"Importing data for {city.name}...")
-            await fetch_and_store_airroi_data(
-                city.name,
-                date(2024, 1, 1),
-                date(2024, 12, 31),
-                db
-            )
-        except Exception as e:
-            print(f"Error importing {city.name}: {str(e)}")
-            continue
+    return await AirROIHarvester(db).sync(cities, start_date, end_date, incremental=incremental)
 
 
 # To use this, create a script like:
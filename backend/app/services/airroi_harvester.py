@@ -0,0 +1,299 @@
+"""
+AIRROI Harvester - Concurrent, rate-limited AIRROI sync
+
+A sync is split into work units of one city, one source (hotel or tourism
+data) and one calendar month. Units run concurrently, bounded by a
+semaphore (settings.AIRROI_MAX_CONCURRENCY), over one pooled HTTP client
+and one token bucket sized to the API quota. Each unit is stored and
+committed on its own, so a unit that still fails after the client's
+retries only loses its slice: the report lists the failed units and
+run() can be called again with just those.
+
+Incremental syncs start each city and source after its watermark (the
+last day stored from AIRROI, see SyncWatermark), so a nightly refresh
+makes one small request per city and source instead of fetching a year.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ensure_tables, upsert_records
+from app.analytics.dirty_ranges import DirtyRanges, enqueue_affected_impacts
+from app.models import City, HotelMetric, SyncWatermark, TourismMetric
+from app.services.airroi_client import AirROIClient, TokenBucket
+from app.services.response_cache import ResponseCache
+
+
+SOURCES = ("hotel", "tourism")
+WATERMARK_PREFIX = "airroi:"  # SyncWatermark.source of each AIRROI source
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """One AIRROI request: a source for a city over (at most) one month"""
+    city_id: int
+    city_name: str
+    source: str
+    start_date: date
+    end_date: date
+
+    def __str__(self) -> str:
+        return f"{self.city_name} {self.source} {self.start_date}..{self.end_date}"
+
+
+def month_slices(start_date: date, end_date: date) -> List[tuple]:
+    """(start, end) of each calendar month overlapping start_date..end_date"""
+    slices = []
+    current = start_date
+    while current <= end_date:
+        next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        slices.append((current, min(end_date, next_month - timedelta(days=1))))
+        current = next_month
+    return slices
+
+
+def plan_units(
+    cities: Iterable[City],
+    start_date: date,
+    end_date: date,
+    sources: Iterable[str] = SOURCES,
+    watermarks: Optional[Dict[tuple, date]] = None
+) -> List[WorkUnit]:
+    """
+    Work units of a sync, month by month for every city and source
+
+    Args:
+        watermarks: {(city_id, source): last stored day}; each city and
+            source then starts on the day after its watermark
+    """
+    watermarks = watermarks or {}
+    units = []
+    for city in cities:
+        for source in sources:
+            watermark = watermarks.get((city.id, source))
+            first = max(start_date, watermark + timedelta(days=1)) if watermark else start_date
+            units.extend(
+                WorkUnit(city.id, city.name, source, month_start, month_end)
+                for month_start, month_end in month_slices(first, end_date)
+            )
+    return units
+
+
+def load_watermarks(db: Session, city_ids: Iterable[int]) -> Dict[tuple, date]:
+    """{(city_id, source): last day stored from AIRROI} of the cities"""
+    ensure_tables(db, SyncWatermark.__table__)
+    rows = db.query(SyncWatermark).filter(
+        SyncWatermark.city_id.in_(list(city_ids)),
+        SyncWatermark.source.like(f"{WATERMARK_PREFIX}%"),
+    )
+    return {(row.city_id, row.source[len(WATERMARK_PREFIX):]): row.last_date for row in rows}
+
+
+def hotel_records(city_id: int, payload: Dict) -> List[Dict[str, Any]]:
+    """HotelMetric rows of a hotel-metrics response"""
+    return [
+        {
+            "city_id": city_id,
+            "date": date.fromisoformat(daily_data["date"]),
+            "occupancy_rate_pct": daily_data.get("occupancy"),
+            "avg_price_usd": daily_data.get("adr"),  # Average Daily Rate
+            "revenue_per_available_room_usd": daily_data.get("revpar"),
+            "available_rooms": daily_data.get("available_rooms"),
+            "occupied_rooms": daily_data.get("occupied_rooms"),
+        }
+        for daily_data in payload.get("daily_metrics", [])
+    ]
+
+
+def tourism_records(city_id: int, payload: Dict) -> List[Dict[str, Any]]:
+    """TourismMetric rows of a tourism-data response"""
+    return [
+        {
+            "city_id": city_id,
+            "date": date.fromisoformat(daily_data["date"]),
+            "total_visitors": daily_data.get("total_visitors"),
+            "international_visitors": daily_data.get("international_visitors"),
+            "domestic_visitors": daily_data.get("domestic_visitors"),
+            "avg_spending_per_visitor_usd": daily_data.get("avg_spending"),
+        }
+        for daily_data in payload.get("daily_metrics", [])
+    ]
+
+
+class AirROIHarvester:
+    """
+    Fetches and stores AIRROI work units concurrently.
+
+    Usage:
+        harvester = AirROIHarvester(db)
+        report = await harvester.sync(cities, date(2024, 1, 1), date(2024, 12, 31))
+        if report["failed_units"]:
+            report = await harvester.run(report["failed_units"])
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        client: Optional[AirROIClient] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        """
+        Args:
+            db: Database session (committed after each unit)
+            client: AIRROI client to use; by default one with a pooled HTTP
+                client, a token bucket and the response cache from the
+                settings is created per run
+            max_concurrency: Units in flight at once
+                (defaults to settings.AIRROI_MAX_CONCURRENCY)
+        """
+        self.db = db
+        self.client = client
+        self.max_concurrency = max_concurrency or settings.AIRROI_MAX_CONCURRENCY
+
+    async def sync(
+        self,
+        cities: Iterable[City],
+        start_date: date,
+        end_date: date,
+        sources: Iterable[str] = SOURCES,
+        incremental: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Fetch and store every source of the cities over a date range
+
+        Args:
+            incremental: Skip the days up to each city and source's watermark
+        """
+        cities = list(cities)
+        watermarks = load_watermarks(self.db, [city.id for city in cities]) if incremental else None
+        return await self.run(plan_units(cities, start_date, end_date, sources, watermarks))
+
+    async def run(self, units: List[WorkUnit]) -> Dict[str, Any]:
+        """
+        Fetch and store work units, then queue the affected impacts.
+
+        Returns:
+            Report with unit and row counts, failed_units (WorkUnit list,
+            each with its error in errors) and the recomputation summary
+        """
+        started = time.perf_counter()
+        dirty = DirtyRanges()
+        report: Dict[str, Any] = {
+            "units": len(units),
+            "units_succeeded": 0,
+            "metrics_stored": 0,
+            "failed_units": [],
+            "errors": [],
+        }
+
+        client = self.client or self._default_client()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Last day stored by each successful unit (None if it had no data)
+        stored_until: Dict[WorkUnit, Optional[date]] = {}
+
+        async def run_unit(unit: WorkUnit):
+            async with semaphore:
+                try:
+                    payload = await self._fetch(client, unit)
+                except Exception as e:
+                    self._fail(report, unit, e)
+                    return
+            # Storing runs on the event loop thread, one unit at a time
+            try:
+                written, stored_until[unit] = self._store(unit, payload, dirty)
+                report["metrics_stored"] += written
+                report["units_succeeded"] += 1
+            except Exception as e:
+                self.db.rollback()
+                self._fail(report, unit, e)
+
+        try:
+            await asyncio.gather(*(run_unit(unit) for unit in units))
+        finally:
+            if self.client is None:
+                await client.close()
+
+        self._advance_watermarks(units, stored_until)
+        report.update(enqueue_affected_impacts(self.db, dirty, source="airroi"))
+        report["seconds"] = round(time.perf_counter() - started, 2)
+        print(
+            f"✓ AIRROI sync: {report['units_succeeded']}/{report['units']} units, "
+            f"{report['metrics_stored']} days stored in {report['seconds']}s"
+        )
+        return report
+
+    @staticmethod
+    def _default_client() -> AirROIClient:
+        cache = None
+        if settings.AIRROI_CACHE_TTL_SECONDS > 0:
+            cache = ResponseCache(settings.AIRROI_CACHE_DIR, settings.AIRROI_CACHE_TTL_SECONDS)
+        return AirROIClient(
+            rate_limiter=TokenBucket(settings.AIRROI_RATE_LIMIT_PER_SECOND, settings.AIRROI_RATE_LIMIT_BURST),
+            cache=cache,
+        )
+
+    @staticmethod
+    async def _fetch(client: AirROIClient, unit: WorkUnit) -> Dict:
+        """Request one unit (retried by the client)"""
+        if unit.source == "hotel":
+            return await client.get_hotel_data(unit.city_name, unit.start_date, unit.end_date)
+        return await client.get_tourism_data(unit.city_name, unit.start_date, unit.end_date)
+
+    def _store(self, unit: WorkUnit, payload: Dict, dirty: DirtyRanges) -> tuple:
+        """
+        Upsert one unit's days and commit (re-fetching a period updates its days)
+
+        Returns:
+            (rows written, last day stored or None)
+        """
+        if unit.source == "hotel":
+            model, records = HotelMetric, hotel_records(unit.city_id, payload)
+        else:
+            model, records = TourismMetric, tourism_records(unit.city_id, payload)
+
+        written = upsert_records(self.db, model, records)
+        self.db.commit()
+        days = [record["date"] for record in records]
+        dirty.add_days(unit.city_id, days)
+        return written, max(days) if days else None
+
+    def _advance_watermarks(self, units: List[WorkUnit], stored_until: Dict[WorkUnit, Optional[date]]):
+        """
+        Move each city and source's watermark to its last stored day.
+
+        Only the units before the first failure count: a failed month keeps
+        the watermark before it, so the next incremental sync fetches it again.
+        """
+        latest: Dict[tuple, date] = {}
+        blocked = set()
+        for unit in sorted(units, key=lambda u: (u.city_id, u.source, u.start_date)):
+            key = (unit.city_id, unit.source)
+            if key in blocked:
+                continue
+            if unit not in stored_until:
+                blocked.add(key)
+            elif stored_until[unit] is not None:
+                latest[key] = stored_until[unit]
+
+        existing = load_watermarks(self.db, {city_id for city_id, _ in latest})
+        records = [
+            {
+                "city_id": city_id, "source": f"{WATERMARK_PREFIX}{source}",
+                "last_date": last_date, "updated_at": datetime.now(timezone.utc),
+            }
+            for (city_id, source), last_date in latest.items()
+            if last_date > existing.get((city_id, source), date.min)
+        ]
+        upsert_records(self.db, SyncWatermark, records, keys=("city_id", "source"))
+        self.db.commit()
+
+    @staticmethod
+    def _fail(report: Dict[str, Any], unit: WorkUnit, error: Exception):
+        report["failed_units"].append(unit)
+        report["errors"].append(f"{unit}: {error}")
+        print(f"❌ AIRROI {unit}: {error}")
@@ -0,0 +1,85 @@
+"""
+Response Cache - On-disk cache of JSON API responses
+
+Each response is one JSON file named after a hash of its path and query
+parameters, holding the body, its ETag/Last-Modified validators and when
+it was fetched. Fresh entries (younger than the TTL) are served without a
+request; stale ones are revalidated with If-None-Match/If-Modified-Since,
+so an unchanged response costs a 304 instead of a full download.
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """
+    File-backed response cache with TTL and ETag revalidation.
+
+    Usage:
+        cache = ResponseCache(settings.AIRROI_CACHE_DIR, ttl_seconds=3600)
+        key = cache.key("/api/hotel-metrics", params)
+        entry = cache.get(key)
+        if entry and cache.is_fresh(entry):
+            return entry["body"]
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float):
+        """
+        Args:
+            directory: Where the entries are stored (created on first write)
+            ttl_seconds: Age up to which an entry is used without revalidation
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def key(path: str, params: Dict[str, Any]) -> str:
+        """Cache key of a request (independent of the parameter order)"""
+        request = json.dumps([path, sorted((str(k), str(v)) for k, v in params.items())])
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored entry ({body, etag, last_modified, fetched_at}) or None"""
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Missing, or a corrupt file: treated as a miss and overwritten
+            return None
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers revalidating an entry"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, key: str, body: Any, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store a response (written atomically: readers never see a partial file)"""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {"body": body, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+        temporary = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp")
+        with open(temporary, "w") as f:
+            json.dump(entry, f)
+        os.replace(temporary, self._path(key))
+
+    def clear(self):
+        """Remove every entry"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
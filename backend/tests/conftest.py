@@ -0,0 +1,83 @@
+"""
+Shared pytest fixtures
+"""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+import app.models  # noqa: F401  (registers all tables on Base.metadata)
+from app.models import (
+    City, Event, EventType,
+    TourismMetric, HotelMetric, EconomicMetric, MobilityMetric
+)
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with all tables created"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def seeded_db(db):
+    """One city with 120 days of metrics and three events"""
+    rng = np.random.default_rng(7)
+    city = City(
+        name="London", country="United Kingdom", country_code="GBR", continent="Europe",
+        latitude=51.5, longitude=-0.1, timezone="Europe/London",
+        avg_hotel_price_usd=180,
+    )
+    db.add(city)
+    db.flush()
+
+    start = date(2024, 1, 1)
+    for i in range(120):
+        day = start + timedelta(days=i)
+        # Some missing and zero values: both are skipped by the averages
+        visitors = None if i % 17 == 0 else (0 if i % 23 == 0 else int(rng.integers(40000, 60000)))
+        db.add(TourismMetric(city_id=city.id, date=day, total_visitors=visitors))
+        db.add(HotelMetric(
+            city_id=city.id, date=day,
+            occupancy_rate_pct=float(rng.uniform(60, 95)),
+            avg_price_usd=None if i % 11 == 0 else float(rng.uniform(150, 300)),
+        ))
+        db.add(EconomicMetric(
+            city_id=city.id, date=day,
+            total_spending_usd=float(rng.uniform(1e6, 2e6)),
+            temporary_jobs_created=int(rng.integers(0, 50)),
+            estimated_tax_revenue_usd=float(rng.uniform(1e4, 5e4)),
+        ))
+        if i < 90:
+            db.add(MobilityMetric(
+                city_id=city.id, date=day,
+                airport_arrivals=int(rng.integers(30000, 45000)),
+                public_transport_usage=int(rng.integers(3000000, 4000000)),
+                traffic_congestion_index=float(rng.uniform(4, 8)),
+            ))
+
+    for name, start_day, end_day in [
+        ("Spring Fair", date(2024, 3, 10), date(2024, 3, 14)),
+        ("Late Concert", date(2024, 4, 20), date(2024, 4, 21)),  # no mobility data
+        ("Winter Race", date(2024, 1, 20), date(2024, 1, 20)),  # no baseline data
+    ]:
+        db.add(Event(
+            city_id=city.id, name=name, event_type=EventType.SPORTS,
+            start_date=start_day, end_date=end_day, year=start_day.year,
+        ))
+    db.commit()
+    return db
@@ -0,0 +1,337 @@
+"""
+Unit tests for the concurrent AIRROI harvester, run against a fake AIRROI server
+"""
+import asyncio
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+import app.analytics.dirty_ranges as dirty_ranges
+from app.core.config import settings
+from app.models import City, HotelMetric, ImpactJob, SyncWatermark, TourismMetric
+from app.services.airroi_client import AirROIClient, TokenBucket
+from app.services.airroi_harvester import AirROIHarvester, load_watermarks, month_slices
+from app.services.response_cache import ResponseCache
+
+
+class FakeAirROI:
+    """
+    In-process AIRROI API: daily metrics for any city and period.
+
+    failures maps (path, city, start_date) to the status codes answered
+    before the real response ("always" codes are answered forever).
+    Responses carry an ETag of the data version and revalidate with 304.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.failures = defaultdict(list)
+        self.always = {}
+        self.requests = Counter()
+        self.version = 1
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.get("/data-portal/api/hotel-metrics")(self.handle)
+        self.app.get("/data-portal/api/tourism-data")(self.handle)
+
+    async def handle(self, request: Request):
+        params = request.query_params
+        key = (request.url.path.rsplit("/", 1)[-1], params["city"], params["start_date"])
+        self.requests[key] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        if key in self.always:
+            return JSONResponse({"error": "down"}, status_code=self.always[key])
+        if self.failures[key]:
+            return JSONResponse({"error": "retry"}, status_code=self.failures[key].pop(0), headers={"Retry-After": "0"})
+
+        etag = f'"v{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag})
+
+        day, end = date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+        days = []
+        while day <= end:
+            days.append({
+                "date": day.isoformat(), "occupancy": 70.0, "adr": 150.0, "revpar": 105.0,
+                "total_visitors": 50000 + day.day + self.version,
+            })
+            day += timedelta(days=1)
+        return JSONResponse({"daily_metrics": days}, headers={"ETag": etag})
+
+    def client(self, **kwargs) -> AirROIClient:
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        return AirROIClient(api_key="test", client=http, **kwargs)
+
+
+class RecordingWorker:
+    """Stand-in for the impact worker that records enqueued events"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, db, event_ids=None, source="api"):
+        self.jobs.append((event_ids, source))
+        return ImpactJob(id=len(self.jobs), event_ids=event_ids, source=source)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    """Retry without real waits and record impact jobs"""
+    monkeypatch.setattr(settings, "AIRROI_BASE_URL", "http://airroi.test/data-portal")
+    monkeypatch.setattr(settings, "AIRROI_BACKOFF_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "AIRROI_BACKOFF_MAX_SECONDS", 0.01)
+    worker = RecordingWorker()
+    monkeypatch.setattr(dirty_ranges, "impact_worker", worker)
+    return worker
+
+
+class TestAirROIClient:
+    """Test suite for AirROIClient retries and the token bucket"""
+
+    def test_month_slices(self):
+        """Ranges are cut at month boundaries"""
+        assert month_slices(date(2024, 1, 15), date(2024, 3, 3)) == [
+            (date(2024, 1, 15), date(2024, 1, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 3, 1), date(2024, 3, 3)),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_retries_429_and_5xx(self):
+        """Rate-limited and unavailable responses are retried until they succeed"""
+        fake = FakeAirROI()
+        fake.failures[("hotel-metrics", "London", "2024-01-01")] = [429, 503, 502]
+        client = fake.client()
+
+        data = await client.get_hotel_data("London", date(2024, 1, 1), date(2024, 1, 31))
+
+        assert len(data["daily_metrics"]) == 31
+        assert fake.requests[("hotel-metrics", "London", "2024-01-01")] == 4
+        await client.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        """A persistent 5xx is raised after max_retries, a 4xx at once"""
+        fake = FakeAirROI()
+        fake.always[("hotel-metrics", "London", "2024-01-01")] = 500
+        fake.always[("tourism-data", "London", "2024-01-01")] = 404
+        client = fake.client(max_retries=2)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_hotel_data("London", date(2024, 1, 1), date(2024, 1, 31))
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_tourism_data("London", date(2024, 1, 1), date(2024, 1, 31))
+
+        assert fake.requests[("hotel-metrics", "London", "2024-01-01")] == 3
+        assert fake.requests[("tourism-data", "London", "2024-01-01")] == 1
+        await client.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_limits_rate(self):
+        """After the burst, requests are spaced at the bucket's rate"""
+        bucket = TokenBucket(rate=100, capacity=5)
+        started = time.monotonic()
+        for _ in range(15):
+            await bucket.acquire()
+        # 5 tokens at once, then 10 more at 100/s
+        assert time.monotonic() - started >= 0.09
+
+
+class TestAirROIHarvester:
+    """Test suite for AirROIHarvester"""
+
+    @pytest.mark.asyncio
+    async def test_full_sync_is_concurrent(self, db):
+        """A 50-city year runs concurrently within the bound and stores every day"""
+        cities = [
+            City(name=f"City {i}", country="Testland", country_code="TST", continent="Europe",
+                 latitude=0.0, longitude=float(i), timezone="UTC")
+            for i in range(50)
+        ]
+        db.add_all(cities)
+        db.commit()
+        fake = FakeAirROI(latency=0.05)
+        client = fake.client(rate_limiter=TokenBucket(rate=5000, capacity=50))
+
+        report = await AirROIHarvester(db, client=client, max_concurrency=32).sync(
+            cities, date(2024, 1, 1), date(2024, 12, 31)
+        )
+
+        assert report["units"] == report["units_succeeded"] == 50 * 12 * 2
+        assert report["failed_units"] == []
+        assert db.query(HotelMetric).count() == db.query(TourismMetric).count() == 50 * 366
+        assert 1 < fake.max_in_flight <= 32
+        # 1200 requests of 50ms each take a minute one at a time
+        assert report["seconds"] < 30
+        await client.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_slice_is_isolated_and_rerun(self, seeded_db, fast_backoff):
+        """A unit failing after its retries loses only its month and can be re-run alone"""
+        fake = FakeAirROI()
+        fake.always[("tourism-data", "London", "2024-09-01")] = 503
+        client = fake.client(max_retries=1)
+        london = seeded_db.query(City).one()
+        harvester = AirROIHarvester(seeded_db, client=client)
+
+        report = await harvester.sync([london], date(2024, 8, 1), date(2024, 10, 31))
+
+        assert report["units_succeeded"] == 5
+        failed, = report["failed_units"]
+        assert (failed.source, failed.start_date, failed.end_date) == ("tourism", date(2024, 9, 1), date(2024, 9, 30))
+        assert "503" in report["errors"][0]
+        september = seeded_db.query(TourismMetric).filter(TourismMetric.date >= date(2024, 9, 1),
+                                                           TourismMetric.date < date(2024, 10, 1))
+        assert september.count() == 0
+        assert seeded_db.query(HotelMetric).filter(HotelMetric.date >= date(2024, 8, 1)).count() == 92
+
+        del fake.always[("tourism-data", "London", "2024-09-01")]
+        fake.requests.clear()
+        report = await harvester.run(report["failed_units"])
+
+        assert report["units_succeeded"] == 1
+        assert list(fake.requests) == [("tourism-data", "London", "2024-09-01")]
+        assert september.count() == 30
+        assert report["dirty_ranges"] == [
+            {"city_id": london.id, "start_date": "2024-09-01", "end_date": "2024-09-30"}
+        ]
+        await client.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_updates_existing_days_and_queues_impacts(self, seeded_db, fast_backoff):
+        """Re-fetched days overwrite stored metrics and their events are recomputed"""
+        fake = FakeAirROI()
+        client = fake.client()
+        london = seeded_db.query(City).one()
+
+        report = await AirROIHarvester(seeded_db, client=client).sync(
+            [london], date(2024, 1, 1), date(2024, 4, 29), sources=("hotel",)
+        )
+
+        assert report["metrics_stored"] == 120
+        assert seeded_db.query(HotelMetric).count() == 120
+        assert {price for (price,) in seeded_db.query(HotelMetric.avg_price_usd)} == {150.0}
+        assert report["affected_events"] == 3
+        assert fast_backoff.jobs[0][1] == "airroi"
+        await client.client.aclose()
+
+
+class TestResponseCache:
+    """Test suite for the on-disk AIRROI response cache"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_response_is_served_from_disk(self, tmp_path):
+        """Within the TTL, a repeated request is not sent again"""
+        fake = FakeAirROI()
+        client = fake.client(cache=ResponseCache(str(tmp_path), ttl_seconds=3600))
+
+        first = await client.get_hotel_data("London", date(2024, 1, 1), date(2024, 1, 31))
+        second = await client.get_hotel_data("London", date(2024, 1, 1), date(2024, 1, 31))
+
+        assert first == second
+        assert sum(fake.requests.values()) == 1
+        await client.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stale_response_is_revalidated(self, tmp_path):
+        """Past the TTL the ETag is sent: 304 reuses the body, a new version replaces it"""
+        fake = FakeAirROI()
+        client = fake.client(cache=ResponseCache(str(tmp_path), ttl_seconds=0))
+
+        first = await client.get_tourism_data("London", date(2024, 1, 1), date(2024, 1, 31))
+        again = await client.get_tourism_data("London", date(2024, 1, 1), date(2024, 1, 31))
+        assert again == first
+        assert fake.not_modified == 1
+
+        fake.version = 2
+        changed = await client.get_tourism_data("London", date(2024, 1, 1), date(2024, 1, 31))
+        assert changed["daily_metrics"][0]["total_visitors"] == first["daily_metrics"][0]["total_visitors"] + 1
+        assert fake.not_modified == 1
+        assert sum(fake.requests.values()) == 3
+        await client.client.aclose()
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """Unreadable files are ignored (and overwritten by the next response)"""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=60)
+        key = cache.key("/api/hotel-metrics", {"city": "London"})
+        (tmp_path / f"{key}.json").write_text("{not json")
+        assert cache.get(key) is None
+
+        cache.put(key, {"daily_metrics": []}, etag='"v1"')
+        assert cache.get(key)["etag"] == '"v1"'
+        assert key == cache.key("/api/hotel-metrics", {"city": "London"})
+
+
+class TestIncrementalSync:
+    """Test suite for watermark-based incremental AIRROI syncs"""
+
+    @pytest.mark.asyncio
+    async def test_nightly_refresh_requests_only_new_days(self, seeded_db):
+        """After a full sync, the next run asks for one day per city and source"""
+        fake = FakeAirROI()
+        client = fake.client()
+        london = seeded_db.query(City).one()
+        harvester = AirROIHarvester(seeded_db, client=client)
+
+        await harvester.sync([london], date(2024, 8, 1), date(2024, 10, 31), incremental=True)
+        assert sum(fake.requests.values()) == 6
+        assert load_watermarks(seeded_db, [london.id]) == {
+            (london.id, "hotel"): date(2024, 10, 31), (london.id, "tourism"): date(2024, 10, 31),
+        }
+
+        fake.requests.clear()
+        report = await harvester.sync([london], date(2024, 8, 1), date(2024, 11, 1), incremental=True)
+
+        assert sorted(fake.requests) == [
+            ("hotel-metrics", "London", "2024-11-01"), ("tourism-data", "London", "2024-11-01"),
+        ]
+        assert report["metrics_stored"] == 2
+        assert seeded_db.query(SyncWatermark).count() == 2
+        assert load_watermarks(seeded_db, [london.id])[(london.id, "hotel")] == date(2024, 11, 1)
+
+        fake.requests.clear()
+        report = await harvester.sync([london], date(2024, 8, 1), date(2024, 11, 1), incremental=True)
+        assert report["units"] == 0
+        assert not fake.requests
+        await client.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_month_holds_back_the_watermark(self, seeded_db):
+        """Days after a failed month are fetched again by the next incremental sync"""
+        fake = FakeAirROI()
+        fake.always[("tourism-data", "London", "2024-09-01")] = 503
+        client = fake.client(max_retries=0)
+        london = seeded_db.query(City).one()
+        harvester = AirROIHarvester(seeded_db, client=client)
+
+        await harvester.sync([london], date(2024, 8, 1), date(2024, 10, 31), incremental=True)
+        assert load_watermarks(seeded_db, [london.id]) == {
+            (london.id, "hotel"): date(2024, 10, 31), (london.id, "tourism"): date(2024, 8, 31),
+        }
+
+        del fake.always[("tourism-data", "London", "2024-09-01")]
+        fake.requests.clear()
+        await harvester.sync([london], date(2024, 8, 1), date(2024, 10, 31), incremental=True)
+
+        assert sorted(fake.requests) == [
+            ("tourism-data", "London", "2024-09-01"), ("tourism-data", "London", "2024-10-01"),
+        ]
+        assert load_watermarks(seeded_db, [london.id])[(london.id, "tourism")] == date(2024, 10, 31)
+        await client.client.aclose()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
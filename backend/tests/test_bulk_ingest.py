@@ -0,0 +1,143 @@
+"""
+Unit tests for bulk ingestion of uploaded files
+"""
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.etl.bulk_ingest import BulkIngestor
+from app.models import City, Event, EventType, HotelMetric, TourismMetric
+
+
+CITY_ROW = {
+    "country": "France", "country_code": "FRA", "continent": "Europe",
+    "latitude": 48.85, "longitude": 2.35, "timezone": "Europe/Paris",
+}
+
+
+class TestBulkIngestor:
+    """Test suite for BulkIngestor"""
+
+    def test_cities_skip_existing_and_repeated(self, seeded_db):
+        """Existing names and repeats within the file are skipped"""
+        df = pd.DataFrame([
+            {"name": "Paris", **CITY_ROW, "population": 2100000.0},
+            {"name": "London", **CITY_ROW},
+            {"name": "Paris", **CITY_ROW},
+            {"name": "Lyon", **CITY_ROW, "population": None},
+        ])
+        report = BulkIngestor(seeded_db).ingest_cities(df)
+        seeded_db.commit()
+
+        assert report == {"cities_created": 2, "cities_skipped": 2}
+        paris = seeded_db.query(City).filter(City.name == "Paris").one()
+        assert paris.population == 2100000
+        assert seeded_db.query(City).filter(City.name == "Lyon").one().population is None
+
+    def test_cities_invalid_coordinates(self, db):
+        """Bad required numbers fail the upload"""
+        df = pd.DataFrame([{"name": "Paris", **CITY_ROW, "latitude": "north"}])
+        with pytest.raises(ValueError, match="Row 1: invalid latitude"):
+            BulkIngestor(db).ingest_cities(df)
+
+    def test_events_report_errors_and_ids(self, seeded_db):
+        """Valid events are inserted with their IDs; bad rows are reported"""
+        df = pd.DataFrame({
+            "name": ["Expo", "Ghost Fest", "Odd Show", "Bad Date"],
+            "city_name": ["London", "Atlantis", "London", "London"],
+            "event_type": ["Conference", "festival", "picnic", "sports"],
+            "start_date": ["2024-05-01", "2024-05-01", "2024-05-01", "not a date"],
+            "end_date": ["2024-05-03", "2024-05-02", "2024-05-02", "2024-05-02"],
+            "expected_attendance": [12000.0, None, None, None],
+        })
+        ingestor = BulkIngestor(seeded_db)
+        report = ingestor.ingest_events(df)
+        seeded_db.commit()
+
+        assert report["events_created"] == 1
+        assert report["errors"] == [
+            "Row 2: City 'Atlantis' not found",
+            "Row 3: Invalid event_type 'picnic'",
+            "Row 4: Invalid start_date 'not a date'",
+        ]
+        expo = seeded_db.query(Event).filter(Event.name == "Expo").one()
+        assert ingestor.created_event_ids == [expo.id]
+        assert expo.event_type == EventType.CONFERENCE
+        assert (expo.start_date, expo.end_date, expo.year) == (date(2024, 5, 1), date(2024, 5, 3), 2024)
+        assert expo.expected_attendance == 12000
+
+    def test_hotel_metrics_upsert(self, seeded_db):
+        """Existing days keep values missing from the file; new days are inserted"""
+        city_id = seeded_db.query(City.id).scalar()
+        before = seeded_db.query(HotelMetric).filter(HotelMetric.date == date(2024, 1, 5)).one()
+        old_price = before.avg_price_usd
+
+        df = pd.DataFrame({
+            "city_name": ["London", "London", "London", "Atlantis", "London"],
+            "date": ["2024-01-05", "2024-06-01", "2024-06-01", "2024-06-02", "2024-06-03"],
+            "occupancy_rate_pct": [99.0, 70.0, None, 50.0, "full"],
+            "avg_price_usd": [None, 200.0, 210.0, 100.0, 100.0],
+        })
+        ingestor = BulkIngestor(seeded_db)
+        report = ingestor.ingest_hotel_metrics(df)
+        seeded_db.commit()
+        seeded_db.expire_all()
+
+        assert report["metrics_created"] == 3
+        assert report["errors"] == [
+            "Row 4: City not found",
+            "Row 5: Invalid occupancy_rate_pct 'full'",
+        ]
+        updated = seeded_db.get(HotelMetric, before.id)
+        assert updated.occupancy_rate_pct == 99.0
+        assert updated.avg_price_usd == old_price
+        june = seeded_db.query(HotelMetric).filter(HotelMetric.date == date(2024, 6, 1)).all()
+        assert len(june) == 1
+        assert (june[0].occupancy_rate_pct, june[0].avg_price_usd) == (70.0, 210.0)
+        assert ingestor.dirty.ranges() == [
+            (city_id, date(2024, 1, 5), date(2024, 1, 5)),
+            (city_id, date(2024, 6, 1), date(2024, 6, 1)),
+        ]
+
+    def test_tourism_metrics(self, seeded_db):
+        """Unknown cities are skipped; invalid numbers fail the upload"""
+        df = pd.DataFrame({
+            "city_name": ["London", "Atlantis"],
+            "date": ["2024-07-01", "2024-07-01"],
+            "total_visitors": [51000, 10],
+        })
+        report = BulkIngestor(seeded_db).ingest_tourism_metrics(df)
+        assert report == {"metrics_created": 1}
+        assert seeded_db.query(TourismMetric).filter(TourismMetric.date == date(2024, 7, 1)).one().total_visitors == 51000
+
+        bad = pd.DataFrame({"city_name": ["London"], "date": ["2024-07-02"], "total_visitors": ["many"]})
+        with pytest.raises(ValueError, match="Row 1: invalid total_visitors"):
+            BulkIngestor(seeded_db).ingest_tourism_metrics(bad)
+
+    def test_large_upload(self, seeded_db):
+        """A 150k-row hotel upload is written in a few seconds"""
+        days = pd.date_range("1800-01-01", periods=150_000, freq="D")
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame({
+            "city_name": "London",
+            "date": days.strftime("%Y-%m-%d"),
+            "occupancy_rate_pct": rng.uniform(50, 95, len(days)),
+            "avg_price_usd": rng.uniform(100, 300, len(days)),
+        })
+
+        started = time.perf_counter()
+        report = BulkIngestor(seeded_db).ingest_hotel_metrics(df)
+        seeded_db.commit()
+        elapsed = time.perf_counter() - started
+
+        assert report["metrics_created"] == len(df)
+        assert report["errors"] == []
+        # The 120 seeded days fall inside the range and are updated in place
+        assert seeded_db.query(HotelMetric).count() == len(df)
+        assert elapsed < 30
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,98 @@
+"""
+Unit tests for the columnar CSV cache
+"""
+import os
+import pytest
+import pandas as pd
+import numpy as np
+
+from app.etl.columnar_cache import ColumnarCache
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    """Directory with a metrics CSV and an events CSV"""
+    pd.DataFrame({
+        'city': ['London', 'Madrid', 'London'],
+        'date': ['2024-01-01', '2024-01-01', '2024-01-02'],
+        'avg_price_usd': [180.5, np.nan, 190.0],
+    }).to_csv(tmp_path / "hotel_metrics.csv", index=False)
+    pd.DataFrame({
+        'event_name': ['A', 'B'],
+        'start_date': ['2024-02-10', None],
+        'attendance': [1000, 2000],
+    }).to_csv(tmp_path / "events.csv", index=False)
+    return tmp_path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Cache that counts how often CSVs are parsed"""
+    cache = ColumnarCache(tmp_path / "cache")
+    cache.parsed = []
+    parse_csv = cache._parse_csv
+
+    def counting_parse(csv_path, parse_dates):
+        cache.parsed.append(csv_path.name)
+        return parse_csv(csv_path, parse_dates)
+
+    cache._parse_csv = counting_parse
+    return cache
+
+
+def _expected(path, parse_dates=()):
+    df = pd.read_csv(path)
+    for col in parse_dates:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+class TestColumnarCache:
+    """Test suite for ColumnarCache"""
+
+    def test_cached_table_matches_csv(self, csv_dir, cache):
+        """Cold and warm loads return the same frame as pd.read_csv"""
+        for name, dates in [("hotel_metrics.csv", ['date']), ("events.csv", [])]:
+            expected = _expected(csv_dir / name, dates)
+            pd.testing.assert_frame_equal(cache.read_csv(csv_dir / name, dates), expected)
+            pd.testing.assert_frame_equal(cache.read_csv(csv_dir / name, dates), expected)
+
+        assert cache.parsed == ["hotel_metrics.csv", "events.csv"]
+        assert pd.isna(cache.read_csv(csv_dir / "events.csv").loc[1, 'start_date'])
+
+    def test_only_changed_table_is_rebuilt(self, csv_dir, cache):
+        """Replacing one CSV rebuilds that table only"""
+        cache.read_csv(csv_dir / "hotel_metrics.csv", ['date'])
+        cache.read_csv(csv_dir / "events.csv")
+
+        with open(csv_dir / "events.csv", 'a', encoding='utf-8') as f:
+            f.write("C,2024-03-01,3000\n")
+        cache.read_csv(csv_dir / "hotel_metrics.csv", ['date'])
+        events = cache.read_csv(csv_dir / "events.csv")
+
+        assert cache.parsed == ["hotel_metrics.csv", "events.csv", "events.csv"]
+        assert len(events) == 3
+
+    def test_touched_file_uses_content_hash(self, csv_dir, cache):
+        """A new mtime with the same content does not rebuild the table"""
+        path = csv_dir / "events.csv"
+        cache.read_csv(path)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        cache.read_csv(path)
+        cache.read_csv(path)
+
+        assert cache.parsed == ["events.csv"]
+
+    def test_parse_dates_change_rebuilds(self, csv_dir, cache):
+        """Reading with different date columns does not reuse the cached types"""
+        raw = cache.read_csv(csv_dir / "hotel_metrics.csv")
+        parsed = cache.read_csv(csv_dir / "hotel_metrics.csv", ['date'])
+
+        assert raw['date'].dtype == object
+        assert pd.api.types.is_datetime64_any_dtype(parsed['date'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,134 @@
+"""
+Unit tests for dirty-range tracking and the event interval index
+"""
+import io
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import app.analytics.dirty_ranges as dirty_ranges
+import app.main as main
+from app.analytics.dirty_ranges import DirtyRanges, EventIntervalIndex
+from app.core.database import get_db
+from app.models import City, Event, ImpactJob
+
+
+class RecordingWorker:
+    """Stand-in for the impact worker that records enqueued events"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, db, event_ids=None, source="api"):
+        self.jobs.append((event_ids, source))
+        return ImpactJob(id=len(self.jobs), event_ids=event_ids, source=source)
+
+
+class TestDirtyRanges:
+    """Test suite for DirtyRanges"""
+
+    def test_consecutive_days_are_merged(self):
+        """Adjacent and overlapping days become one range per gap"""
+        dirty = DirtyRanges()
+        for day in [3, 1, 2, 7]:
+            dirty.add(1, date(2024, 1, day))
+        dirty.add_range(1, date(2024, 1, 8), date(2024, 1, 10))
+        dirty.add(2, date(2024, 5, 1))
+
+        assert dirty.ranges() == [
+            (1, date(2024, 1, 1), date(2024, 1, 3)),
+            (1, date(2024, 1, 7), date(2024, 1, 10)),
+            (2, date(2024, 5, 1), date(2024, 5, 1)),
+        ]
+
+    def test_empty(self):
+        assert not DirtyRanges()
+        assert DirtyRanges().ranges() == []
+
+
+class TestEventIntervalIndex:
+    """Test suite for EventIntervalIndex"""
+
+    def test_matches_brute_force(self):
+        """Overlap queries match a scan over all event windows"""
+        rng = np.random.default_rng(11)
+        starts = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, 300), unit="D")
+        events = pd.DataFrame({
+            "id": np.arange(300),
+            "city_id": rng.integers(1, 4, 300),
+            "start_date": starts,
+            "end_date": starts + pd.to_timedelta(rng.integers(0, 20, 300), unit="D"),
+        })
+        index = EventIntervalIndex(events, window_before=14, window_after=14)
+        window_starts = events["start_date"] - pd.Timedelta(days=44)
+        window_ends = events["end_date"] + pd.Timedelta(days=14)
+
+        for _ in range(200):
+            city_id = int(rng.integers(1, 4))
+            start = pd.Timestamp("2024-01-01") + pd.Timedelta(days=int(rng.integers(-60, 420)))
+            end = start + pd.Timedelta(days=int(rng.integers(0, 10)))
+            expected = events["id"][
+                (events["city_id"] == city_id) & (window_starts <= end) & (window_ends >= start)
+            ]
+            actual = index.overlapping(city_id, start.date(), end.date())
+            assert sorted(actual) == sorted(expected)
+
+    def test_window_edges(self, seeded_db):
+        """Days just inside the baseline and post-event windows count, outside do not"""
+        event = seeded_db.query(Event).filter(Event.name == "Spring Fair").one()
+        index = EventIntervalIndex.from_db(seeded_db)
+        first_day = event.start_date - timedelta(days=44)
+        last_day = event.end_date + timedelta(days=14)
+
+        assert event.id in index.overlapping(event.city_id, first_day, first_day)
+        assert event.id in index.overlapping(event.city_id, last_day, last_day)
+        assert event.id not in index.overlapping(event.city_id, first_day - timedelta(days=1), first_day - timedelta(days=1))
+        assert event.id not in index.overlapping(event.city_id, last_day + timedelta(days=1), last_day + timedelta(days=1))
+
+
+class TestUploadRecompute:
+    """Test suite for recomputation after metric uploads"""
+
+    def test_hotel_upload_enqueues_affected_events(self, seeded_db, monkeypatch):
+        """Only events whose windows cover the uploaded days are queued"""
+        worker = RecordingWorker()
+        monkeypatch.setattr(dirty_ranges, "impact_worker", worker)
+        main.app.dependency_overrides[get_db] = lambda: seeded_db
+        csv = "city_name,date,occupancy_rate_pct,avg_price_usd\nLondon,2024-03-12,90,250\nLondon,2024-03-13,91,260\n"
+        try:
+            response = TestClient(main.app).post(
+                "/api/v1/upload/hotel-metrics", params={"wait": True},
+                files={"file": ("hotel.csv", io.BytesIO(csv.encode()), "text/csv")},
+            )
+        finally:
+            main.app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        body = response.json()
+        city_id = seeded_db.query(City).first().id
+        assert body["dirty_ranges"] == [
+            {"city_id": city_id, "start_date": "2024-03-12", "end_date": "2024-03-13"}
+        ]
+        spring_fair = seeded_db.query(Event).filter(Event.name == "Spring Fair").one()
+        late_concert = seeded_db.query(Event).filter(Event.name == "Late Concert").one()
+        # Spring Fair covers the days; Late Concert's baseline starts on 2024-03-07
+        assert worker.jobs == [([spring_fair.id, late_concert.id], "upload:hotel-metrics")]
+        assert body["affected_events"] == 2
+
+    def test_no_affected_events(self, seeded_db, monkeypatch):
+        """Days outside every window queue nothing"""
+        worker = RecordingWorker()
+        monkeypatch.setattr(dirty_ranges, "impact_worker", worker)
+        dirty = DirtyRanges()
+        dirty.add(seeded_db.query(City).first().id, date(2030, 1, 1))
+
+        summary = dirty_ranges.enqueue_affected_impacts(seeded_db, dirty, source="test")
+        assert summary["affected_events"] == 0
+        assert summary["impact_job_id"] is None
+        assert worker.jobs == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
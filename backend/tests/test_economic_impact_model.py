@@ -0,0 +1,370 @@
+"""
+Unit tests for the economic impact model
+Tests feature enrichment from the time-series metrics CSVs
+"""
+import json
+from pathlib import Path
+import pytest
+import pandas as pd
+import numpy as np
+
+from app.ml.economic_impact_model import EconomicImpactModel
+
+REPO_DATA_DIR = Path(__file__).resolve().parents[2] / "data" / "examples"
+
+
+def _daily_metrics(cities, columns, start='2024-01-01', periods=120, seed=0):
+    """Build a daily metrics frame with a few missing values"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for city in cities:
+        dates = pd.date_range(start, periods=periods, freq='D')
+        frame = pd.DataFrame({'city': city, 'date': dates})
+        for col in columns:
+            values = rng.uniform(50, 500, periods)
+            values[rng.random(periods) < 0.05] = np.nan
+            frame[col] = values
+        frames.append(frame)
+    # Shuffle rows: the enrichment must not rely on CSV order
+    return pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def _enrich_with_metrics_rowwise(model, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row-by-row reference for EconomicImpactModel._enrich_with_metrics().
+
+    The original per-event loop, kept as the parity oracle. For each event:
+    1. Get event dates (start_date, end_date) from events.csv
+    2. Calculate baseline metrics (30 days before event)
+    3. Calculate event period metrics (during event)
+    4. Calculate differences and ratios
+    5. Add as new features
+    """
+    # Get event dates from events.csv
+    events_with_dates = model.df_events[['event_name', 'start_date', 'end_date']].copy()
+    events_with_dates['start_date'] = pd.to_datetime(events_with_dates['start_date'])
+    events_with_dates['end_date'] = pd.to_datetime(events_with_dates['end_date'])
+
+    # Merge to get dates for each impact record
+    df = df.merge(events_with_dates, on='event_name', how='left')
+
+    def calculate_event_metrics(row):
+        """Calculate metrics for a single event"""
+        city = row['city']
+        start_date = row['start_date']
+        end_date = row['end_date']
+
+        if pd.isna(start_date) or pd.isna(end_date):
+            return pd.Series()
+
+        # Baseline period: 30 days before event
+        baseline_start = start_date - pd.Timedelta(days=30)
+        baseline_end = start_date - pd.Timedelta(days=1)
+
+        # Filter metrics for this city
+        city_tourism = model.df_tourism_metrics[model.df_tourism_metrics['city'] == city].copy()
+        city_hotel = model.df_hotel_metrics[model.df_hotel_metrics['city'] == city].copy()
+        city_economic = model.df_economic_metrics[model.df_economic_metrics['city'] == city].copy()
+        city_mobility = model.df_mobility_metrics[model.df_mobility_metrics['city'] == city].copy()
+
+        metrics = {}
+
+        # TOURISM METRICS
+        if not city_tourism.empty:
+            # Event period
+            event_tourism = city_tourism[
+                (city_tourism['date'] >= start_date) &
+                (city_tourism['date'] <= end_date)
+            ]
+            # Baseline period
+            baseline_tourism = city_tourism[
+                (city_tourism['date'] >= baseline_start) &
+                (city_tourism['date'] <= baseline_end)
+            ]
+
+            if not event_tourism.empty and not baseline_tourism.empty:
+                # Event period averages
+                metrics['event_avg_total_visitors'] = event_tourism['total_visitors'].mean()
+                metrics['event_avg_spending_per_visitor'] = event_tourism['avg_spending_per_visitor_usd'].mean()
+                metrics['event_avg_stay_duration'] = event_tourism['avg_stay_duration_days'].mean()
+
+                # Baseline averages
+                metrics['baseline_avg_total_visitors'] = baseline_tourism['total_visitors'].mean()
+                metrics['baseline_avg_spending_per_visitor'] = baseline_tourism['avg_spending_per_visitor_usd'].mean()
+                metrics['baseline_avg_stay_duration'] = baseline_tourism['avg_stay_duration_days'].mean()
+
+                # Differences
+                metrics['visitor_increase_actual'] = (
+                    (metrics['event_avg_total_visitors'] / max(metrics['baseline_avg_total_visitors'], 1) - 1) * 100
+                    if metrics['baseline_avg_total_visitors'] > 0 else 0
+                )
+                metrics['spending_increase_pct'] = (
+                    (metrics['event_avg_spending_per_visitor'] / max(metrics['baseline_avg_spending_per_visitor'], 1) - 1) * 100
+                    if metrics['baseline_avg_spending_per_visitor'] > 0 else 0
+                )
+
+        # HOTEL METRICS
+        if not city_hotel.empty:
+            event_hotel = city_hotel[
+                (city_hotel['date'] >= start_date) &
+                (city_hotel['date'] <= end_date)
+            ]
+            baseline_hotel = city_hotel[
+                (city_hotel['date'] >= baseline_start) &
+                (city_hotel['date'] <= baseline_end)
+            ]
+
+            if not event_hotel.empty and not baseline_hotel.empty:
+                metrics['event_avg_occupancy_pct'] = event_hotel['occupancy_rate_pct'].mean()
+                metrics['event_avg_hotel_price'] = event_hotel['avg_price_usd'].mean()
+                metrics['event_max_hotel_price'] = event_hotel['avg_price_usd'].max()
+
+                metrics['baseline_avg_occupancy_pct'] = baseline_hotel['occupancy_rate_pct'].mean()
+                metrics['baseline_avg_hotel_price'] = baseline_hotel['avg_price_usd'].mean()
+
+                metrics['occupancy_boost_actual'] = metrics['event_avg_occupancy_pct'] - metrics['baseline_avg_occupancy_pct']
+                metrics['hotel_price_increase_actual'] = (
+                    (metrics['event_avg_hotel_price'] / max(metrics['baseline_avg_hotel_price'], 1) - 1) * 100
+                    if metrics['baseline_avg_hotel_price'] > 0 else 0
+                )
+
+        # ECONOMIC METRICS
+        if not city_economic.empty:
+            event_economic = city_economic[
+                (city_economic['date'] >= start_date) &
+                (city_economic['date'] <= end_date)
+            ]
+            baseline_economic = city_economic[
+                (city_economic['date'] >= baseline_start) &
+                (city_economic['date'] <= baseline_end)
+            ]
+
+            if not event_economic.empty and not baseline_economic.empty:
+                metrics['event_avg_daily_spending'] = event_economic['total_spending_usd'].mean()
+                metrics['event_avg_accommodation_spending'] = event_economic['accommodation_spending_usd'].mean()
+                metrics['event_avg_food_spending'] = event_economic['food_beverage_spending_usd'].mean()
+                metrics['event_avg_retail_spending'] = event_economic['retail_spending_usd'].mean()
+
+                metrics['baseline_avg_daily_spending'] = baseline_economic['total_spending_usd'].mean()
+
+                metrics['daily_spending_increase_pct'] = (
+                    (metrics['event_avg_daily_spending'] / max(metrics['baseline_avg_daily_spending'], 1) - 1) * 100
+                    if metrics['baseline_avg_daily_spending'] > 0 else 0
+                )
+
+        # MOBILITY METRICS
+        if not city_mobility.empty:
+            event_mobility = city_mobility[
+                (city_mobility['date'] >= start_date) &
+                (city_mobility['date'] <= end_date)
+            ]
+            baseline_mobility = city_mobility[
+                (city_mobility['date'] >= baseline_start) &
+                (city_mobility['date'] <= baseline_end)
+            ]
+
+            if not event_mobility.empty and not baseline_mobility.empty:
+                metrics['event_avg_airport_arrivals'] = event_mobility['airport_arrivals'].mean()
+                metrics['event_avg_international_flights'] = event_mobility['international_flights'].mean()
+                metrics['event_avg_public_transport'] = event_mobility['public_transport_usage'].mean()
+                metrics['event_avg_traffic_congestion'] = event_mobility['traffic_congestion_index'].mean()
+
+                metrics['baseline_avg_airport_arrivals'] = baseline_mobility['airport_arrivals'].mean()
+                metrics['baseline_avg_traffic_congestion'] = baseline_mobility['traffic_congestion_index'].mean()
+
+                metrics['airport_arrivals_increase_pct'] = (
+                    (metrics['event_avg_airport_arrivals'] / max(metrics['baseline_avg_airport_arrivals'], 1) - 1) * 100
+                    if metrics['baseline_avg_airport_arrivals'] > 0 else 0
+                )
+
+        return pd.Series(metrics)
+
+    # Apply to each row
+    metric_df = df.apply(calculate_event_metrics, axis=1)
+
+    # Merge metrics back to main dataframe
+    df = pd.concat([df, metric_df], axis=1)
+
+    # Fill NaN values with 0 or median
+    for col in metric_df.columns:
+        if col in df.columns:
+            if df[col].dtype in ['int64', 'float64']:
+                df[col] = df[col].fillna(0)
+
+    return df
+
+
+@pytest.fixture
+def model(tmp_path):
+    """Model with small synthetic events and metrics"""
+    model = EconomicImpactModel(data_dir=tmp_path)
+    cities = ['London', 'Madrid']
+
+    model.models_dir = tmp_path
+    model.df_cities = pd.DataFrame({
+        'name': cities,
+        'country': ['United Kingdom', 'Spain'],
+        'continent': ['Europe', 'Europe'],
+        'annual_tourists': [19600000, 8000000],
+        'avg_hotel_price_usd': [180, 140],
+    })
+    model.df_events = pd.DataFrame({
+        'event_name': ['A', 'B', 'C', 'D', 'E', 'F'],
+        'city': ['London', 'Madrid', 'London', 'Madrid', 'London', 'London'],
+        'event_type': ['sports', 'music', 'sports', 'sports', 'music', 'sports'],
+        'start_date': ['2024-02-10', '2024-03-01', '2024-01-01', '2024-02-20', '2024-06-01', None],
+        'end_date': ['2024-02-12', '2024-03-10', '2024-01-02', '2024-02-20', '2024-06-03', None],
+    })
+    model.df_tourism_metrics = _daily_metrics(
+        cities, ['total_visitors', 'avg_spending_per_visitor_usd', 'avg_stay_duration_days'], seed=1
+    )
+    model.df_hotel_metrics = _daily_metrics(cities, ['occupancy_rate_pct', 'avg_price_usd'], seed=2)
+    model.df_economic_metrics = _daily_metrics(
+        cities,
+        ['total_spending_usd', 'accommodation_spending_usd',
+         'food_beverage_spending_usd', 'retail_spending_usd'],
+        seed=3
+    )
+    # Mobility data only for London
+    model.df_mobility_metrics = _daily_metrics(
+        ['London'],
+        ['airport_arrivals', 'international_flights',
+         'public_transport_usage', 'traffic_congestion_index'],
+        seed=4
+    )
+    model.df_impacts = pd.DataFrame({
+        'event_name': ['A', 'B', 'C', 'D', 'E', 'F'],
+        'city': ['London', 'Madrid', 'London', 'Madrid', 'London', 'London'],
+        'event_type': ['sports', 'music', 'sports', 'sports', 'music', 'sports'],
+        'attendance': [30000, 80000, 5000, 20000, 60000, 10000],
+        'duration_days': [3, 10, 2, 1, 3, 2],
+        'total_economic_impact_usd': [9e6, 4e7, 1e6, 5e6, 2e7, 2e6],
+    })
+    return model
+
+
+@pytest.fixture
+def impacts():
+    """Impact records, including a city without metrics"""
+    return pd.DataFrame({
+        'event_name': ['A', 'B', 'C', 'D', 'E', 'F', 'A'],
+        'city': ['London', 'Madrid', 'London', 'Madrid', 'London', 'London', 'Paris'],
+        'attendance': [1000, 2000, 3000, 4000, 5000, 6000, 7000],
+    })
+
+
+class TestMetricEnrichment:
+    """Test suite for _enrich_with_metrics"""
+
+    def test_matches_rowwise_implementation(self, model, impacts):
+        """Vectorized enrichment produces the same features as the per-event loop"""
+        vectorized = model._enrich_with_metrics(impacts)
+        rowwise = _enrich_with_metrics_rowwise(model, impacts)
+
+        pd.testing.assert_frame_equal(vectorized, rowwise, check_like=True, rtol=1e-9)
+
+    def test_windows_without_data_are_zero(self, model, impacts):
+        """Events without baseline or event-window data get zero metrics"""
+        enriched = model._enrich_with_metrics(impacts)
+
+        # C starts on the first metrics day: empty baseline window
+        # E is after the last metrics day, F has no dates, Paris has no metrics
+        for idx in [2, 4, 5, 6]:
+            assert enriched.loc[idx, 'event_avg_hotel_price'] == 0
+        assert enriched.loc[0, 'event_avg_hotel_price'] > 0
+
+    def test_max_hotel_price_within_event_window(self, model, impacts):
+        """event_max_hotel_price is the maximum daily price of the event window"""
+        enriched = model._enrich_with_metrics(impacts)
+
+        hotel = model.df_hotel_metrics
+        window = hotel[
+            (hotel['city'] == 'Madrid') &
+            (hotel['date'] >= '2024-03-01') &
+            (hotel['date'] <= '2024-03-10')
+        ]
+        assert enriched.loc[1, 'event_max_hotel_price'] == pytest.approx(window['avg_price_usd'].max())
+
+
+class TestReferenceProfiles:
+    """Test suite for precomputed predict_simple() references"""
+
+    def test_profiles_for_every_type_and_city(self, model):
+        """A profile is built for each (event_type, city) pair"""
+        profiles = model.build_reference_profiles()
+
+        assert set(profiles) == {'sports', 'music'}
+        assert set(profiles['sports']) == {'London', 'Madrid'}
+        profile = profiles['sports']['London']
+        assert profile['events_analyzed'] == 4
+        assert profile['city']['continent'] == 'Europe'
+        assert profile['avg_metrics']['event_avg_hotel_price'] > 0
+
+    def test_profiles_round_trip(self, model):
+        """Profiles saved next to the model load back unchanged"""
+        profiles = model.build_reference_profiles()
+        model._save_reference_profiles("model.pkl")
+
+        with open(model._profiles_path("model.pkl"), encoding='utf-8') as f:
+            assert json.load(f) == profiles
+
+    def test_unknown_inputs_raise(self, model):
+        """Unknown cities or event types are rejected, not cached"""
+        model.build_reference_profiles()
+
+        with pytest.raises(ValueError, match="City 'Paris' not found"):
+            model._reference_profile('sports', 'Paris')
+        with pytest.raises(ValueError, match="Event type 'expo' not found"):
+            model._reference_profile('expo', 'London')
+        assert 'expo' not in model.reference_profiles
+
+
+class TestPredictMany:
+    """Test suite for batch predictions"""
+
+    @pytest.fixture(scope="class")
+    def trained_model(self):
+        """Saved model with the example CSVs"""
+        model = EconomicImpactModel(data_dir=REPO_DATA_DIR)
+        if not (model.models_dir / "economic_impact_model" / "model.json").exists():
+            pytest.skip("Saved model not available")
+        model.load()
+        return model
+
+    def test_matches_predict_simple(self, trained_model):
+        """Every batch row equals the predict_simple() result"""
+        event_types = trained_model.get_event_types()[:3]
+        cities = [city['name'] for city in trained_model.get_cities()[:4]]
+        events = pd.DataFrame([
+            {'event_type': t, 'city': c, 'duration_days': d, 'attendance': a}
+            for t in event_types for c in cities
+            for d, a in [(1, None), (4, 25000), (10, 300000)]
+        ])
+
+        batch = trained_model.predict_many(events)
+
+        assert len(batch) == len(events)
+        for idx, row in events.iterrows():
+            attendance = None if pd.isna(row['attendance']) else int(row['attendance'])
+            single = trained_model.predict_simple(
+                row['event_type'], row['city'], int(row['duration_days']), attendance
+            )
+            result = batch.loc[idx]
+            assert result['attendance'] == single['input_summary']['attendance']
+            assert result['total_economic_impact_usd'] == pytest.approx(
+                single['prediction']['total_economic_impact_usd'])
+            assert result['upper_bound_usd'] == pytest.approx(single['prediction']['upper_bound_usd'])
+            assert result['jobs_created'] == single['estimates']['jobs_created']
+            assert result['impact_multiplier'] == pytest.approx(
+                single['baseline_comparison']['impact_multiplier'])
+
+    def test_unknown_city_raises(self, trained_model):
+        """Unknown cities are rejected like in predict_simple()"""
+        events = pd.DataFrame({'event_type': ['sports'], 'city': ['Atlantis'], 'duration_days': [2]})
+
+        with pytest.raises(ValueError, match="City 'Atlantis' not found"):
+            trained_model.predict_many(events)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
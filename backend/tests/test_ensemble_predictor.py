@@ -0,0 +1,191 @@
+"""
+Unit tests for batched and parallel EnsemblePredictor scoring
+"""
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.forecast_fleet import ForecastFleet
+from app.ml.predictors import EnsemblePredictor, TourismPredictor
+from app.models import City
+
+
+CITY_DATA = {'avg_hotel_price': 180, 'population': 5000000, 'annual_tourists': 10000000}
+REQUESTS = [
+    {"event_date": date(2025, 6, 1), "event_duration": 7, "expected_attendance": 100000, "city_data": CITY_DATA},
+    {"event_date": date(2025, 6, 28), "event_duration": 2, "expected_attendance": 20000,
+     "city_data": {'avg_hotel_price': 120}},
+    {"event_date": date(2025, 1, 3), "event_duration": 1, "expected_attendance": 5000, "city_data": {}},
+]
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """An ensemble with all three predictors trained on synthetic data"""
+    rng = np.random.default_rng(3)
+    ensemble = EnsemblePredictor()
+
+    history = pd.date_range('2023-01-01', periods=730)
+    ensemble.tourism_predictor = TourismPredictor(backend="holt_winters")
+    ensemble.tourism_predictor.train(pd.DataFrame({
+        'ds': history, 'y': 50000 + 3000 * (history.dayofweek >= 5) + rng.normal(0, 500, len(history)),
+    }))
+
+    n = 300
+    hotel = pd.DataFrame({
+        'occupancy_rate': rng.uniform(50, 95, n),
+        'baseline_price': rng.uniform(100, 200, n),
+        'is_weekend': rng.integers(0, 2, n),
+        'is_event_period': rng.integers(0, 2, n),
+        'days_to_event': rng.integers(-30, 31, n),
+        'event_size': rng.choice([0, 20000, 100000], n),
+    })
+    hotel['price'] = hotel['baseline_price'] * (1 + hotel['occupancy_rate'] / 200) + 30 * hotel['is_event_period']
+    ensemble.hotel_predictor.train(hotel)
+
+    impact = pd.DataFrame({
+        'attendance': rng.integers(10000, 200000, 60),
+        'duration_days': rng.integers(1, 14, 60),
+        'event_type_encoded': rng.integers(0, 5, 60),
+        'city_population': rng.integers(1000000, 10000000, 60),
+        'city_annual_tourists': rng.integers(5000000, 50000000, 60),
+        'baseline_hotel_price': rng.uniform(100, 300, 60),
+    })
+    impact['total_economic_impact'] = impact['attendance'] * impact['duration_days'] * 50 + 1e6
+    ensemble.impact_predictor.train(impact)
+    yield ensemble
+    ensemble.close()
+
+
+def reference_hotel_frame(event_date, event_duration, expected_attendance, city_data):
+    """Hotel inputs of one request, built day by day"""
+    dates = pd.date_range(event_date - timedelta(days=30), event_date + timedelta(days=30), freq='D')
+    return pd.DataFrame({
+        'occupancy_rate': [75.0] * len(dates),
+        'baseline_price': [city_data.get('avg_hotel_price', 150)] * len(dates),
+        'is_weekend': [d.dayofweek >= 5 for d in dates],
+        'is_event_period': [(event_date <= d.date() < event_date + timedelta(days=event_duration)) for d in dates],
+        'days_to_event': [(event_date - d.date()).days for d in dates],
+        'event_size': [expected_attendance] * len(dates),
+    })
+
+
+class TestEnsembleBatching:
+    """Test suite for EnsemblePredictor.predict_many"""
+
+    def test_batch_matches_single_requests(self, trained):
+        """Scoring together gives the same results as one request at a time"""
+        batch = trained.predict_many(REQUESTS)
+
+        for request, prediction in zip(REQUESTS, batch["predictions"]):
+            single = trained.predict_event_impact(**request)
+            assert prediction["hotel_prices"] == pytest.approx(single["hotel_prices"])
+            assert prediction["total_economic_impact"] == pytest.approx(single["total_economic_impact"])
+            assert prediction["visitor_forecast"]["yhat"] == pytest.approx(single["visitor_forecast"]["yhat"])
+            assert prediction["visitor_forecast_source"] == "model"
+            assert len(prediction["hotel_prices"]) == 61
+
+    def test_hotel_inputs_match_day_by_day_frame(self, trained, monkeypatch):
+        """The array-built hotel frame equals the per-day construction"""
+        frames = []
+        predict = trained.hotel_predictor.predict
+        monkeypatch.setattr(trained.hotel_predictor, "predict", lambda df: frames.append(df) or predict(df))
+
+        trained.predict_many(REQUESTS)
+
+        expected = pd.concat(
+            [reference_hotel_frame(**{k: r[k] for k in r if k != "city_id"}) for r in REQUESTS],
+            ignore_index=True,
+        )
+        pd.testing.assert_frame_equal(frames[0], expected, check_dtype=False)
+
+    def test_parallel_and_sequential_agree(self, trained):
+        """Both execution modes give the same predictions"""
+        parallel = trained.predict_many(REQUESTS)["predictions"]
+        trained.parallel = False
+        try:
+            sequential = trained.predict_many(REQUESTS)["predictions"]
+        finally:
+            trained.parallel = True
+
+        for a, b in zip(parallel, sequential):
+            assert a["hotel_prices"] == b["hotel_prices"]
+            assert a["total_economic_impact"] == b["total_economic_impact"]
+
+    def test_stages_run_concurrently(self, monkeypatch, request):
+        """In parallel mode the slowest stage bounds the latency"""
+        ensemble = EnsemblePredictor()
+        request.addfinalizer(ensemble.close)
+        for predictor in (ensemble.tourism_predictor, ensemble.hotel_predictor, ensemble.impact_predictor):
+            predictor.is_trained = True
+
+        def slow(result):
+            def predict(df, *args):
+                time.sleep(0.2)
+                return result(df)
+            return predict
+
+        monkeypatch.setattr(ensemble.tourism_predictor, "predict", slow(
+            lambda df: pd.DataFrame({'ds': df['ds'], 'yhat': 1.0, 'yhat_lower': 0.0, 'yhat_upper': 2.0})))
+        monkeypatch.setattr(ensemble.hotel_predictor, "predict", slow(lambda df: np.ones(len(df))))
+        monkeypatch.setattr(ensemble.impact_predictor, "predict_with_confidence", slow(
+            lambda df: (np.ones(len(df)), np.zeros(len(df)), np.full(len(df), 2.0))))
+
+        result = ensemble.predict_event_impact(**REQUESTS[0])
+        timings = result["timings_ms"]
+
+        assert set(timings) == {"inputs", "forecasts", "tourism", "hotel", "impact", "total"}
+        assert min(timings["tourism"], timings["hotel"], timings["impact"]) >= 200
+        assert timings["total"] < 500
+
+        ensemble.parallel = False
+        assert ensemble.predict_event_impact(**REQUESTS[0])["timings_ms"]["total"] >= 600
+
+    def test_close_stops_the_threads(self, trained):
+        """close() and with blocks shut the stage threads down"""
+        def ensemble_threads():
+            return [t for t in threading.enumerate() if t.name.startswith("ensemble")]
+
+        with EnsemblePredictor() as ensemble:
+            ensemble.tourism_predictor = trained.tourism_predictor
+            ensemble.hotel_predictor = trained.hotel_predictor
+            ensemble.impact_predictor = trained.impact_predictor
+            before = len(ensemble_threads())
+            ensemble.predict_many(REQUESTS)
+            assert len(ensemble_threads()) > before
+
+        assert len(ensemble_threads()) == before
+        # Usable again after closing
+        assert len(ensemble.predict_many(REQUESTS[:1])["predictions"]) == 1
+        ensemble.close()
+
+    def test_mixes_precomputed_and_model_forecasts(self, seeded_db, trained, tmp_path, monkeypatch):
+        """Covered windows use fleet forecasts; the model runs once for the rest"""
+        city_id = seeded_db.query(City.id).scalar()
+        ForecastFleet(model_dir=tmp_path, cpu_budget=1, horizon_days=100, backend="holt_winters").refresh(
+            seeded_db, start=date(2025, 4, 1), metrics=["visitors", "occupancy"],
+        )
+        calls = []
+        predict = trained.tourism_predictor.predict
+        monkeypatch.setattr(trained.tourism_predictor, "predict", lambda df: calls.append(len(df)) or predict(df))
+        trained.db = seeded_db
+        try:
+            batch = trained.predict_many([
+                {**REQUESTS[0], "city_id": city_id},
+                {**REQUESTS[1], "city_id": city_id},
+                {**REQUESTS[2], "city_id": city_id},
+            ])
+        finally:
+            trained.db = None
+
+        sources = [p["visitor_forecast_source"] for p in batch["predictions"]]
+        assert sources == ["precomputed", "model", "model"]
+        # One call for the union of the uncovered windows
+        assert calls == [122]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+Unit tests for the event context interval join
+"""
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.event_features import NO_EVENT_DAYS, event_context
+
+
+def reference_context(days: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """Event context built day by day, scanning every event"""
+    rows = []
+    for city_id, day in days[['city_id', 'date']].itertuples(index=False):
+        city_events = events[events['city_id'] == city_id]
+        covering = city_events[(city_events['start_date'] <= day) & (city_events['end_date'] >= day)]
+        distances = [
+            0 if start <= day <= end else min(abs((start - day).days), abs((end - day).days))
+            for start, end in city_events[['start_date', 'end_date']].itertuples(index=False)
+        ]
+        rows.append({
+            'is_event_period': len(covering) > 0,
+            'days_to_event': min(distances + [NO_EVENT_DAYS]),
+            'event_size': int(covering['attendance'].fillna(0).sum()),
+        })
+    return pd.DataFrame(rows, index=days.index)
+
+
+def random_events(rng, cities, n, first=date(2024, 1, 1)):
+    """Random (possibly overlapping) events over a year"""
+    starts = [first + timedelta(days=int(d)) for d in rng.integers(0, 365, n)]
+    return pd.DataFrame({
+        'city_id': rng.choice(cities, n),
+        'start_date': starts,
+        'end_date': [s + timedelta(days=int(d)) for s, d in zip(starts, rng.integers(0, 40, n))],
+        'attendance': rng.integers(1000, 100000, n),
+    })
+
+
+class TestEventContext:
+    """Test suite for event_context"""
+
+    def test_matches_day_by_day_scan(self):
+        """The interval join gives the same features as scanning every event"""
+        rng = np.random.default_rng(7)
+        days = pd.DataFrame({
+            'city_id': rng.choice([1, 2, 3], 500),
+            'date': [date(2023, 12, 1) + timedelta(days=int(d)) for d in rng.integers(0, 430, 500)],
+        })
+        events = random_events(rng, [1, 2], 25)
+
+        result = event_context(days, events)
+
+        pd.testing.assert_frame_equal(result, reference_context(days, events), check_dtype=False)
+        # City 3 has no events
+        assert (result.loc[days['city_id'] == 3, 'days_to_event'] == NO_EVENT_DAYS).all()
+
+    def test_long_event_covers_later_starts(self):
+        """A day inside a long event is covered even if a shorter event started since"""
+        days = pd.DataFrame({'city_id': [1, 1, 1], 'date': [date(2024, 6, 10), date(2024, 6, 20), date(2024, 7, 5)]},
+                            index=[10, 11, 12])
+        events = pd.DataFrame({
+            'city_id': [1, 1],
+            'start_date': [date(2024, 6, 1), date(2024, 6, 5)],
+            'end_date': [date(2024, 6, 30), date(2024, 6, 6)],
+            'attendance': [50000, None],
+        })
+
+        result = event_context(days, events)
+
+        assert result.index.tolist() == [10, 11, 12]
+        assert result['is_event_period'].tolist() == [True, True, False]
+        assert result['event_size'].tolist() == [50000, 50000, 0]
+        assert result['days_to_event'].tolist() == [0, 0, 5]
+
+    def test_distance_is_capped(self):
+        """Days further than NO_EVENT_DAYS from any event get NO_EVENT_DAYS"""
+        days = pd.DataFrame({'city_id': [1, 1], 'date': [date(2020, 1, 1), date(2024, 1, 1)]})
+        events = pd.DataFrame({
+            'city_id': [1], 'start_date': [date(2024, 1, 11)], 'end_date': [date(2024, 1, 12)], 'attendance': [100],
+        })
+
+        result = event_context(days, events)
+
+        pd.testing.assert_frame_equal(result, reference_context(days, events), check_dtype=False)
+        assert result['days_to_event'].tolist() == [NO_EVENT_DAYS, 10]
+
+    def test_no_events(self):
+        """Without events every day gets the defaults"""
+        days = pd.DataFrame({'city_id': [1], 'date': [date(2024, 1, 1)]})
+        empty = pd.DataFrame(columns=['city_id', 'start_date', 'end_date', 'attendance'])
+
+        result = event_context(days, empty)
+
+        assert result.iloc[0].tolist() == [False, NO_EVENT_DAYS, 0]
+
+    def test_hundred_cities_ten_years(self):
+        """Ten years of days for 100 cities join in seconds"""
+        rng = np.random.default_rng(1)
+        dates = pd.date_range('2015-01-01', '2024-12-31').date
+        days = pd.DataFrame({'city_id': np.repeat(np.arange(100), len(dates)), 'date': np.tile(dates, 100)})
+        events = random_events(rng, np.arange(100), 5000, first=date(2015, 1, 1))
+
+        started = time.perf_counter()
+        result = event_context(days, events)
+
+        assert time.perf_counter() - started < 10
+        assert len(result) == len(days)
+        assert result['is_event_period'].any()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
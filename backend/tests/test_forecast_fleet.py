@@ -0,0 +1,125 @@
+"""
+Unit tests for the per-city forecasting fleet and precomputed forecast slices
+"""
+from datetime import date, timedelta
+import pandas as pd
+import pytest
+from sqlalchemy import func
+
+from app.ml.forecast_fleet import ForecastFleet, forecast_slice
+from app.ml.predictors import EnsemblePredictor, TourismPredictor
+from app.models import City, MetricForecast, TourismMetric
+
+
+START = date(2024, 5, 1)
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    """Serial fleet with a short horizon, saving into a temporary directory"""
+    return ForecastFleet(model_dir=tmp_path, cpu_budget=1, horizon_days=90, backend="holt_winters")
+
+
+class TestForecastFleet:
+    """Test suite for ForecastFleet"""
+
+    def test_trains_every_city_metric(self, seeded_db, fleet, tmp_path):
+        """One model and one forecast per series with history"""
+        city_id = seeded_db.query(City.id).scalar()
+
+        report = fleet.refresh(seeded_db, start=START)
+
+        assert report["models_trained"] == 4
+        assert report["failed"] == []
+        assert report["forecast_rows"] == 4 * 90
+        counts = dict(
+            seeded_db.query(MetricForecast.metric, func.count()).filter_by(city_id=city_id)
+            .group_by(MetricForecast.metric).all()
+        )
+        assert counts == {"visitors": 90, "arrivals": 90, "occupancy": 90, "price": 90}
+
+        loaded = TourismPredictor(backend="random_forest", model_dir=tmp_path / "visitors")
+        loaded.load_model(f"city_{city_id}.pkl")
+        assert loaded.backend == "holt_winters"
+
+    def test_refresh_replaces_the_rolling_window(self, seeded_db, fleet):
+        """A later refresh moves the horizon instead of adding to it"""
+        city_id = seeded_db.query(City.id).scalar()
+        fleet.refresh(seeded_db, start=START, metrics=["visitors"])
+        fleet.refresh(seeded_db, start=START + timedelta(days=30), metrics=["visitors"])
+
+        days = [d for (d,) in seeded_db.query(MetricForecast.date).filter_by(city_id=city_id, metric="visitors")]
+        assert len(days) == 90
+        assert min(days) == START + timedelta(days=30)
+
+    def test_short_history_is_skipped(self, seeded_db, fleet):
+        """Series with less than a month of data get no model"""
+        seeded_db.query(TourismMetric).filter(TourismMetric.date > date(2024, 1, 20)).delete()
+        seeded_db.commit()
+
+        report = fleet.refresh(seeded_db, start=START, metrics=["visitors"])
+
+        assert report["models_trained"] == 0
+        assert "visitors" in report["skipped"][0]
+
+    def test_process_pool(self, seeded_db, tmp_path):
+        """Series are trained on worker processes with the same results"""
+        report = ForecastFleet(model_dir=tmp_path, cpu_budget=2, horizon_days=30, backend="holt_winters").refresh(
+            seeded_db, start=START,
+        )
+        assert report["models_trained"] == 4
+        assert (tmp_path / "price").is_dir()
+
+    def test_forecast_slice(self, seeded_db, fleet):
+        """Slices are returned only when the whole range is covered"""
+        city_id = seeded_db.query(City.id).scalar()
+        fleet.refresh(seeded_db, start=START, metrics=["visitors"])
+
+        window = forecast_slice(seeded_db, city_id, "visitors", START, START + timedelta(days=9))
+        assert list(window.columns) == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+        assert window['ds'].iloc[0] == pd.Timestamp(START)
+        assert len(window) == 10
+        assert forecast_slice(seeded_db, city_id, "visitors", START - timedelta(days=1), START) is None
+        assert forecast_slice(seeded_db, city_id, "price", START, START) is None
+
+
+class TestEnsembleForecastSlices:
+    """Test suite for EnsemblePredictor reading precomputed forecasts"""
+
+    def test_reads_precomputed_slice(self, seeded_db, fleet, monkeypatch):
+        """With a fleet forecast, the tourism model is not run"""
+        city_id = seeded_db.query(City.id).scalar()
+        fleet.refresh(seeded_db, start=START, metrics=["visitors"])
+        ensemble = EnsemblePredictor(db=seeded_db)
+        ensemble.tourism_predictor.is_trained = True
+
+        def fail(future):
+            raise AssertionError("model should not be called")
+
+        monkeypatch.setattr(ensemble.tourism_predictor, "predict", fail)
+        result = ensemble.predict_event_impact(
+            event_date=date(2024, 6, 15), event_duration=3, expected_attendance=50000,
+            city_data={}, city_id=city_id,
+        )
+
+        assert result["visitor_forecast_source"] == "precomputed"
+        assert len(result["visitor_forecast"]["yhat"]) == 61
+
+    def test_falls_back_to_the_model(self, seeded_db):
+        """Windows outside the precomputed horizon use the tourism model"""
+        history = pd.date_range('2024-01-01', periods=60)
+        ensemble = EnsemblePredictor(db=seeded_db)
+        ensemble.tourism_predictor = TourismPredictor(backend="holt_winters")
+        ensemble.tourism_predictor.train(pd.DataFrame({'ds': history, 'y': range(60)}))
+
+        result = ensemble.predict_event_impact(
+            event_date=date(2026, 6, 15), event_duration=3, expected_attendance=50000,
+            city_data={}, city_id=seeded_db.query(City.id).scalar(),
+        )
+
+        assert result["visitor_forecast_source"] == "model"
+        assert len(result["visitor_forecast"]["yhat"]) == 61
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,134 @@
+"""
+Unit tests for the numpy Holt-Winters forecaster and TourismPredictor backends
+"""
+import time
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.holt_winters import HoltWintersForecaster
+from app.ml.predictors import TourismPredictor
+
+
+def visitors(dates: pd.DatetimeIndex, seed: int = 0, noise: float = 1000.0) -> np.ndarray:
+    """Daily visitors with a trend, a yearly cycle and busier weekends"""
+    rng = np.random.default_rng(seed)
+    t = (dates - pd.Timestamp('2015-01-01')).days.to_numpy()
+    return (
+        50000 + 5 * t
+        + 8000 * np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)
+        + 3000 * (dates.dayofweek.to_numpy() >= 5)
+        + rng.normal(0, noise, len(dates))
+    )
+
+
+class TestHoltWintersForecaster:
+    """Test suite for HoltWintersForecaster"""
+
+    def test_forecasts_trend_and_seasonality(self):
+        """A year ahead stays close to the true weekly and yearly pattern"""
+        history = pd.date_range('2015-01-01', '2024-12-31')
+        model = HoltWintersForecaster().fit(history, visitors(history))
+        future = pd.date_range('2025-01-01', periods=365)
+
+        forecast = model.predict(future)
+
+        truth = visitors(future, noise=0)
+        assert list(forecast.columns) == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+        assert model.method == "holt_winters"
+        assert np.abs(forecast['yhat'] - truth).mean() < 0.05 * truth.mean()
+        inside = (truth >= forecast['yhat_lower']) & (truth <= forecast['yhat_upper'])
+        assert inside.mean() > 0.8
+        # Intervals widen with the horizon
+        width = forecast['yhat_upper'] - forecast['yhat_lower']
+        assert width.iloc[-1] > width.iloc[0]
+        # Weekends stay busier
+        weekend = forecast['ds'].dt.dayofweek >= 5
+        assert forecast.loc[weekend, 'yhat'].mean() > forecast.loc[~weekend, 'yhat'].mean()
+
+    def test_in_sample_dates_and_gaps(self):
+        """Missing days are interpolated and past dates get fitted values"""
+        history = pd.date_range('2024-01-01', periods=120)
+        values = visitors(history)
+        values[10:15] = np.nan
+        keep = np.ones(len(history), dtype=bool)
+        keep[40:45] = False
+
+        model = HoltWintersForecaster().fit(history[keep], values[keep])
+        forecast = model.predict(pd.date_range('2024-02-01', periods=100))
+
+        assert model.n == 120
+        assert not forecast[['yhat', 'yhat_lower', 'yhat_upper']].isna().any().any()
+        assert (forecast['yhat_lower'] < forecast['yhat']).all()
+
+    def test_short_history_is_seasonal_naive(self):
+        """Less than two weeks repeats the last week"""
+        history = pd.date_range('2024-03-04', periods=10)
+        values = np.arange(10, dtype=float) * 100
+
+        model = HoltWintersForecaster().fit(history, values)
+        forecast = model.predict(pd.date_range('2024-03-14', periods=8))
+
+        assert model.method == "seasonal_naive"
+        # Same weekday one week earlier
+        assert forecast['yhat'].tolist() == [300.0, 400.0, 500.0, 600.0, 700.0, 800.0, 900.0, 300.0]
+
+    def test_all_cities_in_seconds(self):
+        """Ten years of daily data for 50 cities fit and forecast quickly"""
+        history = pd.date_range('2015-01-01', '2024-12-31')
+        future = pd.date_range('2025-01-01', periods=90)
+        series = [visitors(history, seed=city) for city in range(50)]
+
+        started = time.perf_counter()
+        forecasts = [HoltWintersForecaster().fit(history, values).predict(future) for values in series]
+
+        assert time.perf_counter() - started < 10
+        assert all(len(forecast) == 90 for forecast in forecasts)
+
+
+class TestTourismPredictorBackends:
+    """Test suite for TourismPredictor backends and features"""
+
+    def test_extract_features(self):
+        """Calendar features come from 'date' (or 'ds') columns"""
+        df = pd.DataFrame({'ds': pd.to_datetime(['2024-02-29', '2024-03-02'])})
+        features = TourismPredictor(backend="random_forest")._extract_features(df)
+        assert features.tolist() == [[3, 2, 29, 60, 0], [5, 3, 2, 62, 1]]
+
+        dates = pd.DataFrame({'date': [pd.Timestamp('2024-03-02').date()]})
+        assert TourismPredictor(backend="random_forest")._extract_features(dates).tolist() == [[5, 3, 2, 62, 1]]
+
+    @pytest.mark.parametrize("backend", ["holt_winters", "random_forest"])
+    def test_prophet_frames(self, backend):
+        """Both fallbacks train on ds/y and predict from a ds-only frame"""
+        history = pd.date_range('2023-01-01', periods=365)
+        predictor = TourismPredictor(backend=backend)
+        predictor.train(pd.DataFrame({'ds': history, 'y': visitors(history)}))
+
+        forecast = predictor.predict(pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=30)}))
+
+        assert list(forecast.columns) == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+        assert len(forecast) == 30
+        assert (forecast['yhat_lower'] <= forecast['yhat']).all()
+
+    def test_saved_backend_is_restored(self, tmp_path):
+        """A loaded model keeps the backend it was trained with"""
+        history = pd.date_range('2023-01-01', periods=60)
+        predictor = TourismPredictor(backend="holt_winters", model_dir=tmp_path)
+        predictor.train(pd.DataFrame({'ds': history, 'y': visitors(history)}))
+        predictor.save_model("tourism.pkl")
+
+        loaded = TourismPredictor(backend="random_forest", model_dir=tmp_path)
+        loaded.load_model("tourism.pkl")
+
+        assert loaded.backend == "holt_winters"
+        assert len(loaded.predict(pd.DataFrame({'ds': pd.date_range('2023-03-01', periods=5)}))) == 5
+
+    def test_unknown_backend(self):
+        """Backends are validated"""
+        with pytest.raises(ValueError):
+            TourismPredictor(backend="arima")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
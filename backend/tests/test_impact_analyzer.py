@@ -0,0 +1,240 @@
+"""
+Unit tests for the impact analyzer
+Tests window aggregates from database queries, the set-based statement and the window index
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core.database import get_db
+from app.models import (
+    City, Event, EventImpact, EventType, ImpactCube,
+)
+from app.analytics.batch_impact import BatchImpactAnalyzer
+from app.analytics.impact_analyzer import ImpactAnalyzer, WINDOW_COLUMNS
+from app.analytics.metric_window_index import MetricWindowIndex
+
+
+def _impact_values(impact):
+    return {
+        key: value for key, value in impact.__dict__.items()
+        if not key.startswith("_")
+    }
+
+
+class TestWindowIndex:
+    """Test suite for window aggregates"""
+
+    def test_index_matches_queries(self, seeded_db):
+        """Impacts computed from the window index match the per-window queries"""
+        queried = ImpactAnalyzer(seeded_db, set_based=False)
+        indexed = ImpactAnalyzer(seeded_db)
+        indexed.load_window_indexes()
+
+        for event in seeded_db.query(Event).all():
+            expected = _impact_values(queried.calculate_event_impact(event.id))
+            actual = _impact_values(indexed.calculate_event_impact(event.id))
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                if isinstance(value, float):
+                    assert actual[key] == pytest.approx(value, rel=1e-9), key
+                else:
+                    assert actual[key] == value, key
+
+    def test_set_based_matches_queries(self, seeded_db):
+        """Impacts from the single set-based statement match the per-window queries"""
+        queried = ImpactAnalyzer(seeded_db, set_based=False)
+        set_based = ImpactAnalyzer(seeded_db)
+
+        for event in seeded_db.query(Event).all():
+            expected = _impact_values(queried.calculate_event_impact(event.id))
+            actual = _impact_values(set_based.calculate_event_impact(event.id))
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                if isinstance(value, float):
+                    assert actual[key] == pytest.approx(value, rel=1e-9), key
+                else:
+                    assert actual[key] == value, key
+
+    def test_set_based_window_aggregates(self, seeded_db):
+        """Each window aggregate matches the row-by-row aggregate"""
+        analyzer = ImpactAnalyzer(seeded_db, set_based=False)
+        event = seeded_db.query(Event).first()
+        baseline_start = event.start_date - timedelta(days=40)
+        baseline_end = event.start_date - timedelta(days=10)
+
+        prefetched = analyzer._sql_window_aggregates(
+            event.city_id, baseline_start, baseline_end, event.start_date, event.end_date
+        )
+        assert len(prefetched) == 2 * len(WINDOW_COLUMNS)
+        for (metric_type, city_id, start, end), actual in prefetched.items():
+            expected = analyzer._window_aggregates(metric_type, city_id, start, end)
+            assert actual["rows"] == expected["rows"]
+            for col in WINDOW_COLUMNS[metric_type]:
+                assert actual["sum"][col] == pytest.approx(expected["sum"][col])
+                assert actual["mean"][col] == pytest.approx(expected["mean"][col], nan_ok=True)
+
+    def test_window_max_matches_slice(self):
+        """Sparse-table maxima match a direct scan for every window"""
+        rng = np.random.default_rng(3)
+        values = rng.uniform(0, 100, 50)
+        values[::7] = np.nan
+        df = pd.DataFrame({
+            "city": "London",
+            "date": pd.date_range("2024-01-01", periods=50, freq="D"),
+            "price": values,
+        })
+        index = MetricWindowIndex(df, ["price"], max_columns=["price"])
+
+        for lo in range(50):
+            for hi in range(lo, 50):
+                window = values[lo:hi + 1]
+                expected = np.nan if np.isnan(window).all() else np.nanmax(window)
+                actual = index.window_max("London", "price", df["date"][lo], df["date"][hi])
+                assert actual == pytest.approx(expected, nan_ok=True)
+
+
+class TestBatchAnalyze:
+    """Test suite for BatchImpactAnalyzer"""
+
+    def test_batch_matches_single_event(self, seeded_db):
+        """Batch-computed impacts match calculate_event_impact"""
+        analyzer = ImpactAnalyzer(seeded_db, set_based=False)
+        event_ids = [event.id for event in seeded_db.query(Event).all()]
+        impacts, errors = BatchImpactAnalyzer(seeded_db).compute(event_ids)
+
+        assert errors == {}
+        for event_id in event_ids:
+            expected = _impact_values(analyzer.calculate_event_impact(event_id))
+            actual = impacts[event_id]
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                if isinstance(value, float):
+                    assert actual[key] == pytest.approx(value, rel=1e-9), key
+                else:
+                    assert actual[key] == value, key
+
+    def test_upsert_and_statuses(self, seeded_db):
+        """Rows are created once, then updated; unknown events are reported"""
+        event_ids = [event.id for event in seeded_db.query(Event).all()]
+        batch = BatchImpactAnalyzer(seeded_db)
+
+        first = batch.analyze(event_ids + [9999])
+        assert [r["status"] for r in first] == ["created"] * 3 + ["not_found"]
+        second = batch.analyze(event_ids)
+        assert [r["status"] for r in second] == ["updated"] * 3
+
+        assert seeded_db.query(EventImpact).count() == 3
+        stored = batch.load_impacts(event_ids)
+        assert stored[event_ids[0]].baseline_daily_visitors > 0
+
+    def test_batch_analyze_endpoint(self, seeded_db):
+        """The endpoint returns per-event results with the stored impacts"""
+        main.app.dependency_overrides[get_db] = lambda: seeded_db
+        try:
+            client = TestClient(main.app)
+            event_id = seeded_db.query(Event).first().id
+            response = client.post("/api/v1/events/batch-analyze", json=[event_id, 9999])
+        finally:
+            main.app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["succeeded"] == 1 and body["failed"] == 1
+        assert body["results"][0]["impact"]["event_id"] == event_id
+        assert body["results"][1]["status"] == "not_found"
+
+
+class TestImpactCube:
+    """Test suite for the materialized impact cube"""
+
+    def _analyze_all(self, db):
+        event_ids = [event.id for event in db.query(Event).all()]
+        BatchImpactAnalyzer(db).analyze(event_ids)
+        return event_ids
+
+    def test_cube_matches_impacts(self, seeded_db):
+        """Cube cells aggregate the stored impacts"""
+        self._analyze_all(seeded_db)
+        impacts = seeded_db.query(EventImpact).all()
+        cells = seeded_db.query(ImpactCube).all()
+
+        assert len(cells) == 1  # one city, one event type, one year
+        cell = cells[0]
+        assert cell.impact_count == len(impacts)
+        assert cell.economic_impact_sum_usd == pytest.approx(
+            sum(i.total_economic_impact_usd for i in impacts if i.total_economic_impact_usd)
+        )
+        assert cell.jobs_created_sum == sum(i.jobs_created for i in impacts if i.jobs_created)
+        visitor_pcts = [i.visitor_increase_pct for i in impacts if i.visitor_increase_pct]
+        assert cell.visitor_increase_pct_count == len(visitor_pcts)
+        assert cell.visitor_increase_pct_sum == pytest.approx(sum(visitor_pcts))
+        top = max(impacts, key=lambda i: i.total_economic_impact_usd or 0)
+        assert cell.top_event_id == top.event_id
+
+    def test_incremental_refresh(self, seeded_db):
+        """Only the cells of changed events are recomputed"""
+        self._analyze_all(seeded_db)
+        city = seeded_db.query(City).first()
+        event = Event(
+            city_id=city.id, name="Autumn Expo", event_type=EventType.BUSINESS,
+            start_date=date(2024, 3, 25), end_date=date(2024, 3, 26), year=2024,
+        )
+        seeded_db.add(event)
+        seeded_db.commit()
+        sports_cell = seeded_db.query(ImpactCube).filter(
+            ImpactCube.event_type == EventType.SPORTS
+        ).one()
+        refreshed_at = (sports_cell.id, sports_cell.impact_count)
+
+        BatchImpactAnalyzer(seeded_db).analyze([event.id])
+
+        cells = {c.event_type: c for c in seeded_db.query(ImpactCube).all()}
+        assert set(cells) == {EventType.SPORTS, EventType.BUSINESS}
+        assert cells[EventType.BUSINESS].impact_count == 1
+        assert cells[EventType.BUSINESS].top_event_id == event.id
+        assert (cells[EventType.SPORTS].id, cells[EventType.SPORTS].impact_count) == refreshed_at
+
+    def test_compare_cities_from_cube(self, seeded_db):
+        """City comparison reads the cube"""
+        self._analyze_all(seeded_db)
+        impacts = seeded_db.query(EventImpact).all()
+        df = ImpactAnalyzer(seeded_db).compare_cities([seeded_db.query(City).first().id, 999])
+
+        assert len(df) == 1
+        row = df.iloc[0]
+        assert row["num_events"] == len(impacts)
+        assert row["avg_price_increase_pct"] == pytest.approx(
+            np.mean([i.price_increase_pct for i in impacts if i.price_increase_pct])
+        )
+
+    def test_dashboard_and_globe(self, seeded_db):
+        """Dashboard KPIs and the globe view are built from the cube"""
+        self._analyze_all(seeded_db)
+        main.app.dependency_overrides[get_db] = lambda: seeded_db
+        try:
+            client = TestClient(main.app)
+            kpis = client.get("/api/v1/analytics/dashboard/kpis").json()
+            globe = client.get("/api/v1/analytics/globe").json()
+        finally:
+            main.app.dependency_overrides.clear()
+
+        impacts = seeded_db.query(EventImpact).all()
+        assert len(impacts) == 3
+        assert kpis["avg_economic_impact_per_event_usd"] == pytest.approx(
+            sum(i.total_economic_impact_usd for i in impacts if i.total_economic_impact_usd) / 3,
+            abs=0.01,
+        )
+        assert kpis["highest_impact_city"] == "London"
+        top = max(impacts, key=lambda i: i.total_economic_impact_usd or 0)
+        assert kpis["highest_impact_event_name"] == seeded_db.get(Event, top.event_id).name
+        assert globe[0]["city_name"] == "London"
+        assert globe[0]["num_events"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
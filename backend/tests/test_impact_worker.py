@@ -0,0 +1,160 @@
+"""
+Unit tests for the background impact recomputation worker and job endpoints
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import app.api.endpoints as endpoints
+import app.main as main
+from app.analytics.impact_worker import ImpactJobWorker
+from app.core.database import get_db
+from app.core.job_worker import JobWorker
+from app.models import Event, EventImpact, ImpactJob, JobStatus
+
+
+@pytest.fixture
+def worker(seeded_db):
+    """Worker using sessions on the test database"""
+    worker = ImpactJobWorker(session_factory=sessionmaker(bind=seeded_db.get_bind()), batch_size=2)
+    yield worker
+    worker.stop()
+
+
+@pytest.fixture
+def client(seeded_db, worker, monkeypatch):
+    """API client using the test database and worker"""
+    monkeypatch.setattr(endpoints, "impact_worker", worker)
+    main.app.dependency_overrides[get_db] = lambda: seeded_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+class TestImpactJobWorker:
+    """Test suite for ImpactJobWorker"""
+
+    def test_job_computes_impacts(self, seeded_db, worker):
+        """A job for all events analyzes them in chunks"""
+        job = worker.enqueue(seeded_db, None, source="test")
+        assert job.status == JobStatus.QUEUED
+        assert worker.wait(10)
+
+        seeded_db.expire_all()
+        job = seeded_db.get(ImpactJob, job.id)
+        assert job.status == JobStatus.DONE
+        assert (job.total, job.processed, job.succeeded) == (3, 3, 3)
+        assert job.progress_pct == 100.0
+        assert seeded_db.query(EventImpact).count() == 3
+
+    def test_pending_job_is_reused(self, seeded_db, worker, monkeypatch):
+        """Enqueuing the same events twice returns the pending job"""
+        monkeypatch.setattr(worker, "start", lambda: False)
+        event_id = seeded_db.query(Event.id).first()[0]
+        first = worker.enqueue(seeded_db, [event_id])
+        second = worker.enqueue(seeded_db, [event_id])
+        other = worker.enqueue(seeded_db, None)
+
+        assert first.id == second.id
+        assert other.id != first.id
+        assert seeded_db.query(ImpactJob).count() == 2
+
+    def test_recovers_unfinished_jobs(self, seeded_db, worker):
+        """Jobs left queued by a previous process run when the worker starts"""
+        job = ImpactJob(status=JobStatus.RUNNING, event_ids=None)
+        seeded_db.add(job)
+        seeded_db.commit()
+
+        worker.start()
+        assert worker.wait(10)
+
+        seeded_db.expire_all()
+        assert seeded_db.get(ImpactJob, job.id).status == JobStatus.DONE
+
+    def test_failed_job(self, seeded_db, worker, monkeypatch):
+        """Errors mark the job as failed with the message"""
+        def broken(self, event_ids):
+            raise RuntimeError("metrics unavailable")
+
+        monkeypatch.setattr("app.analytics.impact_worker.BatchImpactAnalyzer.analyze", broken)
+        job = worker.enqueue(seeded_db, None)
+        worker.wait(10)
+
+        seeded_db.expire_all()
+        job = seeded_db.get(ImpactJob, job.id)
+        assert job.status == JobStatus.FAILED
+        assert "metrics unavailable" in job.error
+
+
+class TestImpactJobEndpoints:
+    """Test suite for endpoints that queue impact jobs"""
+
+    def test_crash_marks_job_failed_and_continues(self, seeded_db, worker, monkeypatch):
+        """An exception escaping process() fails that job; later jobs still run"""
+        process = worker.process
+        crashed = []
+
+        def crash_once(job_id):
+            if not crashed:
+                crashed.append(job_id)
+                raise RuntimeError("database went away")
+            return process(job_id)
+
+        monkeypatch.setattr(worker, "process", crash_once)
+        event_id = seeded_db.query(Event.id).first()[0]
+        first = worker.enqueue(seeded_db, [event_id])
+        second = worker.enqueue(seeded_db, None)
+        assert worker.wait(10)
+
+        seeded_db.expire_all()
+        first, second = seeded_db.get(ImpactJob, first.id), seeded_db.get(ImpactJob, second.id)
+        assert first.status == JobStatus.FAILED
+        assert first.error == "database went away"
+        assert second.status == JobStatus.DONE
+        assert worker.is_running
+
+    def test_process_is_abstract(self):
+        """Workers without process() cannot be created"""
+        with pytest.raises(TypeError):
+            JobWorker()
+
+    def test_dashboard_queues_job_on_cold_database(self, client, seeded_db, worker):
+        """The dashboard returns immediately and the worker fills the cube"""
+        kpis = client.get("/api/v1/analytics/dashboard/kpis").json()
+        assert kpis["impact_job_id"] is not None
+        assert kpis["avg_economic_impact_per_event_usd"] == 0
+
+        assert worker.wait(10)
+        job = client.get(f"/api/v1/jobs/impact/{kpis['impact_job_id']}").json()
+        assert job["status"] == "done"
+        assert job["progress_pct"] == 100.0
+
+        seeded_db.expire_all()
+        kpis = client.get("/api/v1/analytics/dashboard/kpis").json()
+        assert kpis["impact_job_id"] is None
+        assert kpis["avg_economic_impact_per_event_usd"] > 0
+
+    def test_event_impact_is_queued(self, client, seeded_db, worker):
+        """Missing impacts return 202 with the job, then the stored impact"""
+        event_id = seeded_db.query(Event.id).first()[0]
+        response = client.get(f"/api/v1/events/{event_id}/impact")
+        assert response.status_code == 202
+        assert response.headers["Location"].endswith(f"/jobs/impact/{response.json()['job_id']}")
+
+        assert worker.wait(10)
+        seeded_db.expire_all()
+        response = client.get(f"/api/v1/events/{event_id}/impact")
+        assert response.status_code == 200
+        assert response.json()["event_id"] == event_id
+
+        response = client.get(f"/api/v1/events/{event_id}/impact", params={"recalculate": True})
+        assert response.status_code == 200
+        assert "X-Impact-Job-Id" in response.headers
+        worker.wait(10)
+
+    def test_job_not_found(self, client):
+        """Unknown jobs are 404"""
+        assert client.get("/api/v1/jobs/impact/999").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,207 @@
+"""
+Unit tests for background import jobs and their Server-Sent Events stream
+"""
+import io
+import json
+import os
+import time
+from datetime import date, datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import app.analytics.dirty_ranges as dirty_ranges
+import app.api.upload as upload
+import app.main as main
+from app.core.config import settings
+from app.core.database import get_db
+from app.etl.bulk_ingest import BulkIngestor
+from app.etl.import_jobs import ImportJobWorker
+from app.models import ImportJob, JobStatus, TourismMetric
+
+
+HOTEL_CSV = "city_name,date,occupancy_rate_pct\n" + "".join(
+    f"London,2024-09-{day:02d},{'bad' if day == 3 else 75}\n" for day in range(1, 8)
+) + "Atlantis,2024-09-01,50\n"
+
+
+class NoImpactJobs:
+    """Stand-in for the impact worker (uploads here affect no event windows)"""
+
+    def enqueue(self, db, event_ids=None, source="api"):
+        raise AssertionError("no impacts should be recomputed")
+
+
+@pytest.fixture
+def worker(seeded_db, tmp_path, monkeypatch):
+    """Import worker using the test database and a temporary spool directory"""
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_ROWS", 3)
+    monkeypatch.setattr(dirty_ranges, "impact_worker", NoImpactJobs())
+    worker = ImportJobWorker(session_factory=sessionmaker(bind=seeded_db.get_bind()))
+    yield worker
+    worker.stop()
+
+
+@pytest.fixture
+def client(seeded_db, worker, monkeypatch):
+    """API client using the test database and import worker"""
+    monkeypatch.setattr(upload, "import_worker", worker)
+    main.app.dependency_overrides[get_db] = lambda: seeded_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def post_hotel_csv(client, csv=HOTEL_CSV):
+    return client.post(
+        "/api/v1/upload/hotel-metrics",
+        files={"file": ("hotel.csv", io.BytesIO(csv.encode()), "text/csv")},
+    )
+
+
+def read_events(response):
+    """(event, data) pairs of a Server-Sent Events body"""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestImportJobs:
+    """Test suite for background upload imports"""
+
+    def test_upload_returns_job_and_imports_in_background(self, client, worker, seeded_db, tmp_path):
+        """The request only spools the file; the worker imports it"""
+        response = post_hotel_csv(client)
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert response.headers["Location"].endswith(f"/jobs/{job['job_id']}")
+
+        assert worker.wait(10)
+        status = client.get(f"/api/v1/jobs/{job['job_id']}").json()
+        assert status["status"] == "done"
+        assert (status["rows_processed"], status["chunks"], status["error_count"]) == (8, 3, 2)
+        assert status["rows_per_second"] > 0
+        assert status["result"]["metrics_created"] == 6
+        assert status["result"]["errors"] == [
+            "Row 3: Invalid occupancy_rate_pct 'bad'",
+            "Row 8: City not found",
+        ]
+        assert os.listdir(tmp_path) == []
+
+    def test_event_stream(self, client, worker, seeded_db):
+        """The SSE stream reports progress with new errors, then the result"""
+        job_id = post_hotel_csv(client).json()["job_id"]
+        assert worker.wait(10)
+
+        response = client.get(f"/api/v1/jobs/{job_id}/events")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        (event, data), = read_events(response)
+        assert event == "done"
+        assert data["rows_processed"] == 8
+        assert data["new_errors"] == ["Row 3: Invalid occupancy_rate_pct 'bad'", "Row 8: City not found"]
+        assert data["result"]["total_rows"] == 8
+
+    def test_event_stream_while_running(self, client, worker, monkeypatch):
+        """A stream opened during the import gets progress events before the result"""
+        ingest = BulkIngestor.ingest_hotel_metrics
+
+        def slow_ingest(self, df, row_offset=0):
+            time.sleep(0.3)
+            return ingest(self, df, row_offset)
+
+        monkeypatch.setattr(BulkIngestor, "ingest_hotel_metrics", slow_ingest)
+        monkeypatch.setattr(upload, "SSE_POLL_SECONDS", 0.05)
+        job_id = post_hotel_csv(client).json()["job_id"]
+
+        events = read_events(client.get(f"/api/v1/jobs/{job_id}/events"))
+
+        assert events[-1][0] == "done"
+        progress = [data for event, data in events[:-1] if event == "progress"]
+        assert progress
+        assert all(event == "progress" for event, _ in events[:-1])
+        rows = [data["rows_processed"] for data in progress]
+        assert rows == sorted(rows)
+        # Every error is sent once, across all events
+        assert sum((data["new_errors"] for _, data in events), []) == [
+            "Row 3: Invalid occupancy_rate_pct 'bad'", "Row 8: City not found",
+        ]
+
+    def test_rate_counts_rows_since_last_start(self):
+        """A resumed job's rate leaves out rows imported before the restart"""
+        job = ImportJob(
+            rows_processed=7, rows_at_start=3,
+            started_at=datetime(2024, 1, 1, 12, 0, 0), finished_at=datetime(2024, 1, 1, 12, 0, 2),
+        )
+        assert job.rows_per_second == 2.0
+
+    def test_failed_import(self, client, worker, seeded_db):
+        """A failing chunk marks the job as failed with the message"""
+        csv = "city_name,date,total_visitors\nLondon,2024-09-01,5\nLondon,2024-09-02,many\n"
+        response = client.post(
+            "/api/v1/upload/tourism-metrics",
+            files={"file": ("tourism.csv", io.BytesIO(csv.encode()), "text/csv")},
+        )
+        assert worker.wait(10)
+
+        events = read_events(client.get(f"/api/v1/jobs/{response.json()['job_id']}/events"))
+        assert events[-1][0] == "failed"
+        assert "invalid total_visitors" in events[-1][1]["error"]
+
+    def test_interrupted_job_resumes(self, seeded_db, worker, monkeypatch):
+        """A job stopped after a chunk continues from the next one"""
+        csv = "city_name,date,total_visitors\n" + "".join(
+            f"London,2024-10-{day:02d},{1000 + day}\n" for day in range(1, 8)
+        )
+        # Keep the worker thread out of this test: jobs are processed by hand
+        monkeypatch.setattr(worker, "submit", lambda job_id: None)
+        job = worker.enqueue(seeded_db, "tourism-metrics", io.BytesIO(csv.encode()), "tourism.csv")
+
+        ingest = BulkIngestor.ingest_tourism_metrics
+        calls = []
+
+        def stop_during_second_chunk(self, df, row_offset=0):
+            calls.append(len(df))
+            if len(calls) == 2:
+                worker._stop.set()
+            return ingest(self, df, row_offset)
+
+        monkeypatch.setattr(BulkIngestor, "ingest_tourism_metrics", stop_during_second_chunk)
+        worker.process(job.id)
+        seeded_db.expire_all()
+        job = seeded_db.get(ImportJob, job.id)
+        assert job.status == JobStatus.RUNNING
+        assert job.rows_processed == 3
+
+        worker._stop.clear()
+        worker.process(job.id)
+        seeded_db.expire_all()
+        job = seeded_db.get(ImportJob, job.id)
+        assert job.status == JobStatus.DONE
+        assert (job.rows_processed, job.chunks) == (7, 3)
+        assert job.rows_at_start == 3
+        assert job.result["metrics_created"] == 7
+        assert job.result["dirty_ranges"][0]["start_date"] == "2024-10-01"
+        visitors = [
+            v for (v,) in seeded_db.query(TourismMetric.total_visitors)
+            .filter(TourismMetric.date >= date(2024, 10, 1)).order_by(TourismMetric.date)
+        ]
+        assert visitors == [1001, 1002, 1003, 1004, 1005, 1006, 1007]
+
+    def test_missing_columns_rejected_before_spooling(self, client, tmp_path):
+        """Bad headers fail the request itself"""
+        response = post_hotel_csv(client, "city_name,price\nLondon,1\n")
+        assert response.status_code == 400
+        assert "date" in response.json()["detail"]
+        assert os.listdir(tmp_path) == []
+
+    def test_job_not_found(self, client):
+        """Unknown jobs are 404"""
+        assert client.get("/api/v1/jobs/999").status_code == 404
+        assert client.get("/api/v1/jobs/999/events").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
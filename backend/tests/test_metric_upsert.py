@@ -0,0 +1,151 @@
+"""
+Unit tests for unique (city_id, date) metric keys, upserts and the dedupe migrations
+"""
+from datetime import date
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import chunked, upsert_records
+from app.analytics.batch_impact import BatchImpactAnalyzer
+from app.core.migrations import ensure_unique_impact_keys, ensure_unique_metric_keys, missing_unique_keys
+from app.etl.bulk_ingest import BulkIngestor
+from app.models import City, Event, EventImpact, HotelMetric, ImpactCube, TourismMetric
+
+
+class TestUpsertRecords:
+    """Test suite for upsert_records"""
+
+    def test_duplicate_key_is_rejected(self, seeded_db):
+        """Plain inserts of an existing (city_id, date) fail"""
+        city_id = seeded_db.query(City.id).scalar()
+        seeded_db.add(HotelMetric(city_id=city_id, date=date(2024, 1, 1), avg_price_usd=1.0))
+        with pytest.raises(IntegrityError):
+            seeded_db.flush()
+        seeded_db.rollback()
+
+    def test_overwrite_and_coalesce(self, seeded_db):
+        """Existing rows are updated, new keys inserted, repeats merged"""
+        city_id = seeded_db.query(City.id).scalar()
+        before = seeded_db.query(HotelMetric).filter(HotelMetric.date == date(2024, 1, 2)).one()
+        occupancy = before.occupancy_rate_pct
+
+        written = upsert_records(seeded_db, HotelMetric, [
+            {"city_id": city_id, "date": date(2024, 1, 2), "occupancy_rate_pct": None, "avg_price_usd": 111.0},
+            {"city_id": city_id, "date": date(2025, 1, 1), "occupancy_rate_pct": 50.0, "avg_price_usd": None},
+            {"city_id": city_id, "date": date(2025, 1, 1), "occupancy_rate_pct": None, "avg_price_usd": 90.0},
+        ], coalesce=True)
+        seeded_db.commit()
+        seeded_db.expire_all()
+
+        assert written == 2
+        assert seeded_db.query(HotelMetric).count() == 121
+        updated = seeded_db.get(HotelMetric, before.id)
+        assert (updated.occupancy_rate_pct, updated.avg_price_usd) == (occupancy, 111.0)
+        new = seeded_db.query(HotelMetric).filter(HotelMetric.date == date(2025, 1, 1)).one()
+        assert (new.occupancy_rate_pct, new.avg_price_usd) == (50.0, 90.0)
+
+        upsert_records(seeded_db, HotelMetric, [
+            {"city_id": city_id, "date": date(2025, 1, 1), "occupancy_rate_pct": None},
+        ])
+        seeded_db.expire_all()
+        assert seeded_db.get(HotelMetric, new.id).occupancy_rate_pct is None
+
+    def test_reupload_is_idempotent(self, seeded_db):
+        """Ingesting the same file twice leaves one row per city and day"""
+        df = pd.DataFrame({
+            "city_name": ["London"] * 3,
+            "date": ["2024-01-10", "2024-09-01", "2024-09-02"],
+            "total_visitors": [70000, 40000, 41000],
+        })
+        for _ in range(2):
+            BulkIngestor(seeded_db).ingest_tourism_metrics(df)
+            seeded_db.commit()
+
+        assert seeded_db.query(TourismMetric).count() == 122
+        day = seeded_db.query(TourismMetric).filter(TourismMetric.date == date(2024, 1, 10)).one()
+        assert day.total_visitors == 70000
+
+    def test_chunked(self):
+        """chunked splits any iterable into lists of at most size items"""
+        assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+        assert list(chunked(set(), 2)) == []
+
+
+class TestUniqueKeyMigration:
+    """Test suite for the unique key migrations"""
+
+    def test_dedupes_and_replaces_index(self, db):
+        """Older databases lose duplicates (latest row kept) and get a unique index"""
+        engine = db.get_bind()
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX idx_hotel_city_date")
+            connection.exec_driver_sql("CREATE INDEX idx_hotel_city_date ON hotel_metrics (city_id, date)")
+
+        city = City(name="Rome", country="Italy", country_code="ITA", continent="Europe",
+                    latitude=41.9, longitude=12.5, timezone="Europe/Rome")
+        db.add(city)
+        db.flush()
+        for price in [100.0, 120.0, 130.0]:
+            db.add(HotelMetric(city_id=city.id, date=date(2024, 5, 1), avg_price_usd=price))
+        db.add(HotelMetric(city_id=city.id, date=date(2024, 5, 2), avg_price_usd=90.0))
+        db.commit()
+        assert missing_unique_keys(engine) == ["hotel_metrics"]
+        # The check never changes the data
+        assert db.query(HotelMetric).count() == 4
+
+        deleted = ensure_unique_metric_keys(engine)
+
+        assert deleted == {"hotel_metrics": 2}
+        prices = sorted(price for (price,) in db.query(HotelMetric.avg_price_usd))
+        assert prices == [90.0, 130.0]
+        indexes = {index["name"]: index for index in inspect(engine).get_indexes("hotel_metrics")}
+        assert indexes["idx_hotel_city_date"]["unique"]
+        assert ensure_unique_metric_keys(engine) == {}
+        assert missing_unique_keys(engine) == []
+
+    def test_impacts_unique_per_event(self, seeded_db):
+        """Older event_impacts tables keep the oldest row per event and get a unique index"""
+        engine = seeded_db.get_bind()
+        event_ids = [event_id for (event_id,) in seeded_db.query(Event.id).order_by(Event.id)]
+        BatchImpactAnalyzer(seeded_db).analyze(event_ids)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_event_impacts_event_id")
+            connection.exec_driver_sql("CREATE INDEX ix_event_impacts_event_id ON event_impacts (event_id)")
+        kept = {impact.event_id: impact.id for impact in seeded_db.query(EventImpact)}
+        seeded_db.add(EventImpact(event_id=event_ids[0], total_economic_impact_usd=1e12))
+        seeded_db.commit()
+        assert missing_unique_keys(engine) == ["event_impacts"]
+
+        assert ensure_unique_impact_keys(engine) == 1
+
+        seeded_db.expire_all()
+        assert {impact.event_id: impact.id for impact in seeded_db.query(EventImpact)} == kept
+        # The cube no longer counts the duplicate
+        assert seeded_db.query(ImpactCube).one().impact_count == 3
+        assert missing_unique_keys(engine) == []
+        assert ensure_unique_impact_keys(engine) == 0
+        with pytest.raises(IntegrityError):
+            seeded_db.add(EventImpact(event_id=event_ids[0]))
+            seeded_db.commit()
+        seeded_db.rollback()
+
+    def test_overlapping_batches_share_one_row(self, seeded_db, monkeypatch):
+        """A batch that missed another run's row still updates it instead of adding one"""
+        event_ids = [event_id for (event_id,) in seeded_db.query(Event.id)]
+        BatchImpactAnalyzer(seeded_db).analyze(event_ids)
+
+        # Second run reads no existing rows, as if both runs read before either wrote
+        late = BatchImpactAnalyzer(seeded_db)
+        impacts = late.compute(event_ids)[0]
+        monkeypatch.setattr("app.analytics.batch_impact.chunked", lambda values, size: iter(()))
+        statuses = late._upsert(impacts)
+        seeded_db.commit()
+
+        assert set(statuses.values()) == {"created"}
+        assert seeded_db.query(EventImpact).count() == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,142 @@
+"""
+Unit tests for the slim model artifact
+"""
+import pickle
+import pytest
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from app.ml.economic_impact_model import EconomicImpactModel
+from app.ml.model_artifact import ArrayRegressor, LazyModels, load_artifact, save_artifact
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    """Small fitted models and preprocessors"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 5))
+    y = X[:, 0] * 3 - X[:, 1] ** 2 + rng.normal(scale=0.1, size=200)
+    models = {
+        'linear_regression': LinearRegression().fit(X, y),
+        'lasso_regression': Lasso(alpha=0.1).fit(X, y),
+        'random_forest': RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(X, y),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=30, random_state=0).fit(X, y),
+    }
+    encoder = LabelEncoder().fit(['sports', 'music', 'culture'])
+    return {
+        'best_model': models['gradient_boosting'],
+        'best_model_name': 'gradient_boosting',
+        'all_models': models,
+        'scaler': StandardScaler().fit(X),
+        'label_encoders': {'event_type': encoder},
+        'feature_columns': [f'f{i}' for i in range(5)],
+        'metrics': {name: {'r2': np.float64(0.9)} for name in models},
+        'trained_at': '2025-01-01T00:00:00',
+    }, rng.normal(size=(300, 5)) * 2
+
+
+class TestArrayRegressor:
+    """Test suite for ArrayRegressor"""
+
+    @pytest.mark.parametrize(
+        "name", ['linear_regression', 'lasso_regression', 'random_forest', 'gradient_boosting']
+    )
+    def test_matches_estimator(self, fitted, name):
+        """Array predictions equal the scikit-learn predictions"""
+        model_data, X = fitted
+        model = model_data['all_models'][name]
+        regressor = ArrayRegressor(*ArrayRegressor.export_arrays(model))
+
+        np.testing.assert_array_equal(regressor.predict(X), model.predict(X))
+        np.testing.assert_array_equal(regressor.predict(X[:1]), model.predict(X[:1]))
+
+    @pytest.mark.parametrize("name", ['random_forest', 'gradient_boosting'])
+    def test_large_batches_are_chunked(self, fitted, name):
+        """Batches over chunk_rows are walked in blocks, with the same results"""
+        model_data, X = fitted
+        model = model_data['all_models'][name]
+        regressor = ArrayRegressor(*ArrayRegressor.export_arrays(model), chunk_rows=64)
+
+        np.testing.assert_array_equal(regressor.predict(X), model.predict(X))
+        np.testing.assert_array_equal(regressor.predict(X[:64]), model.predict(X[:64]))
+
+
+class TestModelArtifact:
+    """Test suite for save_artifact/load_artifact"""
+
+    def test_round_trip(self, fitted, tmp_path):
+        """Loaded artifact predicts like the saved models"""
+        model_data, X = fitted
+        save_artifact(tmp_path / "model", model_data)
+        loaded = load_artifact(tmp_path / "model")
+
+        assert isinstance(loaded['best_model'], ArrayRegressor)
+        assert isinstance(loaded['best_model'].arrays['threshold'], np.memmap)
+        # The best model is stored once, as arrays
+        assert not (tmp_path / "model" / "alternates" / "gradient_boosting.joblib").exists()
+        assert loaded['all_models']['gradient_boosting'] is loaded['best_model']
+        np.testing.assert_array_equal(
+            loaded['best_model'].predict(X[:50]), model_data['best_model'].predict(X[:50])
+        )
+        np.testing.assert_array_equal(loaded['scaler'].transform(X), model_data['scaler'].transform(X))
+        assert loaded['label_encoders']['event_type'].transform(['music'])[0] == 1
+        assert loaded['metrics']['random_forest']['r2'] == 0.9
+
+    def test_alternates_are_lazy(self, fitted, tmp_path):
+        """Alternate models are only unpickled when accessed"""
+        model_data, X = fitted
+        save_artifact(tmp_path / "model", model_data)
+        models = load_artifact(tmp_path / "model")['all_models']
+
+        assert isinstance(models, LazyModels)
+        assert set(models) == set(model_data['all_models'])
+        assert models.loaded() == []
+        np.testing.assert_array_equal(
+            models['lasso_regression'].predict(X), model_data['all_models']['lasso_regression'].predict(X)
+        )
+        assert models.loaded() == ['lasso_regression']
+
+    def test_resave_loaded_artifact(self, fitted, tmp_path):
+        """A loaded artifact (best model as arrays) can be saved again"""
+        model_data, X = fitted
+        save_artifact(tmp_path / "model", model_data)
+        save_artifact(tmp_path / "copy", load_artifact(tmp_path / "model"))
+        loaded = load_artifact(tmp_path / "copy")
+
+        assert sorted(p.name for p in (tmp_path / "copy" / "alternates").iterdir()) == [
+            'lasso_regression.joblib', 'linear_regression.joblib', 'random_forest.joblib',
+        ]
+        np.testing.assert_array_equal(loaded['best_model'].predict(X), model_data['best_model'].predict(X))
+
+    def test_unexportable_best_model_is_joblib(self, fitted, tmp_path):
+        """A best model without an array form is stored as joblib"""
+        model_data, X = fitted
+        knn = KNeighborsRegressor().fit(X, X[:, 0])
+        save_artifact(tmp_path / "model", {
+            **model_data, 'best_model': knn, 'best_model_name': 'knn',
+            'all_models': {**model_data['all_models'], 'knn': knn},
+        })
+        loaded = load_artifact(tmp_path / "model")
+
+        assert isinstance(loaded['best_model'], KNeighborsRegressor)
+        assert (tmp_path / "model" / "alternates" / "knn.joblib").exists()
+
+    def test_model_loads_legacy_pickle(self, fitted, tmp_path):
+        """EconomicImpactModel still reads the single pickle of older versions"""
+        model_data, _ = fitted
+        with open(tmp_path / "legacy.pkl", 'wb') as f:
+            pickle.dump(model_data, f)
+
+        model = EconomicImpactModel(data_dir=tmp_path / "missing")
+        model.models_dir = tmp_path
+        model.load("legacy.pkl")
+
+        assert model.best_model_name == 'gradient_boosting'
+        assert isinstance(model.best_model, GradientBoostingRegressor)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+"""
+Unit tests for the model registry and hot swapping of model versions
+"""
+from pathlib import Path
+import pytest
+
+from app.ml.economic_impact_model import EconomicImpactModel
+from app.ml.model_registry import ModelRegistry
+from app.ml.model_warmup import ModelWarmup
+
+REPO_DATA_DIR = Path(__file__).resolve().parents[2] / "data" / "examples"
+
+
+@pytest.fixture(scope="module")
+def trained_model():
+    """Saved model with the example CSVs"""
+    model = EconomicImpactModel(data_dir=REPO_DATA_DIR)
+    if not (model.models_dir / "economic_impact_model" / "model.json").exists():
+        pytest.skip("Saved model not available")
+    model.load()
+    return model
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(tmp_path / "registry")
+
+
+class TestModelRegistry:
+    """Test suite for ModelRegistry"""
+
+    def test_publish_and_promote(self, registry, trained_model):
+        """Versions are numbered, published versions become current"""
+        assert registry.current_version() is None
+
+        assert registry.publish(trained_model) == 1
+        assert registry.publish(trained_model, promote=False) == 2
+        assert registry.current_version() == 1
+        assert [entry['version'] for entry in registry.versions()] == [1, 2]
+        assert registry.versions()[0]['best_model_name'] == trained_model.best_model_name
+
+        registry.promote(2)
+        assert registry.current_version() == 2
+        with pytest.raises(FileNotFoundError):
+            registry.promote(7)
+        assert registry.current_version() == 2
+
+    def test_load_current_version(self, registry, trained_model):
+        """A loaded version predicts like the published model"""
+        registry.publish(trained_model)
+        model = registry.load(data_dir=REPO_DATA_DIR)
+
+        expected = trained_model.predict_simple('sports', 'London', 3)
+        result = model.predict_simple('sports', 'London', 3)
+        assert result['prediction'] == expected['prediction']
+
+
+class TestHotSwap:
+    """Test suite for swapping model versions in a running process"""
+
+    def test_swaps_to_promoted_version(self, registry, trained_model):
+        """The warmup serves the current version and swaps on promotion"""
+        registry.publish(trained_model)
+        warmup = ModelWarmup(loader=None, registry=registry)
+        warmup.start()
+        assert warmup.wait(30)
+        first = warmup.get()
+        assert warmup.version == 1
+
+        assert warmup.check_for_update() is False
+        registry.publish(trained_model)
+        assert warmup.check_for_update() is True
+
+        assert warmup.version == 2
+        assert warmup.get() is not first
+        assert warmup.status()['swaps'] == 1
+        # Requests holding the previous model can still finish with it
+        assert first.predict_simple('music', 'Paris', 2)['prediction']
+
+    def test_broken_version_keeps_serving(self, registry, trained_model):
+        """A version that fails to load does not replace the current model"""
+        registry.publish(trained_model)
+        warmup = ModelWarmup(loader=None, registry=registry)
+        warmup.start()
+        warmup.wait(30)
+        current = warmup.get()
+
+        registry.publish(trained_model)
+        (registry.version_path(2) / "economic_impact_model" / "model.json").write_text("{")
+
+        assert warmup.check_for_update() is False
+        assert warmup.get() is current
+        assert warmup.version == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
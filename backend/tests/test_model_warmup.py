@@ -0,0 +1,162 @@
+"""
+Unit tests for the background model warmup and readiness probe
+"""
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.endpoints as endpoints
+import app.main as main
+from app.ml.model_warmup import ModelNotReadyError, ModelWarmup
+
+
+class FakeModel:
+    """Stand-in for EconomicImpactModel"""
+
+    def get_event_types(self):
+        return ['sports']
+
+    def get_cities(self):
+        return [{'name': 'London', 'country': 'United Kingdom', 'continent': 'Europe'}]
+
+
+class FakeRegistry:
+    """Stand-in for ModelRegistry with a settable current version"""
+
+    def __init__(self):
+        self.current = None
+
+    def current_version(self):
+        return self.current
+
+    def load(self, version):
+        return FakeModel()
+
+
+@pytest.fixture
+def gate():
+    """Event that keeps the fake loader busy until set"""
+    return threading.Event()
+
+
+@pytest.fixture
+def warmup(gate):
+    """Warmup whose loader blocks on the gate and counts its calls"""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        gate.wait(5)
+        return FakeModel()
+
+    warmup = ModelWarmup(loader=loader)
+    warmup.calls = calls
+    return warmup
+
+
+@pytest.fixture
+def client(warmup, monkeypatch):
+    """API client using the test warmup"""
+    monkeypatch.setattr(main, "model_warmup", warmup)
+    monkeypatch.setattr(endpoints, "model_warmup", warmup)
+    with TestClient(main.app) as client:
+        yield client
+
+
+class TestModelWarmup:
+    """Test suite for ModelWarmup"""
+
+    def test_single_flight(self, warmup, gate):
+        """Concurrent start() calls run the loader once"""
+        threads = [threading.Thread(target=warmup.start) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with pytest.raises(ModelNotReadyError):
+            warmup.get()
+        gate.set()
+
+        assert warmup.wait(5)
+        assert isinstance(warmup.get(), FakeModel)
+        assert warmup.start() is False
+        assert len(warmup.calls) == 1
+
+    def test_failure_is_reported(self):
+        """A failing loader leaves the warmup in the failed state"""
+        def loader():
+            raise FileNotFoundError("no CSVs")
+
+        warmup = ModelWarmup(loader=loader)
+        warmup.start()
+
+        assert warmup.wait(5) is False
+        assert warmup.status()['state'] == 'failed'
+        with pytest.raises(ModelNotReadyError, match="no CSVs"):
+            warmup.get()
+
+    def test_published_version_skips_loader(self):
+        """With a published version the legacy loader is never called"""
+        def loader():
+            raise AssertionError("legacy model loaded")
+
+        registry = FakeRegistry()
+        registry.current = 3
+        warmup = ModelWarmup(loader=loader, registry=registry)
+        warmup.start()
+
+        assert warmup.wait(5) is True
+        assert warmup.version == 3
+        assert isinstance(warmup.get(), FakeModel)
+
+    def test_version_promoted_after_failure(self):
+        """A failed warmup keeps watching the registry and becomes ready on promotion"""
+        def loader():
+            raise FileNotFoundError("no CSVs")
+
+        registry = FakeRegistry()
+        warmup = ModelWarmup(loader=loader, registry=registry, poll_seconds=0.01)
+        warmup.start()
+        try:
+            assert warmup.wait(5) is False
+
+            registry.current = 1
+            deadline = time.monotonic() + 5
+            while not warmup.is_ready and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert warmup.status()['state'] == 'ready'
+            assert warmup.status()['error'] is None
+            assert warmup.version == 1
+            assert isinstance(warmup.get(), FakeModel)
+        finally:
+            warmup.stop()
+
+
+class TestReadiness:
+    """Test suite for /ready and prediction routes during warmup"""
+
+    def test_503_until_ready(self, client, warmup, gate):
+        """Predictions and /ready answer 503 until the model is loaded"""
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()['state'] == 'warming'
+
+        response = client.get("/api/v1/predict/options")
+        assert response.status_code == 503
+        assert response.headers['retry-after'] == "5"
+
+        gate.set()
+        warmup.wait(5)
+
+        assert client.get("/ready").status_code == 200
+        response = client.get("/api/v1/predict/options")
+        assert response.status_code == 200
+        assert response.json()['event_types'] == ['sports']
+        assert len(warmup.calls) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
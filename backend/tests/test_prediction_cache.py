@@ -0,0 +1,107 @@
+"""
+Unit tests for the prediction response cache
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.endpoints as endpoints
+import app.main as main
+from app.ml.model_warmup import ModelWarmup
+from app.ml.prediction_cache import PredictionCache
+
+
+class CountingModel:
+    """Stand-in model that counts predict_simple() calls"""
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.calls = 0
+
+    def predict_simple(self, event_type, city, duration_days, attendance=None):
+        self.calls += 1
+        return {'input_summary': {'city': city, 'duration_days': duration_days}}
+
+
+class TestPredictionCache:
+    """Test suite for PredictionCache"""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted once full"""
+        cache = PredictionCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Entries older than the TTL are misses"""
+        now = [1000.0]
+        monkeypatch.setattr("app.ml.prediction_cache.time.monotonic", lambda: now[0])
+        cache = PredictionCache(ttl_seconds=60)
+        cache.put('a', 1)
+
+        now[0] += 30
+        assert cache.get('a') == 1
+        now[0] += 31
+        assert cache.get('a') is None
+        assert cache.stats()['expirations'] == 1
+
+    def test_values_are_isolated(self):
+        """Modifying a returned value does not change the cached one"""
+        cache = PredictionCache()
+        cache.put('a', {'prediction': {'total': 1}})
+        cache.get('a')['prediction']['total'] = 2
+
+        assert cache.get('a') == {'prediction': {'total': 1}}
+
+    def test_key_includes_model_fingerprint(self):
+        """Different models never share entries"""
+        old, new = CountingModel('v1'), CountingModel('v2')
+        assert PredictionCache.key(old, 'simple', 'sports') != PredictionCache.key(new, 'simple', 'sports')
+
+    def test_get_or_compute_counts(self):
+        """Repeated requests are served from the cache"""
+        cache = PredictionCache()
+        model = CountingModel('v1')
+        for _ in range(3):
+            key = cache.key(model, 'simple', 'sports', 'London', 3, None)
+            cache.get_or_compute(key, lambda: model.predict_simple('sports', 'London', 3))
+
+        assert model.calls == 1
+        assert cache.stats()['hits'] == 2
+        assert cache.stats()['misses'] == 1
+
+
+class TestPredictEndpointCache:
+    """Test suite for caching in the /predict endpoints"""
+
+    def test_repeated_predictions_hit_cache(self, monkeypatch):
+        """The model is called once per distinct input"""
+        model = CountingModel('v1')
+        warmup = ModelWarmup(loader=lambda: model)
+        warmup.start()
+        warmup.wait(5)
+        cache = PredictionCache()
+        monkeypatch.setattr(main, "model_warmup", warmup)
+        monkeypatch.setattr(endpoints, "model_warmup", warmup)
+        monkeypatch.setattr(endpoints, "prediction_cache", cache)
+
+        client = TestClient(main.app)
+        params = {'event_type': 'sports', 'city': 'London', 'duration_days': 3}
+        for _ in range(3):
+            assert client.post("/api/v1/predict/detailed", params=params).status_code == 200
+        client.post("/api/v1/predict/detailed", params={**params, 'duration_days': 4})
+
+        assert model.calls == 2
+        stats = client.get("/api/v1/predict/cache/stats").json()
+        assert stats['hits'] == 2
+        assert stats['entries'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,171 @@
+"""
+Unit tests for streaming chunked upload processing
+"""
+import io
+from datetime import date
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+import app.main as main
+from app.core.config import settings
+from app.core.database import get_db
+from app.etl.bulk_ingest import BulkIngestor
+from app.etl.upload_stream import MAX_REPORTED_ERRORS, UploadReader, merge_reports, stream_ingest
+from app.models import HotelMetric
+
+
+def xlsx_bytes(rows):
+    """XLSX file with the given rows (first row is the header)"""
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+class TestUploadReader:
+    """Test suite for UploadReader"""
+
+    def test_csv_chunks_keep_file_rows(self):
+        """CSV chunks are bounded and indexed by row of the file"""
+        csv = "city_name,date\n" + "".join(f"London,2024-01-{day:02d}\n" for day in range(1, 11))
+        reader = UploadReader(io.BytesIO(csv.encode()), "hotel.csv", chunk_rows=4)
+
+        assert reader.columns == ["city_name", "date"]
+        chunks = list(reader.chunks())
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert chunks[2].index.tolist() == [8, 9]
+
+    def test_xlsx_matches_read_excel(self):
+        """XLSX chunks hold the same data as pd.read_excel"""
+        rows = [["city_name", "date", "total_visitors"]]
+        rows += [["London", f"2024-02-{day:02d}", 1000 + day] for day in range(1, 8)]
+        rows.insert(4, [None, None, None])
+        rows.append([None, None, None])
+        buffer = xlsx_bytes(rows)
+        expected = pd.read_excel(buffer)
+
+        reader = UploadReader(buffer, "tourism.xlsx", chunk_rows=3)
+        assert reader.columns == ["city_name", "date", "total_visitors"]
+        chunks = list(reader.chunks())
+        assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+    def test_header_only(self):
+        """An upload without rows gives one empty chunk"""
+        reader = UploadReader(xlsx_bytes([["city_name", "date"]]), "empty.xlsx")
+        chunks = list(reader.chunks())
+        assert len(chunks) == 1 and chunks[0].empty
+
+
+class TestStreamIngest:
+    """Test suite for stream_ingest"""
+
+    def test_chunks_are_committed_with_progress(self, seeded_db):
+        """Each chunk is inserted and reported before the next is read"""
+        csv = "city_name,date,occupancy_rate_pct\n" + "".join(
+            f"London,2024-06-{day:02d},{'bad' if day == 6 else 70}\n" for day in range(1, 11)
+        )
+        reader = UploadReader(io.BytesIO(csv.encode()), "hotel.csv", chunk_rows=4)
+        ingestor = BulkIngestor(seeded_db)
+        progress = []
+
+        def on_progress(update):
+            progress.append((
+                update["chunks"], update["total_rows"], update.get("error_count", 0),
+                seeded_db.query(HotelMetric).filter(HotelMetric.date >= date(2024, 6, 1)).count(),
+            ))
+
+        report = stream_ingest(reader, ingestor.ingest_hotel_metrics, seeded_db, on_progress=on_progress)
+
+        assert progress == [(1, 4, 0, 4), (2, 8, 1, 7), (3, 10, 1, 9)]
+        assert report["metrics_created"] == 9
+        assert report["errors"] == ["Row 6: Invalid occupancy_rate_pct 'bad'"]
+        assert report["error_count"] == 1
+        assert report["total_rows"] == 10
+
+    def test_resume_skips_committed_rows(self, seeded_db):
+        """A running report from an interrupted import skips the rows it counted"""
+        csv = "city_name,date,total_visitors\n" + "".join(
+            f"London,2024-07-{day:02d},{day}\n" for day in range(1, 8)
+        )
+        reader = UploadReader(io.BytesIO(csv.encode()), "tourism.csv", chunk_rows=3)
+        seen = []
+
+        def ingest(chunk):
+            seen.append(chunk.index.tolist())
+            return {"metrics_created": len(chunk)}
+
+        report = stream_ingest(reader, ingest, seeded_db, report={"total_rows": 4, "chunks": 2, "metrics_created": 4})
+        assert seen == [[4, 5], [6]]
+        assert (report["total_rows"], report["chunks"], report["metrics_created"]) == (7, 4, 7)
+
+    def test_failing_chunk_is_rolled_back(self, db):
+        """Earlier chunks stay committed when a later chunk fails"""
+        csv = (
+            "name,country,country_code,continent,latitude,longitude,timezone\n"
+            "Paris,France,FRA,Europe,48.8,2.3,Europe/Paris\n"
+            "Lyon,France,FRA,Europe,45.7,4.8,Europe/Paris\n"
+            "Nice,France,FRA,Europe,north,7.2,Europe/Paris\n"
+        )
+        reader = UploadReader(io.BytesIO(csv.encode()), "cities.csv", chunk_rows=2)
+        with pytest.raises(ValueError, match="Row 3: invalid latitude"):
+            stream_ingest(reader, BulkIngestor(db).ingest_cities, db)
+        assert sorted(BulkIngestor(db).cities) == ["Lyon", "Paris"]
+
+    def test_reported_errors_are_capped(self):
+        """Only the first MAX_REPORTED_ERRORS messages are kept, all are counted"""
+        total = {}
+        for _ in range(3):
+            merge_reports(total, {"metrics_created": 1, "errors": ["x"] * (MAX_REPORTED_ERRORS // 2 + 1)})
+        assert total["metrics_created"] == 3
+        assert len(total["errors"]) == MAX_REPORTED_ERRORS
+        assert total["error_count"] == 3 * (MAX_REPORTED_ERRORS // 2 + 1)
+
+
+class TestUploadEndpoints:
+    """Test suite for the chunked upload endpoints"""
+
+    def test_tourism_xlsx_upload(self, seeded_db, monkeypatch):
+        """The endpoint streams the file in chunks and reports them"""
+        monkeypatch.setattr(settings, "UPLOAD_CHUNK_ROWS", 2)
+        buffer = xlsx_bytes(
+            [["city_name", "date", "total_visitors"]]
+            + [["London", f"2024-08-{day:02d}", 50000] for day in range(1, 6)]
+        )
+        main.app.dependency_overrides[get_db] = lambda: seeded_db
+        try:
+            response = TestClient(main.app).post(
+                "/api/v1/upload/tourism-metrics", params={"wait": True},
+                files={"file": ("tourism.xlsx", buffer, "application/octet-stream")},
+            )
+        finally:
+            main.app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["metrics_created"], body["total_rows"], body["chunks"]) == (5, 5, 3)
+        assert body["dirty_ranges"][0]["start_date"] == "2024-08-01"
+        assert body["dirty_ranges"][0]["end_date"] == "2024-08-05"
+
+    def test_missing_columns(self, seeded_db):
+        """Required columns are checked before anything is inserted"""
+        main.app.dependency_overrides[get_db] = lambda: seeded_db
+        try:
+            response = TestClient(main.app).post(
+                "/api/v1/upload/hotel-metrics",
+                files={"file": ("hotel.csv", io.BytesIO(b"city_name,price\nLondon,1\n"), "text/csv")},
+            )
+        finally:
+            main.app.dependency_overrides.clear()
+        assert response.status_code == 400
+        assert "date" in response.json()["detail"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
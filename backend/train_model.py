@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.ml.economic_impact_model import EconomicImpactModel
+from app.ml.model_registry import ModelRegistry
 
 print("=" * 80)
 print("🚀 ENTRENANDO MODELO DE IMPACTO ECONÓMICO CON 7 CSVs")
@@ -72,8 +73,12 @@ print()
 # Guardar el modelo
 print("💾 Guardando modelo entrenado...")
 try:
-    model.save()
-    print(f"   ✓ Modelo guardado en: {model.model_dir}/economic_impact_model.pkl")
+    # Solo se guarda como nueva versión del registro: los workers de la API
+    # cargan su CURRENT (también al arrancar) sin reiniciar
+    registry = ModelRegistry()
+    version = registry.publish(model)
+    print(f"   ✓ Modelo guardado en: {registry.version_path(version)}/")
+    print(f"   ✓ Versión {version} publicada en el registro de modelos")
     print()
 except Exception as e:
     print(f"   ⚠️  Error guardando modelo: {e}")
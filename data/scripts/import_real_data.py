@@ -10,7 +10,7 @@ from datetime import date
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../backend'))
 
 from app.core.database import SessionLocal
-from app.services.airroi_client import AirROIClient
+from app.services.airroi_client import import_all_cities_from_airroi
 from app.models import City
 
 
@@ -40,36 +40,17 @@ async def import_from_airroi():
         cities = db.query(City).all()
         print(f"Found {len(cities)} cities in database\n")
 
-        async with AirROIClient() as client:
-            for city in cities:
-                print(f"📊 Fetching data for {city.name}...")
-
-                try:
-                    # Fetch hotel data
-                    hotel_data = await client.get_hotel_data(
-                        city=city.name,
-                        start_date=date(2024, 1, 1),
-                        end_date=date(2024, 12, 31),
-                        metrics=["occupancy", "adr", "revpar"]
-                    )
-
-                    print(f"   ✓ Hotel data: {len(hotel_data.get('daily_metrics', []))} days")
-
-                    # Fetch tourism data
-                    tourism_data = await client.get_tourism_data(
-                        city=city.name,
-                        start_date=date(2024, 1, 1),
-                        end_date=date(2024, 12, 31)
-                    )
-
-                    print(f"   ✓ Tourism data: {len(tourism_data.get('daily_metrics', []))} days")
-
-                    # TODO: Store in database
-                    # See airroi_client.py for implementation
-
-                except Exception as e:
-                    print(f"   ❌ Error: {str(e)}")
-                    continue
+        # Cities and months are fetched concurrently and stored as they
+        # arrive; re-runs only request the days not stored yet
+        report = await import_all_cities_from_airroi(
+            db,
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 12, 31),
+            incremental=True
+        )
+        print(f"   ✓ {report['metrics_stored']} days stored in {report['seconds']}s")
+        for error in report["errors"]:
+            print(f"   ❌ Error: {error}")
 
         print("\n✅ AIRROI data import completed")
 
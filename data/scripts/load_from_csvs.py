@@ -15,7 +15,8 @@ if os.path.exists('/app'):  # Inside Docker container
 sys.path.insert(0, backend_path)
 
 from sqlalchemy.orm import Session
-from app.core.database import engine, SessionLocal, Base
+from app.core.database import engine, SessionLocal, Base, upsert_records
+from app.core.migrations import missing_unique_keys
 from app.models import (
     City, Event, EventType,
     TourismMetric, HotelMetric, EconomicMetric, MobilityMetric
@@ -26,11 +27,23 @@ CSV_DIR = Path(__file__).parent.parent / "examples"
 
 
 def create_database():
-    """Create all database tables"""
+    """Create all database tables (older metrics tables must be migrated first)"""
     Base.metadata.create_all(bind=engine)
+    pending = missing_unique_keys(engine)
+    if pending:
+        raise RuntimeError(
+            f"{', '.join(pending)} not unique per (city_id, date): run `python -m app.core.migrations` first"
+        )
     print("✓ Database tables created")
 
 
+def upsert_metrics(db: Session, model, records: list):
+    """Upsert a batch of metric rows on (city_id, date), commit, and clear the batch"""
+    upsert_records(db, model, records)
+    db.commit()
+    records.clear()
+
+
 def load_cities(db: Session):
     """Load cities from CSV"""
     csv_path = CSV_DIR / "cities.csv"
@@ -38,9 +51,15 @@ def load_cities(db: Session):
         raise FileNotFoundError(f"Cities CSV not found: {csv_path}")
     
     df = pd.read_csv(csv_path)
+    existing = {city.name: city for city in db.query(City).all()}
     cities = []
     
     for _, row in df.iterrows():
+        # Reuse cities from an earlier run (names are unique)
+        if row['name'] in existing:
+            cities.append(existing[row['name']])
+            continue
+
         city = City(
             name=row['name'],
             country=row['country'],
@@ -72,6 +91,7 @@ def load_events(db: Session, cities: list):
     
     df = pd.read_csv(csv_path)
     city_map = {city.name: city for city in cities}
+    existing = set(db.query(Event.city_id, Event.name, Event.start_date).all())
     events = []
     
     for _, row in df.iterrows():
@@ -80,6 +100,10 @@ def load_events(db: Session, cities: list):
         if not city:
             print(f"⚠️  City '{city_name}' not found, skipping event {row['event_name']}")
             continue
+
+        # Skip events loaded by an earlier run
+        if (city.id, row['event_name'], pd.to_datetime(row['start_date']).date()) in existing:
+            continue
         
         # Map event type
         event_type_str = str(row['event_type']).lower()
@@ -141,6 +165,7 @@ def load_tourism_metrics(db: Session, cities: list):
     
     df = pd.read_csv(csv_path)
     city_map = {city.name: city for city in cities}
+    records = []
     count = 0
     
     for _, row in df.iterrows():
@@ -149,24 +174,23 @@ def load_tourism_metrics(db: Session, cities: list):
         if not city:
             continue
         
-        metric = TourismMetric(
-            city_id=city.id,
-            date=pd.to_datetime(row['date']).date(),
-            domestic_visitors=int(row['domestic_visitors']),
-            international_visitors=int(row['international_visitors']),
-            total_visitors=int(row['total_visitors']),
-            avg_stay_duration_days=float(row.get('avg_stay_duration_days', 3.5)),
-            avg_spending_per_visitor_usd=float(row.get('avg_spending_per_visitor_usd', 280)),
-            event_visitors_pct=float(row.get('event_visitors_pct', 0.0)),
-        )
-        db.add(metric)
+        records.append({
+            "city_id": city.id,
+            "date": pd.to_datetime(row['date']).date(),
+            "domestic_visitors": int(row['domestic_visitors']),
+            "international_visitors": int(row['international_visitors']),
+            "total_visitors": int(row['total_visitors']),
+            "avg_stay_duration_days": float(row.get('avg_stay_duration_days', 3.5)),
+            "avg_spending_per_visitor_usd": float(row.get('avg_spending_per_visitor_usd', 280)),
+            "event_visitors_pct": float(row.get('event_visitors_pct', 0.0)),
+        })
         count += 1
         
-        # Batch commit every 1000 records
-        if count % 1000 == 0:
-            db.commit()
+        # Batch upsert and commit every 1000 records
+        if len(records) == 1000:
+            upsert_metrics(db, TourismMetric, records)
     
-    db.commit()
+    upsert_metrics(db, TourismMetric, records)
     print(f"✓ Loaded {count} tourism metrics from CSV")
     return count
 
@@ -180,6 +204,7 @@ def load_hotel_metrics(db: Session, cities: list):
     
     df = pd.read_csv(csv_path)
     city_map = {city.name: city for city in cities}
+    records = []
     count = 0
     
     for _, row in df.iterrows():
@@ -188,24 +213,23 @@ def load_hotel_metrics(db: Session, cities: list):
         if not city:
             continue
         
-        metric = HotelMetric(
-            city_id=city.id,
-            date=pd.to_datetime(row['date']).date(),
-            occupancy_rate_pct=float(row['occupancy_rate_pct']),
-            available_rooms=int(row.get('available_rooms', city.hotel_rooms)),
-            occupied_rooms=int(row.get('occupied_rooms', city.hotel_rooms * float(row['occupancy_rate_pct']) / 100)),
-            avg_price_usd=float(row['avg_price_usd']),
-            median_price_usd=float(row.get('median_price_usd', row['avg_price_usd'] * 0.9)),
-            min_price_usd=float(row.get('min_price_usd', row['avg_price_usd'] * 0.5)),
-            max_price_usd=float(row.get('max_price_usd', row['avg_price_usd'] * 2.5)),
-        )
-        db.add(metric)
+        records.append({
+            "city_id": city.id,
+            "date": pd.to_datetime(row['date']).date(),
+            "occupancy_rate_pct": float(row['occupancy_rate_pct']),
+            "available_rooms": int(row.get('available_rooms', city.hotel_rooms)),
+            "occupied_rooms": int(row.get('occupied_rooms', city.hotel_rooms * float(row['occupancy_rate_pct']) / 100)),
+            "avg_price_usd": float(row['avg_price_usd']),
+            "median_price_usd": float(row.get('median_price_usd', row['avg_price_usd'] * 0.9)),
+            "min_price_usd": float(row.get('min_price_usd', row['avg_price_usd'] * 0.5)),
+            "max_price_usd": float(row.get('max_price_usd', row['avg_price_usd'] * 2.5)),
+        })
         count += 1
         
-        if count % 1000 == 0:
-            db.commit()
+        if len(records) == 1000:
+            upsert_metrics(db, HotelMetric, records)
     
-    db.commit()
+    upsert_metrics(db, HotelMetric, records)
     print(f"✓ Loaded {count} hotel metrics from CSV")
     return count
 
@@ -219,6 +243,7 @@ def load_economic_metrics(db: Session, cities: list):
     
     df = pd.read_csv(csv_path)
     city_map = {city.name: city for city in cities}
+    records = []
     count = 0
     
     for _, row in df.iterrows():
@@ -227,23 +252,22 @@ def load_economic_metrics(db: Session, cities: list):
         if not city:
             continue
         
-        metric = EconomicMetric(
-            city_id=city.id,
-            date=pd.to_datetime(row['date']).date(),
-            total_spending_usd=float(row['total_spending_usd']),
-            accommodation_spending_usd=float(row.get('accommodation_spending_usd', row['total_spending_usd'] * 0.35)),
-            food_beverage_spending_usd=float(row.get('food_beverage_spending_usd', row['total_spending_usd'] * 0.25)),
-            retail_spending_usd=float(row.get('retail_spending_usd', row['total_spending_usd'] * 0.20)),
-            entertainment_spending_usd=float(row.get('entertainment_spending_usd', row['total_spending_usd'] * 0.12)),
-            transport_spending_usd=float(row.get('transport_spending_usd', row['total_spending_usd'] * 0.08)),
-        )
-        db.add(metric)
+        records.append({
+            "city_id": city.id,
+            "date": pd.to_datetime(row['date']).date(),
+            "total_spending_usd": float(row['total_spending_usd']),
+            "accommodation_spending_usd": float(row.get('accommodation_spending_usd', row['total_spending_usd'] * 0.35)),
+            "food_beverage_spending_usd": float(row.get('food_beverage_spending_usd', row['total_spending_usd'] * 0.25)),
+            "retail_spending_usd": float(row.get('retail_spending_usd', row['total_spending_usd'] * 0.20)),
+            "entertainment_spending_usd": float(row.get('entertainment_spending_usd', row['total_spending_usd'] * 0.12)),
+            "transport_spending_usd": float(row.get('transport_spending_usd', row['total_spending_usd'] * 0.08)),
+        })
         count += 1
         
-        if count % 1000 == 0:
-            db.commit()
+        if len(records) == 1000:
+            upsert_metrics(db, EconomicMetric, records)
     
-    db.commit()
+    upsert_metrics(db, EconomicMetric, records)
     print(f"✓ Loaded {count} economic metrics from CSV")
     return count
 
@@ -257,6 +281,7 @@ def load_mobility_metrics(db: Session, cities: list):
     
     df = pd.read_csv(csv_path)
     city_map = {city.name: city for city in cities}
+    records = []
     count = 0
     
     for _, row in df.iterrows():
@@ -265,23 +290,22 @@ def load_mobility_metrics(db: Session, cities: list):
         if not city:
             continue
         
-        metric = MobilityMetric(
-            city_id=city.id,
-            date=pd.to_datetime(row['date']).date(),
-            airport_arrivals=int(row.get('airport_arrivals', 0)),
-            airport_departures=int(row.get('airport_departures', 0)),
-            international_flights=int(row.get('international_flights', 0)),
-            domestic_flights=int(row.get('domestic_flights', 0)),
-            public_transport_usage=int(row.get('public_transport_usage', 0)),
-            traffic_congestion_index=float(row.get('traffic_congestion_index', 5.5)),
-        )
-        db.add(metric)
+        records.append({
+            "city_id": city.id,
+            "date": pd.to_datetime(row['date']).date(),
+            "airport_arrivals": int(row.get('airport_arrivals', 0)),
+            "airport_departures": int(row.get('airport_departures', 0)),
+            "international_flights": int(row.get('international_flights', 0)),
+            "domestic_flights": int(row.get('domestic_flights', 0)),
+            "public_transport_usage": int(row.get('public_transport_usage', 0)),
+            "traffic_congestion_index": float(row.get('traffic_congestion_index', 5.5)),
+        })
         count += 1
         
-        if count % 1000 == 0:
-            db.commit()
+        if len(records) == 1000:
+            upsert_metrics(db, MobilityMetric, records)
     
-    db.commit()
+    upsert_metrics(db, MobilityMetric, records)
     print(f"✓ Loaded {count} mobility metrics from CSV")
     return count
 
@@ -5,9 +5,10 @@ UNESCO MVP - Model Training Pipeline
 import sys
 import os
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 import pandas as pd
 import numpy as np
+from sqlalchemy import func
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../backend'))
@@ -23,6 +24,8 @@ from app.ml.predictors import (
     ImpactPredictor,
     EnsemblePredictor
 )
+from app.ml.event_features import event_context
+from app.ml.forecast_fleet import ForecastFleet
 
 
 class ModelTrainer:
@@ -67,52 +70,43 @@ class ModelTrainer:
         print("\n🏨 Preparing hotel data...")
 
         # Query hotels and events
-        query = self.db.query(HotelMetric, City).join(City)
+        query = self.db.query(
+            HotelMetric.city_id, HotelMetric.date, HotelMetric.occupancy_rate_pct,
+            HotelMetric.avg_price_usd, City.avg_hotel_price_usd,
+        ).join(City)
         if city_id:
             query = query.filter(HotelMetric.city_id == city_id)
 
-        results = query.order_by(HotelMetric.date).all()
+        hotels = pd.DataFrame(
+            query.order_by(HotelMetric.date).all(),
+            columns=['city_id', 'date', 'occupancy', 'price', 'city_price'],
+        )
 
-        if not results:
+        if hotels.empty:
             print("  ⚠️  No hotel data found")
             return pd.DataFrame()
 
-        # Get all events for context
-        events = self.db.query(Event).all()
-        event_map = {}
-        for event in events:
-            for i in range((event.end_date - event.start_date).days + 1):
-                event_date = event.start_date + timedelta(days=i)
-                if event_date not in event_map:
-                    event_map[event_date] = []
-                event_map[event_date].append(event)
+        # Events of the same cities, joined to the hotel days as intervals
+        events = pd.DataFrame(
+            self.db.query(
+                Event.city_id, Event.start_date, Event.end_date,
+                func.coalesce(Event.actual_attendance, Event.expected_attendance, 0),
+            ).filter(Event.city_id.in_(hotels['city_id'].unique().tolist())).all(),
+            columns=['city_id', 'start_date', 'end_date', 'attendance'],
+        )
+        context = event_context(hotels, events)
 
         # Build feature matrix
-        data = []
-        for hotel, city in results:
-            # Check if this date has an event
-            events_on_date = event_map.get(hotel.date, [])
-            is_event_period = len(events_on_date) > 0
-            event_size = sum(e.actual_attendance or e.expected_attendance or 0 for e in events_on_date)
-
-            # Calculate days to nearest event
-            days_to_event = 999
-            for event_date, _ in event_map.items():
-                days_diff = abs((event_date - hotel.date).days)
-                days_to_event = min(days_to_event, days_diff)
-
-            data.append({
-                'date': hotel.date,
-                'occupancy_rate': hotel.occupancy_rate_pct or 70.0,
-                'baseline_price': city.avg_hotel_price_usd or 150.0,
-                'is_weekend': hotel.date.weekday() >= 5,
-                'is_event_period': is_event_period,
-                'days_to_event': days_to_event,
-                'event_size': event_size,
-                'price': hotel.avg_price_usd or city.avg_hotel_price_usd,
-            })
-
-        df = pd.DataFrame(data)
+        df = pd.DataFrame({
+            'date': hotels['date'],
+            'occupancy_rate': hotels['occupancy'].fillna(70.0),
+            'baseline_price': hotels['city_price'].fillna(150.0),
+            'is_weekend': pd.to_datetime(hotels['date']).dt.dayofweek >= 5,
+            'is_event_period': context['is_event_period'],
+            'days_to_event': context['days_to_event'],
+            'event_size': context['event_size'],
+            'price': hotels['price'].fillna(hotels['city_price']),
+        })
         print(f"  ✅ Prepared {len(df)} hotel records")
         return df
 
@@ -181,6 +175,15 @@ class ModelTrainer:
         else:
             print("\n⚠️  Not enough tourism data (need > 30 records)")
 
+        # 1b. Per-city forecasting fleet (one model per city and metric, in parallel)
+        print("\n🎯 Training per-city forecasting fleet...")
+        try:
+            report = ForecastFleet().refresh(self.db)
+            for problem in report["skipped"] + report["failed"]:
+                print(f"  ⚠️  {problem}")
+        except Exception as e:
+            print(f"  ❌ Error training forecasting fleet: {e}")
+
         # 2. Hotel price predictor
         hotel_df = self.prepare_hotel_data()
         if len(hotel_df) > 50:
@@ -1,16 +1,19 @@
 python backend/train_model.py
 """
 Script para mostrar métricas del modelo guardado sin necesidad de entrenar
-Usa pickle para cargar el modelo y mostrar sus métricas
+Lee el JSON del artefacto (model.json) sin cargar los modelos
 """
+import json
 import pickle
 import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-model_path = BASE_DIR / "backend" / "app" / "ml" / "saved_models" / "economic_impact_model.pkl"
+models_dir = BASE_DIR / "backend" / "app" / "ml" / "saved_models"
+manifest_path = models_dir / "economic_impact_model" / "model.json"
+model_path = models_dir / "economic_impact_model.pkl"  # Formato antiguo
 
-if not model_path.exists():
+if not manifest_path.exists() and not model_path.exists():
     print("❌ No se encontró modelo guardado.")
     print("   El modelo se entrenará automáticamente la primera vez que se use.")
     print("   O ejecuta: python backend/train_model.py (después de instalar dependencias)")
@@ -22,8 +25,12 @@ print("=" * 80)
 print()
 
 try:
-    with open(model_path, 'rb') as f:
-        model_data = pickle.load(f)
+    if manifest_path.exists():
+        with open(manifest_path, encoding='utf-8') as f:
+            model_data = json.load(f)
+    else:
+        with open(model_path, 'rb') as f:
+            model_data = pickle.load(f)
     
     print(f"🏆 Mejor Modelo: {model_data.get('best_model_name', 'Unknown').upper().replace('_', ' ')}")
     print(f"📅 Entrenado: {model_data.get('trained_at', 'Unknown')}")
@@ -60,7 +60,7 @@ print()
 # Guardar el modelo
 print("💾 Guardando modelo entrenado...")
 model.save()
-print(f"   ✓ Modelo guardado en: {model.model_dir}/economic_impact_model.pkl")
+print(f"   ✓ Modelo guardado en: {model.models_dir}/economic_impact_model/")
 print()
 
 # Mostrar información del dataset